@@ -22,6 +22,7 @@ Version: 1.0
 """
 
 import yfinance as yf
+from history_source import price_history
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -86,7 +87,7 @@ class AdaptiveTrendStrengthIndex:
             stock = yf.Ticker(symbol)
             
             # Price data with volume
-            hist_data = stock.history(period=period)
+            hist_data = price_history(symbol, period, stock)
             if hist_data.empty:
                 return None
             
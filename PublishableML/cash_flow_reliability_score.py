@@ -22,6 +22,7 @@ Version: 1.0
 """
 
 import yfinance as yf
+from history_source import price_history
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -84,7 +85,7 @@ class CashFlowReliabilityScore:
             hist_data = None
             for attempt in range(3):
                 try:
-                    hist_data = stock.history(period=period)
+                    hist_data = price_history(symbol, period, stock)
                     if not hist_data.empty:
                         break
                 except Exception as e:
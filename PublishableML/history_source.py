@@ -0,0 +1,27 @@
+"""
+Price history shared by the PublishableML models.
+
+Goes through the platform's incremental history store (history_store.get_history), so repeat
+runs only fetch the bars added since the previous one. Inside the app tree the store is imported
+from utils; publish_ml_models.py copies this file, history_store.py and ohlcv_cache.py next to
+every published model.py, so runs under the `python -I` sandbox import the same store from the
+artifact directory and share the app's OHLCV cache (OHLCV_CACHE_DIR). A model copied somewhere
+without those files falls back to a plain yfinance download.
+"""
+
+import yfinance as yf
+
+try:
+    from utils.history_store import get_history
+except ImportError:
+    try:
+        from history_store import get_history  # shipped next to a published artifact
+    except ImportError:
+        get_history = None
+
+
+def price_history(symbol, period="1y", ticker=None):
+    """OHLCV history for `symbol` over a yfinance period string ("6mo", "1y", "2y", ...)."""
+    if get_history is not None:
+        return get_history(symbol, period=period)
+    return (ticker or yf.Ticker(symbol)).history(period=period)
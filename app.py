@@ -108,7 +108,7 @@ except ImportError:
 
 # === Advanced Analytics and ML Integration ===
 try:
-    from rimsi_ml_models import get_rimsi_model_registry, get_rimsi_ml_models
+    from rimsi_ml_models import get_rimsi_model_registry, get_rimsi_ml_models, FeatureFrame
     RIMSI_ML_AVAILABLE = True
     print("🤖 RIMSI ML Models imported successfully")
 except ImportError as e:
@@ -1321,51 +1321,24 @@ print("  🎯 Startup time dramatically improved - all heavy components lazy loa
 # Temporary auto table creation (replace with proper migrations in production)
 
 # ================= Real-Time Quote Streaming & Alerts (SSE) =================
-from collections import defaultdict
-import queue as _sse_queue_mod
+from collections import defaultdict, OrderedDict
 
-_QUOTE_CACHE = {}  # symbol -> last full snapshot
+_QUOTE_CACHE = OrderedDict()  # symbol -> last full snapshot, least recently requested first
 _QUOTE_ALERTS = []  # alert dicts {symbol,type,value,triggered,...}
 _QUOTE_LOCK = threading.Lock()
-_SSE_QUEUE = _sse_queue_mod.Queue(maxsize=50)
 _QUOTE_THREAD_STARTED = False
 
-def _fetch_symbol_quote(symbol: str):
-    yf = lazy_load_yfinance()
-    if not YFINANCE_AVAILABLE or not yf:
-        return None
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="1d", interval="1m")
-        if hist.empty:
-            return None
-        last = hist.iloc[-1]
-        open_price = hist['Open'].iloc[0]
-        current_price = float(last['Close'])
-        change = current_price - float(open_price)
-        change_pct = (change / float(open_price) * 100) if open_price else 0.0
-        volume = int(hist['Volume'].sum())
-        return {
-            'symbol': symbol,
-            'price': current_price,
-            'open': float(open_price),
-            'high': float(hist['High'].max()),
-            'low': float(hist['Low'].min()),
-            'volume': volume,
-            'change': change,
-            'change_pct': change_pct,
-            'ts': int(time.time()*1000)
-        }
-    except Exception as e:
-        app.logger.error(f"Quote fetch error {symbol}: {e}")
-        return None
+_QUOTE_MAX_SYMBOLS = int(os.getenv('QUOTE_MAX_SYMBOLS', '500'))  # symbols per tick
+_QUOTE_CACHE_SYMBOLS = int(os.getenv('QUOTE_CACHE_SYMBOLS', '2000'))  # requested symbols kept in _QUOTE_CACHE
+_QUOTE_POLL_SECONDS = float(os.getenv('QUOTE_POLL_SECONDS', '5'))
 
-def _compute_delta(old: dict, new: dict):
-    diff = {}
-    for k,v in new.items():
-        if k not in old or old[k] != v:
-            diff[k] = v
-    return diff
+try:
+    from utils.quote_engine import get_quote_engine
+    from utils.quote_broadcaster import get_quote_broadcaster
+    QUOTE_ENGINE_AVAILABLE = True
+except Exception as e:
+    print(f"⚠️ Batched quote engine not available: {e}")
+    QUOTE_ENGINE_AVAILABLE = False
 
 def _alert_engine_process(snapshot):
     now = time.time()
@@ -1387,37 +1360,49 @@ def _alert_engine_process(snapshot):
             triggered.append({'symbol': snapshot['symbol'], 'type': atype, 'price': price, 'target': target})
     return triggered
 
+def _quote_track(symbol):
+    """Mark `symbol` as requested (caller holds _QUOTE_LOCK); evicts the least recently requested past the cap"""
+    _QUOTE_CACHE.setdefault(symbol, {})
+    _QUOTE_CACHE.move_to_end(symbol)
+    while len(_QUOTE_CACHE) > _QUOTE_CACHE_SYMBOLS:
+        _QUOTE_CACHE.popitem(last=False)
+
+def _next_quote_batch(symbols, offset):
+    """(symbols for this tick, next offset): past _QUOTE_MAX_SYMBOLS the watchlist is ticked in rotating slices"""
+    ordered = sorted(symbols)
+    if len(ordered) <= _QUOTE_MAX_SYMBOLS:
+        return ordered, 0
+    offset %= len(ordered)
+    return (ordered[offset:] + ordered[:offset])[:_QUOTE_MAX_SYMBOLS], offset + _QUOTE_MAX_SYMBOLS
+
 def _quote_background_loop():
+    engine = get_quote_engine()
+    offset = 0
     while True:
+        started = time.time()
         try:
             with _QUOTE_LOCK:
-                symbols = set([a['symbol'] for a in _QUOTE_ALERTS]) | set(_QUOTE_CACHE.keys()) or set(['AAPL'])
-            updates = []
-            for sym in list(symbols)[:25]:
-                snap = _fetch_symbol_quote(sym)
+                alert_symbols = set([a['symbol'] for a in _QUOTE_ALERTS])
+                symbols = alert_symbols | set(_QUOTE_CACHE.keys()) | get_quote_broadcaster().symbols() or set(['AAPL'])
+            # One batched fetch + vectorised snapshot/delta computation for the whole watchlist
+            batch, offset = _next_quote_batch(symbols, offset)
+            updates = engine.tick(batch)
+            with _QUOTE_LOCK:
+                for upd in updates:
+                    snap = engine.snapshot(upd['sym'])
+                    if snap and upd['sym'] in _QUOTE_CACHE:
+                        _QUOTE_CACHE[upd['sym']] = snap
+            for sym in alert_symbols:
+                snap = engine.snapshot(sym)
                 if not snap:
                     continue
-                with _QUOTE_LOCK:
-                    prev = _QUOTE_CACHE.get(sym)
-                    if prev:
-                        delta_fields = _compute_delta(prev, snap)
-                        if len(delta_fields) > 1:  # more than ts changed
-                            _QUOTE_CACHE[sym] = snap
-                            updates.append({'t':'delta','sym':sym,'f':delta_fields})
-                    else:
-                        _QUOTE_CACHE[sym] = snap
-                        updates.append({'t':'snapshot','sym':sym,'f':snap})
-                triggered = _alert_engine_process(snap)
-                for trig in triggered:
+                for trig in _alert_engine_process(snap):
                     updates.append({'t':'alert','data':trig})
-            if updates:
-                try:
-                    _SSE_QUEUE.put(updates, timeout=1)
-                except Exception:
-                    pass
+            # Fan out to every connected client; never blocks on slow consumers
+            get_quote_broadcaster().publish(updates)
         except Exception as e:
             app.logger.error(f"Quote loop error: {e}")
-        time.sleep(5)
+        time.sleep(max(0.5, _QUOTE_POLL_SECONDS - (time.time() - started)))
 
 from flask import Response
 from plan_access import enforce_feature
@@ -1434,29 +1419,76 @@ except Exception:
         INVESTOR_TERMINAL_AVAILABLE = False
         investor_terminal_bp = None  # type: ignore
 
+def _sse_requested_symbols():
+    """Symbols a stream should carry: ?symbols=A,B or the logged-in investor's watchlist (None = all)."""
+    raw = (request.args.get('symbols') or '').strip()
+    if raw:
+        return {s.strip().upper() for s in raw.split(',') if s.strip()}
+    investor_id = session.get('investor_id')
+    if investor_id:
+        try:
+            rows = InvestorWatchlistStock.query.filter_by(investor_id=investor_id, is_active=True).all()
+            tickers = {r.ticker.upper() for r in rows if r.ticker}
+            if tickers:
+                return tickers
+        except Exception as e:
+            app.logger.warning(f"SSE watchlist lookup failed: {e}")
+    return None
+
 @app.route('/api/quotes/subscribe')
 def sse_quote_stream():
+    symbols = _sse_requested_symbols()
     def gen():
         global _QUOTE_THREAD_STARTED
-        if not _QUOTE_THREAD_STARTED:
+        if not _QUOTE_THREAD_STARTED and QUOTE_ENGINE_AVAILABLE:
             th = threading.Thread(target=_quote_background_loop, daemon=True)
             th.start()
             _QUOTE_THREAD_STARTED = True
-        with _QUOTE_LOCK:
-            for sym, snap in _QUOTE_CACHE.items():
+        if not QUOTE_ENGINE_AVAILABLE:
+            return
+        hub = get_quote_broadcaster()
+        sub = hub.subscribe(symbols)
+        try:
+            with _QUOTE_LOCK:
+                if symbols:
+                    for sym in symbols:
+                        _quote_track(sym)
+                initial = [(sym, snap) for sym, snap in _QUOTE_CACHE.items() if snap and sub.wants(sym)]
+            for sym, snap in initial:
                 yield f"data: {json.dumps({'t':'snapshot','sym':sym,'f':snap})}\n\n"
-        while True:
-            try:
-                batch = _SSE_QUEUE.get()
+            while True:
+                batch = sub.get(timeout=15)
+                if not batch:
+                    yield ": keepalive\n\n"
+                    continue
                 for item in batch:
                     yield f"data: {json.dumps(item)}\n\n"
-            except GeneratorExit:
-                break
-            except Exception as e:
-                app.logger.error(f"SSE stream error: {e}")
-                time.sleep(1)
+        except GeneratorExit:
+            pass
+        except Exception as e:
+            app.logger.error(f"SSE stream error: {e}")
+        finally:
+            hub.unsubscribe(sub)
     return Response(gen(), mimetype='text/event-stream')
 
+@app.route('/api/quotes/metrics')
+def quote_engine_metrics():
+    """Per-tick latency (fetch/compute/total p50/p95/max) of the batched quote engine"""
+    if not QUOTE_ENGINE_AVAILABLE:
+        return jsonify({'ok': False, 'error': 'quote engine unavailable'}), 503
+    with _QUOTE_LOCK:
+        tracked = len(_QUOTE_CACHE)
+    return jsonify({
+        'ok': True,
+        'running': _QUOTE_THREAD_STARTED,
+        'tracked_symbols': tracked,
+        'max_symbols': _QUOTE_MAX_SYMBOLS,
+        'cache_symbols': _QUOTE_CACHE_SYMBOLS,
+        'poll_seconds': _QUOTE_POLL_SECONDS,
+        'metrics': get_quote_engine().metrics(),
+        'fanout': get_quote_broadcaster().stats()
+    })
+
 @app.route('/api/quotes/add_symbol', methods=['POST'])
 def add_symbol_stream():
     """Add symbol to both cache and investor's permanent watchlist"""
@@ -1468,7 +1500,7 @@ def add_symbol_stream():
         
         # Add to cache for real-time updates
         with _QUOTE_LOCK:
-            _QUOTE_CACHE.setdefault(symbol, {})
+            _quote_track(symbol)
         
         # Add to permanent storage for logged-in investors
         investor_id = session.get('investor_id')
@@ -1609,7 +1641,7 @@ def add_alert():
     alert = {'symbol':symbol,'type':atype,'value':float(value),'triggered':False,'created_ts':time.time()}
     _QUOTE_ALERTS.append(alert)
     with _QUOTE_LOCK:
-        _QUOTE_CACHE.setdefault(symbol, {})
+        _quote_track(symbol)
     return jsonify({'ok':True,'alert':alert})
 
 
@@ -3472,6 +3504,27 @@ def admin_data_sources_status():
         }
     })
 
+@app.route('/api/admin/data_sources/cache_stats', methods=['GET'])
+def admin_ohlcv_cache_stats():
+    """Hit/miss/eviction counters for the shared tiered OHLCV cache (admin only)"""
+    is_admin = session.get('admin_name') or session.get('is_admin')
+    if not is_admin:
+        return jsonify({'ok': False, 'error': 'Admin access required'}), 403
+    try:
+        from utils.ohlcv_cache import get_ohlcv_cache
+        return jsonify({'ok': True, 'ohlcv_cache': get_ohlcv_cache().stats()})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/plagiarism/reembed', methods=['GET', 'POST'])
+def admin_plagiarism_reembed():
+    """Status (GET) or start (POST) of the TF-IDF re-embedding job (admin only)"""
+    is_admin = session.get('admin_name') or session.get('is_admin')
+    if not is_admin:
+        return jsonify({'ok': False, 'error': 'Admin access required'}), 403
+    started = start_tfidf_reembed_job() if request.method == 'POST' else False
+    return jsonify({'ok': True, 'started': started, 'job': dict(_TFIDF_REEMBED_JOB)})
+
 @app.route('/api/admin/data_sources/fyers/configure', methods=['POST'])
 def admin_configure_fyers():
     """Configure Fyers API credentials (admin only)"""
@@ -4245,6 +4298,86 @@ def rimsi_backtest():
         rimsi_history.insert(0, error_result)
         return jsonify(error_result), 500
 
+@app.route('/api/rimsi/backtest/sweep', methods=['POST'])
+def rimsi_backtest_sweep():
+    """Parameter sweep with walk-forward validation, streamed as results complete.
+
+    Body: code, symbol, start_date, end_date, initial_capital, commission, objective,
+          grid {name: [values]} or space {name: [choices] | {low, high, int, log}} + n_samples/seed,
+          walk_forward {splits, mode: rolling|anchored, train_size, test_size}
+    Events: meta, results (per finished batch), report (best configuration + OOS stability), done.
+    ?stream=0 returns the report as one JSON response instead.
+    """
+    try:
+        from models.rimsi_backtesting import RIMSIBacktester, close_prices
+        from models.rimsi_sweep import (MAX_SWEEP_COMBINATIONS, expand_grid, run_sweep, sample_space,
+                                        walk_forward_splits)
+    except ImportError as e:
+        return jsonify({'success': False, 'error': f'Backtesting engine unavailable: {e}'}), 503
+    data = request.json or {}
+    code = data.get('code', '')
+    config = {
+        'symbol': data.get('symbol', 'SPY'),
+        'start_date': data.get('start_date', '2022-01-01'),
+        'end_date': data.get('end_date', '2023-12-31'),
+        'initial_capital': data.get('initial_capital', 100000),
+        'commission': data.get('commission', 0.001),
+    }
+    objective = data.get('objective', 'sharpe_ratio')
+    wf = data.get('walk_forward') or {}
+    try:
+        if data.get('grid'):
+            param_sets = expand_grid(data['grid'])
+        elif data.get('space'):
+            n_samples = min(int(data.get('n_samples', 50)), MAX_SWEEP_COMBINATIONS)
+            param_sets = sample_space(data['space'], n_samples, data.get('seed'))
+        else:
+            return jsonify({'success': False, 'error': 'Provide a parameter grid or a search space'}), 400
+        if not param_sets:
+            return jsonify({'success': False, 'error': 'No valid parameter combinations'}), 400
+        if len(param_sets) > MAX_SWEEP_COMBINATIONS:
+            return jsonify({'success': False,
+                            'error': f'{len(param_sets)} combinations exceed the limit of {MAX_SWEEP_COMBINATIONS}'}), 400
+        # Market data is loaded once and shared by every combination and fold
+        close = close_prices(RIMSIBacktester('native')._get_market_data(config))
+        splits = walk_forward_splits(len(close), int(wf.get('splits', 4)), wf.get('mode', 'rolling'),
+                                     wf.get('train_size'), wf.get('test_size'))
+        sweep = run_sweep(code, close.to_numpy(), param_sets, splits, config, objective=objective)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Sweep setup failed: {e}'}), 500
+
+    def window_dates(window):
+        if window is None:
+            return None
+        start, end = window
+        return [str(close.index[start])[:10], str(close.index[end - 1])[:10]]
+
+    meta = {
+        'config': config,
+        'objective': objective,
+        'combinations': len(param_sets),
+        'folds': [{'train': window_dates(train), 'test': window_dates(test)} for train, test in splits],
+    }
+
+    if request.args.get('stream') == '0':
+        try:
+            report = [payload for kind, payload in sweep if kind == 'report'][0]
+        except Exception as e:
+            return jsonify({'success': False, 'error': f'Sweep failed: {e}'}), 500
+        return jsonify({'success': True, **meta, 'report': report})
+
+    def stream_gen():
+        yield "event: meta\n" + f"data: {json.dumps(meta)}\n\n"
+        try:
+            for kind, payload in sweep:
+                yield f"event: {kind}\n" + f"data: {json.dumps(payload)}\n\n"
+        except Exception as e:
+            yield "event: error\n" + f"data: {json.dumps({'error': str(e)})}\n\n"
+        yield "event: done\n" + f"data: {json.dumps({'combinations': len(param_sets)})}\n\n"
+    return Response(stream_gen(), mimetype='text/event-stream')
+
 @app.route('/api/rimsi/risk', methods=['POST'])
 def rimsi_risk():
     """Comprehensive risk analysis"""
@@ -4689,13 +4822,17 @@ def rimsi_ml_portfolio_analysis():
         if not price_data:
             return jsonify({'error': 'No price data available'}), 400
         
+        # One feature frame per symbol: returns, rolling stats, drawdowns etc. are computed once
+        # and shared by every model below
+        frames = {symbol: FeatureFrame.from_returns(rets, symbol=symbol) for symbol, rets in price_data.items()}
+        
         # Run ensemble analysis
         analysis_results = {}
         
         # 1. Volatility Analysis
         for symbol in symbols:
-            if symbol in price_data:
-                vol_result = rimsi_model_registry.predict('volatility_estimator', price_data[symbol])
+            if symbol in frames:
+                vol_result = rimsi_model_registry.predict('volatility_estimator', frames[symbol])
                 if vol_result['success']:
                     analysis_results[f'{symbol}_volatility'] = vol_result['prediction']
         
@@ -4703,8 +4840,8 @@ def rimsi_ml_portfolio_analysis():
         if len(symbols) > 0:
             # Use first symbol's data for risk analysis
             first_symbol = symbols[0]
-            if first_symbol in price_data:
-                risk_result = rimsi_model_registry.predict('tail_risk', price_data[first_symbol])
+            if first_symbol in frames:
+                risk_result = rimsi_model_registry.predict('tail_risk', frames[first_symbol])
                 if risk_result['success']:
                     analysis_results['portfolio_risk'] = risk_result['prediction']
         
@@ -4714,20 +4851,14 @@ def rimsi_ml_portfolio_analysis():
             if portfolio_result['success']:
                 analysis_results['optimization'] = portfolio_result['prediction']
         
-        # 4. Technical Analysis
+        # 4. Technical Analysis and 5. Anomaly Detection on the symbol's price path
         for symbol in symbols:
-            if symbol in price_data:
-                # Mock price data for technical analysis
-                prices = [100 * (1 + sum(price_data[symbol][:i+1])) for i in range(len(price_data[symbol]))]
-                
-                momentum_result = rimsi_model_registry.predict('momentum_persistence', prices)
+            if symbol in frames:
+                suite = rimsi_model_registry.predict_suite(frames[symbol], ['momentum_persistence', 'anomaly_detection'])
+                momentum_result = suite['predictions']['momentum_persistence']
                 if momentum_result['success']:
                     analysis_results[f'{symbol}_momentum'] = momentum_result['prediction']
-        
-        # 5. Anomaly Detection
-        for symbol in symbols:
-            if symbol in price_data:
-                anomaly_result = rimsi_model_registry.predict('anomaly_detection', prices if 'prices' in locals() else price_data[symbol])
+                anomaly_result = suite['predictions']['anomaly_detection']
                 if anomaly_result['success']:
                     analysis_results[f'{symbol}_anomalies'] = anomaly_result['prediction']
         
@@ -4900,9 +5031,9 @@ def rimsi_ml_insights():
             'success': False
         }), 500
 
-@app.route('/api/rimsi/ml/ensemble/<name>', methods=['GET'])
+@app.route('/api/rimsi/ml/ensemble/<name>', methods=['POST'])
 def rimsi_ml_ensemble_predict(name):
-    """Get ensemble prediction by name"""
+    """Get ensemble prediction by name (POST body: {"data": ..., "params": {...}})"""
     try:
         if not RIMSI_ML_AVAILABLE or not rimsi_model_registry:
             return jsonify({
@@ -4910,8 +5041,14 @@ def rimsi_ml_ensemble_predict(name):
                 'available': False
             }), 503
         
-        # Get ensemble predictions
-        ensemble_result = rimsi_model_registry.get_ensemble_prediction(name)
+        data = request.get_json(silent=True) or {}
+        if data.get('data') is None:
+            return jsonify({'error': 'data required', 'ensemble': name, 'success': False}), 400
+        if not isinstance(data.get('params', {}), dict):
+            return jsonify({'error': 'params must be an object', 'ensemble': name, 'success': False}), 400
+        
+        # Get ensemble predictions (members run concurrently, repeated inputs come from the cache)
+        ensemble_result = rimsi_model_registry.predict_ensemble(name, data.get('data'), **data.get('params', {}))
         
         return jsonify(ensemble_result)
         
@@ -6871,6 +7008,142 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 # Initialize Plagiarism Detection System
+from utils.tfidf_vocab import TfidfVocabulary, document_terms
+from utils.db_upsert import insert_ignore, upsert
+
+class PersistentTfidfVocabulary:
+    """Process-local copy of the frozen IDF version in the shared tfidf_vocabulary row.
+
+    Document frequencies live in tfidf_term (one row per term, incremented in place) and
+    tfidf_learned_report guarantees each report is counted once. Counting runs in a SAVEPOINT of
+    the caller's transaction, so it commits or rolls back together with the caller's work. New
+    versions are cut (and the corpus bootstrapped) by the re-embedding job; reads re-check the
+    revision at most every REFRESH_SECONDS.
+    """
+    REFRESH_SECONDS = 30
+    ROW_ID = 1
+    MAX_TERMS = 50000
+
+    def __init__(self):
+        self.vocab = None
+        self.revision = -1
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    def _load(self):
+        row = db.session.query(TfidfVocabularyState.revision, TfidfVocabularyState.payload).filter_by(id=self.ROW_ID).first()
+        if row is None:
+            # Not bootstrapped yet: embed under an empty version 0 until the job has counted the corpus
+            self.vocab, self.revision = TfidfVocabulary(max_terms=self.MAX_TERMS), 0
+            start_tfidf_reembed_job()
+            return
+        self.vocab = TfidfVocabulary.from_payload(row.payload)
+        self.revision = row.revision
+
+    def current(self, force_check=False):
+        with self._lock:
+            now = time.time()
+            if self.vocab is None or force_check or now - self._checked_at > self.REFRESH_SECONDS:
+                rev = db.session.query(TfidfVocabularyState.revision).filter_by(id=self.ROW_ID).scalar() or 0
+                if self.vocab is None or rev != self.revision:
+                    self._load()
+                self._checked_at = now
+            return self.vocab
+
+    def _count_terms(self, conn, terms):
+        table = TfidfTerm.__table__
+        for i in range(0, len(terms), 500):
+            chunk = terms[i:i + 500]
+            known = {t for (t,) in conn.execute(db.select(table.c.term).where(table.c.term.in_(chunk)))}
+            if known:
+                conn.execute(table.update().where(table.c.term.in_(known)).values(df=table.c.df + 1))
+            new = [t for t in chunk if t not in known]
+            if new:
+                room = self.MAX_TERMS - conn.execute(db.select(db.func.count()).select_from(table)).scalar()
+                # A term inserted concurrently since the SELECT above is incremented instead
+                upsert(conn, table, [{'term': t, 'df': 1} for t in new[:max(0, room)]], ['term'], {'df': table.c.df + 1})
+
+    def learn(self, report_id, text):
+        """Count a report's terms once; returns True if this call counted it.
+
+        A failure rolls back only the SAVEPOINT and is logged: the report stays unlearned and the
+        re-embedding job counts it on its next pass.
+        """
+        terms = document_terms(text)
+        if not report_id or not terms:
+            return False
+        if self.current().version == 0:
+            return False  # the bootstrap counts every report
+        try:
+            with db.session.begin_nested():
+                conn = db.session.connection()
+                marker = {'report_id': report_id, 'learned_at': datetime.utcnow()}
+                if not insert_ignore(conn, TfidfLearnedReport.__table__, [marker], ['report_id']):
+                    return False
+                self._count_terms(conn, terms)
+        except Exception as e:
+            app.logger.warning(f"TF-IDF vocabulary update for report {report_id} failed, will retry in the re-embedding job: {e}")
+            return False
+        if self.cut_due():
+            start_tfidf_reembed_job()
+        return True
+
+    def cut_due(self):
+        n_docs = db.session.query(db.func.count(TfidfLearnedReport.report_id)).scalar() or 0
+        n_terms = db.session.query(db.func.count(TfidfTerm.id)).scalar() or 0
+        return self.current().drifted(n_docs, n_terms)
+
+    def cut_version(self):
+        """Freeze a new IDF version from the current counts and commit it; False if another worker cut first."""
+        with self._lock:
+            old = self.current(force_check=True)
+            n_docs = db.session.query(db.func.count(TfidfLearnedReport.report_id)).scalar() or 0
+            rows = db.session.query(TfidfTerm.id, TfidfTerm.term, TfidfTerm.df).all()
+            vocab = TfidfVocabulary.frozen(rows, n_docs, old.version + 1, max_terms=self.MAX_TERMS)
+            updated = TfidfVocabularyState.query.filter_by(id=self.ROW_ID, revision=self.revision).update({
+                'payload': vocab.to_payload(),
+                'version': vocab.version,
+                'n_docs': n_docs,
+                'revision': self.revision + 1,
+                'updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            if not updated:
+                self.current(force_check=True)
+                return False
+            self.vocab, self.revision = vocab, self.revision + 1
+            app.logger.info(f"TF-IDF vocabulary version {vocab.version} cut at {n_docs} documents ({len(rows)} terms)")
+            return True
+
+    def bootstrap(self, batch_size=500):
+        """Count the existing corpus on first start and cut version 1; no-op once the state row exists."""
+        if db.session.query(TfidfVocabularyState.id).filter_by(id=self.ROW_ID).first() is not None:
+            return False
+        counts = TfidfVocabulary(max_terms=self.MAX_TERMS)
+        try:
+            # Claim the bootstrap first: a concurrent worker blocks here and then fails on the key
+            db.session.add(TfidfVocabularyState(id=self.ROW_ID, version=0, revision=0, n_docs=0, payload=counts.to_payload()))
+            db.session.flush()
+        except Exception:
+            db.session.rollback()
+            return False
+        learned = []
+        for rid, text in db.session.query(Report.id, Report.original_text).filter(Report.original_text.isnot(None)).yield_per(batch_size):
+            if document_terms(text):
+                counts.add_document(text, allow_cut=False)
+                learned.append(rid)
+        conn = db.session.connection()
+        ordered = sorted(counts.terms, key=counts.terms.get)
+        for i in range(0, len(ordered), 1000):
+            conn.execute(TfidfTerm.__table__.insert(), [{'term': t, 'df': int(counts.df[counts.terms[t]])} for t in ordered[i:i + 1000]])
+        now = datetime.utcnow()
+        for i in range(0, len(learned), 1000):
+            conn.execute(TfidfLearnedReport.__table__.insert(), [{'report_id': rid, 'learned_at': now} for rid in learned[i:i + 1000]])
+        db.session.commit()
+        app.logger.info(f"Bootstrapped TF-IDF vocabulary from {len(learned)} reports ({len(ordered)} terms)")
+        self.cut_version()
+        return True
+
 class PlagiarismDetector:
     def __init__(self):
         self.bert_available = False  # Temporarily disabled for testing
@@ -6884,15 +7157,24 @@ class PlagiarismDetector:
                 self.bert_available = False
         
         if not self.bert_available:
-            self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+            self.vocabulary = PersistentTfidfVocabulary()
             print("Using TF-IDF for plagiarism detection")
     
-    def generate_embeddings(self, text):
-        """Generate embeddings for the given text"""
+    def generate_embeddings(self, text, report_id=None):
+        """Generate embeddings for the given text (a report_id is also counted into the shared vocabulary, once)"""
         if self.bert_available:
             return self._generate_bert_embeddings(text)
         else:
-            return self._generate_tfidf_embeddings(text)
+            return self._generate_tfidf_embeddings(text, report_id=report_id)
+    
+    def is_current_embedding(self, embedding):
+        """True if the stored embedding was produced under the current vocabulary version"""
+        if self.bert_available or not embedding:
+            return bool(embedding)
+        try:
+            return TfidfVocabulary.blob_version(embedding) == self.vocabulary.current().version
+        except Exception:
+            return False
     
     def _generate_bert_embeddings(self, text):
         """Generate BERT embeddings"""
@@ -6906,69 +7188,12 @@ class PlagiarismDetector:
             print(f"Error generating BERT embeddings: {e}")
             return self._generate_tfidf_embeddings(text)
     
-    def _generate_tfidf_embeddings(self, text):
-        """Generate TF-IDF embeddings as fallback"""
+    def _generate_tfidf_embeddings(self, text, report_id=None):
+        """Sparse float32 TF-IDF embedding in the shared, versioned vocabulary space"""
         try:
-            # Lazy load numpy
-            np = lazy_load_numpy()
-            if not np:
-                # Fallback to hash if numpy is not available
-                return hashlib.md5(text.encode()).digest()
-            
-            # For TF-IDF, we need to fit the vectorizer with a corpus
-            # Get some existing reports to create a corpus
-            try:
-                existing_reports = Report.query.limit(100).all()
-                corpus = [report.original_text or "" for report in existing_reports if report.original_text]
-                
-                # Add the current text to corpus
-                corpus.append(text)
-                
-                # If we have a corpus, use it; otherwise fall back to single document
-                if len(corpus) > 1:
-                    tfidf_matrix = self.vectorizer.fit_transform(corpus)
-                    # Return the embedding for the last document (current text)
-                    last_doc_vector = tfidf_matrix[-1]
-                    # Handle different matrix formats
-                    if hasattr(last_doc_vector, 'toarray'):
-                        # Scipy sparse matrix
-                        return last_doc_vector.toarray().flatten().tobytes()
-                    elif hasattr(last_doc_vector, 'flatten'):
-                        # Numpy array
-                        return last_doc_vector.flatten().tobytes()
-                    else:
-                        # Convert to numpy array first
-                        return np.array(last_doc_vector).flatten().tobytes()
-                else:
-                    # Single document case - create a simple n-gram representation
-                    words = text.lower().split()
-                    # Create a simple bag of words representation
-                    word_freq = {}
-                    for word in words:
-                        word_freq[word] = word_freq.get(word, 0) + 1
-                    
-                    # Convert to a simple vector (top 100 most common words)
-                    common_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:100]
-                    vector = [freq for word, freq in common_words]
-                    # Pad or truncate to 100 dimensions
-                    vector = vector[:100] + [0] * (100 - len(vector))
-                    return np.array(vector, dtype=np.float64).tobytes()
-                    
-            except Exception as db_error:
-                # Fallback to single document analysis
-                app.logger.warning(f"Could not access existing reports for TF-IDF corpus: {db_error}")
-                # Create a simple text fingerprint
-                words = text.lower().split()
-                word_freq = {}
-                for word in words:
-                    word_freq[word] = word_freq.get(word, 0) + 1
-                
-                # Convert to a simple vector representation
-                common_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:100]
-                vector = [freq for word, freq in common_words]
-                vector = vector[:100] + [0] * (100 - len(vector))
-                return np.array(vector, dtype=np.float64).tobytes()
-                
+            if report_id:
+                self.vocabulary.learn(report_id, text)
+            return self.vocabulary.current().embed(text)
         except Exception as e:
             app.logger.error(f"Error generating TF-IDF embeddings: {e}")
             # Return a simple hash-based representation as last resort
@@ -7014,6 +7239,10 @@ class PlagiarismDetector:
                 # Fallback to exact matching if numpy is not available
                 return 1.0 if embedding1 == embedding2 else 0.0
                 
+            # Versioned sparse embeddings share stable term indices
+            if TfidfVocabulary.blob_version(embedding1) is not None and TfidfVocabulary.blob_version(embedding2) is not None:
+                return TfidfVocabulary.cosine(embedding1, embedding2)
+            
             # Handle different embedding types
             if len(embedding1) == 16 and len(embedding2) == 16:
                 # These are MD5 hashes, use exact matching
@@ -7068,6 +7297,59 @@ except Exception as e:
     print(f"Failed to set up plagiarism detector: {e}")
     plagiarism_detector = None
 
+_TFIDF_REEMBED_JOB = {'running': False, 'version': None, 'scanned': 0, 'learned': 0, 'updated': 0, 'started_at': None, 'finished_at': None, 'error': None}
+_TFIDF_REEMBED_LOCK = threading.Lock()
+
+def start_tfidf_reembed_job():
+    """Bootstrap/cut the vocabulary, count unlearned reports and re-embed stale ones (background thread)"""
+    with _TFIDF_REEMBED_LOCK:
+        if _TFIDF_REEMBED_JOB['running']:
+            return False
+        _TFIDF_REEMBED_JOB.update({'running': True, 'scanned': 0, 'learned': 0, 'updated': 0, 'error': None,
+                                   'started_at': datetime.utcnow().isoformat(), 'finished_at': None})
+    threading.Thread(target=_run_tfidf_reembed_job, daemon=True).start()
+    return True
+
+def _run_tfidf_reembed_job(batch_size=200):
+    try:
+        with app.app_context():
+            vocabulary = get_plagiarism_detector().vocabulary
+            vocabulary.bootstrap()
+            if vocabulary.cut_due():
+                vocabulary.cut_version()
+            while True:
+                last_id = ''
+                while True:
+                    vocab = vocabulary.current()
+                    _TFIDF_REEMBED_JOB['version'] = vocab.version
+                    rows = db.session.query(Report.id, Report.original_text, Report.text_embeddings).filter(
+                        Report.id > last_id,
+                        Report.original_text.isnot(None)
+                    ).order_by(Report.id).limit(batch_size).all()
+                    if not rows:
+                        break
+                    learned = {rid for (rid,) in db.session.query(TfidfLearnedReport.report_id).filter(
+                        TfidfLearnedReport.report_id.in_([r[0] for r in rows]))}
+                    for rid, text, blob in rows:
+                        # Reports whose counting failed (or raced the bootstrap) are picked up here
+                        if rid not in learned and vocabulary.learn(rid, text):
+                            _TFIDF_REEMBED_JOB['learned'] += 1
+                        if text and text.strip() and TfidfVocabulary.blob_version(blob) != vocab.version:
+                            Report.query.filter_by(id=rid).update({'text_embeddings': vocab.embed(text)}, synchronize_session=False)
+                            _TFIDF_REEMBED_JOB['updated'] += 1
+                    db.session.commit()
+                    _TFIDF_REEMBED_JOB['scanned'] += len(rows)
+                    last_id = rows[-1][0]
+                # Counts learned during the pass may call for another version
+                if not (vocabulary.cut_due() and vocabulary.cut_version()):
+                    break
+    except Exception as e:
+        _TFIDF_REEMBED_JOB['error'] = str(e)
+        app.logger.error(f"TF-IDF re-embedding job failed: {e}")
+    finally:
+        _TFIDF_REEMBED_JOB['running'] = False
+        _TFIDF_REEMBED_JOB['finished_at'] = datetime.utcnow().isoformat()
+
 def get_plagiarism_detector():
     """Return an initialized plagiarism detector (lazy init)."""
     global plagiarism_detector
@@ -7093,7 +7375,7 @@ def ensure_report_embeddings(report_id):
             
         # Generate embeddings if they don't exist
         if not report.text_embeddings:
-            embeddings = detector.generate_embeddings(report.original_text)
+            embeddings = detector.generate_embeddings(report.original_text, report_id=report.id)
             report.text_embeddings = embeddings
             db.session.commit()
             app.logger.info(f"Generated embeddings for report {report_id}")
@@ -7121,7 +7403,7 @@ def batch_generate_embeddings(limit=50):
         for report in reports_without_embeddings:
             try:
                 if report.original_text and report.original_text.strip():
-                    embeddings = detector.generate_embeddings(report.original_text)
+                    embeddings = detector.generate_embeddings(report.original_text, report_id=report.id)
                     report.text_embeddings = embeddings
                     generated_count += 1
             except Exception as e:
@@ -7884,6 +8166,124 @@ class PlagiarismMatch(db.Model):
     def __repr__(self):
         return f'<PlagiarismMatch {self.source_report_id} -> {self.matched_report_id} ({self.similarity_score:.2f})>'
 
+class ReportMinHash(db.Model):
+    """MinHash signature of a report's shingles (candidate search for plagiarism checks)"""
+    __tablename__ = 'report_minhash'
+    report_id = db.Column(db.String(32), db.ForeignKey('report.id'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # uint32[num_perm]
+    num_perm = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TfidfVocabularyState(db.Model):
+    """Frozen IDF version shared by all workers (plagiarism embeddings); rewritten only when a version is cut"""
+    __tablename__ = 'tfidf_vocabulary'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)  # IDF version tagged into embeddings
+    revision = db.Column(db.Integer, nullable=False, default=0)  # bumped on every cut (compare-and-set)
+    n_docs = db.Column(db.Integer, default=0)  # learned reports at the cut
+    payload = db.Column(db.LargeBinary, nullable=False)  # zlib-compressed JSON snapshot (terms, df, idf)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TfidfTerm(db.Model):
+    """Document frequency of one vocabulary term; the id is the term's column in every embedding"""
+    __tablename__ = 'tfidf_term'
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(64), nullable=False, unique=True)
+    df = db.Column(db.Integer, nullable=False, default=0)
+
+class TfidfLearnedReport(db.Model):
+    """Reports already counted into tfidf_term, so a report is never counted twice"""
+    __tablename__ = 'tfidf_learned_report'
+    report_id = db.Column(db.String(32), primary_key=True)
+    learned_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ReportLshBand(db.Model):
+    """LSH band bucket membership; reports sharing a band_key are plagiarism candidates"""
+    __tablename__ = 'report_lsh_band'
+    id = db.Column(db.Integer, primary_key=True)
+    band_key = db.Column(db.String(40), nullable=False, index=True)
+    report_id = db.Column(db.String(32), db.ForeignKey('report.id'), nullable=False, index=True)
+
+class ReportScore(db.Model):
+    """Typed scores extracted from Report.analysis_result when the report is written (dashboard reads)"""
+    __tablename__ = 'report_score'
+    report_id = db.Column(db.String(32), primary_key=True)
+    analyst = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime)
+    quality = db.Column(db.Float)  # composite_quality_score; NULL when the report has none
+    factual_accuracy = db.Column(db.Float)
+    predictive_power = db.Column(db.Float)
+    bias_score = db.Column(db.Float)
+    originality = db.Column(db.Float)
+    risk_disclosure = db.Column(db.Float)
+    transparency = db.Column(db.Float)
+    sebi_compliance = db.Column(db.Float)  # sebi_compliance_detailed.overall_compliance_score
+    alert_count = db.Column(db.Float)  # flagged_alerts.total_alerts
+    ai_probability = db.Column(db.Float)
+    plagiarism_score = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_report_score_analyst_created', 'analyst', 'created_at'),
+        db.Index('ix_report_score_created', 'created_at'),
+        db.Index('ix_report_score_quality', 'quality'),
+    )
+
+class AnalystMetricsRollup(db.Model):
+    """Additive per-analyst counters over report_score; analyst '__platform__' holds the platform totals"""
+    __tablename__ = 'analyst_metrics_rollup'
+    analyst = db.Column(db.String(100), primary_key=True)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    quality_sum = db.Column(db.Float, nullable=False, default=0)
+    factual_accuracy_sum = db.Column(db.Float, nullable=False, default=0)
+    predictive_power_sum = db.Column(db.Float, nullable=False, default=0)
+    bias_score_sum = db.Column(db.Float, nullable=False, default=0)
+    originality_sum = db.Column(db.Float, nullable=False, default=0)
+    risk_disclosure_sum = db.Column(db.Float, nullable=False, default=0)
+    transparency_sum = db.Column(db.Float, nullable=False, default=0)
+    factual_accuracy_n = db.Column(db.Integer, nullable=False, default=0)
+    predictive_power_n = db.Column(db.Integer, nullable=False, default=0)
+    bias_score_n = db.Column(db.Integer, nullable=False, default=0)
+    originality_n = db.Column(db.Integer, nullable=False, default=0)
+    risk_disclosure_n = db.Column(db.Integer, nullable=False, default=0)
+    transparency_n = db.Column(db.Integer, nullable=False, default=0)
+    sebi_sum = db.Column(db.Float, nullable=False, default=0)
+    sebi_n = db.Column(db.Integer, nullable=False, default=0)
+    alert_sum = db.Column(db.Float, nullable=False, default=0)
+    ai_probability_sum = db.Column(db.Float, nullable=False, default=0)
+    plagiarism_sum = db.Column(db.Float, nullable=False, default=0)
+    best_report_id = db.Column(db.String(32))  # highest quality report (kept on insert, re-queried on removal)
+    best_quality = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ReportPipelineJob(db.Model):
+    """Queued background /analyze stages for one report; claimed by whichever worker's pool is free"""
+    __tablename__ = 'report_pipeline_job'
+    report_id = db.Column(db.String(32), primary_key=True)
+    tickers_json = db.Column(db.Text)
+    status = db.Column(db.String(20), default='queued', index=True)  # queued | running | done | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(80))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class ScheduledTask(db.Model):
+    """A periodic job run by exactly one worker at a time: whoever holds the lease; config and last status are shared"""
+    __tablename__ = 'scheduled_task'
+    name = db.Column(db.String(64), primary_key=True)
+    enabled = db.Column(db.Boolean, nullable=False, default=False)
+    interval_seconds = db.Column(db.Float, nullable=False, default=60)
+    config_json = db.Column(db.Text)
+    status_json = db.Column(db.Text)  # last run: outcome, worker, duration and the handler's result
+    leader = db.Column(db.String(80))
+    lease_until = db.Column(db.DateTime)
+    next_run_at = db.Column(db.DateTime)
+    last_run_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class SkillLearningAnalysis(db.Model):
     """Store skill learning breakdowns for reports"""
     id = db.Column(db.Integer, primary_key=True)
@@ -10764,6 +11164,24 @@ class KnowledgeBase(db.Model):
     meta_data = db.Column(db.Text)  # JSON metadata (renamed from metadata)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SearchDocument(db.Model):
+    """BM25 index: one row per indexed knowledge base entry / report (weighted token length)"""
+    __tablename__ = 'search_document'
+    doc_type = db.Column(db.String(10), primary_key=True)  # 'kb' | 'report'
+    doc_id = db.Column(db.String(100), primary_key=True)
+    length = db.Column(db.Float, nullable=False, default=0.0)
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class SearchPosting(db.Model):
+    """BM25 index posting: term -> document, weighted tf and first char offset in the snippet field"""
+    __tablename__ = 'search_posting'
+    term = db.Column(db.String(40), primary_key=True)
+    doc_type = db.Column(db.String(10), primary_key=True)
+    doc_id = db.Column(db.String(100), primary_key=True)
+    tf = db.Column(db.Float, nullable=False)
+    first_offset = db.Column(db.Integer, default=-1)  # -1 when the term only occurs outside the snippet field
+    __table_args__ = (db.Index('ix_search_posting_doc', 'doc_type', 'doc_id'),)
     
 ## NOTE: ChatHistory & InvestorAccount model definitions moved to investor_terminal_export.models to avoid duplication.
 
@@ -12545,32 +12963,28 @@ def analyst_performance_dashboard(analyst_name):
         session_analyst = session.get('analyst_name')
         is_own_profile = (session_analyst == analyst_name)
         
-        # Get all reports by this analyst
-        reports = Report.query.filter_by(analyst=analyst_name).order_by(Report.created_at.desc()).all()
-        
-        # Convert reports to serializable format
-        reports_data = []
-        for report in reports:
-            try:
-                analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-            except:
-                analysis = {}
-            
-            reports_data.append({
-                'id': report.id,
-                'created_at': report.created_at.isoformat(),
-                'analysis': analysis,
-                'ai_probability': getattr(report, 'ai_probability', 0),
-                'plagiarism_score': getattr(report, 'plagiarism_score', 0)
-            })
+        # Typed scores of every report by this analyst (no analysis_result parsing); full rows only for the table
+        scores = ReportScore.query.filter_by(analyst=analyst_name).order_by(
+            ReportScore.created_at.desc(), ReportScore.report_id.desc()
+        ).all()
+        reports_data = [{
+            'id': score.report_id,
+            'created_at': score.created_at.isoformat() if score.created_at else None,
+            'analysis': _report_score_analysis(score),
+            'ai_probability': score.ai_probability or 0,
+            'plagiarism_score': score.plagiarism_score or 0
+        } for score in scores]
+        reports = Report.query.options(db.load_only(
+            Report.id, Report.analyst, Report.created_at, Report.ai_probability, Report.plagiarism_score
+        )).filter_by(analyst=analyst_name).order_by(Report.created_at.desc(), Report.id.desc()).limit(10).all()
         
         # Get improvement records
         improvements = AnalystImprovement.query.filter_by(analyst=analyst_name).order_by(AnalystImprovement.created_at.desc()).all()
         
         # Calculate performance metrics
-        performance_metrics = calculate_analyst_performance_metrics(reports, improvements)
+        performance_metrics = calculate_analyst_performance_metrics(analyst_name, improvements)
         
-        app.logger.info(f"Performance dashboard for {analyst_name}: {len(reports)} reports, {len(improvements)} improvements")
+        app.logger.info(f"Performance dashboard for {analyst_name}: {performance_metrics['total_reports']} reports, {len(improvements)} improvements")
         
         return render_template('analyst_performance.html',
                              analyst_name=analyst_name,
@@ -12679,13 +13093,14 @@ def dashboard():
     except Exception:
         # Fallback to existing index if redirect import not available
         try:
-            reports = Report.query.order_by(Report.created_at.desc()).all()
+            # Metrics come from the rollups; only the listed reports are loaded and parsed
+            reports = Report.query.order_by(Report.created_at.desc()).limit(DASHBOARD_RECENT_REPORTS).all()
             for report in reports:
                 try:
                     report.analysis = json.loads(report.analysis_result)
                 except Exception:
                     report.analysis = {}
-            metrics = calculate_real_time_metrics(reports)
+            metrics = calculate_real_time_metrics()
             return render_template('index.html', reports=reports, metrics=metrics)
         except Exception as e:
             app.logger.error(f"Dashboard error: {e}")
@@ -12715,7 +13130,7 @@ def dashboard():
                     
                 reports.append(report)
             
-            metrics = calculate_real_time_metrics(reports)
+            metrics = calculate_real_time_metrics()
             return render_template('index.html', reports=reports, metrics=metrics)
             
         except Exception as fallback_error:
@@ -37846,9 +38261,10 @@ def get_metrics():
         
         for attempt in range(max_retries):
             try:
-                reports = Report.query.order_by(Report.created_at.desc()).all()
+                metrics = calculate_real_time_metrics()
                 break
             except Exception as e:
+                db.session.rollback()
                 if "database is locked" in str(e).lower() and attempt < max_retries - 1:
                     time.sleep(retry_delay)
                     retry_delay *= 2  # Exponential backoff
@@ -37862,13 +38278,6 @@ def get_metrics():
                         'quality_trend': 'stable'
                     })
         
-        for report in reports:
-            try:
-                report.analysis = json.loads(report.analysis_result)
-            except Exception:
-                report.analysis = {}
-        
-        metrics = calculate_real_time_metrics(reports)
         return jsonify(metrics)
         
     except Exception as e:
@@ -37880,9 +38289,11 @@ def get_metrics():
             'quality_trend': 'stable'
         })
 
-def calculate_real_time_metrics(reports):
-    """Calculate real-time quality metrics across all analysts"""
-    if not reports:
+def calculate_real_time_metrics():
+    """Calculate real-time quality metrics across all analysts (from the materialized rollups)"""
+    rollups = AnalystMetricsRollup.query.all()
+    platform = next((r for r in rollups if r.analyst == PLATFORM_ROLLUP_KEY), None)
+    if platform is None or not platform.report_count:
         return {
             'total_reports': 0,
             'avg_quality_score': 0,
@@ -37891,70 +38302,36 @@ def calculate_real_time_metrics(reports):
             'recent_trends': []
         }
     
-    total_reports = len(reports)
-    quality_scores = []
-    analyst_scores = {}
-    metric_totals = {
-        'factual_accuracy': [],
-        'predictive_power': [],
-        'bias_score': [],
-        'originality': [],
-        'risk_disclosure': [],
-        'transparency': []
-    }
-    
-    for report in reports:
-        if hasattr(report, 'analysis') and report.analysis.get('composite_quality_score'):
-            quality_scores.append(report.analysis['composite_quality_score'])
-            
-            # Track analyst performance
-            analyst = report.analyst
-            if analyst not in analyst_scores:
-                analyst_scores[analyst] = []
-            analyst_scores[analyst].append(report.analysis['composite_quality_score'])
-            
-            # Track individual metrics
-            scores = report.analysis.get('scores', {})
-            for metric, values in metric_totals.items():
-                if metric in scores:
-                    values.append(scores[metric])
-    
-    # Calculate averages
-    avg_quality_score = sum(quality_scores) / len(quality_scores) if quality_scores else 0
+    averages = rollup_averages(platform)
     
     # Top analysts
     top_analysts = []
-    for analyst, scores in analyst_scores.items():
-        avg_score = sum(scores) / len(scores)
+    for row in rollups:
+        if row.analyst == PLATFORM_ROLLUP_KEY or not row.scored_count:
+            continue
         top_analysts.append({
-            'name': analyst,
-            'avg_score': round(avg_score * 100, 1),
-            'report_count': len(scores)
+            'name': row.analyst,
+            'avg_score': round(row.quality_sum / row.scored_count * 100, 1),
+            'report_count': row.scored_count
         })
     top_analysts.sort(key=lambda x: x['avg_score'], reverse=True)
     
     # Metric averages
-    metric_averages = {}
-    for metric, values in metric_totals.items():
-        if values:
-            metric_averages[metric] = round(sum(values) / len(values), 3)
-        else:
-            metric_averages[metric] = 0
+    metric_averages = {metric: round(averages[metric], 3) for metric in REPORT_METRICS}
     
     # Recent trends (last 10 reports)
     recent_trends = []
-    recent_reports = reports[:10]
-    for report in recent_reports:
-        if hasattr(report, 'analysis') and report.analysis.get('composite_quality_score'):
+    for score in ReportScore.query.order_by(ReportScore.created_at.desc()).limit(10).all():
+        if score.quality and score.created_at:
             recent_trends.append({
-                'date': report.created_at.isoformat(),
-                'score': report.analysis['composite_quality_score'],
-                'analyst': report.analyst
+                'date': score.created_at.isoformat(),
+                'score': score.quality,
+                'analyst': score.analyst
             })
     
     return {
-        'total_reports': total_reports,
-        'avg_quality_score': round(avg_quality_score * 100, 1),
+        'total_reports': platform.report_count,
+        'avg_quality_score': round(averages['quality'] * 100, 1),
         'top_analysts': top_analysts[:5],
         'metric_averages': metric_averages,
         'recent_trends': recent_trends
@@ -37999,7 +38376,7 @@ def api_main_dashboard():
                 report.analysis = {}
         
         # Calculate metrics
-        metrics = calculate_real_time_metrics(reports)
+        metrics = calculate_real_time_metrics()
         
         # Get recent reports
         recent_reports = []
@@ -38269,7 +38646,7 @@ def api_admin_dashboard():
                 'reports_this_week': len([r for r in reports if (datetime.now() - r.created_at).days <= 7]),
                 'reports_this_month': len([r for r in reports if (datetime.now() - r.created_at).days <= 30])
             },
-            'quality_metrics': calculate_real_time_metrics(reports),
+            'quality_metrics': calculate_real_time_metrics(),
             'analyst_performance': [],
             'system_health': {
                 'database_status': 'operational',
@@ -39100,6 +39477,104 @@ def _get_sector_from_ticker(ticker):
         return 'Other'
 
 # Plagiarism Detection Functions
+
+# --- MinHash/LSH candidate index (sub-linear candidate search for check_plagiarism) ---
+# Signatures and band keys are written in the same transaction as the report (flush hooks), so
+# every inserted report is a candidate for the next check.
+from sqlalchemy import event as _sa_event, inspect as _sa_inspect
+PLAG_LSH_MAX_CANDIDATES = int(os.getenv('PLAG_LSH_MAX_CANDIDATES', '50'))
+PLAG_LSH_BACKFILL_BATCH = int(os.getenv('PLAG_LSH_BACKFILL_BATCH', '500'))
+_MINHASHER = None
+
+def get_minhasher():
+    """Return the process-wide MinHasher (same seed everywhere so stored signatures stay comparable)."""
+    global _MINHASHER
+    if _MINHASHER is None:
+        from utils.minhash_lsh import MinHasher
+        _MINHASHER = MinHasher()
+    return _MINHASHER
+
+def _write_report_minhash(conn, report_id, report_text, signature=None):
+    """Replace a report's MinHash signature and LSH band keys using the given Core connection"""
+    mh = get_minhasher()
+    sig, keys = mh.index_keys(report_text, signature)
+    _drop_report_minhash(conn, report_id)
+    conn.execute(ReportMinHash.__table__.insert().values(
+        report_id=report_id, signature=mh.to_bytes(sig), num_perm=mh.num_perm, updated_at=datetime.utcnow()
+    ))
+    if keys:
+        conn.execute(ReportLshBand.__table__.insert(), [{'band_key': k, 'report_id': report_id} for k in keys])
+    return sig
+
+def _drop_report_minhash(conn, report_id):
+    for table in (ReportLshBand.__table__, ReportMinHash.__table__):
+        conn.execute(table.delete().where(table.c.report_id == report_id))
+
+def index_report_minhash(report_id, report_text, commit=True, signature=None):
+    """Store/replace a report's MinHash signature and LSH band keys"""
+    sig = _write_report_minhash(db.session.connection(), report_id, report_text, signature)
+    if commit:
+        db.session.commit()
+    return sig
+
+@_sa_event.listens_for(db.session, 'before_flush')
+def _minhash_index_before_flush(session, flush_context, instances):
+    """Drop index rows of deleted reports before the report rows go (they reference report.id)"""
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Report)]
+    if deleted:
+        conn = session.connection()
+        for report_id in deleted:
+            _drop_report_minhash(conn, report_id)
+
+@_sa_event.listens_for(db.session, 'after_flush')
+def _minhash_index_after_flush(session, flush_context):
+    """Index reports in the same transaction that inserts them or changes their text"""
+    touched = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Report) and (obj in session.new or _sa_inspect(obj).attrs.original_text.history.has_changes())
+    ]
+    if touched:
+        conn = session.connection()
+        for obj in touched:
+            _write_report_minhash(conn, obj.id, obj.original_text)
+
+def backfill_minhash_index(limit=None):
+    """Index up to `limit` reports that have text but no signature yet; returns how many were indexed.
+    Reports are indexed on insert; this only covers rows written before the index existed or outside
+    the ORM (see the a1c3e5f7b9d2 migration, which runs it over the whole table once)."""
+    limit = limit or PLAG_LSH_BACKFILL_BATCH
+    missing = db.session.query(Report.id, Report.original_text).outerjoin(
+        ReportMinHash, ReportMinHash.report_id == Report.id
+    ).filter(
+        ReportMinHash.report_id.is_(None),
+        Report.original_text.isnot(None)
+    ).limit(limit).all()
+    for rid, text in missing:
+        index_report_minhash(rid, text, commit=False)
+    if missing:
+        db.session.commit()
+    return len(missing)
+
+def lsh_candidates(signature, exclude_report_id=None, limit=None):
+    """Return [(report_id, estimated_jaccard)] for reports sharing at least one LSH band, best first"""
+    mh = get_minhasher()
+    limit = limit or PLAG_LSH_MAX_CANDIDATES
+    q = db.session.query(ReportLshBand.report_id, db.func.count(ReportLshBand.id).label('hits')).filter(
+        ReportLshBand.band_key.in_(mh.band_keys(signature))
+    )
+    if exclude_report_id is not None:
+        q = q.filter(ReportLshBand.report_id != exclude_report_id)
+    rows = q.group_by(ReportLshBand.report_id).order_by(db.desc('hits')).limit(limit * 4).all()
+    if not rows:
+        return []
+    sigs = ReportMinHash.query.filter(ReportMinHash.report_id.in_([r[0] for r in rows])).all()
+    scored = [
+        (r.report_id, mh.jaccard(signature, mh.from_bytes(r.signature)))
+        for r in sigs if r.num_perm == mh.num_perm
+    ]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:limit]
+
 def check_plagiarism(report_text, report_id, similarity_threshold=0.2):
     """
     Check for plagiarism against existing reports
@@ -39116,20 +39591,32 @@ def check_plagiarism(report_text, report_id, similarity_threshold=0.2):
             app.logger.warning("Empty report text provided for plagiarism check")
             return []
         
-        # Generate embeddings for the new report
-        new_embeddings = detector.generate_embeddings(report_text.strip())
+        # Generate embeddings for the new report (counted into the vocabulary once per report)
+        new_embeddings = detector.generate_embeddings(report_text.strip(), report_id=report_id)
         
-        # Get all existing reports with embeddings - handle missing columns gracefully
+        # Candidate search via the MinHash/LSH index; exact scoring only runs on the short list
+        candidate_jaccard = {}
         try:
+            candidate_jaccard = dict(lsh_candidates(get_minhasher().signature(report_text), report_id))
             existing_reports = Report.query.filter(
-                Report.id != report_id,
+                Report.id.in_(list(candidate_jaccard.keys())),
                 Report.text_embeddings.isnot(None),
                 Report.original_text.isnot(None)
-            ).limit(1000).all()  # Limit to avoid memory issues
-        except Exception as e:
-            app.logger.warning(f"Could not query plagiarism columns: {e}")
-            # If columns don't exist, return empty list
-            return []
+            ).all() if candidate_jaccard else []
+        except Exception as lsh_error:
+            db.session.rollback()
+            app.logger.warning(f"LSH candidate search unavailable, scanning reports: {lsh_error}")
+            # Get existing reports with embeddings - handle missing columns gracefully
+            try:
+                existing_reports = Report.query.filter(
+                    Report.id != report_id,
+                    Report.text_embeddings.isnot(None),
+                    Report.original_text.isnot(None)
+                ).limit(1000).all()  # Limit to avoid memory issues
+            except Exception as e:
+                app.logger.warning(f"Could not query plagiarism columns: {e}")
+                # If columns don't exist, return empty list
+                return []
         
         matches = []
         
@@ -39140,9 +39627,13 @@ def check_plagiarism(report_text, report_id, similarity_threshold=0.2):
                     existing_report.original_text and
                     existing_report.original_text.strip()):
                     
+                    existing_embeddings = existing_report.text_embeddings
+                    if not detector.is_current_embedding(existing_embeddings):
+                        # Stale vocabulary version: re-embed on the fly until the background job catches up
+                        existing_embeddings = detector.generate_embeddings(existing_report.original_text)
                     similarity = detector.calculate_similarity(
                         new_embeddings, 
-                        existing_report.text_embeddings
+                        existing_embeddings
                     )
                     
                     # Use a lower threshold for detection but still report high similarity
@@ -39173,6 +39664,7 @@ def check_plagiarism(report_text, report_id, similarity_threshold=0.2):
                             "matching_segments": matching_segments,
                             "content_analysis": analyze_copied_content(report_text, existing_report.original_text, matching_segments),
                             "plagiarism_severity": get_plagiarism_severity(similarity),
+                            "minhash_jaccard": candidate_jaccard.get(existing_report.id),
                             "word_overlap_count": len(set(report_text.lower().split()).intersection(set(existing_report.original_text.lower().split()))),
                             "total_words_new": len(report_text.split()),
                             "total_words_original": len(existing_report.original_text.split())
@@ -39299,7 +39791,8 @@ def update_report_embeddings(report_id, report_text):
         return False
     
     try:
-        embeddings = detector.generate_embeddings(report_text)
+        # The report is counted into the shared vocabulary the first time it is embedded
+        embeddings = detector.generate_embeddings(report_text, report_id=report_id)
         
         # Update the report with embeddings - handle missing columns gracefully
         try:
@@ -40269,153 +40762,371 @@ def generate_backtesting_recommendations(overall_score, scenario_results):
     
     return recommendations
 
+# ========== Staged /analyze pipeline ==========
+# Request path: ticker data (concurrent, through the shared history store) and AI detection run
+# alongside the quick plagiarism pass, then scoring. Corpus-sized stages (embeddings + full
+# plagiarism check, backtesting, knowledge base) are queued as a report_pipeline_job row; the
+# REPORT_PIPELINE_WORKERS pool threads in every process claim queued rows (as the published model
+# job pool does) and write each stage's result into the stored report as it finishes.
+
+REPORT_FETCH_WORKERS = int(os.getenv('REPORT_FETCH_WORKERS', '8'))
+REPORT_PIPELINE_WORKERS = int(os.getenv('REPORT_PIPELINE_WORKERS', '2'))
+REPORT_PIPELINE_STALE_SECONDS = int(os.getenv('REPORT_PIPELINE_STALE_SECONDS', '900'))
+# A side thread refreshes a running job's heartbeat this often, however long its current stage takes
+REPORT_PIPELINE_HEARTBEAT_SECONDS = float(os.getenv('REPORT_PIPELINE_HEARTBEAT_SECONDS', '60'))
+REPORT_PIPELINE_MAX_ATTEMPTS = int(os.getenv('REPORT_PIPELINE_MAX_ATTEMPTS', '3'))
+REPORT_PIPELINE_RETENTION_HOURS = float(os.getenv('REPORT_PIPELINE_RETENTION_HOURS', '24'))
+REPORT_PIPELINE_FINAL = ('done', 'failed', 'skipped')
+_REPORT_PIPELINE_WORKER_ID = f"pid{os.getpid()}"
+_report_pipeline_pool = None
+_report_pipeline_lock = threading.Lock()
+
+def get_report_pipeline_pool():
+    """Process-wide worker pool draining the shared report_pipeline_job queue"""
+    global _report_pipeline_pool
+    if _report_pipeline_pool is None:
+        with _report_pipeline_lock:
+            if _report_pipeline_pool is None:
+                from utils.job_queue import JobWorkerPool
+                _report_pipeline_pool = JobWorkerPool(
+                    _claim_report_pipeline_job, _run_report_pipeline_job, maintain=_maintain_report_pipeline_jobs,
+                    max_workers=max(1, REPORT_PIPELINE_WORKERS), name='report-pipeline',
+                ).start()
+    return _report_pipeline_pool
+
+def enqueue_report_pipeline(report_id, tickers):
+    """Queue the background stages of a stored report for whichever worker claims them first"""
+    db.session.add(ReportPipelineJob(report_id=report_id, tickers_json=json.dumps(tickers), status='queued'))
+    db.session.commit()
+    get_report_pipeline_pool().notify()
+
+def _claim_report_pipeline_job():
+    """Atomically move the oldest queued job to 'running' for this process; returns its report id or None"""
+    with app.app_context():
+        for _ in range(3):
+            job_id = (db.session.query(ReportPipelineJob.report_id).filter_by(status='queued')
+                      .order_by(ReportPipelineJob.created_at.asc()).limit(1).scalar())
+            if job_id is None:
+                return None
+            now = datetime.utcnow()
+            claimed = (ReportPipelineJob.query.filter_by(report_id=job_id, status='queued')
+                       .update({'status': 'running', 'worker': _REPORT_PIPELINE_WORKER_ID, 'started_at': now,
+                                'heartbeat_at': now, 'attempts': ReportPipelineJob.attempts + 1},
+                               synchronize_session=False))
+            db.session.commit()
+            if claimed == 1:
+                return job_id
+        return None
+
+def _finish_report_pipeline_job(report_id, status, error=None):
+    (ReportPipelineJob.query.filter_by(report_id=report_id, status='running')
+     .update({'status': status, 'error': error, 'finished_at': datetime.utcnow()}, synchronize_session=False))
+    db.session.commit()
+
+def _fail_report_pipeline(report_id, error):
+    """Give up on a job: unfinished stages are recorded as failed on the report"""
+    _finish_report_pipeline_job(report_id, 'failed', error=error)
+    report = Report.query.get(report_id)
+    if report is None:
+        return
+    for stage, status in _report_pipeline_stages(report).items():
+        if status not in REPORT_PIPELINE_FINAL:
+            _update_report_pipeline(report, stage, 'failed')
+
+def _start_report_pipeline_heartbeat(report_id):
+    """Refresh the job's heartbeat from a side thread until the returned stop() is called, so a stage
+    running longer than REPORT_PIPELINE_STALE_SECONDS is not requeued while it is still working"""
+    stopped = threading.Event()
+    def beat():
+        while not stopped.wait(REPORT_PIPELINE_HEARTBEAT_SECONDS):
+            try:
+                with app.app_context():
+                    (ReportPipelineJob.query
+                     .filter_by(report_id=report_id, status='running', worker=_REPORT_PIPELINE_WORKER_ID)
+                     .update({'heartbeat_at': datetime.utcnow()}, synchronize_session=False))
+                    db.session.commit()
+            except Exception as e:
+                app.logger.warning(f"Report pipeline heartbeat for {report_id} failed: {e}")
+    thread = threading.Thread(target=beat, name=f'report-pipeline-heartbeat-{report_id}', daemon=True)
+    thread.start()
+    def stop():
+        stopped.set()
+        thread.join()
+    return stop
+
+def _run_report_pipeline_job(report_id):
+    with app.app_context():
+        job = ReportPipelineJob.query.get(report_id)
+        if not job or job.status != 'running':
+            return
+        stop_heartbeat = _start_report_pipeline_heartbeat(report_id)
+        try:
+            failed = run_report_background_stages(report_id, json.loads(job.tickers_json or '[]'))
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Report pipeline job {report_id} failed: {e}")
+            _fail_report_pipeline(report_id, str(e))
+            return
+        finally:
+            stop_heartbeat()
+        if failed:
+            _finish_report_pipeline_job(report_id, 'failed', error=f"stages failed: {', '.join(failed)}")
+        else:
+            _finish_report_pipeline_job(report_id, 'done')
+
+def _maintain_report_pipeline_jobs():
+    """Requeue jobs whose worker stopped heart-beating (finished stages are not re-run), give up after
+    REPORT_PIPELINE_MAX_ATTEMPTS claims, and drop finished jobs past retention."""
+    with app.app_context():
+        now = datetime.utcnow()
+        stale = ReportPipelineJob.query.filter(
+            ReportPipelineJob.status == 'running',
+            ReportPipelineJob.heartbeat_at < now - timedelta(seconds=REPORT_PIPELINE_STALE_SECONDS)
+        ).all()
+        for job in stale:
+            if (job.attempts or 0) >= REPORT_PIPELINE_MAX_ATTEMPTS:
+                _fail_report_pipeline(job.report_id, 'worker lost')
+            else:
+                (ReportPipelineJob.query.filter_by(report_id=job.report_id, status='running', heartbeat_at=job.heartbeat_at)
+                 .update({'status': 'queued', 'worker': None}, synchronize_session=False))
+        (ReportPipelineJob.query
+         .filter(ReportPipelineJob.status.in_(('done', 'failed')),
+                 ReportPipelineJob.finished_at < now - timedelta(hours=REPORT_PIPELINE_RETENTION_HOURS))
+         .delete(synchronize_session=False))
+        db.session.commit()
+
+def _fallback_report_ohlc(period_covered):
+    return {
+        'current_price': 100.0,
+        '52w_high': 120.0,
+        '52w_low': 80.0,
+        'volatility': 0.25,
+        'avg_volume': 1000000,
+        'price_change_percent': 0.0,
+        'data_points': 0,
+        'period_covered': period_covered
+    }
+
+def _report_ticker_ohlc(ticker):
+    """One year of daily bars for a report ticker, summarised for the scorer"""
+    try:
+        try:
+            from utils.history_store import get_history
+            hist = get_history(ticker, period="1y")
+        except ImportError:
+            hist = lazy_load_yfinance().Ticker(ticker).history(period="1y")
+        if hist is None or hist.empty:
+            app.logger.warning(f"No historical data for {ticker}, using fallback")
+            return _fallback_report_ohlc("No data")
+        
+        close = hist['Close']
+        current_price = close.iloc[-1]
+        high_52w = hist['High'].max()
+        low_52w = hist['Low'].min()
+        volatility = close.pct_change().std()
+        avg_volume = hist['Volume'].mean() if 'Volume' in hist.columns else 0
+        price_change = ((current_price - close.iloc[0]) / close.iloc[0]) * 100
+        
+        # Handle NaN values
+        if volatility != volatility:
+            volatility = 0.25  # Default volatility
+        if avg_volume != avg_volume:
+            avg_volume = 0
+        
+        app.logger.info(f"Fetched data for {ticker}: Price={current_price:.2f}, 52W High={high_52w:.2f}, 52W Low={low_52w:.2f}")
+        return {
+            'current_price': float(current_price),
+            '52w_high': float(high_52w),
+            '52w_low': float(low_52w),
+            'volatility': float(volatility),
+            'avg_volume': float(avg_volume),
+            'price_change_percent': float(price_change),
+            'data_points': len(hist),
+            'period_covered': f"{len(hist)} days"
+        }
+    except Exception as e:
+        app.logger.error(f"Failed to fetch data for {ticker}: {str(e)}")
+        return _fallback_report_ohlc("Error fetching data")
+
+def fetch_report_ohlc(tickers):
+    """OHLC summaries for all report tickers, fetched concurrently"""
+    if not tickers:
+        return {}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1, min(REPORT_FETCH_WORKERS, len(tickers)))) as pool:
+        return dict(zip(tickers, pool.map(_report_ticker_ohlc, tickers)))
+
+def quick_plagiarism_score(report_text):
+    """Highest word-set Jaccard against the LSH short list (full scan only without a usable index)"""
+    words = set(report_text.lower().split())
+    if not words:
+        return 0.0
+    texts = None
+    try:
+        # An empty index (fresh create_all() database, backfill not run yet) would short-list nothing
+        if db.session.query(ReportMinHash.report_id).first() is not None:
+            candidates = [rid for rid, _ in lsh_candidates(get_minhasher().signature(report_text))]
+            texts = db.session.query(Report.original_text).filter(
+                Report.id.in_(candidates), Report.original_text.isnot(None)
+            ).all() if candidates else []
+    except Exception as lsh_error:
+        db.session.rollback()
+        app.logger.warning(f"LSH short list unavailable for quick plagiarism check: {lsh_error}")
+    if texts is None:
+        texts = db.session.query(Report.original_text).filter(Report.original_text.isnot(None)).all()
+    best = 0.0
+    for (text,) in texts:
+        other = set(text.lower().split())
+        if other:
+            best = max(best, len(words & other) / len(words | other))
+    return best
+
+def _safe_ai_detection(report_text):
+    try:
+        if ai_detector:
+            result = ai_detector.detect_ai_content(report_text)
+            # numpy scalars in detailed_analysis would break both the stored JSON and the response
+            return json.loads(json.dumps(result, default=lambda o: o.item() if hasattr(o, 'item') else str(o)))
+        app.logger.warning("AI detector not available, skipping AI detection")
+    except Exception as e:
+        app.logger.error(f"AI detection failed: {e}")
+    return {}
+
+def _report_pipeline_stages(report):
+    try:
+        analysis = json.loads(report.analysis_result) if report.analysis_result else {}
+    except Exception:
+        analysis = {}
+    return dict(analysis.get('pipeline', {}).get('stages', {}))
+
+def _update_report_pipeline(report, stage, status, **results):
+    """Record a background stage transition (and any result blocks) in the stored analysis.
+    Also refreshes the job heartbeat (a side thread refreshes it during long stages); a failed write
+    propagates so the job is retried or failed."""
+    try:
+        analysis = json.loads(report.analysis_result) if report.analysis_result else {}
+    except Exception:
+        analysis = {}
+    analysis.update(results)
+    pipeline = analysis.setdefault('pipeline', {'stages': {}})
+    pipeline['stages'][stage] = status
+    if all(s in REPORT_PIPELINE_FINAL for s in pipeline['stages'].values()):
+        pipeline['status'] = 'complete'
+        pipeline['completed_at'] = datetime.utcnow().isoformat()
+    report.analysis_result = json.dumps(analysis)
+    (ReportPipelineJob.query.filter_by(report_id=report.id, status='running')
+     .update({'heartbeat_at': datetime.utcnow()}, synchronize_session=False))
+    db.session.commit()
+    return analysis
+
+def run_report_background_stages(report_id, tickers):
+    """Corpus-sized /analyze stages; each one streams its result into the report record.
+    Stages already done by an earlier attempt are skipped. Returns the names of the failed stages."""
+    report = Report.query.get(report_id)
+    if report is None:
+        raise LookupError(f"report {report_id} not found")
+    report_text = report.original_text or ''
+    stages = _report_pipeline_stages(report)
+    failed = []
+    
+    # Embeddings + full plagiarism check against the corpus
+    if stages.get('plagiarism') != 'done':
+        _update_report_pipeline(report, 'plagiarism', 'running')
+        try:
+            update_report_embeddings(report.id, report_text)
+            plagiarism_matches = check_plagiarism(report_text, report.id, similarity_threshold=0.2)
+            plagiarism_score = 0.0
+            if plagiarism_matches:
+                max_similarity = max(match['similarity'] for match in plagiarism_matches)
+                # Only consider high similarities (>0.8) as actual plagiarism concerns for scoring
+                high_similarity_matches = [m for m in plagiarism_matches if m['similarity'] > 0.8]
+                plagiarism_score = max_similarity if high_similarity_matches else 0.0
+            report.plagiarism_score = plagiarism_score
+            report.plagiarism_checked = True
+            _update_report_pipeline(report, 'plagiarism', 'done', plagiarism_detection={
+                'checked': True,
+                'status': 'done',
+                'score': plagiarism_score,
+                'matches_found': len(plagiarism_matches),
+                'matches': plagiarism_matches[:3]  # Include top 3 matches
+            })
+            app.logger.info(f"Plagiarism check completed for report {report.id}. Found {len(plagiarism_matches)} potential matches.")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error in plagiarism detection for report {report.id}: {e}")
+            _update_report_pipeline(report, 'plagiarism', 'failed', plagiarism_detection={
+                'checked': False, 'status': 'failed', 'score': 0.0, 'matches_found': 0, 'matches': []
+            })
+            failed.append('plagiarism')
+    
+    # Backtesting for scenario-based and economy situation reports
+    if report.report_type in ['scenario_based', 'economy_situation'] and stages.get('backtesting') != 'done':
+        _update_report_pipeline(report, 'backtesting', 'running')
+        try:
+            analysis = json.loads(report.analysis_result) if report.analysis_result else {}
+            backtesting_result = perform_report_backtesting(report, tickers, analysis)
+            _update_report_pipeline(report, 'backtesting', 'done', backtesting=backtesting_result)
+            app.logger.info(f"Backtesting completed for report {report.id}. Score: {backtesting_result.get('overall_score', 'N/A')}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error in backtesting for report {report.id}: {e}")
+            _update_report_pipeline(report, 'backtesting', 'failed', backtesting={
+                'enabled': False,
+                'error': 'Backtesting failed due to technical error',
+                'overall_score': 0
+            })
+            failed.append('backtesting')
+    
+    # Update knowledge base with the finished report
+    if stages.get('knowledge_base') != 'done':
+        _update_report_pipeline(report, 'knowledge_base', 'running')
+        if add_report_to_knowledge_base(report):
+            _update_report_pipeline(report, 'knowledge_base', 'done')
+        else:
+            _update_report_pipeline(report, 'knowledge_base', 'failed')
+            failed.append('knowledge_base')
+    return failed
+
 @app.route('/analyze', methods=['POST'])
 def analyze_report():
     data = request.get_json()
     if not data:
         return jsonify({"error": "No JSON data provided"}), 400
 
-    # Lazy load required libraries
-    yf = lazy_load_yfinance()
-    pd = lazy_load_pandas()
-    
-    if not yf or not pd:
-        return jsonify({"error": "Required libraries not available"}), 500
-
     report_text = data.get('text')
     analyst = data.get('analyst', 'Unknown')
     topic = data.get('topic', '')  # New field
     sub_heading = data.get('sub_heading', '')  # New field
     report_type = data.get('report_type', 'equity')  # New field
     
+    if not report_text:
+        return jsonify({"error": "No report text provided"}), 400
+    
     # Auto-extract tickers from report text
     all_tickers = extract_tickers_from_text(report_text)
     
     # Filter for Indian stocks only (.NS suffix) for backtesting
     indian_tickers = [ticker for ticker in all_tickers if ticker.endswith('.NS')]
-    
-    if not report_text:
-        return jsonify({"error": "No report text provided"}), 400
 
-    # Only process Indian stocks (.NS) for OHLC data and backtesting
-    ohlc_data = {}
-    for ticker in indian_tickers:
+    # Stage 1: ticker data and AI detection in worker threads, quick plagiarism pass here
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=2) as stage_pool:
+        ohlc_future = stage_pool.submit(fetch_report_ohlc, indian_tickers)
+        ai_future = stage_pool.submit(_safe_ai_detection, report_text)
+        
+        preliminary_plagiarism_score = 0.0
         try:
-            app.logger.info(f"Fetching data for Indian stock: {ticker}")
-            stock = yf.Ticker(ticker)
-            
-            # Try to get 1 year history first
-            hist = stock.history(period="1y")
-            if hist.empty:
-                # If 1 year fails, try 6 months
-                hist = stock.history(period="6mo")
-            if hist.empty:
-                # If 6 months fails, try 3 months
-                hist = stock.history(period="3mo")
-            if hist.empty:
-                # If 3 months fails, try 1 month
-                hist = stock.history(period="1mo")
-            
-            if not hist.empty:
-                # Get current price (most recent close)
-                current_data = stock.history(period="1d")
-                if not current_data.empty:
-                    current_price = current_data['Close'].iloc[-1]
-                else:
-                    current_price = hist['Close'].iloc[-1]
-                
-                # Calculate metrics
-                high_52w = hist['High'].max()
-                low_52w = hist['Low'].min()
-                volatility = hist['Close'].pct_change().std()
-                
-                # Calculate additional metrics for Indian stocks
-                avg_volume = hist['Volume'].mean() if 'Volume' in hist.columns else 0
-                price_change = ((current_price - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
-                
-                # Handle NaN values
-                if pd.isna(volatility):
-                    volatility = 0.25  # Default volatility
-                if pd.isna(avg_volume):
-                    avg_volume = 0
-                    
-                ohlc_data[ticker] = {
-                    'current_price': float(current_price),
-                    '52w_high': float(high_52w),
-                    '52w_low': float(low_52w),
-                    'volatility': float(volatility),
-                    'avg_volume': float(avg_volume),
-                    'price_change_percent': float(price_change),
-                    'data_points': len(hist),
-                    'period_covered': f"{len(hist)} days"
-                }
-                app.logger.info(f"Successfully fetched data for {ticker}: Price={current_price:.2f}, 52W High={high_52w:.2f}, 52W Low={low_52w:.2f}")
-                
-            else:
-                # Fallback data if no historical data available
-                app.logger.warning(f"No historical data for {ticker}, using fallback")
-                ohlc_data[ticker] = {
-                    'current_price': 100.0,
-                    '52w_high': 120.0,
-                    '52w_low': 80.0,
-                    'volatility': 0.25,
-                    'avg_volume': 1000000,
-                    'price_change_percent': 0.0,
-                    'data_points': 0,
-                    'period_covered': "No data"
-                }
-                
+            if plagiarism_detector:
+                preliminary_plagiarism_score = quick_plagiarism_score(report_text)
         except Exception as e:
-            app.logger.error(f"Failed to fetch data for {ticker}: {str(e)}")
-            # Create fallback data for failed tickers
-            ohlc_data[ticker] = {
-                'current_price': 100.0,
-                '52w_high': 120.0,
-                '52w_low': 80.0,
-                'volatility': 0.25,
-                'avg_volume': 1000000,
-                'price_change_percent': 0.0,
-                'data_points': 0,
-                'period_covered': "Error fetching data"
-            }
-
-    # First, check for plagiarism to get similarity score
-    preliminary_plagiarism_score = 0.0
-    try:
-        # Quick plagiarism check against existing reports for scoring
-        if plagiarism_detector:
-            existing_reports = Report.query.all()
-            max_similarity = 0.0
-            
-            for existing_report in existing_reports:
-                # Use simple text similarity for quick check
-                if existing_report.original_text:
-                    words1 = set(report_text.lower().split())
-                    words2 = set(existing_report.original_text.lower().split())
-                    if len(words1) > 0 and len(words2) > 0:
-                        intersection = words1.intersection(words2)
-                        union = words1.union(words2)
-                        similarity = len(intersection) / len(union) if len(union) > 0 else 0
-                        max_similarity = max(max_similarity, similarity)
-            
-            preliminary_plagiarism_score = max_similarity
-    except Exception as e:
-        app.logger.warning(f"Quick plagiarism check failed: {e}")
-
-    # Perform AI detection first to get AI probability
-    ai_detection_result = {}
-    ai_probability = 0.0
-    try:
-        if ai_detector:
-            ai_detection_result = ai_detector.detect_ai_content(report_text)
-            ai_probability = ai_detection_result.get('ai_probability', 0.0)
-        else:
-            app.logger.warning("AI detector not available, skipping AI detection")
-    except Exception as e:
-        app.logger.error(f"AI detection failed during scoring: {e}")
-        ai_probability = 0.0
+            db.session.rollback()
+            app.logger.warning(f"Quick plagiarism check failed: {e}")
+        
+        ohlc_data = ohlc_future.result()
+        ai_detection_result = ai_future.result()
+    ai_probability = ai_detection_result.get('ai_probability', 0.0)
     
-    # Use Indian tickers for analysis but store all tickers for reference
+    # Stage 2: scoring (Indian tickers for analysis, all tickers stored for reference)
     if scorer:
         analysis_result = scorer.score_report(
             report_text=report_text,
@@ -40451,6 +41162,37 @@ def analyze_report():
         'total_extracted': len(all_tickers),
         'indian_stocks_processed': len(indian_tickers)
     }
+    
+    if not ai_detection_result:
+        ai_detection_result = {
+            'ai_probability': 0.5,
+            'confidence': 0.1,
+            'classification': 'Analysis Failed',
+            'explanation': 'AI detection failed due to technical error'
+        }
+    analysis_result['ai_detection'] = {
+        'checked': True,
+        'ai_probability': ai_detection_result.get('ai_probability', 0.5),
+        'human_probability': ai_detection_result.get('human_probability', 0.5),
+        'confidence': ai_detection_result.get('confidence', 0.1),
+        'classification': ai_detection_result.get('classification', 'Unknown'),
+        'explanation': ai_detection_result.get('explanation', 'No explanation available'),
+        'detailed_analysis': ai_detection_result.get('detailed_analysis', {})
+    }
+    
+    # Generate skill learning analysis
+    skill_learning_data = []
+    try:
+        skill_learning_data = generate_skill_learning_analysis(report_text, indian_tickers, analysis_result)
+        app.logger.info(f"Skill learning analysis generated. Found {len(skill_learning_data)} learning modules.")
+    except Exception as e:
+        app.logger.error(f"Error generating skill learning analysis: {e}")
+        skill_learning_data = []
+    analysis_result['skill_learning'] = {
+        'enabled': True,
+        'modules_count': len(skill_learning_data),
+        'modules': skill_learning_data
+    }
 
     # Generate unique ID with timestamp to avoid duplicates
     base_id = f"rep_{hash(report_text) & 0xFFFFFFFF}"
@@ -40466,6 +41208,25 @@ def analyze_report():
     if Report.query.get(unique_id) is not None:
         unique_id = f"rep_{str(uuid.uuid4()).replace('-', '')[:12]}"
     
+    # Analyze improvements from previous reports (before this one is stored)
+    analysis_result['improvement_analysis'] = analyze_analyst_improvements(unique_id, analyst, analysis_result)
+    
+    # Background stages fill these in on the stored report
+    stages = {'plagiarism': 'pending', 'knowledge_base': 'pending'}
+    analysis_result['plagiarism_detection'] = {
+        'checked': False,
+        'status': 'pending',
+        'preliminary_score': preliminary_plagiarism_score,
+        'score': 0.0,
+        'matches_found': 0,
+        'matches': []
+    }
+    if report_type in ['scenario_based', 'economy_situation']:
+        stages['backtesting'] = 'pending'
+        analysis_result['backtesting'] = {'enabled': True, 'status': 'pending'}
+    analysis_result['pipeline'] = {'status': 'running', 'stages': stages,
+                                   'started_at': datetime.utcnow().isoformat()}
+    
     report = Report(
         id=unique_id,
         analyst=analyst,
@@ -40474,7 +41235,13 @@ def analyze_report():
         tickers=json.dumps(indian_tickers),  # Store only Indian tickers for consistency
         topic=topic,  # New field
         sub_heading=sub_heading,  # New field
-        report_type=report_type  # New field
+        report_type=report_type,  # New field
+        ai_probability=analysis_result['ai_detection']['ai_probability'],
+        ai_confidence=analysis_result['ai_detection']['confidence'],
+        ai_classification=analysis_result['ai_detection']['classification'],
+        ai_analysis_result=json.dumps(ai_detection_result),
+        ai_checked=True,
+        skill_learning_analysis=json.dumps(skill_learning_data)
     )
     
     try:
@@ -40516,175 +41283,45 @@ def analyze_report():
                 app.logger.error(f"Final attempt to save report failed: {final_error}")
                 return jsonify({"error": "Failed to save report due to ID conflict"}), 500
 
-    # Perform plagiarism detection
-    plagiarism_matches = []
-    plagiarism_score = 0.0
-    try:
-        # Generate and store embeddings for the new report
-        update_report_embeddings(report.id, report_text)
-        
-        # Check for plagiarism against existing reports
-        plagiarism_matches = check_plagiarism(report_text, report.id, similarity_threshold=0.2)  # Lower threshold to capture more matches
-        
-        # Calculate overall plagiarism score and update report
-        if plagiarism_matches:
-            max_similarity = max(match['similarity'] for match in plagiarism_matches)
-            # Only consider high similarities (>0.8) as actual plagiarism concerns for scoring
-            high_similarity_matches = [m for m in plagiarism_matches if m['similarity'] > 0.8]
-            plagiarism_score = max_similarity if high_similarity_matches else 0.0
-            
-            # Try to update the report with plagiarism score
-            try:
-                if hasattr(report, 'plagiarism_score'):
-                    report.plagiarism_score = plagiarism_score
-                else:
-                    # Use raw SQL if attribute doesn't exist
-                    db.session.execute(
-                        db.text("UPDATE report SET plagiarism_score = :score WHERE id = :report_id"),
-                        {"score": plagiarism_score, "report_id": report.id}
-                    )
-            except Exception as update_error:
-                app.logger.warning(f"Could not update plagiarism score: {update_error}")
-        
-        try:
-            db.session.commit()
-        except Exception as commit_error:
-            app.logger.warning(f"Could not commit plagiarism updates: {commit_error}")
-        
-        app.logger.info(f"Plagiarism check completed for report {report.id}. Found {len(plagiarism_matches)} potential matches.")
-        
-    except Exception as e:
-        app.logger.error(f"Error in plagiarism detection for report {report.id}: {e}")
-    
-    # Perform AI detection
-    ai_detection_result = {}
+    # Stage 3: corpus checks, backtesting and knowledge base on the shared job queue
     try:
-        ai_detection_result = ai_detector.detect_ai_content(report_text)
-        
-        # Update report with AI detection results
-        try:
-            if hasattr(report, 'ai_probability'):
-                report.ai_probability = ai_detection_result['ai_probability']
-                report.ai_confidence = ai_detection_result['confidence']
-                report.ai_classification = ai_detection_result['classification']
-                report.ai_analysis_result = json.dumps(ai_detection_result)
-                report.ai_checked = True
-            else:
-                # Use raw SQL if attributes don't exist
-                db.session.execute(
-                    db.text("UPDATE report SET ai_probability = :prob, ai_confidence = :conf, ai_classification = :class, ai_analysis_result = :result, ai_checked = 1 WHERE id = :report_id"),
-                    {
-                        "prob": ai_detection_result['ai_probability'],
-                        "conf": ai_detection_result['confidence'],
-                        "class": ai_detection_result['classification'],
-                        "result": json.dumps(ai_detection_result),
-                        "report_id": report.id
-                    }
-                )
-        except Exception as update_error:
-            app.logger.warning(f"Could not update AI detection results: {update_error}")
-        
-        try:
-            db.session.commit()
-        except Exception as commit_error:
-            app.logger.warning(f"Could not commit AI detection updates: {commit_error}")
-        
-        app.logger.info(f"AI detection completed for report {report.id}. Classification: {ai_detection_result['classification']}")
-        
+        enqueue_report_pipeline(report.id, indian_tickers)
     except Exception as e:
-        app.logger.error(f"Error in AI detection for report {report.id}: {e}")
-        ai_detection_result = {
-            'ai_probability': 0.5,
-            'confidence': 0.1,
-            'classification': 'Analysis Failed',
-            'explanation': 'AI detection failed due to technical error'
-        }
-    
-    # Generate skill learning analysis
-    skill_learning_data = []
-    try:
-        skill_learning_data = generate_skill_learning_analysis(report_text, indian_tickers, analysis_result)
-        
-        # Update report with skill learning analysis
-        try:
-            if hasattr(report, 'skill_learning_analysis'):
-                report.skill_learning_analysis = json.dumps(skill_learning_data)
-            else:
-                # Use raw SQL if attribute doesn't exist
-                db.session.execute(
-                    db.text("UPDATE report SET skill_learning_analysis = :data WHERE id = :report_id"),
-                    {"data": json.dumps(skill_learning_data), "report_id": report.id}
-                )
-        except Exception as update_error:
-            app.logger.warning(f"Could not update skill learning analysis: {update_error}")
-        
-        try:
-            db.session.commit()
-        except Exception as commit_error:
-            app.logger.warning(f"Could not commit skill learning analysis: {commit_error}")
-        
-        app.logger.info(f"Skill learning analysis generated for report {report.id}. Found {len(skill_learning_data)} learning modules.")
-        
-    except Exception as e:
-        app.logger.error(f"Error generating skill learning analysis for report {report.id}: {e}")
-        skill_learning_data = []
-
-    # Add plagiarism results to the response
-    analysis_result['plagiarism_detection'] = {
-        'checked': True,
-        'score': plagiarism_score,
-        'matches_found': len(plagiarism_matches),
-        'matches': plagiarism_matches[:3] if plagiarism_matches else []  # Include top 3 matches
-    }
-    
-    # Add AI detection results to the response
-    analysis_result['ai_detection'] = {
-        'checked': True,
-        'ai_probability': ai_detection_result.get('ai_probability', 0.5),
-        'human_probability': ai_detection_result.get('human_probability', 0.5),
-        'confidence': ai_detection_result.get('confidence', 0.1),
-        'classification': ai_detection_result.get('classification', 'Unknown'),
-        'explanation': ai_detection_result.get('explanation', 'No explanation available'),
-        'detailed_analysis': ai_detection_result.get('detailed_analysis', {})
-    }
-    
-    # Analyze improvements from previous reports
-    improvement_analysis = analyze_analyst_improvements(report.id, analyst, analysis_result)
-    analysis_result['improvement_analysis'] = improvement_analysis
-    
-    # Add skill learning analysis to results
-    analysis_result['skill_learning'] = {
-        'enabled': True,
-        'modules_count': len(skill_learning_data),
-        'modules': skill_learning_data
-    }
-    
-    # Update knowledge base with new report
-    try:
-        add_report_to_knowledge_base(report)
-    except Exception as e:
-        app.logger.error(f"Error adding report to knowledge base: {e}")
-
-    # Perform backtesting for scenario-based and economy situation reports
-    backtesting_result = {}
-    if report.report_type in ['scenario_based', 'economy_situation']:
-        try:
-            backtesting_result = perform_report_backtesting(report, indian_tickers, analysis_result)
-            analysis_result['backtesting'] = backtesting_result
-            app.logger.info(f"Backtesting completed for report {report.id}. Score: {backtesting_result.get('overall_score', 'N/A')}")
-        except Exception as e:
-            app.logger.error(f"Error in backtesting for report {report.id}: {e}")
-            analysis_result['backtesting'] = {
-                'enabled': False,
-                'error': 'Backtesting failed due to technical error',
-                'overall_score': 0
-            }
+        db.session.rollback()
+        app.logger.error(f"Could not queue background stages for report {report.id}: {e}")
+        analysis_result['pipeline']['status'] = 'failed'
+    analysis_result['pipeline']['status_url'] = f"/api/report/{report.id}/pipeline"
 
     return jsonify({
         "report_id": report.id,
         "result": analysis_result
     })
 
+@app.route('/api/report/<report_id>/pipeline')
+def get_report_pipeline(report_id):
+    """Progress of the background /analyze stages for a submitted report"""
+    report = Report.query.get_or_404(report_id)
+    get_report_pipeline_pool()  # make sure this process also drains the shared queue
+    try:
+        analysis = json.loads(report.analysis_result) if report.analysis_result else {}
+    except Exception:
+        analysis = {}
+    job = ReportPipelineJob.query.get(report.id)
+    return jsonify({
+        'report_id': report.id,
+        'pipeline': analysis.get('pipeline', {'status': 'complete', 'stages': {}}),
+        'job': {
+            'status': job.status,
+            'attempts': job.attempts,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        } if job else None,
+        'plagiarism_detection': analysis.get('plagiarism_detection'),
+        'backtesting': analysis.get('backtesting')
+    })
+
 # ========== Scenario-Based Analysis Helper Functions ==========
 
 def perform_scenario_backtesting(stock_predictions, scenario_data):
@@ -46092,7 +46729,7 @@ def generate_chatbot_answer(question):
     """Generate answer using knowledge base and LLM"""
     try:
         # Search knowledge base for relevant content
-        relevant_entries = search_knowledge_base(question)
+        relevant_entries = search_knowledge_base_entries(question)
         
         if not relevant_entries:
             return "I don't have enough information to answer that question. Please ask about research reports, stocks, or topics in our database.", []
@@ -46117,35 +46754,154 @@ def generate_chatbot_answer(question):
         app.logger.error(f"Error generating chatbot answer: {e}")
         return "I'm having trouble processing your question right now. Please try again.", []
 
-def search_knowledge_base(question):
-    """Search knowledge base for relevant entries"""
+# --- BM25 full-text index over knowledge base entries and reports ---
+# Postings are written in the same transaction as the row (after_flush hook), so the index follows
+# every insert/update/delete without a rebuild; queries read only the postings of their own terms.
+# Rows that predate the index are indexed by the migration that creates it (d4f6b8c0e2a4).
+from utils.bm25_index import (KB_FIELDS as BM25_KB_FIELDS, REPORT_FIELDS as BM25_REPORT_FIELDS,
+                               analyze as bm25_analyze, query_terms as bm25_query_terms, rank as bm25_rank,
+                               row_fields as bm25_row_fields, snippet as bm25_snippet)
+
+SEARCH_INDEX_BACKFILL_BATCH = int(os.getenv('SEARCH_INDEX_BACKFILL_BATCH', '1000'))
+_KB_INDEXED_FIELDS = tuple(f[0] for f in BM25_KB_FIELDS)
+_REPORT_INDEXED_FIELDS = tuple(f[0] for f in BM25_REPORT_FIELDS)
+
+def _search_fields(doc_type, obj):
+    """(text, weight, is_snippet_field) per indexed field; the snippet field is what offsets point into."""
+    return bm25_row_fields(BM25_KB_FIELDS if doc_type == 'kb' else BM25_REPORT_FIELDS, obj)
+
+def _search_doc_ref(obj):
+    if isinstance(obj, KnowledgeBase):
+        return 'kb', str(obj.id)
+    if isinstance(obj, Report):
+        return 'report', str(obj.id)
+    return None
+
+def _write_search_document(conn, doc_type, doc_id, fields):
+    """Replace one document's postings using the given Core connection"""
+    _drop_search_document(conn, doc_type, doc_id)
+    terms, length = bm25_analyze(fields)
+    conn.execute(SearchDocument.__table__.insert(), [{
+        'doc_type': doc_type, 'doc_id': doc_id, 'length': length, 'indexed_at': datetime.utcnow()
+    }])
+    if terms:
+        conn.execute(SearchPosting.__table__.insert(), [
+            {'term': t, 'doc_type': doc_type, 'doc_id': doc_id, 'tf': tf, 'first_offset': off}
+            for t, (tf, off) in terms.items()
+        ])
+
+def _drop_search_document(conn, doc_type, doc_id):
+    for table in (SearchPosting.__table__, SearchDocument.__table__):
+        conn.execute(table.delete().where(table.c.doc_type == doc_type).where(table.c.doc_id == doc_id))
+
+@_sa_event.listens_for(db.session, 'after_flush')
+def _search_index_after_flush(session, flush_context):
+    """Keep postings in step with inserted/updated/deleted KnowledgeBase and Report rows"""
+    touched = []
+    for obj in list(session.new) + list(session.dirty):
+        ref = _search_doc_ref(obj)
+        if ref is None:
+            continue
+        if obj not in session.new:
+            fields = _KB_INDEXED_FIELDS if ref[0] == 'kb' else _REPORT_INDEXED_FIELDS
+            state = _sa_inspect(obj)
+            if not any(state.attrs[f].history.has_changes() for f in fields):
+                continue  # e.g. plagiarism/AI score updates: text unchanged
+        touched.append((ref, obj))
+    deleted = [ref for ref in map(_search_doc_ref, session.deleted) if ref is not None]
+    if not touched and not deleted:
+        return
+    # Errors propagate: swallowing them after a partial write would leave a PostgreSQL transaction aborted
+    conn = session.connection()
+    for (doc_type, doc_id), obj in touched:
+        _write_search_document(conn, doc_type, doc_id, _search_fields(doc_type, obj))
+    for doc_type, doc_id in deleted:
+        _drop_search_document(conn, doc_type, doc_id)
+
+def backfill_search_index(limit=None):
+    """Index up to `limit` KB entries / reports that have no search_document row; returns how many.
+    The migration indexes existing rows; this admin-triggered pass catches rows written outside the ORM."""
+    limit = limit or SEARCH_INDEX_BACKFILL_BATCH
+    done = 0
+    conn = db.session.connection()
+    for doc_type, model in (('kb', KnowledgeBase), ('report', Report)):
+        key = db.cast(model.id, db.String) if doc_type == 'kb' else model.id
+        missing = model.query.outerjoin(
+            SearchDocument, db.and_(SearchDocument.doc_type == doc_type, SearchDocument.doc_id == key)
+        ).filter(SearchDocument.doc_id.is_(None)).limit(max(0, limit - done)).all()
+        for obj in missing:
+            _write_search_document(conn, doc_type, str(obj.id), _search_fields(doc_type, obj))
+        done += len(missing)
+    if done:
+        db.session.commit()
+    return done
+
+def bm25_search(query, doc_types=('kb', 'report'), k=10):
+    """Ranked top-k [(doc_type, doc_id, score, offset, matched_terms)] for a free-text query"""
+    terms = bm25_query_terms(query)
+    if not terms:
+        return []
+    stats = db.session.query(db.func.count(SearchDocument.doc_id), db.func.avg(SearchDocument.length)).filter(
+        SearchDocument.doc_type.in_(doc_types)
+    ).one()
+    n_docs, avg_len = int(stats[0] or 0), float(stats[1] or 0.0)
+    if not n_docs:
+        return []
+    postings = db.session.query(
+        SearchPosting.doc_type, SearchPosting.doc_id, SearchPosting.term, SearchPosting.tf,
+        SearchDocument.length, SearchPosting.first_offset
+    ).join(
+        SearchDocument, db.and_(SearchDocument.doc_type == SearchPosting.doc_type, SearchDocument.doc_id == SearchPosting.doc_id)
+    ).filter(SearchPosting.term.in_(terms), SearchPosting.doc_type.in_(doc_types)).all()
+    hits = bm25_rank((((p[0], p[1]), p[2], p[3], p[4], p[5]) for p in postings), n_docs, avg_len, k=k)
+    return [(h.doc[0], h.doc[1], h.score, h.offset, h.terms) for h in hits]
+
+def _hydrate_search_hits(hits, doc_type, model, key=lambda v: v):
+    """Load rows for hits of one doc_type in rank order; prunes index entries of rows deleted in bulk"""
+    ids = [h[1] for h in hits if h[0] == doc_type]
+    if not ids:
+        return []
+    rows = {str(r.id): r for r in model.query.filter(model.id.in_([key(i) for i in ids])).all()}
+    stale = [i for i in ids if i not in rows]
+    if stale:
+        conn = db.session.connection()
+        for i in stale:
+            _drop_search_document(conn, doc_type, i)
+        db.session.commit()
+    return [(rows[h[1]], h) for h in hits if h[0] == doc_type and h[1] in rows]
+
+def search_knowledge_base_entries(question, limit=5):
+    """Search knowledge base for relevant entries (BM25 ranked)"""
     try:
-        # Extract keywords from question
-        question_keywords = extract_keywords_from_text(question.lower())
-        
-        # Search by keywords and content
-        relevant_entries = []
-        
-        # Direct keyword matching
-        for keyword in question_keywords:
-            entries = KnowledgeBase.query.filter(
-                db.or_(
-                    KnowledgeBase.keywords.contains(keyword),
-                    KnowledgeBase.content.contains(keyword),
-                    KnowledgeBase.title.contains(keyword)
-                )
-            ).limit(5).all()
-            relevant_entries.extend(entries)
-        
-        # Remove duplicates and sort by relevance
-        unique_entries = list({entry.id: entry for entry in relevant_entries}.values())
-        
-        return unique_entries[:5]  # Return top 5 most relevant
+        hits = bm25_search(question, doc_types=('kb',), k=limit)
+        return [entry for entry, _ in _hydrate_search_hits(hits, 'kb', KnowledgeBase, key=int)]
         
     except Exception as e:
+        db.session.rollback()
         app.logger.error(f"Error searching knowledge base: {e}")
         return []
 
+@app.route('/api/admin/search_index', methods=['GET', 'POST'])
+def admin_search_index():
+    """BM25 index coverage; POST indexes a batch of rows that are not indexed yet"""
+    is_admin = session.get('admin_name') or session.get('is_admin')
+    if not is_admin:
+        return jsonify({'ok': False, 'error': 'Admin access required'}), 403
+    indexed = 0
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        indexed = backfill_search_index(int(data.get('limit') or SEARCH_INDEX_BACKFILL_BATCH))
+    counts = dict(db.session.query(SearchDocument.doc_type, db.func.count(SearchDocument.doc_id))
+                  .group_by(SearchDocument.doc_type).all())
+    return jsonify({
+        'ok': True,
+        'indexed_now': indexed,
+        'documents': counts,
+        'knowledge_base_rows': KnowledgeBase.query.count(),
+        'report_rows': Report.query.count(),
+        'postings': db.session.query(db.func.count(SearchPosting.term)).scalar(),
+    })
+
 def extract_keywords_from_text(text):
     """Extract keywords from text"""
     try:
@@ -46306,114 +47062,6 @@ def generate_llm_answer(question, context):
         app.logger.error(f"Error generating LLM answer: {e}")
         return "I'm having trouble generating a response right now. Please try rephrasing your question."
 
-def calculate_analyst_performance_metrics(reports, improvements):
-    """Calculate comprehensive performance metrics for an analyst"""
-    if not reports:
-        return {
-            'total_reports': 0,
-            'avg_quality_score': 0,
-            'quality_trend': 'No Data',
-            'improvement_trend': 'No Data',
-            'best_report': None,
-            'recent_performance': [],
-            'total_improvements': 0,
-            'avg_improvement_score': 0
-        }
-    
-    # Basic metrics
-    total_reports = len(reports)
-    quality_scores = []
-    
-    # Parse analysis results for each report
-    for report in reports:
-        try:
-            analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-            if analysis.get('composite_quality_score'):
-                quality_scores.append(analysis['composite_quality_score'])
-        except:
-            continue
-    
-    avg_quality_score = sum(quality_scores) / len(quality_scores) if quality_scores else 0
-    
-    # Quality trend analysis
-    if len(quality_scores) >= 3:
-        recent_scores = quality_scores[:3]
-        older_scores = quality_scores[-3:] if len(quality_scores) > 3 else quality_scores
-        recent_avg = sum(recent_scores) / len(recent_scores)
-        older_avg = sum(older_scores) / len(older_scores)
-        
-        if recent_avg > older_avg + 0.05:
-            quality_trend = 'Improving'
-        elif recent_avg < older_avg - 0.05:
-            quality_trend = 'Declining'
-        else:
-            quality_trend = 'Stable'
-    else:
-        quality_trend = 'Insufficient Data'
-    
-    # Improvement trend
-    improvement_scores = [imp.improvement_score for imp in improvements]
-    if len(improvement_scores) >= 2:
-        recent_improvements = improvement_scores[:2]
-        avg_improvement = sum(recent_improvements) / len(recent_improvements)
-        if avg_improvement >= 0.6:
-            improvement_trend = 'Strong Improvement'
-        elif avg_improvement >= 0.4:
-            improvement_trend = 'Moderate Improvement'
-        else:
-            improvement_trend = 'Needs Focus'
-    else:
-        improvement_trend = 'No Data'
-    
-    # Best performing report
-    best_report = None
-    if quality_scores:
-        max_score = max(quality_scores)
-        for report in reports:
-            try:
-                analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-                if analysis.get('composite_quality_score', 0) == max_score:
-                    best_report = {
-                        'id': report.id,
-                        'score': max_score,
-                        'date': report.created_at.strftime('%Y-%m-%d')
-                    }
-                    break
-            except:
-                continue
-    
-    # Recent performance (last 5 reports)
-    recent_performance = []
-    for report in reports[:5]:
-        try:
-            analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-            recent_performance.append({
-                'id': report.id,
-                'date': report.created_at.strftime('%Y-%m-%d'),
-                'quality_score': analysis.get('composite_quality_score', 0),
-                'ai_probability': getattr(report, 'ai_probability', 0),
-                'plagiarism_score': getattr(report, 'plagiarism_score', 0)
-            })
-        except:
-            recent_performance.append({
-                'id': report.id,
-                'date': report.created_at.strftime('%Y-%m-%d'),
-                'quality_score': 0,
-                'ai_probability': getattr(report, 'ai_probability', 0),
-                'plagiarism_score': getattr(report, 'plagiarism_score', 0)
-            })
-    
-    return {
-        'total_reports': total_reports,
-        'avg_quality_score': round(avg_quality_score, 3),
-        'quality_trend': quality_trend,
-        'improvement_trend': improvement_trend,
-        'best_report': best_report,
-        'recent_performance': recent_performance,
-        'total_improvements': len(improvements),
-        'avg_improvement_score': round(sum(improvement_scores) / len(improvement_scores), 3) if improvement_scores else 0
-    }
-
 def migrate_database():
     """Handle database migrations for plagiarism detection features"""
     with app.app_context():
@@ -49966,50 +50614,220 @@ with app.app_context():
 
 
 
-def calculate_analyst_performance_metrics(reports, improvements):
-    """Calculate comprehensive performance metrics for an analyst"""
-    if not reports:
+# --- Materialized report scores and analyst / platform metrics rollups ---
+# analysis_result is parsed once, when a report is written (after_flush hook, same transaction):
+# report_score keeps the typed values and analyst_metrics_rollup additive counters per analyst plus
+# a platform row, so dashboards read a handful of pre-aggregated rows instead of every report.
+# Existing reports are scored by migration e5a7c9d1f3b5; POST /api/admin/metrics_rollup repairs
+# rows written outside the ORM.
+from utils.report_metrics import (
+    METRICS as REPORT_METRICS, PLATFORM_KEY as PLATFORM_ROLLUP_KEY, ROLLUP_COLUMNS as METRICS_ROLLUP_COLUMNS,
+    ROLLUP_COUNTERS as METRICS_ROLLUP_COUNTERS, SCORE_FIELDS as REPORT_SCORE_FIELDS, averages as rollup_averages,
+    extract_scores as extract_report_scores, quality_trend as rollup_quality_trend, rollup_delta,
+)
+
+DASHBOARD_RECENT_REPORTS = int(os.getenv('DASHBOARD_RECENT_REPORTS', '50'))
+METRICS_BACKFILL_BATCH = int(os.getenv('METRICS_BACKFILL_BATCH', '1000'))
+_REPORT_SCORED_FIELDS = ('analysis_result', 'analyst', 'created_at', 'ai_probability', 'plagiarism_score')
+
+def _report_score_row(report):
+    """report_score values for a Report (parses analysis_result once)"""
+    row = extract_report_scores(report.analysis_result)
+    row['ai_probability'] = report.ai_probability or 0.0
+    row['plagiarism_score'] = report.plagiarism_score or 0.0
+    row['analyst'] = report.analyst or ''
+    row['created_at'] = report.created_at
+    return row
+
+def _apply_rollup_delta(conn, key, delta, now):
+    if not any(delta.values()):
+        return
+    t = AnalystMetricsRollup.__table__
+    # One statement, so concurrent first reports of an analyst add up instead of racing on the insert
+    upsert(conn, t, [dict(delta, analyst=key, updated_at=now)], ['analyst'], lambda new: dict(
+        updated_at=now, **{c: t.c[c] + getattr(new, c) for c in METRICS_ROLLUP_COLUMNS}
+    ))
+
+def _refresh_rollup_best(conn, key, report_id, quality):
+    """Keep best_report_id current; only re-queries when the current best report lost its place"""
+    t, s = AnalystMetricsRollup.__table__, ReportScore.__table__
+    cur = conn.execute(db.select(t.c.best_report_id, t.c.best_quality).where(t.c.analyst == key)).first()
+    if cur is None:
+        return
+    if quality is not None and (cur.best_quality is None or quality >= cur.best_quality):
+        best = (report_id, quality)
+    elif cur.best_report_id == report_id:
+        q = db.select(s.c.report_id, s.c.quality).where(s.c.quality.isnot(None))
+        if key != PLATFORM_ROLLUP_KEY:
+            q = q.where(s.c.analyst == key)
+        top = conn.execute(q.order_by(s.c.quality.desc()).limit(1)).first()
+        best = (top.report_id, top.quality) if top else (None, None)
+    else:
+        return
+    conn.execute(t.update().where(t.c.analyst == key).values(best_report_id=best[0], best_quality=best[1]))
+
+def _store_report_score(conn, report_id, row, now):
+    """Replace a report's report_score row (row=None removes it) and apply the difference to the rollups"""
+    s = ReportScore.__table__
+    old = conn.execute(db.select(s).where(s.c.report_id == report_id)).mappings().first()
+    old = dict(old) if old is not None else None
+    if old is None and row is None:
+        return
+    conn.execute(s.delete().where(s.c.report_id == report_id))
+    if row is not None:
+        conn.execute(s.insert().values(report_id=report_id, updated_at=now, **{
+            k: row.get(k) for k in ('analyst', 'created_at') + REPORT_SCORE_FIELDS
+        }))
+    old_key = old['analyst'] if old is not None else None
+    new_key = row['analyst'] if row is not None else None
+    new_quality = row.get('quality') if row is not None else None
+    if old_key == new_key:
+        _apply_rollup_delta(conn, new_key, rollup_delta(old, row), now)
+    else:
+        if old_key is not None:
+            _apply_rollup_delta(conn, old_key, rollup_delta(old, None), now)
+            _refresh_rollup_best(conn, old_key, report_id, None)
+        if new_key is not None:
+            _apply_rollup_delta(conn, new_key, rollup_delta(None, row), now)
+    _apply_rollup_delta(conn, PLATFORM_ROLLUP_KEY, rollup_delta(old, row), now)
+    if new_key is not None:
+        _refresh_rollup_best(conn, new_key, report_id, new_quality)
+    _refresh_rollup_best(conn, PLATFORM_ROLLUP_KEY, report_id, new_quality)
+
+@_sa_event.listens_for(db.session, 'after_flush')
+def _report_metrics_after_flush(session, flush_context):
+    """Keep report_score and the metrics rollups in step with inserted/updated/deleted reports"""
+    changed = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Report):
+            continue
+        if obj not in session.new:
+            state = _sa_inspect(obj)
+            if not any(state.attrs[f].history.has_changes() for f in _REPORT_SCORED_FIELDS):
+                continue
+        changed.append(obj)
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Report)]
+    if not changed and not deleted:
+        return
+    # No try/except: a failed write must fail the flush, or the report would commit with half-applied rollups
+    conn = session.connection()
+    now = datetime.utcnow()
+    for obj in changed:
+        _store_report_score(conn, obj.id, _report_score_row(obj), now)
+    for report_id in deleted:
+        _store_report_score(conn, report_id, None, now)
+
+def backfill_report_scores(limit=None):
+    """Score up to `limit` reports without a report_score row and drop rows of reports deleted in bulk"""
+    limit = limit or METRICS_BACKFILL_BATCH
+    conn = db.session.connection()
+    now = datetime.utcnow()
+    missing = Report.query.options(db.load_only(
+        Report.id, Report.analyst, Report.created_at, Report.analysis_result, Report.ai_probability, Report.plagiarism_score
+    )).outerjoin(ReportScore, ReportScore.report_id == Report.id).filter(ReportScore.report_id.is_(None)).limit(limit).all()
+    for report in missing:
+        _store_report_score(conn, report.id, _report_score_row(report), now)
+    orphans = [r[0] for r in db.session.query(ReportScore.report_id).outerjoin(
+        Report, Report.id == ReportScore.report_id
+    ).filter(Report.id.is_(None)).limit(limit).all()]
+    for report_id in orphans:
+        _store_report_score(conn, report_id, None, now)
+    done = len(missing) + len(orphans)
+    if done:
+        db.session.commit()
+    return done
+
+def rebuild_metrics_rollups():
+    """Recompute every rollup row from report_score (repair after writes that bypassed the ORM)"""
+    s = ReportScore.__table__.c
+    aggs = [db.func.count(s.report_id).label('report_count')]
+    for column, field, kind in METRICS_ROLLUP_COUNTERS:
+        aggs.append((db.func.coalesce(db.func.sum(s[field]), 0) if kind == 'sum' else db.func.count(s[field])).label(column))
+    rows = [dict(r._mapping) for r in db.session.query(s.analyst, *aggs).group_by(s.analyst).all()]
+    platform = dict(db.session.query(*aggs).one()._mapping)
+    platform['analyst'] = PLATFORM_ROLLUP_KEY
+    if platform['report_count']:
+        rows.append(platform)
+    best = {}
+    for analyst, report_id, quality in db.session.query(s.analyst, s.report_id, s.quality).filter(s.quality.isnot(None)).all():
+        for key in (analyst, PLATFORM_ROLLUP_KEY):
+            if key not in best or quality > best[key][1]:
+                best[key] = (report_id, quality)
+    now = datetime.utcnow()
+    for r in rows:
+        r['best_report_id'], r['best_quality'] = best.get(r['analyst'], (None, None))
+        r['updated_at'] = now
+    conn = db.session.connection()
+    conn.execute(AnalystMetricsRollup.__table__.delete())
+    if rows:
+        conn.execute(AnalystMetricsRollup.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+def _report_score_analysis(score):
+    """The analysis_result keys dashboards read, rebuilt from a report_score row"""
+    analysis = {
+        'composite_quality_score': score.quality or 0,
+        'scores': {m: getattr(score, m) for m in REPORT_METRICS if getattr(score, m) is not None},
+        'flagged_alerts': {'total_alerts': int(score.alert_count or 0)},
+    }
+    if score.sebi_compliance is not None:
+        analysis['sebi_compliance_detailed'] = {'overall_compliance_score': score.sebi_compliance}
+    return analysis
+
+def calculate_analyst_performance_metrics(analyst_name, improvements):
+    """Performance metrics for an analyst, read from their rollup row and newest report scores"""
+    improvement_scores = [imp.improvement_score for imp in improvements if imp.improvement_score is not None]
+    row = db.session.get(AnalystMetricsRollup, analyst_name or '')
+    if row is None or not row.report_count:
         return {
             'total_reports': 0,
             'avg_quality_score': 0,
             'quality_trend': 'No Data',
-            'recent_performance': []
+            'quality_scores': [],
+            'best_report': None,
+            'total_improvements': len(improvements),
+            'avg_improvement_score': 0
         }
-    
-    total_reports = len(reports)
-    quality_scores = []
-    ai_scores = []
-    plagiarism_scores = []
-    
-    for report in reports:
-        try:
-            analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-            if analysis.get('composite_quality_score'):
-                quality_scores.append(analysis['composite_quality_score'] * 100)
-            
-            # AI detection scores
-            if hasattr(report, 'ai_probability'):
-                ai_scores.append(report.ai_probability)
-            
-            # Plagiarism scores
-            if hasattr(report, 'plagiarism_score'):
-                plagiarism_scores.append(report.plagiarism_score)
-        except:
-            pass
-    
-    avg_quality_score = sum(quality_scores) / len(quality_scores) if quality_scores else 0
-    avg_ai_probability = sum(ai_scores) / len(ai_scores) if ai_scores else 0
-    avg_plagiarism_score = sum(plagiarism_scores) / len(plagiarism_scores) if plagiarism_scores else 0
-    
+    avg = rollup_averages(row)
+    scored = ReportScore.query.filter(ReportScore.analyst == row.analyst, ReportScore.quality.isnot(None))
+    newest = [r.quality for r in scored.order_by(ReportScore.created_at.desc()).limit(10).all()]
+    oldest = [r.quality for r in scored.order_by(ReportScore.created_at.asc()).limit(3).all()]
     return {
-        'total_reports': total_reports,
-        'avg_quality_score': round(avg_quality_score, 1),
-        'avg_ai_probability': round(avg_ai_probability * 100, 1),
-        'avg_plagiarism_score': round(avg_plagiarism_score * 100, 1),
-        'quality_scores': quality_scores[:10],  # Last 10 for trending
-        'recent_reports': reports[:5]  # Last 5 reports
+        'total_reports': row.report_count,
+        'avg_quality_score': round(avg['quality'] * 100, 1),
+        'avg_ai_probability': round(avg['ai_probability'] * 100, 1),
+        'avg_plagiarism_score': round(avg['plagiarism_score'] * 100, 1),
+        'quality_trend': rollup_quality_trend(newest[:3], oldest),
+        'quality_scores': [q * 100 for q in newest],  # newest first, for trending
+        'best_report': {'id': row.best_report_id, 'score': row.best_quality} if row.best_report_id else None,
+        'total_improvements': len(improvements),
+        'avg_improvement_score': round(sum(improvement_scores) / len(improvement_scores), 3) if improvement_scores else 0
     }
 
+@app.route('/api/admin/metrics_rollup', methods=['GET', 'POST'])
+def admin_metrics_rollup():
+    """Rollup coverage; POST scores a batch of unscored reports, {"rebuild": true} recomputes all rollups"""
+    is_admin = session.get('admin_name') or session.get('is_admin')
+    if not is_admin:
+        return jsonify({'ok': False, 'error': 'Admin access required'}), 403
+    scored_now, rebuilt = 0, None
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        scored_now = backfill_report_scores(int(data.get('limit') or METRICS_BACKFILL_BATCH))
+        if data.get('rebuild'):
+            rebuilt = rebuild_metrics_rollups()
+    platform = db.session.get(AnalystMetricsRollup, PLATFORM_ROLLUP_KEY)
+    return jsonify({
+        'ok': True,
+        'scored_now': scored_now,
+        'rollup_rows_rebuilt': rebuilt,
+        'report_rows': Report.query.count(),
+        'report_score_rows': ReportScore.query.count(),
+        'analyst_rollups': AnalystMetricsRollup.query.filter(AnalystMetricsRollup.analyst != PLATFORM_ROLLUP_KEY).count(),
+        'platform_report_count': platform.report_count if platform else 0,
+    })
+
 def analyze_analyst_improvements(report_id, analyst, analysis_result):
     """Analyze improvements from previous reports"""
     try:
@@ -50074,7 +50892,7 @@ def analyze_analyst_improvements(report_id, analyst, analysis_result):
         }
 
 def add_report_to_knowledge_base(report):
-    """Add report to knowledge base for intelligent recommendations"""
+    """Add report to knowledge base for intelligent recommendations; returns False if it could not be stored"""
     try:
         # Extract key information from the report
         analysis = json.loads(report.analysis_result) if report.analysis_result else {}
@@ -50100,10 +50918,12 @@ def add_report_to_knowledge_base(report):
         
         db.session.commit()
         app.logger.info(f"Added report {report.id} to knowledge base")
+        return True
         
     except Exception as e:
         app.logger.error(f"Error adding report to knowledge base: {e}")
         db.session.rollback()
+        return False
 
 def extract_tickers_from_text(text):
     """Extract stock tickers from text"""
@@ -50310,144 +51130,61 @@ def search_knowledge_base(extracted_data):
             keywords = query_text.split()
             sectors = []
         
-        # Enhanced ticker search with better content extraction
-        ticker_variations = []
-        for ticker in tickers:
-            ticker_variations.extend([ticker, ticker.replace('.NS', ''), ticker + '.NS', ticker.replace('.BO', ''), ticker + '.BO'])
+        # One BM25 query over reports and KB entries (tickers, keywords and sectors as extra terms)
+        ticker_terms = set(bm25_query_terms(' '.join(tickers)))
+        search_query = ' '.join([query_text] + list(tickers) + list(keywords) + list(sectors))
+        hits = bm25_search(search_query, doc_types=('report', 'kb'), k=40)
+        top_score = max((h[2] for h in hits), default=0.0) or 1.0
         
-        # Also search for common ticker patterns in query text
-        import re
-        ticker_patterns = re.findall(r'\b[A-Z]{2,6}(?:\.NS|\.BO)?\b', query_text.upper())
-        ticker_variations.extend(ticker_patterns)
-        
-        # Remove duplicates
-        ticker_variations = list(set(ticker_variations))
-        
-        # Enhanced report search with content analysis
-        if ticker_variations:
-            for ticker in ticker_variations:
-                # Multi-field search with relevance scoring
-                reports = Report.query.filter(
-                    db.or_(
-                        Report.tickers.like(f'%{ticker}%'),
-                        Report.analysis_result.like(f'%{ticker}%'),
-                        Report.original_text.like(f'%{ticker}%')
-                    )
-                ).order_by(Report.created_at.desc()).limit(15).all()  # Increased limit for better coverage
+        for report, (doc_type, doc_id, score, offset, matched) in _hydrate_search_hits(hits, 'report', Report)[:20]:
+            try:
+                # Parse analysis result for structured data extraction
+                analysis = json.loads(report.analysis_result) if report.analysis_result else {}
+                relevance = round(score / top_score, 4)
+                start, end, excerpt = bm25_snippet(report.original_text or '', offset, 500)
                 
-                for report in reports:
-                    try:
-                        # Parse analysis result for structured data extraction
-                        analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-                        
-                        # Enhanced content extraction
-                        content_score = calculate_content_relevance(report, ticker, keywords)
-                        
-                        # Extract key insights from the report content
-                        key_insights = extract_key_insights_from_report(report, analysis)
-                        
-                        # Get financial metrics if available
-                        financial_data = extract_financial_metrics(analysis)
-                        
-                        report_data = {
-                            'id': report.id,
-                            'analyst': report.analyst,
-                            'created_at': report.created_at,
-                            'analysis': analysis,
-                            'tickers': json.loads(report.tickers) if report.tickers else [],
-                            'relevance_score': content_score,
-                            'key_insights': key_insights,
-                            'financial_data': financial_data,
-                            'content_summary': generate_report_summary(report, analysis),
-                            'original_content_excerpt': report.original_text[:500] if report.original_text else ""
-                        }
-                        
-                        results['reports'].append(report_data)
-                        results['coverage_areas'].add(ticker)
-                        
-                        # Track content matches for quality scoring
-                        results['content_matches'].append({
-                            'report_id': report.id,
-                            'match_type': 'ticker',
-                            'match_value': ticker,
-                            'confidence': content_score
-                        })
-                        
-                    except Exception as e:
-                        app.logger.warning(f"Error processing report {report.id}: {e}")
-                        continue
-        
-        # Enhanced keyword and sector search
-        search_terms = keywords + sectors
-        if search_terms:
-            for term in search_terms[:15]:  # Expanded search
-                # Advanced report search with context
-                reports = Report.query.filter(
-                    db.or_(
-                        Report.analysis_result.like(f'%{term}%'),
-                        Report.original_text.like(f'%{term}%')
-                    )
-                ).order_by(Report.created_at.desc()).limit(8).all()
+                report_data = {
+                    'id': report.id,
+                    'analyst': report.analyst,
+                    'created_at': report.created_at,
+                    'analysis': analysis,
+                    'tickers': json.loads(report.tickers) if report.tickers else [],
+                    'relevance_score': relevance,
+                    'bm25_score': score,
+                    'key_insights': extract_key_insights_from_report(report, analysis),
+                    'financial_data': extract_financial_metrics(analysis),
+                    'content_summary': generate_report_summary(report, analysis),
+                    'original_content_excerpt': excerpt,
+                    'snippet_offsets': [start, end]
+                }
                 
-                for report in reports:
-                    try:
-                        # Avoid duplicates
-                        if any(r['id'] == report.id for r in results['reports']):
-                            continue
-                            
-                        analysis = json.loads(report.analysis_result) if report.analysis_result else {}
-                        
-                        # Calculate semantic relevance
-                        semantic_score = calculate_semantic_relevance(report, term, query_text)
-                        
-                        # Only include if relevance is significant
-                        if semantic_score > 0.3:
-                            key_insights = extract_key_insights_from_report(report, analysis)
-                            financial_data = extract_financial_metrics(analysis)
-                            
-                            report_data = {
-                                'id': report.id,
-                                'analyst': report.analyst,
-                                'created_at': report.created_at,
-                                'analysis': analysis,
-                                'tickers': json.loads(report.tickers) if report.tickers else [],
-                                'relevance_score': semantic_score,
-                                'key_insights': key_insights,
-                                'financial_data': financial_data,
-                                'content_summary': generate_report_summary(report, analysis),
-                                'original_content_excerpt': report.original_text[:500] if report.original_text else ""
-                            }
-                            
-                            results['reports'].append(report_data)
-                            results['coverage_areas'].add(term)
-                            
-                            results['content_matches'].append({
-                                'report_id': report.id,
-                                'match_type': 'keyword',
-                                'match_value': term,
-                                'confidence': semantic_score
-                            })
-                            
-                    except Exception as e:
-                        app.logger.warning(f"Error processing keyword search for {term}: {e}")
-                        continue
-        
-        # Search knowledge base entries
-        if keywords:
-            for keyword in keywords[:5]:  # Top 5 keywords
-                kb_entries = KnowledgeBase.query.filter(
-                    KnowledgeBase.keywords.like(f'%{keyword}%')
-                ).limit(3).all()
+                results['reports'].append(report_data)
+                results['coverage_areas'].update(matched)
                 
-                for entry in kb_entries:
-                    results['knowledge_entries'].append({
-                        'id': entry.id,
-                        'title': entry.title,
-                        'content': entry.content[:500],  # First 500 chars
-                        'summary': entry.summary,
-                        'content_type': entry.content_type,
-                        'relevance_score': calculate_kb_relevance_score(entry, extracted_data)
-                    })
+                # Track content matches for quality scoring
+                results['content_matches'].append({
+                    'report_id': report.id,
+                    'match_type': 'ticker' if ticker_terms & set(matched) else 'keyword',
+                    'match_value': ', '.join(matched),
+                    'confidence': relevance
+                })
+                
+            except Exception as e:
+                app.logger.warning(f"Error processing report {report.id}: {e}")
+                continue
+        
+        # Knowledge base entries from the same ranking
+        for entry, (doc_type, doc_id, score, offset, matched) in _hydrate_search_hits(hits, 'kb', KnowledgeBase, key=int)[:5]:
+            start, end, excerpt = bm25_snippet(entry.content or '', offset, 500)
+            results['knowledge_entries'].append({
+                'id': entry.id,
+                'title': entry.title,
+                'content': excerpt,
+                'snippet_offsets': [start, end],
+                'summary': entry.summary,
+                'content_type': entry.content_type,
+                'relevance_score': round(score / top_score, 4)
+            })
         
         # Sort by relevance
         results['reports'].sort(key=lambda x: x['relevance_score'], reverse=True)
@@ -54307,6 +55044,188 @@ def upload_report_to_github_api():
 options_alerts = []
 options_preferences = {}
 
+# ========== Scheduled tasks ==========
+# Periodic jobs (chain recorder, options scanner) are scheduled_task rows: the config and the last
+# run's status live in the database, so every worker reads and changes the same state. Each process
+# runs a small SCHEDULED_TASK_WORKERS pool that claims due tasks; a claim takes a lease, and only the
+# lease holder runs the task until it stops renewing (lease = two intervals + grace), after which any
+# other worker takes over. SCHEDULED_TASK_WORKERS=0 keeps a process out of the rotation.
+
+import socket
+
+SCHEDULED_TASK_WORKERS = int(os.getenv('SCHEDULED_TASK_WORKERS', '2'))
+SCHEDULED_TASK_POLL_SECONDS = float(os.getenv('SCHEDULED_TASK_POLL_SECONDS', '2'))
+SCHEDULED_TASK_LEASE_GRACE = float(os.getenv('SCHEDULED_TASK_LEASE_GRACE', '30'))
+_SCHEDULED_TASK_WORKER_ID = f"{socket.gethostname()}:pid{os.getpid()}"
+_SCHEDULED_TASK_HANDLERS = {}
+_SCHEDULED_TASK_DEFAULTS = {}  # name -> (interval, config) for tasks every deployment runs
+_scheduled_tasks_running = set()
+_scheduled_task_pool = None
+_scheduled_task_lock = threading.Lock()
+
+def scheduled_task(name, default_interval=None, default_config=None):
+    """Register handler(config) -> JSON-serialisable result as the body of scheduled task `name`;
+    config is the stored config plus the task's 'interval'. With default_interval the task row is
+    created (enabled) when the first worker starts its pool; an existing row keeps its settings."""
+    def register(handler):
+        _SCHEDULED_TASK_HANDLERS[name] = handler
+        if default_interval:
+            _SCHEDULED_TASK_DEFAULTS[name] = (default_interval, default_config or {})
+        return handler
+    return register
+
+def get_scheduled_task_pool():
+    """Process-wide pool claiming due scheduled tasks (None when SCHEDULED_TASK_WORKERS is 0)"""
+    global _scheduled_task_pool
+    if _scheduled_task_pool is None and SCHEDULED_TASK_WORKERS > 0:
+        with _scheduled_task_lock:
+            if _scheduled_task_pool is None:
+                from utils.job_queue import JobWorkerPool
+                _scheduled_task_pool = JobWorkerPool(
+                    _claim_scheduled_task, _run_scheduled_task, max_workers=SCHEDULED_TASK_WORKERS,
+                    poll_interval=SCHEDULED_TASK_POLL_SECONDS, name='scheduled-task',
+                ).start()
+    return _scheduled_task_pool
+
+def _scheduled_task_lease(interval, now):
+    return now + timedelta(seconds=2 * float(interval) + SCHEDULED_TASK_LEASE_GRACE)
+
+def _claim_scheduled_task():
+    """Take the lease on a due task this worker may run; returns its name or None"""
+    with app.app_context():
+        now = datetime.utcnow()
+        with _scheduled_task_lock:
+            names = set(_SCHEDULED_TASK_HANDLERS) - _scheduled_tasks_running
+        if not names:
+            return None
+        due = ScheduledTask.query.filter(
+            ScheduledTask.enabled.is_(True), ScheduledTask.name.in_(names),
+            db.or_(ScheduledTask.next_run_at.is_(None), ScheduledTask.next_run_at <= now),
+            db.or_(ScheduledTask.leader.is_(None), ScheduledTask.leader == _SCHEDULED_TASK_WORKER_ID,
+                   ScheduledTask.lease_until.is_(None), ScheduledTask.lease_until < now),
+        ).order_by(ScheduledTask.next_run_at.asc()).all()
+        for task in due:
+            # Compare-and-set on the row as read, so two workers cannot both take an expired lease
+            claimed = (ScheduledTask.query
+                       .filter_by(name=task.name, leader=task.leader, lease_until=task.lease_until,
+                                  next_run_at=task.next_run_at)
+                       .update({'leader': _SCHEDULED_TASK_WORKER_ID,
+                                'lease_until': _scheduled_task_lease(task.interval_seconds, now),
+                                'next_run_at': now + timedelta(seconds=task.interval_seconds)},
+                               synchronize_session=False))
+            db.session.commit()
+            if claimed == 1:
+                with _scheduled_task_lock:
+                    if task.name in _scheduled_tasks_running:
+                        continue
+                    _scheduled_tasks_running.add(task.name)
+                return task.name
+        return None
+
+def _run_scheduled_task(name):
+    """Run one cycle of a claimed task and publish its outcome in status_json"""
+    try:
+        with app.app_context():
+            task = db.session.get(ScheduledTask, name)
+            if task is None or not task.enabled:
+                return
+            interval = task.interval_seconds
+            config = {'interval': interval, **json.loads(task.config_json or '{}')}
+            db.session.rollback()
+            started = time.time()
+            status = {'worker': _SCHEDULED_TASK_WORKER_ID, 'started': datetime.utcnow().isoformat()}
+            try:
+                status['result'] = _SCHEDULED_TASK_HANDLERS[name](config)
+                status['ok'] = True
+            except Exception as e:
+                app.logger.error(f"Scheduled task {name} failed: {e}")
+                status.update(ok=False, error=str(e))
+            status['duration'] = round(time.time() - started, 3)
+            now = datetime.utcnow()
+            (ScheduledTask.query.filter_by(name=name, leader=_SCHEDULED_TASK_WORKER_ID)
+             .update({'status_json': json.dumps(status, default=str), 'last_run_at': now,
+                      'lease_until': _scheduled_task_lease(interval, now)}, synchronize_session=False))
+            db.session.commit()
+    finally:
+        with _scheduled_task_lock:
+            _scheduled_tasks_running.discard(name)
+
+def configure_scheduled_task(name, enabled, interval=None, config=None):
+    """Enable/disable a task and store its config; an enabled task becomes due immediately"""
+    task = db.session.get(ScheduledTask, name)
+    if task is None:
+        task = ScheduledTask(name=name)
+        db.session.add(task)
+    task.enabled = bool(enabled)
+    if interval is not None:
+        task.interval_seconds = max(1.0, float(interval))
+    elif task.interval_seconds is None:
+        task.interval_seconds = 60.0
+    if config is not None:
+        task.config_json = json.dumps(config)
+    task.next_run_at = datetime.utcnow()
+    task.updated_at = datetime.utcnow()
+    db.session.commit()
+    pool = get_scheduled_task_pool()
+    if pool is not None:
+        pool.notify()
+    return scheduled_task_status(name)
+
+def ensure_scheduled_task(name, interval, config):
+    """Create an enabled task unless one exists (an existing row keeps its settings); True when created"""
+    created = insert_ignore(db.session.connection(), ScheduledTask.__table__, [{
+        'name': name, 'enabled': True, 'interval_seconds': float(interval), 'config_json': json.dumps(config),
+        'next_run_at': datetime.utcnow(), 'updated_at': datetime.utcnow()}], ['name'])
+    db.session.commit()
+    pool = get_scheduled_task_pool() if created else None
+    if pool is not None:
+        pool.notify()
+    return bool(created)
+
+def scheduled_task_status(name):
+    """Shared view of a task: config, current leader and the last run's status"""
+    task = db.session.get(ScheduledTask, name)
+    if task is None:
+        return {'name': name, 'enabled': False, 'running': False, 'config': {}, 'last_status': None}
+    now = datetime.utcnow()
+    return {
+        'name': name,
+        'enabled': bool(task.enabled),
+        'running': bool(task.enabled and task.leader and task.lease_until and task.lease_until >= now),
+        'interval': task.interval_seconds,
+        'config': json.loads(task.config_json or '{}'),
+        'leader': task.leader,
+        'lease_until': task.lease_until.isoformat() if task.lease_until else None,
+        'next_run_at': task.next_run_at.isoformat() if task.next_run_at else None,
+        'last_run_at': task.last_run_at.isoformat() if task.last_run_at else None,
+        'last_status': json.loads(task.status_json) if task.status_json else None,
+    }
+
+@app.before_request
+def _start_scheduled_task_pool():
+    if _scheduled_task_pool is None and SCHEDULED_TASK_WORKERS > 0:
+        get_scheduled_task_pool()
+        try:
+            for name, (interval, config) in _SCHEDULED_TASK_DEFAULTS.items():
+                if db.session.get(ScheduledTask, name) is None:
+                    ensure_scheduled_task(name, interval, config)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Could not create default scheduled tasks: {e}")
+
+# Strike-level chain history (append-only columnar store) and its scheduled recorder. Only
+# server-side fetches write the shared store; chains saved by users go to the per-owner user store.
+from utils.option_chain_store import (ChainRecorder, expected_move_backtest, get_option_chain_store,
+                                      get_user_chain_store, user_underlying)
+
+OPTION_CHAIN_RECORDER_INTERVAL = int(os.getenv('OPTION_CHAIN_RECORDER_INTERVAL', '60'))
+
+def _chain_owner():
+    """Partition key for chains saved by the current session"""
+    if session.get('investor_id') and not session.get('is_admin'):
+        return f"investor_{session['investor_id']}"
+    return f"admin_{session.get('admin_id') or session.get('user_id') or 'admin'}"
+
 @app.route('/options_analyzer')
 @admin_or_investor_required
 @investor_plan_at_least('pro')
@@ -54334,6 +55253,25 @@ def test_enhanced_analytics():
     """Test page for Enhanced Analytics functionality"""
     return render_template('enhanced_analytics_test.html')
 
+def fetch_upstox_chain(symbol, expiry, strategy='PC_CHAIN'):
+    """Fetch one strategy chain from Upstox and transform it to our format (raises on HTTP errors)"""
+    # Prepare Upstox API URL
+    base_url = "https://service.upstox.com/option-analytics-tool/open/v1/strategy-chains"
+    params = {
+        'assetKey': symbol,
+        'strategyChainType': strategy,
+        'expiry': expiry
+    }
+    
+    app.logger.info(f"Fetching options data from Upstox for {symbol}, expiry: {expiry}")
+    
+    # Fetch data from Upstox API
+    response = requests.get(base_url, params=params, timeout=10)
+    response.raise_for_status()
+    
+    # Transform Upstox data to our format
+    return transform_upstox_data(response.json(), symbol, expiry, strategy)
+
 @app.route('/api/options/strategy_chain')
 @admin_or_investor_required  
 @investor_plan_at_least('pro')
@@ -54344,24 +55282,7 @@ def api_options_strategy_chain():
         expiry = request.args.get('expiry', '14-08-2025')
         strategy = request.args.get('strategy', 'PC_CHAIN')
         
-        # Prepare Upstox API URL
-        base_url = "https://service.upstox.com/option-analytics-tool/open/v1/strategy-chains"
-        params = {
-            'assetKey': symbol,
-            'strategyChainType': strategy,
-            'expiry': expiry
-        }
-        
-        app.logger.info(f"Fetching options data from Upstox for {symbol}, expiry: {expiry}")
-        
-        # Fetch data from Upstox API
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        upstox_data = response.json()
-        
-        # Transform Upstox data to our format
-        transformed_data = transform_upstox_data(upstox_data, symbol, expiry, strategy)
+        transformed_data = fetch_upstox_chain(symbol, expiry, strategy)
         
         return jsonify(transformed_data)
         
@@ -54427,11 +55348,12 @@ def transform_upstox_data(upstox_data, symbol, expiry, strategy):
         # Sort by strike price
         raw_options.sort(key=lambda x: x['strike'])
         
-        # Calculate metrics
-        total_call_volume = sum(opt['call_volume'] for opt in raw_options)
-        total_put_volume = sum(opt['put_volume'] for opt in raw_options)
-        total_volume = total_call_volume + total_put_volume
-        put_call_ratio = total_put_volume / max(total_call_volume, 1)
+        # Calculate metrics from the shared strike-sorted chain arrays
+        from models.options_chain_analytics import get_chain_analytics
+        chain = get_chain_analytics(raw_options)
+        flow = chain.pcr()
+        total_volume = flow['total_call_volume'] + flow['total_put_volume']
+        put_call_ratio = flow['volume_pcr']
         
         # Calculate average IV
         call_ivs = [opt['call_iv'] for opt in raw_options if opt['call_iv'] > 0]
@@ -54448,14 +55370,8 @@ def transform_upstox_data(upstox_data, symbol, expiry, strategy):
         asset_ltp_data = extended_data.get('assetLtpc', {})
         current_price = asset_ltp_data.get('ltp', 24000)  # Default fallback
         
-        # Calculate max pain (simplified - strike with highest total OI)
-        strike_oi = {}
-        for opt in raw_options:
-            strike = opt['strike']
-            total_oi = opt['call_oi'] + opt['put_oi']
-            strike_oi[strike] = strike_oi.get(strike, 0) + total_oi
-        
-        max_pain = max(strike_oi.keys(), key=lambda x: strike_oi[x]) if strike_oi else current_price
+        # Max pain: strike where option writers pay out the least at expiry
+        max_pain = chain.max_pain()['max_pain_strike'] if len(chain) else current_price
         
         # Calculate expected move (simplified)
         if avg_iv > 0:
@@ -54473,7 +55389,10 @@ def transform_upstox_data(upstox_data, symbol, expiry, strategy):
             'metrics': {
                 'total_volume': total_volume,
                 'put_call_ratio': round(put_call_ratio, 2),
+                'oi_pcr': round(flow['oi_pcr'], 2),
                 'max_pain': max_pain,
+                'oi_walls': chain.oi_walls(current_price),
+                'iv_skew': chain.iv_skew(current_price),
                 'avg_iv': round(avg_iv, 4),
                 'expected_move': round(expected_move, 2),
                 'expected_move_range': {
@@ -54720,7 +55639,14 @@ def api_options_save_chain():
         db.session.add(snapshot)
         db.session.commit()
         
-        return jsonify({'success': True, 'id': snapshot.id})
+        # Keep the strike-level chain alongside the metrics blob, in the saver's own partition
+        strikes_saved = 0
+        if data.get('raw') and snapshot.asset_key and snapshot.expiry:
+            strikes_saved = get_user_chain_store().append(
+                user_underlying(_chain_owner(), snapshot.asset_key), snapshot.expiry, data['raw'],
+                ts=snapshot.created_at, underlying_price=data.get('underlying_price'))
+        
+        return jsonify({'success': True, 'id': snapshot.id, 'strikes_saved': strikes_saved})
         
     except Exception as e:
         app.logger.error(f"Error saving snapshot: {e}")
@@ -54781,6 +55707,18 @@ def api_options_compare_snapshots():
                 'metrics': json.loads(snapshot.metrics_json) if snapshot.metrics_json else {}
             })
         
+        # Strike-level diff between the oldest and newest snapshot of the same chain
+        ordered = sorted(snapshots, key=lambda s: s.created_at)
+        if len(ordered) >= 2 and len({(s.asset_key, s.expiry) for s in ordered}) == 1:
+            diff = get_user_chain_store().diff(user_underlying(_chain_owner(), ordered[0].asset_key),
+                                               ordered[0].expiry, ordered[0].created_at, ordered[-1].created_at)
+            if not diff.empty:
+                comparison['comparison_metrics'] = {
+                    'from': diff.attrs['before'].isoformat(),
+                    'to': diff.attrs['after'].isoformat(),
+                    'strike_diff': json.loads(diff.to_json(orient='records'))
+                }
+        
         return jsonify(comparison)
         
     except Exception as e:
@@ -54790,27 +55728,17 @@ def api_options_compare_snapshots():
 @app.route('/api/options/expected_move_backtest')
 @admin_or_investor_required
 def api_options_expected_move_backtest():
-    """Backtest expected move calculations"""
+    """Backtest the ATM-straddle expected move against realised moves in recorded chain history"""
     try:
-        symbol = request.args.get('symbol', 'AAPL')
+        symbol = request.args.get('symbol', 'NSE_INDEX|Nifty 50')
         days_back = int(request.args.get('days_back', 30))
+        expiry = request.args.get('expiry') or None
+        start = (datetime.now() - timedelta(days=days_back)).date()
         
-        # Mock backtest data - replace with real historical analysis
-        backtest_results = {
-            'accuracy': 72.5,
-            'total_tests': days_back,
-            'successful_predictions': int(days_back * 0.725),
-            'average_error': 2.1,
-            'results_by_day': [
-                {
-                    'date': '2024-01-15',
-                    'predicted_move': 3.2,
-                    'actual_move': 2.8,
-                    'accuracy': 87.5
-                }
-                # Add more historical data points
-            ]
-        }
+        backtest_results = expected_move_backtest(get_option_chain_store(), symbol, start, expiry=expiry)
+        backtest_results['symbol'] = symbol
+        if not backtest_results['total_tests']:
+            backtest_results['message'] = 'No recorded chain history with a settled expiry in this window'
         
         return jsonify(backtest_results)
         
@@ -54818,6 +55746,58 @@ def api_options_expected_move_backtest():
         app.logger.error(f"Error running backtest: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/options/chain_history')
+@admin_or_investor_required
+@investor_plan_at_least('pro')
+def api_options_chain_history():
+    """Strike-level chain history for a time range, returned column-wise"""
+    try:
+        symbol = request.args.get('symbol', 'NSE_INDEX|Nifty 50')
+        expiry = request.args.get('expiry') or None
+        strikes = [float(k) for k in request.args.getlist('strikes') if k]
+        columns = [c for c in (request.args.get('columns') or '').split(',') if c] or None
+        frame = get_option_chain_store().query(symbol, expiry, start=request.args.get('start'),
+                                               end=request.args.get('end'), strikes=strikes or None,
+                                               columns=columns)
+        limit = int(request.args.get('limit', 200000))
+        payload = json.loads(frame.head(limit).to_json(orient='split', index=False, date_format='iso'))
+        return jsonify({'success': True, 'symbol': symbol, 'rows': len(frame), 'truncated': len(frame) > limit,
+                        'columns': payload['columns'], 'data': payload['data']})
+    except Exception as e:
+        app.logger.error(f"Error reading chain history: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@scheduled_task('option_chain_recorder')
+def _record_option_chains(config):
+    recorder = ChainRecorder(get_option_chain_store(), fetch_upstox_chain,
+                             [tuple(t) for t in config.get('targets', [])])
+    written = recorder.record_once()
+    return {'written': written, 'errors': recorder.last_errors, 'snapshots': recorder.snapshots}
+
+@app.route('/api/options/chain_recorder', methods=['GET', 'POST'])
+@admin_required
+def api_options_chain_recorder():
+    """Start/stop the scheduled chain recorder (POST {action, targets: [[symbol, expiry], ...], interval})"""
+    try:
+        if request.method == 'POST':
+            body = request.get_json() or {}
+            if body.get('action', 'start') == 'start':
+                targets = [list(t) for t in body.get('targets', []) if len(t) == 2]
+                if not targets:
+                    return jsonify({'success': False, 'error': 'targets must be [[symbol, expiry], ...]'}), 400
+                configure_scheduled_task('option_chain_recorder', True,
+                                         interval=body.get('interval', OPTION_CHAIN_RECORDER_INTERVAL),
+                                         config={'targets': targets})
+            else:
+                configure_scheduled_task('option_chain_recorder', False)
+        status = scheduled_task_status('option_chain_recorder')
+        status['store'] = get_option_chain_store().stats()
+        return jsonify({'success': True, 'recorder': status})
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Chain recorder error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/options/preferences', methods=['GET', 'POST'])
 @admin_or_investor_required
 def api_options_preferences():
@@ -54913,74 +55893,28 @@ def _make_recommendations_from_chain(chain):
         app.logger.error(f"Recommendation heuristic error: {e}")
         return []
 
-def _bs_call_price(S, K, r, sigma, T):
-    # Basic Black-Scholes call price; r as 0.0 for now
-    try:
-        import math
-        from math import log, sqrt, exp
-        from statistics import NormalDist
-        if S <= 0 or K <= 0 or sigma <= 0 or T <= 0:
-            return max(S - K, 0)
-        d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-        N = NormalDist()
-        return S * N.cdf(d1) - K * math.exp(-r * T) * N.cdf(d2)
-    except Exception:
-        return max(S - K, 0)
+SYNTHETIC_TEST_MAX_PATHS = int(os.getenv('SYNTHETIC_TEST_MAX_PATHS', '200000'))
 
-def _simulate_gbm_paths(S0, sigma, days, n_paths):
-    import math
-    import random
-    dt = 1.0/252.0
-    paths = []
-    for _ in range(n_paths):
-        S = S0
-        series = [S]
-        for _ in range(days):
-            z = random.gauss(0, 1)
-            S = S * math.exp(-0.5 * sigma * sigma * dt + sigma * math.sqrt(dt) * z)
-            series.append(S)
-        paths.append(series)
-    return paths
+def _synthetic_test_paths(n_paths):
+    # Scenario count actually simulated (and recorded) for a requested n_paths
+    return max(0, min(int(n_paths), SYNTHETIC_TEST_MAX_PATHS))
+
+def _bs_call_price(S, K, r, sigma, T):
+    # Scalar/array Black-Scholes call; see models.options_pricing for the vectorized kernel
+    from models.options_pricing import bs_price
+    return bs_price(S, K, T, sigma, r, is_call=True)
 
 def _run_synthetic_test_for_call(strike, entry_premium, S0, iv, horizon_days, n_paths, slippage=0.0, fees=0.0):
-    # Simple mark-to-market exit at horizon using BS price with constant IV
-    T_years = max(horizon_days, 1) / 252.0
-    sigma = max(iv, 0.01)
-    paths = _simulate_gbm_paths(S0, sigma, horizon_days, n_paths)
-    pnls = []
-    for series in paths:
-        S_T = series[-1]
-        exit_price = _bs_call_price(S_T, strike, 0.0, sigma, T_years)
-        pnl = (exit_price - entry_premium) - slippage - fees
-        pnls.append(pnl)
-    if not pnls:
-        return {'mean': 0, 'p50': 0, 'p05': 0, 'p95': 0, 'samples': []}
-    pnls_sorted = sorted(pnls)
-    import statistics as stats
-    def pct(p):
-        idx = max(0, min(len(pnls_sorted)-1, int(p * (len(pnls_sorted)-1))))
-        return pnls_sorted[idx]
-    return {
-        'mean': round(stats.fmean(pnls), 4),
-        'p50': round(pct(0.5), 4),
-        'p05': round(pct(0.05), 4),
-        'p95': round(pct(0.95), 4),
-        'samples': pnls[:min(len(pnls), 2000)]  # cap size for storage
-    }
+    # Mark-to-market exit at horizon using BS price with constant IV, priced over all
+    # scenarios at once (antithetic draws of the terminal price)
+    from models.options_pricing import synthetic_long_option_test
+    n_paths = _synthetic_test_paths(n_paths)
+    return synthetic_long_option_test(strike, entry_premium, S0, iv, horizon_days, n_paths,
+                                      slippage=slippage, fees=fees, is_call=True)
 
 def _bs_put_price(S, K, r, sigma, T):
-    try:
-        import math
-        from statistics import NormalDist
-        if S <= 0 or K <= 0 or sigma <= 0 or T <= 0:
-            return max(K - S, 0)
-        d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-        N = NormalDist()
-        return K * math.exp(-r * T) * N.cdf(-d2) - S * N.cdf(-d1)
-    except Exception:
-        return max(K - S, 0)
+    from models.options_pricing import bs_price
+    return bs_price(S, K, T, sigma, r, is_call=False)
 
 def _days_to_expiry(expiry_str: str):
     try:
@@ -55013,22 +55947,22 @@ def api_options_predict_prices():
         T = max(days, 1) / 365.0
         r = 0.0
 
+        rows = [o for o in chain.get('raw', []) if float(o.get('strike') or 0) > 0]
+        strikes = np.array([float(o.get('strike')) for o in rows])
+        # IVs
+        call_ivs = np.array([float(o.get('call_iv') or 0.2) for o in rows])
+        put_ivs = np.array([float(o.get('put_iv') or o.get('call_iv') or 0.2) for o in rows])
+        call_ivs, put_ivs = np.maximum(call_ivs, 0.01), np.maximum(put_ivs, 0.01)
+        # Theoretical mids at user spot and at the expected-move range, one row per spot level
+        levels = np.array([[spot], [spot + exp_move], [max(1e-6, spot - exp_move)]])
+        call_mids = np.atleast_2d(_bs_call_price(levels, strikes, r, call_ivs, T))
+        put_mids = np.atleast_2d(_bs_put_price(levels, strikes, r, put_ivs, T))
+
         preds = []
-        for o in chain.get('raw', []):
-            K = float(o.get('strike') or 0)
-            if K <= 0:
-                continue
-            # IVs
-            call_iv = float(o.get('call_iv') or 0.2)
-            put_iv = float(o.get('put_iv') or call_iv or 0.2)
-            # Theoretical mid at user spot
-            call_mid = _bs_call_price(spot, K, r, max(call_iv, 0.01), T)
-            put_mid = _bs_put_price(spot, K, r, max(put_iv, 0.01), T)
-            # Range mids using expected move
-            call_mid_upper = _bs_call_price(spot + exp_move, K, r, max(call_iv, 0.01), T)
-            call_mid_lower = _bs_call_price(max(1e-6, spot - exp_move), K, r, max(call_iv, 0.01), T)
-            put_mid_upper = _bs_put_price(spot + exp_move, K, r, max(put_iv, 0.01), T)
-            put_mid_lower = _bs_put_price(max(1e-6, spot - exp_move), K, r, max(put_iv, 0.01), T)
+        for i, o in enumerate(rows):
+            K = float(strikes[i])
+            call_mid, call_mid_upper, call_mid_lower = (float(v) for v in call_mids[:, i])
+            put_mid, put_mid_upper, put_mid_lower = (float(v) for v in put_mids[:, i])
 
             # Current spreads and liquidity adjustment
             def liq_score(vol, oi):
@@ -55247,7 +56181,7 @@ def api_backtest_call_recommendation(rec_id: int):
     try:
         body = request.get_json() or {}
         horizon_days = int(body.get('horizon_days', 10))
-        n_scenarios = int(body.get('n_scenarios', 200))
+        n_scenarios = _synthetic_test_paths(body.get('n_scenarios', 200))
         slippage = float(body.get('slippage', 0.0))
         fees = float(body.get('fees', 0.0))
 
@@ -55294,7 +56228,7 @@ def api_forwardtest_call_recommendation(rec_id: int):
     try:
         body = request.get_json() or {}
         horizon_days = int(body.get('horizon_days', 10))
-        n_scenarios = int(body.get('n_scenarios', 500))
+        n_scenarios = _synthetic_test_paths(body.get('n_scenarios', 500))
         slippage = float(body.get('slippage', 0.0))
         fees = float(body.get('fees', 0.0))
 
@@ -55470,6 +56404,7 @@ def api_gamma_exposure_analysis():
     """Detailed gamma exposure analysis"""
     try:
         from models.enhanced_options_analytics import EnhancedOptionsAnalytics
+        from models.options_chain_analytics import get_chain_analytics
         
         data = request.json
         options_data = data.get('options_chain', [])
@@ -55482,29 +56417,18 @@ def api_gamma_exposure_analysis():
             }), 400
         
         enhanced_analytics = EnhancedOptionsAnalytics()
-        gamma_analysis = enhanced_analytics.calculate_advanced_greeks(options_data, spot_price)
+        chain = get_chain_analytics(options_data)
+        gamma_analysis = enhanced_analytics.calculate_advanced_greeks(chain, spot_price)
         
-        # Additional gamma-specific calculations
-        gamma_profile = []
-        for row in options_data:
-            strike = row['strike']
-            call_gamma_exposure = row.get('call_gamma', 0) * row.get('call_oi', 0) * spot_price * spot_price / 100
-            put_gamma_exposure = row.get('put_gamma', 0) * row.get('put_oi', 0) * spot_price * spot_price / 100
-            
-            gamma_profile.append({
-                'strike': strike,
-                'call_gamma_exposure': call_gamma_exposure,
-                'put_gamma_exposure': put_gamma_exposure,
-                'net_gamma_exposure': call_gamma_exposure + put_gamma_exposure,
-                'distance_from_spot': abs(strike - spot_price)
-            })
+        # Additional gamma-specific calculations on the same chain instance
+        gamma_profile = chain.gex_profile(spot_price)
         
         return jsonify({
             'success': True,
             'data': {
                 'gamma_analysis': gamma_analysis,
                 'gamma_profile': gamma_profile,
-                'total_gamma_exposure': sum(item['net_gamma_exposure'] for item in gamma_profile)
+                'total_gamma_exposure': float(chain.gamma_exposure(spot_price)['net'].sum())
             }
         })
         
@@ -55652,49 +56576,78 @@ def api_market_structure_analysis():
             'error': str(e)
         }), 500
 
+# Underlyings covered by the unusual-activity scanner (Upstox asset keys, comma separated)
+OPTIONS_SCANNER_UNDERLYINGS = [k.strip() for k in os.getenv(
+    'OPTIONS_SCANNER_UNDERLYINGS',
+    'NSE_INDEX|Nifty 50,NSE_INDEX|Nifty Bank,NSE_INDEX|Nifty Fin Service,NSE_INDEX|NIFTY MID SELECT'
+).split(',') if k.strip()]
+OPTIONS_SCANNER_INTERVAL = float(os.getenv('OPTIONS_SCANNER_INTERVAL', '60'))
+OPTIONS_SCANNER_WORKERS = int(os.getenv('OPTIONS_SCANNER_WORKERS', '8'))
+OPTIONS_SCANNER_EXPIRY_WEEKDAY = int(os.getenv('OPTIONS_SCANNER_EXPIRY_WEEKDAY', '1'))  # Tuesday
+_options_scanner = None
+_options_scanner_lock = threading.Lock()
+
+def _monthly_expiry(today=None, weekday=OPTIONS_SCANNER_EXPIRY_WEEKDAY):
+    """Last `weekday` of this month (next month once it has passed), as dd-mm-YYYY"""
+    import calendar
+    today = today or datetime.now().date()
+    year, month = today.year, today.month
+    for _ in range(2):
+        last_day = calendar.monthrange(year, month)[1]
+        last = datetime(year, month, last_day).date()
+        expiry = last - timedelta(days=(last.weekday() - weekday) % 7)
+        if expiry >= today:
+            return expiry.strftime('%d-%m-%Y')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return expiry.strftime('%d-%m-%Y')
+
+def options_scanner_targets(config=None):
+    """(underlying, expiry) pairs to scan; the monthly expiry rolls forward unless one is configured"""
+    config = config or {}
+    expiry = config.get('expiry') or os.getenv('OPTIONS_SCANNER_EXPIRY') or _monthly_expiry()
+    return [(u, expiry) for u in (config.get('underlyings') or OPTIONS_SCANNER_UNDERLYINGS)]
+
+def get_options_scanner():
+    """This process's scanner; its rolling baselines only advance while this worker holds the task lease"""
+    global _options_scanner
+    from models.options_activity_scanner import OptionsActivityScanner
+    with _options_scanner_lock:
+        if _options_scanner is None:
+            _options_scanner = OptionsActivityScanner(
+                fetch_upstox_chain, options_scanner_targets(),
+                {'interval': OPTIONS_SCANNER_INTERVAL, 'workers': OPTIONS_SCANNER_WORKERS})
+        return _options_scanner
+
+@scheduled_task('options_scanner')
+def _scan_options(config):
+    scanner = get_options_scanner()
+    scanner.config['interval'] = float(config.get('interval', OPTIONS_SCANNER_INTERVAL))
+    scanner.set_targets(options_scanner_targets(config))
+    return scanner.scan()
+
 @app.route('/api/options/realtime_scanner', methods=['GET'])
 @admin_or_investor_required
 @investor_plan_at_least('pro')
 def api_realtime_options_scanner():
-    """Real-time options scanner for unusual activity"""
-    try:
-        # This would scan multiple assets for unusual options activity
-        # For now, return a sample structure
-        
-        scanner_results = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'unusual_activity': [
-                {
-                    'symbol': 'NIFTY',
-                    'strike': 22050,
-                    'type': 'call',
-                    'unusual_volume': 250000,
-                    'avg_volume': 50000,
-                    'volume_ratio': 5.0,
-                    'implied_move': 2.3,
-                    'alert_type': 'volume_spike'
-                }
-            ],
-            'top_movers': [
-                {
-                    'symbol': 'BANKNIFTY',
-                    'strike': 45200,
-                    'type': 'put',
-                    'iv_change': 15.2,
-                    'volume': 180000,
-                    'alert_type': 'iv_expansion'
-                }
-            ],
-            'gamma_alerts': [
-                {
-                    'symbol': 'NIFTY',
-                    'strike': 22000,
-                    'gamma_exposure': 125000000,
-                    'distance_from_spot': 0.2,
-                    'alert_type': 'gamma_wall'
-                }
-            ]
-        }
+    """Latest unusual-activity scan across the configured underlyings, as published by the scanner task"""
+    try:
+        # The first request anywhere schedules the scanner; whichever worker claims it runs every cycle
+        if db.session.get(ScheduledTask, 'options_scanner') is None:
+            ensure_scheduled_task('options_scanner', OPTIONS_SCANNER_INTERVAL,
+                                  {'underlyings': OPTIONS_SCANNER_UNDERLYINGS})
+        task = scheduled_task_status('options_scanner')
+        last = task['last_status'] or {}
+        scanner_results = dict(last.get('result') or {})
+        if not scanner_results:
+            scanner_results = {'timestamp': None, 'unusual_activity': [], 'top_movers': [], 'gamma_alerts': [],
+                               'scanned': 0, 'targets': len(options_scanner_targets(task['config'])),
+                               'pending': task['enabled'], 'error': last.get('error')}
+        
+        symbols = {s.strip().lower() for s in (request.args.get('symbols') or '').split(',') if s.strip()}
+        if symbols:
+            for name in ('unusual_activity', 'top_movers', 'gamma_alerts'):
+                scanner_results[name] = [a for a in scanner_results[name]
+                                         if a['symbol'].lower() in symbols or a['underlying'].lower() in symbols]
         
         return jsonify({
             'success': True,
@@ -55702,12 +56655,35 @@ def api_realtime_options_scanner():
         })
         
     except Exception as e:
+        db.session.rollback()
         app.logger.error(f"Error in realtime scanner: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+# hAi-Edge universe scan: one leased task scores the whole universe on shared feeds and publishes
+# the signal snapshot that the hAi-Edge signal routes and optimize_portfolio read
+HAI_EDGE_SCAN_INTERVAL = int(os.getenv('HAI_EDGE_SCAN_INTERVAL', '3600'))
+
+@scheduled_task('hai_edge_universe_scan', default_interval=HAI_EDGE_SCAN_INTERVAL)
+def _scan_hai_edge_universe(config):
+    from hai_edge_engine import HAiEdgeEngine
+    snapshot = HAiEdgeEngine().scan_universe(config.get('symbols') or None)
+    return {'scored': int(snapshot['error'].isna().sum()), 'failed': int(snapshot['error'].notna().sum()),
+            'as_of': str(snapshot['as_of'].max()) if len(snapshot) else None}
+
+# hAi-Edge ML retraining: one leased pass brings every stored model bundle up to the latest bar
+# (warm starts on the new bars, a full refit once model_store.full_refit_bars have accumulated)
+HAI_EDGE_ML_REFRESH_INTERVAL = int(os.getenv('HAI_EDGE_ML_REFRESH_INTERVAL', '86400'))
+
+@scheduled_task('hai_edge_ml_refresh', default_interval=HAI_EDGE_ML_REFRESH_INTERVAL)
+def _refresh_hai_edge_ml_models(config):
+    from collections import Counter
+    from hai_edge_engine import HAiEdgeEngine
+    trained = HAiEdgeEngine().refresh_ml_models(config.get('symbols') or None)
+    return {'symbols': len(trained), **Counter(trained.values())}
+
 # =========================================================================
 # RETAIL INVESTMENT FEATURES - BEGINNER FRIENDLY
 # =========================================================================
@@ -63822,6 +64798,30 @@ class PublishedModelRunHistory(db.Model):
     signal_strength = db.Column(db.Float)  # confidence score 0-1
     analyzed_stocks_count = db.Column(db.Integer, default=0)  # number of stocks analyzed
 
+class PublishedModelJob(db.Model):
+    """Queued/async published model run; shared by every worker so any of them can poll or cancel it."""
+    __tablename__ = 'published_model_job'
+    id = db.Column(db.String(80), primary_key=True)
+    published_model_id = db.Column(db.String(40), db.ForeignKey('published_models.id'), index=True, nullable=False)
+    owner_key = db.Column(db.String(120), index=True)  # _user_key() of the submitter
+    investor_id = db.Column(db.String(32), index=True)
+    plan = db.Column(db.String(20))
+    priority = db.Column(db.Integer, default=0)
+    status = db.Column(db.String(20), default='queued', index=True)  # queued | running | completed | failed | cancelled
+    function_name = db.Column(db.String(120))
+    payload_json = db.Column(db.Text)  # request body
+    context_json = db.Column(db.Text)  # admission result (timeout, investor, ML flag)
+    result_json = db.Column(db.Text)
+    error = db.Column(db.Text)
+    cancel_requested = db.Column(db.Boolean, default=False)
+    worker = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # created_at minus priority * PUBLISHED_JOB_AGING_SECONDS: ascending order is claim order
+    queue_rank_at = db.Column(db.DateTime, index=True)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
 class PublishedModelEvaluation(db.Model):
     """Model evaluation and scoring system for published ML models"""
     __tablename__ = 'published_model_evaluations'
@@ -67451,17 +68451,78 @@ def _load_published_module(pm: PublishedModel):
     spec.loader.exec_module(mod)  # type: ignore
     return mod
 
-@app.route('/api/published_models/<mid>/run', methods=['POST'])
-def run_published_model(mid):
-    """Execute an allowed function in a sandboxed subprocess with timeout.
-    Enhanced with Fyers API integration for real-time data.
-    JSON: { function, args?, kwargs?, timeout?, use_realtime?, symbol? }
+from utils.job_queue import JobCancelled, JobWorkerPool, plan_priority, run_cancellable
+
+try:
+    from utils.sandbox_pool import get_sandbox_pool
+    SANDBOX_POOL_AVAILABLE = True
+except Exception as e:
+    print(f"⚠️ Sandbox interpreter pool not available: {e}")
+    SANDBOX_POOL_AVAILABLE = False
+# SANDBOX_POOL=0 falls back to one fresh `python -I` subprocess per run
+SANDBOX_POOL_ENABLED = SANDBOX_POOL_AVAILABLE and os.getenv('SANDBOX_POOL', '1') not in ('0', 'false', 'False')
+# Published runs start in their artifact directory; pin the shared OHLCV cache to an absolute path
+# (inherited by the sandbox processes) so the history store shipped with the models reads the app's cache
+os.environ.setdefault('OHLCV_CACHE_DIR', os.path.abspath(os.path.join('data', 'ohlcv_cache')))
+
+def _published_run_timeout(pm: PublishedModel, func_name, requested, is_investor):
+    """Dynamic timeout based on model type and function; returns (timeout_seconds, is_ml_model)."""
+    default_timeout = 60   # Increased from 20 to 60 seconds
+    ml_model_timeout = 600  # Increased to 10 minutes for ML models
+    investor_timeout = 300  # 5 minutes for investor accounts
+
+    # Check if this is an ML model that needs longer timeout
+    ml_model_indicators = [
+        'Multi-Factor Expected Return Model',
+        'Cash Flow Reliability Score Model',
+        'Adaptive Trend Strength Index Model',
+        'Fundamental Surprise Impact Predictor',
+        'Gap Fill Probability Model',
+        'Long-Term Earnings Revision Momentum Model',
+        'Market Breadth Health Score Model',
+        'Volatility Compression Breakout Probability Model'
+    ]
+
+    # Functions that typically need more time
+    long_running_functions = [
+        'run_analysis',
+        'analyze_stock',
+        'run_complete_analysis',
+        'generate_comprehensive_report',
+        'full_analysis',
+        'comprehensive_analysis',
+        'detailed_analysis'
+    ]
+
+    # Determine appropriate timeout (more generous logic)
+    # Option 1: Check against specific ML model names
+    is_ml_model_specific = any(indicator in pm.name for indicator in ml_model_indicators)
+
+    # Option 2: Auto-detect any model that looks like an ML model
+    ml_keywords = ['ML', 'Model', 'Predictor', 'Analyzer', 'Classifier', 'Regression']
+    is_ml_model_auto = any(keyword in pm.name for keyword in ml_keywords)
+
+    # Use either specific list OR auto-detection
+    is_ml_model = is_ml_model_specific or is_ml_model_auto
+
+    is_long_function = func_name in long_running_functions
+
+    # Use longer timeout if ANY of these conditions are true:
+    if is_ml_model or is_long_function or is_investor:
+        if is_ml_model:
+            timeout = requested or ml_model_timeout  # 10 minutes for ML models
+        else:
+            timeout = requested or investor_timeout  # 5 minutes for investors
+    else:
+        timeout = requested or default_timeout  # 1 minute for others
+    return timeout, is_ml_model
+
+def _published_run_admission(pm: PublishedModel, data):
+    """Request-time checks shared by sync and queued runs (visibility, quotas, allowed function).
+    Returns (context, None) on success or (None, (body, status)) to reject the run.
     """
-    pm = PublishedModel.query.get(mid)
-    if not pm:
-        return jsonify({'error': 'not found'}), 404
     if pm.visibility in ('restricted', 'private') and not _is_editor(pm):
-        return jsonify({'error': 'unauthorized'}), 403
+        return None, ({'error': 'unauthorized'}, 403)
     # Daily usage throttling per investor (1 run per model per day unless pro_plus)
     inv_id = session.get('investor_id')
     acct = None
@@ -67476,20 +68537,56 @@ def run_published_model(mid):
                            .filter_by(investor_id=inv_id, published_model_id=pm.id)
                            .filter(PublishedModelRunHistory.created_at >= datetime.combine(today, datetime.min.time()))
                            .count())
+        # Queued and running jobs are not in the run history yet but will be once they finish
+        run_count_today += (PublishedModelJob.query
+                            .filter_by(investor_id=inv_id, published_model_id=pm.id)
+                            .filter(PublishedModelJob.status.in_(('queued', 'running')))
+                            .count())
         if run_count_today >= 10:
-            return jsonify({'ok': False, 'error': 'Daily run limit reached for this model (10 per day on your plan)'}), 429
-    data = request.get_json(silent=True) or {}
+            return None, ({'ok': False, 'error': 'Daily run limit reached for this model (10 per day on your plan)'}, 429)
     func_name = data.get('function')
+    timeout, is_ml_model = _published_run_timeout(pm, func_name, data.get('timeout'), inv_id is not None)
+    try:
+        allowed = json.loads(pm.allowed_functions or '[]')
+    except Exception:
+        allowed = []
+    if func_name not in allowed:
+        return None, ({'error': 'function not allowed'}, 403)
+    # Analyst usage accounting (counts analyst runs separate from investor run history)
+    if session.get('analyst_id') or session.get('analyst_name'):
+        ok, msg = _analyst_register_run()
+        if not ok:
+            return None, ({'ok': False, 'error': msg, 'plan_status': _analyst_plan_info()}, 429)
+    return {
+        'investor_id': inv_id,
+        'is_investor': inv_id is not None,
+        'plan': plan,
+        'function': func_name,
+        'timeout': timeout,
+        'is_ml_model': is_ml_model,
+    }, None
+
+def _execute_published_model(pm: PublishedModel, data, ctx, should_cancel=None):
+    """Execute an allowed function in a sandboxed subprocess with timeout.
+    Needs an app context but no request, so queued jobs call it directly from a pool thread.
+    `should_cancel` is polled while the subprocess runs; JobCancelled propagates to the caller.
+    Returns (payload, http_status).
+    """
+    inv_id = ctx.get('investor_id')
+    func_name = ctx.get('function')
+    timeout = ctx.get('timeout')
+    is_ml_model = ctx.get('is_ml_model')
+    is_investor = ctx.get('is_investor')
     args = data.get('args') or []
     kwargs = data.get('kwargs') or {}
     inputs_map = data.get('inputs') or {}
-    
+
     # Enhanced: Fyers API integration for real-time data
     use_realtime = data.get('use_realtime', True)  # Default to real-time
     symbol = data.get('symbol')  # Optional symbol for real-time data
     realtime_data = None
     data_source_used = 'static'
-    
+
     if use_realtime:
         try:
             # Load real-time data fetcher
@@ -67497,7 +68594,7 @@ def run_published_model(mid):
             if realtime_available:
                 # Initialize real-time data fetcher
                 data_fetcher = RealTimeDataFetcher()
-                
+
                 # If symbol provided, fetch real-time data
                 if symbol:
                     try:
@@ -67508,142 +68605,96 @@ def run_published_model(mid):
                         app.logger.warning(f"Failed to fetch real-time data for {symbol}: {e}")
                         realtime_data = None
                         data_source_used = 'fallback'
-                
+
                 # Add real-time data to inputs for model execution
                 if realtime_data:
                     inputs_map['realtime_data'] = realtime_data
                     inputs_map['data_source'] = data_source_used
                     kwargs['realtime_data'] = realtime_data
                     kwargs['data_source'] = data_source_used
-                    
+
         except Exception as e:
             app.logger.error(f"Error initializing real-time data: {e}")
             use_realtime = False
-    
-    # Dynamic timeout based on model type and function
-    default_timeout = 60   # Increased from 20 to 60 seconds
-    ml_model_timeout = 600  # Increased to 10 minutes for ML models
-    investor_timeout = 300  # 5 minutes for investor accounts
-    
-    # Check if this is an ML model that needs longer timeout
-    ml_model_indicators = [
-        'Multi-Factor Expected Return Model',
-        'Cash Flow Reliability Score Model', 
-        'Adaptive Trend Strength Index Model',
-        'Fundamental Surprise Impact Predictor',
-        'Gap Fill Probability Model',
-        'Long-Term Earnings Revision Momentum Model',
-        'Market Breadth Health Score Model',
-        'Volatility Compression Breakout Probability Model'
-    ]
-    
-    # Functions that typically need more time
-    long_running_functions = [
-        'run_analysis',
-        'analyze_stock',
-        'run_complete_analysis',
-        'generate_comprehensive_report',
-        'full_analysis',
-        'comprehensive_analysis',
-        'detailed_analysis'
-    ]
-    
-    # Determine appropriate timeout (more generous logic)
-    # Option 1: Check against specific ML model names
-    is_ml_model_specific = any(indicator in pm.name for indicator in ml_model_indicators)
-    
-    # Option 2: Auto-detect any model that looks like an ML model
-    ml_keywords = ['ML', 'Model', 'Predictor', 'Analyzer', 'Classifier', 'Regression']
-    is_ml_model_auto = any(keyword in pm.name for keyword in ml_keywords)
-    
-    # Use either specific list OR auto-detection
-    is_ml_model = is_ml_model_specific or is_ml_model_auto
-    
-    is_long_function = func_name in long_running_functions
-    is_investor = session.get('investor_id') is not None
-    
-    # Use longer timeout if ANY of these conditions are true:
-    if is_ml_model or is_long_function or is_investor:
-        if is_ml_model:
-            timeout = data.get('timeout') or ml_model_timeout  # 10 minutes for ML models
-        else:
-            timeout = data.get('timeout') or investor_timeout  # 5 minutes for investors
-    else:
-        timeout = data.get('timeout') or default_timeout  # 1 minute for others
-    try:
-        allowed = json.loads(pm.allowed_functions or '[]')
-    except Exception:
-        allowed = []
-    if func_name not in allowed:
-        return jsonify({'error': 'function not allowed'}), 403
-    # Analyst usage accounting (counts analyst runs separate from investor run history)
-    if session.get('analyst_id') or session.get('analyst_name'):
-        ok, msg = _analyst_register_run()
-        if not ok:
-            return jsonify({'ok': False, 'error': msg, 'plan_status': _analyst_plan_info()}), 429
-    # Build a temporary runner script
+
+    # Extension overrides live next to the artifact
     import tempfile, textwrap, json as _json, subprocess
     ext_path = os.path.join(os.path.dirname(pm.artifact_path), 'extensions_'+pm.id+'.py')
-    
-    # Pre-process paths to avoid backslashes in f-strings
-    artifact_path_fixed = pm.artifact_path.replace('\\','/')
-    ext_path_fixed = ext_path.replace('\\','/')
-    
-    runner_code = textwrap.dedent(f"""
-    import importlib.util, json, sys, traceback, os
-    artifact='{artifact_path_fixed}'
-    ext_path='{ext_path_fixed}'
-    spec=importlib.util.spec_from_file_location('artifact_mod', artifact)
-    mod=importlib.util.module_from_spec(spec)
+
     try:
-        spec.loader.exec_module(mod)  # type: ignore
-        # Load extension overrides if present
-        if os.path.exists(ext_path):
+        started = time.perf_counter()
+        if SANDBOX_POOL_ENABLED:
+            # Pre-started interpreter with heavy libraries preloaded; single use, so runs never share a process
+            payload = get_sandbox_pool().run({
+                'artifact': pm.artifact_path,
+                'ext_path': ext_path,
+                'function': func_name,
+                'args': args,
+                'kwargs': kwargs,
+                'inputs': inputs_map,
+                'cwd': os.path.dirname(pm.artifact_path),
+            }, timeout=float(timeout), should_cancel=should_cancel)
+        else:
+            # Pre-process paths to avoid backslashes in f-strings
+            artifact_path_fixed = pm.artifact_path.replace('\\','/')
+            ext_path_fixed = ext_path.replace('\\','/')
+            runner_code = textwrap.dedent(f"""
+            import importlib.util, json, sys, traceback, os
+            artifact='{artifact_path_fixed}'
+            ext_path='{ext_path_fixed}'
+            sys.path.insert(0, os.path.dirname(artifact))
+            spec=importlib.util.spec_from_file_location('artifact_mod', artifact)
+            mod=importlib.util.module_from_spec(spec)
             try:
-                with open(ext_path,'r',encoding='utf-8') as _f:
-                    code=_f.read()
-                exec(compile(code, ext_path, 'exec'), mod.__dict__)
-            except Exception as _e:
-                print('EXTENSION_LOAD_ERROR', _e, file=sys.stderr)
-        # Install input() shim using provided prompt->value mapping to avoid blocking
-        try:
-            _inputs_map = {json.dumps(inputs_map)}
-            import builtins as _b
-            def _shim_input(prompt=''):
-                # Return mapped value if present else empty string
-                return str(_inputs_map.get(prompt,''))
-            _b.input = _shim_input
-        except Exception as _ie:
-            print('INPUT_SHIM_WARN', _ie, file=sys.stderr)
-        fn=getattr(mod, {func_name!r}, None)
-        if not callable(fn):
-            raise AttributeError('callable missing')
-        args={_json.dumps(args)}
-        kwargs={_json.dumps(kwargs)}
-        result=fn(*args, **kwargs)
-        out={{'ok': True, 'result': repr(result)[:5000]}}
-    except Exception as e:
-        out={{'ok': False, 'error': str(e), 'trace': traceback.format_exc()[-4000:]}}
-    sys.stdout.write(json.dumps(out))
-    """)
-    try:
-        with tempfile.NamedTemporaryFile('w', delete=False, suffix='_runner.py') as tf:
-            tf.write(runner_code)
-            runner_path = tf.name
-        # Run isolated python (-I) to ignore user site packages; still will have stdlib
-        cmd = [sys.executable, '-I', runner_path]
-        completed = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, cwd=os.path.dirname(pm.artifact_path))
-        stdout = completed.stdout.strip()
-        stderr = completed.stderr.strip()
-        try:
-            payload = json.loads(stdout) if stdout else {}
-        except Exception:
-            payload = {'ok': False, 'error': 'malformed runner output', 'raw': stdout[:400]}
-        if completed.returncode != 0:
-            payload.setdefault('ok', False)
-            payload['proc_rc'] = completed.returncode
-            if stderr:
-                payload['stderr'] = stderr[:800]
+                spec.loader.exec_module(mod)  # type: ignore
+                # Load extension overrides if present
+                if os.path.exists(ext_path):
+                    try:
+                        with open(ext_path,'r',encoding='utf-8') as _f:
+                            code=_f.read()
+                        exec(compile(code, ext_path, 'exec'), mod.__dict__)
+                    except Exception as _e:
+                        print('EXTENSION_LOAD_ERROR', _e, file=sys.stderr)
+                # Install input() shim using provided prompt->value mapping to avoid blocking
+                try:
+                    _inputs_map = {json.dumps(inputs_map)}
+                    import builtins as _b
+                    def _shim_input(prompt=''):
+                        # Return mapped value if present else empty string
+                        return str(_inputs_map.get(prompt,''))
+                    _b.input = _shim_input
+                except Exception as _ie:
+                    print('INPUT_SHIM_WARN', _ie, file=sys.stderr)
+                fn=getattr(mod, {func_name!r}, None)
+                if not callable(fn):
+                    raise AttributeError('callable missing')
+                args={_json.dumps(args)}
+                kwargs={_json.dumps(kwargs)}
+                result=fn(*args, **kwargs)
+                out={{'ok': True, 'result': repr(result)[:5000]}}
+            except Exception as e:
+                out={{'ok': False, 'error': str(e), 'trace': traceback.format_exc()[-4000:]}}
+            sys.stdout.write(json.dumps(out))
+            """)
+            with tempfile.NamedTemporaryFile('w', delete=False, suffix='_runner.py') as tf:
+                tf.write(runner_code)
+                runner_path = tf.name
+            # Run isolated python (-I) to ignore user site packages; still will have stdlib
+            cmd = [sys.executable, '-I', runner_path]
+            returncode, stdout, stderr = run_cancellable(cmd, timeout=timeout, cwd=os.path.dirname(pm.artifact_path), should_cancel=should_cancel)
+            stdout = (stdout or '').strip()
+            stderr = (stderr or '').strip()
+            try:
+                payload = json.loads(stdout) if stdout else {}
+            except Exception:
+                payload = {'ok': False, 'error': 'malformed runner output', 'raw': stdout[:400]}
+            if returncode != 0:
+                payload.setdefault('ok', False)
+                payload['proc_rc'] = returncode
+                if stderr:
+                    payload['stderr'] = stderr[:800]
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        payload['duration_ms'] = duration_ms
         if payload.get('ok'):
             pm.run_count = (pm.run_count or 0) + 1
             
@@ -67655,7 +68706,7 @@ def run_published_model(mid):
                 published_model_id=pm.id,
                 inputs_json=json.dumps(inputs_map),
                 output_text=payload.get('result', '')[:4000],  # Truncate long outputs
-                duration_ms=None  # Could add timing if needed
+                duration_ms=duration_ms
             )
             db.session.add(run_history)
             
@@ -67739,7 +68790,7 @@ def run_published_model(mid):
             payload['realtime_enabled'] = False
             payload['data_source'] = 'static'
         
-        return jsonify(payload)
+        return payload, 200
     except subprocess.TimeoutExpired:
         # Provide more helpful timeout error message
         timeout_minutes = timeout // 60
@@ -67752,8 +68803,8 @@ def run_published_model(mid):
         else:
             error_msg += 'Try running individual analysis functions or use the async API for long-running analyses.'
         
-        return jsonify({
-            'ok': False, 
+        return {
+            'ok': False,
             'error': error_msg,
             'timeout_seconds': timeout,
             'timeout_minutes': timeout_minutes,
@@ -67763,9 +68814,11 @@ def run_published_model(mid):
                 'Try running specific functions instead of full analysis',
                 'ML models now have extended 10-minute timeout'
             ]
-        })
+        }, 200
+    except JobCancelled:
+        raise
     except Exception as e:
-        return jsonify({'ok': False, 'error': f'sandbox failure: {e}'}), 500
+        return {'ok': False, 'error': f'sandbox failure: {e}'}, 500
     finally:
         try:
             if 'runner_path' in locals() and os.path.exists(runner_path):
@@ -67773,101 +68826,261 @@ def run_published_model(mid):
         except Exception:
             pass
 
-# Simple in-memory storage for async jobs
-async_jobs = {}
 
-@app.route('/api/published_models/<mid>/run_async', methods=['POST'])
-def run_published_model_async(mid):
-    """Start an async job for long-running model execution.
-    JSON: { function, args?, kwargs?, timeout? }
-    Returns: { ok: True, job_id: "job_xxx" }
+@app.route('/api/published_models/<mid>/run', methods=['POST'])
+def run_published_model(mid):
+    """Execute an allowed function in a sandboxed subprocess with timeout.
+    Enhanced with Fyers API integration for real-time data.
+    JSON: { function, args?, kwargs?, timeout?, use_realtime?, symbol? }
     """
     pm = PublishedModel.query.get(mid)
     if not pm:
         return jsonify({'error': 'not found'}), 404
-    if pm.visibility in ('restricted', 'private') and not _is_editor(pm):
-        return jsonify({'error': 'unauthorized'}), 403
-    
-    # Generate job ID
-    import secrets
-    job_id = f"job_{mid}_{int(time.time())}_{secrets.token_hex(6)}"
-    
-    # Store job info
-    async_jobs[job_id] = {
-        'status': 'running',
-        'model_id': mid,
-        'created_at': time.time(),
-        'result': None,
-        'error': None
-    }
-    
-    # Start background thread
-    import threading
-    def run_in_background():
+    data = request.get_json(silent=True) or {}
+    ctx, rejected = _published_run_admission(pm, data)
+    if rejected:
+        return jsonify(rejected[0]), rejected[1]
+    payload, status = _execute_published_model(pm, data, ctx)
+    return jsonify(payload), status
+
+# --- Async published model runs: persisted job table + in-process worker pool ---
+# Jobs are rows in published_model_job, so any gunicorn worker can enqueue, poll or cancel them.
+# Every process runs PUBLISHED_JOB_WORKERS pool threads that claim queued rows (plan-tier priority
+# with ageing) and call _execute_published_model directly; no HTTP loopback into a web worker.
+# A job gains one priority point per PUBLISHED_JOB_AGING_SECONDS waited, so "highest priority + age"
+# is the same as "earliest created_at - priority * aging": that is stored as queue_rank_at and the
+# claim and queue-position queries sort on it in the database.
+PUBLISHED_JOB_WORKERS = int(os.getenv('PUBLISHED_JOB_WORKERS', '2'))
+PUBLISHED_JOB_MAX_ACTIVE_PER_USER = int(os.getenv('PUBLISHED_JOB_MAX_ACTIVE_PER_USER', '5'))
+PUBLISHED_JOB_AGING_SECONDS = float(os.getenv('PUBLISHED_JOB_AGING_SECONDS', '60'))
+PUBLISHED_JOB_STALE_SECONDS = int(os.getenv('PUBLISHED_JOB_STALE_SECONDS', '120'))
+PUBLISHED_JOB_RETENTION_HOURS = float(os.getenv('PUBLISHED_JOB_RETENTION_HOURS', '24'))
+_PUBLISHED_JOB_HEARTBEAT_SECONDS = 15
+_PUBLISHED_JOB_WORKER_ID = f"pid{os.getpid()}"
+_published_job_pool = None
+_published_job_pool_lock = threading.Lock()
+
+def get_published_job_pool():
+    global _published_job_pool
+    if _published_job_pool is None:
+        with _published_job_pool_lock:
+            if _published_job_pool is None:
+                _published_job_pool = JobWorkerPool(
+                    _claim_published_job, _run_published_job, maintain=_maintain_published_jobs,
+                    max_workers=PUBLISHED_JOB_WORKERS, name='published-job',
+                ).start()
+    return _published_job_pool
+
+def _claim_published_job():
+    """Atomically move the best queued job to 'running' for this process; returns its id or None."""
+    with app.app_context():
+        for _ in range(3):
+            candidates = (db.session.query(PublishedModelJob.id).filter_by(status='queued')
+                          .order_by(PublishedModelJob.queue_rank_at.asc(), PublishedModelJob.created_at.asc())
+                          .limit(5).all())
+            if not candidates:
+                return None
+            now = datetime.utcnow()
+            for (job_id,) in candidates:
+                claimed = (PublishedModelJob.query.filter_by(id=job_id, status='queued')
+                           .update({'status': 'running', 'worker': _PUBLISHED_JOB_WORKER_ID,
+                                    'started_at': now, 'heartbeat_at': now}, synchronize_session=False))
+                db.session.commit()
+                if claimed == 1:
+                    return job_id
+        return None
+
+def _finish_published_job(job_id, status, result=None, error=None):
+    values = {'status': status, 'finished_at': datetime.utcnow(), 'error': error}
+    if result is not None:
+        values['result_json'] = json.dumps(result, default=str)
+    (PublishedModelJob.query.filter_by(id=job_id, status='running')
+     .update(values, synchronize_session=False))
+    db.session.commit()
+
+def _published_job_cancel_checker(job_id):
+    """should_cancel callback: reads the cancel flag (any worker may set it) and refreshes the heartbeat."""
+    state = {'checked': 0.0, 'beat': time.monotonic()}
+    def should_cancel():
+        now = time.monotonic()
+        if now - state['checked'] < 2.0:
+            return False
+        state['checked'] = now
         try:
-            # Make a request to the sync endpoint
-            data = request.get_json(silent=True) or {}
-            import requests
-            
-            # Get the current server port dynamically
-            server_port = request.environ.get('SERVER_PORT', '80')
-            sync_url = f"http://127.0.0.1:{server_port}/api/published_models/{mid}/run"
-            headers = {'Content-Type': 'application/json'}
-            
-            # Copy session cookies for authentication
-            cookies = {}
-            for cookie_name in ['session', 'investor_id', 'admin_id', 'analyst_id']:
-                if cookie_name in request.cookies:
-                    cookies[cookie_name] = request.cookies[cookie_name]
-            
-            response = requests.post(sync_url, json=data, headers=headers, cookies=cookies, timeout=300)
-            result = response.json()
-            
-            async_jobs[job_id]['status'] = 'completed'
-            async_jobs[job_id]['result'] = result
-            
+            if now - state['beat'] >= _PUBLISHED_JOB_HEARTBEAT_SECONDS:
+                state['beat'] = now
+                (PublishedModelJob.query.filter_by(id=job_id)
+                 .update({'heartbeat_at': datetime.utcnow()}, synchronize_session=False))
+                db.session.commit()
+            flag = db.session.query(PublishedModelJob.cancel_requested).filter_by(id=job_id).scalar()
+            db.session.commit()  # end the read transaction so the next poll sees other workers' writes
+            return bool(flag)
+        except Exception:
+            db.session.rollback()
+            return False
+    return should_cancel
+
+def _run_published_job(job_id):
+    with app.app_context():
+        job = PublishedModelJob.query.get(job_id)
+        if not job or job.status != 'running':
+            return
+        pm = PublishedModel.query.get(job.published_model_id)
+        if not pm:
+            _finish_published_job(job_id, 'failed', error='model not found')
+            return
+        try:
+            data = json.loads(job.payload_json or '{}')
+            ctx = json.loads(job.context_json or '{}')
+            payload, status = _execute_published_model(pm, data, ctx, should_cancel=_published_job_cancel_checker(job_id))
+        except JobCancelled:
+            db.session.rollback()
+            _finish_published_job(job_id, 'cancelled', error='cancelled while running')
+            return
         except Exception as e:
-            async_jobs[job_id]['status'] = 'failed'
-            async_jobs[job_id]['error'] = str(e)
-    
-    thread = threading.Thread(target=run_in_background)
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({'ok': True, 'job_id': job_id})
+            db.session.rollback()
+            app.logger.error(f"Published model job {job_id} failed: {e}")
+            _finish_published_job(job_id, 'failed', error=str(e))
+            return
+        if status >= 500:
+            _finish_published_job(job_id, 'failed', result=payload, error=payload.get('error'))
+        else:
+            _finish_published_job(job_id, 'completed', result=payload)
+
+def _maintain_published_jobs():
+    """Fail jobs whose worker stopped heart-beating and drop finished jobs past retention."""
+    with app.app_context():
+        now = datetime.utcnow()
+        (PublishedModelJob.query
+         .filter(PublishedModelJob.status == 'running',
+                 PublishedModelJob.heartbeat_at < now - timedelta(seconds=PUBLISHED_JOB_STALE_SECONDS))
+         .update({'status': 'failed', 'finished_at': now, 'error': 'worker lost'}, synchronize_session=False))
+        (PublishedModelJob.query
+         .filter(PublishedModelJob.status.in_(('completed', 'failed', 'cancelled')),
+                 PublishedModelJob.finished_at < now - timedelta(hours=PUBLISHED_JOB_RETENTION_HOURS))
+         .delete(synchronize_session=False))
+        db.session.commit()
+
+def _published_job_visible(job):
+    if session.get('admin_name') or session.get('is_admin'):
+        return True
+    return not job.owner_key or job.owner_key == _user_key()
+
+def _published_job_queue_position(job):
+    """1-based position among queued jobs by current effective priority."""
+    ahead = (PublishedModelJob.query.filter_by(status='queued')
+             .filter(db.or_(PublishedModelJob.queue_rank_at < job.queue_rank_at,
+                            db.and_(PublishedModelJob.queue_rank_at == job.queue_rank_at,
+                                    PublishedModelJob.created_at < job.created_at)))
+             .count())
+    return 1 + ahead
+
+@app.route('/api/published_models/<mid>/run_async', methods=['POST'])
+def run_published_model_async(mid):
+    """Queue a published model run on the background worker pool.
+    JSON: { function, args?, kwargs?, timeout?, use_realtime?, symbol? }
+    Returns: { ok: True, job_id: "job_xxx", status: "queued", priority, position }
+    """
+    pm = PublishedModel.query.get(mid)
+    if not pm:
+        return jsonify({'error': 'not found'}), 404
+    data = request.get_json(silent=True) or {}
+    owner = _user_key()
+    active = (PublishedModelJob.query.filter_by(owner_key=owner)
+              .filter(PublishedModelJob.status.in_(('queued', 'running'))).count())
+    if active >= PUBLISHED_JOB_MAX_ACTIVE_PER_USER:
+        return jsonify({'ok': False, 'error': f'Too many active jobs ({active}); wait for one to finish or cancel it'}), 429
+    ctx, rejected = _published_run_admission(pm, data)
+    if rejected:
+        return jsonify(rejected[0]), rejected[1]
+    is_admin = session.get('admin_name') or session.get('is_admin')
+    priority = plan_priority('pro_plus' if is_admin else ctx.get('plan'))
+    created_at = datetime.utcnow()
+    job = PublishedModelJob(
+        id=f"job_{mid}_{int(time.time())}_{secrets.token_hex(6)}",
+        published_model_id=pm.id,
+        owner_key=owner,
+        investor_id=ctx.get('investor_id'),
+        plan=ctx.get('plan'),
+        priority=priority,
+        status='queued',
+        function_name=ctx.get('function'),
+        payload_json=json.dumps(data),
+        context_json=json.dumps(ctx),
+        created_at=created_at,
+        queue_rank_at=created_at - timedelta(seconds=priority * PUBLISHED_JOB_AGING_SECONDS),
+    )
+    db.session.add(job)
+    db.session.commit()
+    get_published_job_pool().notify()
+    return jsonify({'ok': True, 'job_id': job.id, 'status': 'queued', 'priority': priority,
+                    'position': _published_job_queue_position(job)})
 
 @app.route('/api/published_models/<mid>/job/<job_id>', methods=['GET'])
 def get_async_job_status(mid, job_id):
-    """Get status of async job.
-    Returns: { ok: True, status: "running|completed|failed", result?: {...}, error?: "..." }
+    """Get status of async job (from any worker).
+    Returns: { ok: True, status: "queued|running|completed|failed|cancelled", result?: {...}, error?: "..." }
     """
-    if job_id not in async_jobs:
+    get_published_job_pool()  # make sure this process also drains the shared queue
+    job = PublishedModelJob.query.get(job_id)
+    if not job or job.published_model_id != mid or not _published_job_visible(job):
         return jsonify({'ok': False, 'error': 'job not found'}), 404
-    
-    job = async_jobs[job_id]
-    
-    # Clean up old jobs (older than 1 hour)
-    if time.time() - job['created_at'] > 3600:
-        del async_jobs[job_id]
-        return jsonify({'ok': False, 'error': 'job expired'}), 404
-    
     response = {
         'ok': True,
-        'status': job['status'],
-        'model_id': job['model_id']
+        'status': job.status,
+        'model_id': job.published_model_id,
+        'function': job.function_name,
+        'priority': job.priority,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
     }
-    
-    if job['status'] == 'completed' and job['result']:
-        response['result'] = job['result']
-        # Clean up completed job after returning result
-        del async_jobs[job_id]
-    elif job['status'] == 'failed' and job['error']:
-        response['error'] = job['error']
-        # Clean up failed job after returning error
-        del async_jobs[job_id]
-    
+    if job.status == 'queued':
+        response['position'] = _published_job_queue_position(job)
+    elif job.status == 'running':
+        response['cancel_requested'] = bool(job.cancel_requested)
+    if job.result_json:
+        response['result'] = json.loads(job.result_json)
+    if job.error:
+        response['error'] = job.error
     return jsonify(response)
 
+@app.route('/api/published_models/<mid>/job/<job_id>/cancel', methods=['POST'])
+def cancel_async_job(mid, job_id):
+    """Cancel a queued job immediately or ask the worker running it to kill the sandbox."""
+    job = PublishedModelJob.query.get(job_id)
+    if not job or job.published_model_id != mid or not _published_job_visible(job):
+        return jsonify({'ok': False, 'error': 'job not found'}), 404
+    now = datetime.utcnow()
+    dropped = (PublishedModelJob.query.filter_by(id=job_id, status='queued')
+               .update({'status': 'cancelled', 'cancel_requested': True, 'finished_at': now,
+                        'error': 'cancelled before start'}, synchronize_session=False))
+    if not dropped:
+        (PublishedModelJob.query.filter_by(id=job_id, status='running')
+         .update({'cancel_requested': True}, synchronize_session=False))
+    db.session.commit()
+    db.session.refresh(job)
+    if job.status in ('completed', 'failed'):
+        return jsonify({'ok': False, 'status': job.status, 'error': 'job already finished'}), 409
+    return jsonify({'ok': True, 'status': job.status, 'cancel_requested': True})
+
+@app.route('/api/admin/published_jobs/stats')
+def admin_published_job_stats():
+    """Queue depth per status and this process's worker pool counters"""
+    is_admin = session.get('admin_name') or session.get('is_admin')
+    if not is_admin:
+        return jsonify({'ok': False, 'error': 'Admin access required'}), 403
+    from sqlalchemy import func as _func
+    counts = dict(db.session.query(PublishedModelJob.status, _func.count(PublishedModelJob.id))
+                  .group_by(PublishedModelJob.status).all())
+    return jsonify({
+        'ok': True,
+        'jobs': counts,
+        'pool': get_published_job_pool().stats(),
+        'sandbox': get_sandbox_pool().stats() if SANDBOX_POOL_ENABLED else None,
+        'worker': _PUBLISHED_JOB_WORKER_ID,
+    })
+
 def _get_sector_symbols(symbol):
     """Get sector symbols for a given stock symbol"""
     # Define basic sector mappings for common sectors
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Shared test fixtures
+Synthetic OHLCV bars, offline hAi-Edge engines and RIMSI backtesters, and a throwaway database
+for the tests that import the Flask app.
+"""
+import os
+import tempfile
+
+# Before any test module imports app: a private SQLite file, and no scheduled-task poller threads
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("SCHEDULED_TASK_WORKERS", "0")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_ohlcv(index, seed=0, drift=0.0004, vol=0.018):
+    """Random-walk daily bars on `index`; the same seed always gives the same bars"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(drift, vol, len(index)))
+    return pd.DataFrame({"Open": close * (1 + rng.normal(0, 0.003, len(index))), "High": close * 1.01,
+                         "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(100000, 1000000, len(index)).astype(float)}, index=index)
+
+
+@pytest.fixture
+def ohlcv():
+    """make_ohlcv(index, seed=0, drift=0.0004, vol=0.018) -> OHLCV frame"""
+    return make_ohlcv
+
+
+@pytest.fixture
+def hai_edge_engine():
+    """Factory for offline hAi-Edge engines: make(bars, **config) serves bars(i, start, end) as the
+    history of the i-th requested symbol, with the news/events/flows feeds returning nothing"""
+    from hai_edge_engine import HAiEdgeEngine
+
+    class FixtureEngine(HAiEdgeEngine):
+        bars = None
+        feed_calls = 0
+
+        def _fetch_histories(self, symbols, start, end, workers):
+            return {s: self.bars(i, start, end) for i, s in enumerate(symbols)}
+
+        def fetch_news_data(self, page=1, page_size=100):
+            self.feed_calls += 1
+            return []
+
+        def fetch_events_data(self):
+            return []
+
+        def fetch_fii_dii_data(self):
+            return {}
+
+    def make(bars, **config):
+        engine = FixtureEngine()
+        engine.bars = bars
+        engine.config["benchmark"] = None
+        engine.config.update(config)
+        return engine
+    return make
+
+
+@pytest.fixture
+def rimsi_backtester():
+    """Factory for RIMSI backtesters reading a fixed frame: make(data, engine='native')"""
+    from models.rimsi_backtesting import RIMSIBacktester
+
+    class FixtureBacktester(RIMSIBacktester):
+        data = None
+
+        def _get_market_data(self, config):
+            return self.data.copy()
+
+    def make(data, engine="native"):
+        backtester = FixtureBacktester(engine)
+        backtester.data = data
+        return backtester
+    return make
@@ -6,14 +6,19 @@ import pandas as pd
 import numpy as np
 import requests
 from datetime import datetime, timedelta
+import copy
 import json
+import hashlib
 import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Dict, List, Tuple, Any
 import warnings
 warnings.filterwarnings('ignore')
 
 # Technical Analysis
-from ta import add_all_ta_features
 from ta.utils import dropna
 
 # Machine Learning
@@ -44,6 +49,340 @@ except ImportError:
     SENTIMENT_AVAILABLE = False
     print("⚠️ TextBlob not available - Sentiment analysis disabled")
 
+# Incremental history store (fetches only the missing tail on repeat calls)
+try:
+    from utils.history_store import get_history as stored_history
+    HISTORY_STORE_AVAILABLE = True
+except ImportError:
+    HISTORY_STORE_AVAILABLE = False
+
+# Columnar signal snapshots (pickle fallback)
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Versioned on-disk model store (fitted ML members survive restarts and are shared across workers)
+try:
+    from utils.model_store import get_model_store, schema_id
+    MODEL_STORE_AVAILABLE = True
+except ImportError:
+    MODEL_STORE_AVAILABLE = False
+
+# ==================== POINT-IN-TIME SIGNAL REPLAY ====================
+# Module-level so backtest workers (separate processes) can import and pickle them.
+
+ML_MODEL_NAMES = ('random_forest', 'gradient_boost', 'linear', 'ridge', 'svr')
+SIGNAL_COMPONENTS = ('symbolic', 'statistical', 'ml_traditional', 'deep_learning', 'sentiment', 'event_driven')
+# HAiEdgePortfolio.model_weights keys (portfolio form fields) -> signal components
+PORTFOLIO_WEIGHT_KEYS = {
+    'symbolic_weight': 'symbolic', 'statistical_weight': 'statistical', 'ml_weight': 'ml_traditional',
+    'deep_learning_weight': 'deep_learning', 'sentiment_weight': 'sentiment', 'event_driven_weight': 'event_driven',
+}
+REPLAY_FEATURES = [
+    'Close', 'Open', 'High', 'Low', 'Volume', 'rsi', 'macd', 'macd_signal', 'macd_diff',
+    'bb_high', 'bb_low', 'bb_mavg', 'hl_ratio', 'oc_ratio', 'price_ma5', 'price_ma20', 'price_ma50',
+    'return_lag_1', 'return_lag_2', 'return_lag_3', 'return_lag_5',
+]
+# The `ta` columns the ML ensemble reads: the same RSI/MACD/Bollinger set as REPLAY_FEATURES, so
+# live, scanned and replayed models are fitted on the same inputs
+TA_ML_FEATURES = ['momentum_rsi', 'trend_macd', 'trend_macd_signal', 'trend_macd_diff',
+                  'volatility_bbh', 'volatility_bbl', 'volatility_bbm']
+
+
+def build_ml_models(names=ML_MODEL_NAMES, n_estimators: int = 100) -> Dict[str, Any]:
+    """Fresh, unfitted instances of the classical ML ensemble members"""
+    factories = {
+        'random_forest': lambda: RandomForestRegressor(n_estimators=n_estimators, random_state=42),
+        'gradient_boost': lambda: GradientBoostingRegressor(n_estimators=n_estimators, random_state=42),
+        'linear': lambda: LinearRegression(),
+        'ridge': lambda: Ridge(alpha=1.0),
+        'svr': lambda: SVR(kernel='rbf', C=1.0),
+    }
+    return {name: factories[name]() for name in names}
+
+
+def prediction_to_signal(pred):
+    """Map predicted next-day returns to the 0-1 signal scale (scalar or array)"""
+    pred = np.asarray(pred, dtype=float)
+    out = np.select([pred > 0.02, pred > 0.01, pred > 0, pred > -0.01], [0.8, 0.7, 0.6, 0.4], 0.2)
+    return float(out) if out.ndim == 0 else out
+
+
+def combine_ml_predictions(predictions: Dict[str, Any], scores: Dict[str, float]):
+    """Accuracy-weighted mean of member signals; equal weights when no member beats R^2 = 0"""
+    total = sum(scores.values())
+    if total > 0:
+        return sum(predictions[name] * scores[name] for name in predictions) / total
+    return sum(predictions.values()) / len(predictions)
+
+
+def indicator_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """Causal indicators the ensemble rules and replay features read, computed once per symbol.
+
+    Only what the signals use is computed (not the full `ta` set), with the `ta` definitions:
+    Wilder RSI(14), MACD(12, 26, 9) and Bollinger(20, 2).
+    """
+    close = data['Close'].astype(float)
+    df = data[['Open', 'High', 'Low', 'Close', 'Volume']].astype(float).copy()
+    for window in (5, 20, 50, 200):
+        df[f'ma{window}'] = close.rolling(window).mean()
+    delta = close.diff()
+    ema_up = delta.where(delta > 0, 0.0).ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    ema_down = (-delta.where(delta < 0, 0.0)).ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['rsi'] = np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+    df.loc[ema_down.isna(), 'rsi'] = np.nan
+    macd = (close.ewm(span=12, min_periods=12, adjust=False).mean()
+            - close.ewm(span=26, min_periods=26, adjust=False).mean())
+    df['macd'] = macd
+    df['macd_signal'] = macd.ewm(span=9, min_periods=9, adjust=False).mean()
+    df['macd_diff'] = df['macd'] - df['macd_signal']
+    df['bb_mavg'] = df['ma20']
+    band = 2 * close.rolling(20).std(ddof=0)
+    df['bb_high'] = df['bb_mavg'] + band
+    df['bb_low'] = df['bb_mavg'] - band
+    df['volume_ma20'] = df['Volume'].rolling(20).mean()
+    df['hl_ratio'] = df['High'] / df['Low']
+    df['oc_ratio'] = df['Open'] / df['Close']
+    for window in (5, 20, 50):
+        df[f'price_ma{window}'] = close / df[f'ma{window}']
+    for lag in (1, 2, 3, 5):
+        df[f'return_lag_{lag}'] = close.pct_change(lag)
+    df['returns'] = close.pct_change()
+    return df
+
+
+def _mean_of_present(parts: List[pd.Series], index) -> pd.Series:
+    """Row mean over the components that are defined (the live rules skip missing ones)"""
+    frame = pd.concat(parts, axis=1)
+    return frame.mean(axis=1, skipna=True).reindex(index).fillna(0.5)
+
+
+def replay_symbolic(ind: pd.DataFrame) -> pd.Series:
+    ma200 = ind['ma200'].fillna(ind['ma50'])
+    up, down = ind['ma20'] > ind['ma50'], ind['ma20'] < ind['ma50']
+    idx = ind.index
+    ma_trend = pd.Series(np.select([up & (ind['ma50'] > ma200), up, down & (ind['ma50'] < ma200)],
+                                   [0.8, 0.6, 0.2], 0.4), index=idx)
+    price_ma = pd.Series(np.where(ind['Close'] > ind['ma20'], 0.7, 0.3), index=idx)
+    rsi = pd.Series(np.select([ind['rsi'] < 30, ind['rsi'] > 70], [0.8, 0.2], 0.5), index=idx)
+    m, s = ind['macd'], ind['macd_signal']
+    m1, s1 = m.shift(1), s.shift(1)
+    macd = pd.Series(np.select([(m > s) & (m1 <= s1), (m < s) & (m1 >= s1)], [0.8, 0.2], 0.5), index=idx)
+    volume = pd.Series(np.where(ind['Volume'] > 1.5 * ind['volume_ma20'], 0.7, 0.5), index=idx)
+    bollinger = pd.Series(np.select([ind['Close'] <= ind['bb_low'], ind['Close'] >= ind['bb_high']],
+                                    [0.8, 0.2], 0.5), index=idx)
+    return _mean_of_present([ma_trend, price_ma, rsi, macd, volume, bollinger], idx)
+
+
+def replay_statistical(ind: pd.DataFrame, benchmark_returns: pd.Series = None) -> pd.Series:
+    r, idx = ind['returns'], ind.index
+    n_returns = r.notna().cumsum()
+    mean30, std30 = r.rolling(30).mean(), r.rolling(30).std()
+    z = (r - mean30) / std30
+    mean_rev = pd.Series(np.select([z < -2, z > 2], [0.8, 0.2], 0.5 - z * 0.1), index=idx)
+    mean_rev = mean_rev.where((std30 > 0) & (n_returns >= 30))
+    m5, m20 = r.rolling(5).sum(), r.rolling(20).sum()
+    momentum = pd.Series(np.select([(m5 > 0) & (m20 > 0), (m5 < 0) & (m20 < 0)], [0.7, 0.3], 0.5), index=idx)
+    momentum = momentum.where(n_returns >= 30)
+    vol20 = r.rolling(20).std()
+    # The live rule compares with the whole-history mean of the 60-day vol; only the past is used here
+    avg_vol = r.rolling(60).std().expanding().mean().where(n_returns >= 60, vol20)
+    volatility = pd.Series(np.where(vol20 < 0.8 * avg_vol, 0.6, 0.5), index=idx).where(n_returns >= 20)
+    parts = [mean_rev, momentum, volatility]
+    if benchmark_returns is not None:
+        corr = r.rolling(250, min_periods=20).corr(benchmark_returns.reindex(idx))
+        parts.append(pd.Series(np.select([corr > 0.8, corr < 0.3], [0.4, 0.6], 0.5), index=idx).where(corr.notna()))
+    else:
+        parts.append(pd.Series(0.5, index=idx))
+    return _mean_of_present(parts, idx)
+
+
+def replay_ml(ind: pd.DataFrame, start: int, refit_days: int = 126, model_names=ML_MODEL_NAMES,
+              n_estimators: int = 100, min_rows: int = 50) -> pd.Series:
+    """Walk-forward ML signal: refit every refit_days bars on rows whose next-day target is already
+    known, then score the following block. Bars before `start` are left at 0.5."""
+    X = ind[REPLAY_FEATURES]
+    y = ind['Close'].shift(-1) / ind['Close'] - 1
+    usable = X.notna().all(axis=1).to_numpy()
+    Xv, yv = X.to_numpy(), y.to_numpy()
+    out = np.full(len(ind), 0.5)
+    for block in range(max(start, 1), len(ind), refit_days):
+        train = np.flatnonzero(usable[:block] & np.isfinite(yv[:block]))
+        rows = np.arange(block, min(block + refit_days, len(ind)))
+        rows = rows[usable[rows]]
+        if len(train) < min_rows or not len(rows):
+            continue
+        X_tr, y_tr = Xv[train], yv[train]
+        split = int(len(train) * 0.8)
+        scaler = StandardScaler().fit(X_tr[:split])
+        predictions, scores = {}, {}
+        for name, model in build_ml_models(model_names, n_estimators).items():
+            try:
+                fit_X, test_X, live_X = X_tr[:split], X_tr[split:], Xv[rows]
+                if name == 'svr':
+                    fit_X, test_X, live_X = scaler.transform(fit_X), scaler.transform(test_X), scaler.transform(live_X)
+                model.fit(fit_X, y_tr[:split])
+                scores[name] = max(0, min(1, r2_score(y_tr[split:], model.predict(test_X))))
+                predictions[name] = prediction_to_signal(model.predict(live_X))
+            except Exception:
+                predictions[name] = np.full(len(rows), 0.5)
+                scores[name] = 0.0
+        out[rows] = combine_ml_predictions(predictions, scores)
+    return pd.Series(out, index=ind.index)
+
+
+def replay_event_driven(index, benchmark_close: pd.Series = None) -> pd.Series:
+    """Event and flow feeds have no history, so they stay neutral; the market regime is replayed."""
+    if benchmark_close is None:
+        return pd.Series(0.5, index=index)
+    bench = benchmark_close.reindex(index, method='ffill')
+    month = bench / bench.shift(21) - 1
+    regime = pd.Series(np.select([month > 0.05, month > 0, month > -0.05], [0.7, 0.6, 0.4], 0.3), index=index)
+    regime = regime.where(month.notna(), 0.5)
+    return (0.5 + 0.5 + regime) / 3
+
+
+def replay_symbol_signals(symbol: str, ohlcv: pd.DataFrame, start, weights: Dict[str, float],
+                          benchmark_close: pd.Series = None, params: Dict[str, Any] = None) -> pd.DataFrame:
+    """
+    Ensemble signal and confidence for every bar from `start` on, each using only data up to that bar.
+
+    Deep learning, news sentiment and event feeds are held at their neutral 0.5 - the LSTM is too
+    costly to refit per bar and the feeds have no history - so they dilute, never bias, the signal.
+    """
+    params = params or {}
+    ind = indicator_frame(ohlcv)
+    first = int(ind.index.searchsorted(pd.Timestamp(start)))
+    first = max(first - 1, 0)  # the bar before `start` sets the opening book
+    bench_returns = benchmark_close.reindex(ind.index, method='ffill').pct_change() if benchmark_close is not None else None
+    components = pd.DataFrame({
+        'symbolic': replay_symbolic(ind),
+        'statistical': replay_statistical(ind, bench_returns),
+        'ml_traditional': replay_ml(ind, first, params.get('ml_refit_days', 126),
+                                    params.get('ml_models', ML_MODEL_NAMES), params.get('ml_trees', 30)),
+        'deep_learning': 0.5,
+        'sentiment': 0.5,
+        'event_driven': replay_event_driven(ind.index, benchmark_close),
+    }, index=ind.index).iloc[first:]
+    values = components[list(SIGNAL_COMPONENTS)].to_numpy()
+    w = np.array([weights[c] for c in SIGNAL_COMPONENTS])
+    components['signal'] = values @ w
+    components['confidence'] = np.maximum(0.0, 1 - values.std(axis=1) * 2)
+    components['close'] = ind['Close'].iloc[first:]
+    return components
+
+
+def _fetch_ohlcv(symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Daily OHLCV between start and end with a naive date index (no indicators)"""
+    if HISTORY_STORE_AVAILABLE:
+        years = (pd.Timestamp.now() - start).days / 365.25
+        period = next((p for p, y in (('1y', 1), ('2y', 2), ('5y', 5), ('10y', 10)) if years <= y), 'max')
+        data = stored_history(symbol, period=period)
+    else:
+        data = yf.Ticker(symbol).history(start=start.strftime('%Y-%m-%d'),
+                                         end=(end + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    if data is None or data.empty:
+        return pd.DataFrame()
+    data = data.copy()
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    data.index = index.normalize()
+    data = data[~data.index.duplicated(keep='last')].sort_index()
+    return data.loc[(data.index >= start) & (data.index <= end)].dropna(subset=['Close'])
+
+
+def _signal_weights(scores: np.ndarray, eligible: np.ndarray, target_stocks: int, max_position: float) -> np.ndarray:
+    """optimize_portfolio's weighting in array form: top scores, proportional, capped, renormalised"""
+    weights = np.zeros(len(scores))
+    candidates = np.flatnonzero(eligible)
+    if not len(candidates):
+        return weights
+    top = candidates[np.argsort(-scores[candidates], kind='stable')[:target_stocks]]
+    raw = scores[top] / scores[top].sum()
+    capped = np.minimum(raw, max_position)
+    weights[top] = capped / capped.sum()
+    return weights
+
+# ==================== UNIVERSE SCAN ====================
+# Module-level so scan workers (separate processes) can import and pickle them.
+
+SNAPSHOT_COLUMNS = ['symbol', 'as_of', 'close', 'signal', 'confidence', 'signal_strength',
+                    *SIGNAL_COMPONENTS, 'ml_training', 'market_data_points', 'news_items', 'events_count',
+                    'error', 'scanned_at']
+# Routes serve snapshot signals no older than this; the scheduled scan republishes well within it
+SNAPSHOT_MAX_AGE_HOURS = float(os.getenv('HAI_EDGE_SNAPSHOT_MAX_AGE_HOURS', '6'))
+# Symbols a backtest started from an HTTP request may replay (in-process, while the request waits)
+REQUEST_BACKTEST_MAX_SYMBOLS = int(os.getenv('HAI_EDGE_REQUEST_BACKTEST_SYMBOLS', '10'))
+_SCAN_ENGINES: Dict[str, Any] = {}
+
+
+def ta_feature_frames(histories: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """OHLCV plus the `ta` columns the signal rules and TA_ML_FEATURES read, for every symbol in one grouped pass.
+
+    Stacks all symbols into one long frame and runs the RSI/MACD/Bollinger windows per symbol
+    group, instead of one add_all_ta_features call (~90 indicators) per symbol. Columns keep the
+    `ta` names and the ta dropna; fetch_market_data builds its single-symbol frames here too.
+    """
+    histories = {s: df for s, df in histories.items() if len(df)}
+    if not histories:
+        return {}
+    long = pd.concat({s: df[['Open', 'High', 'Low', 'Close', 'Volume']].astype(float)
+                      for s, df in histories.items()}, names=['symbol', 'date'])
+    close = long['Close']
+    grouped = lambda x: x.groupby(level='symbol', sort=False)
+    ewm = lambda x, **kw: grouped(x).ewm(adjust=False, **kw).mean().droplevel(0)
+    rolling = lambda x, w: grouped(x).rolling(w)
+
+    delta = grouped(close).diff()
+    up = ewm(delta.where(delta > 0, 0.0), alpha=1 / 14, min_periods=14)
+    down = ewm(-delta.where(delta < 0, 0.0), alpha=1 / 14, min_periods=14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = pd.Series(np.where(down == 0, 100.0, 100 - 100 / (1 + up / down)), index=long.index)
+    macd = ewm(close, span=12, min_periods=12) - ewm(close, span=26, min_periods=26)
+    macd_signal = ewm(macd, span=9, min_periods=9)
+    bbm = rolling(close, 20).mean().droplevel(0)
+    band = 2 * rolling(close, 20).std(ddof=0).droplevel(0)
+    long = long.assign(momentum_rsi=rsi.where(down.notna()), trend_macd=macd, trend_macd_signal=macd_signal,
+                       trend_macd_diff=macd - macd_signal, volatility_bbm=bbm,
+                       volatility_bbh=bbm + band, volatility_bbl=bbm - band)
+    return {s: dropna(frame.droplevel(0)) for s, frame in long.groupby(level='symbol', sort=False)}
+
+
+def scan_symbol_signal(config: Dict[str, Any], symbol: str, data: pd.DataFrame, news_data: List[Dict],
+                       events_data: List[Dict], fii_data: Dict, benchmark: pd.Series = None) -> Dict[str, Any]:
+    """Ensemble signal for one symbol inside a scan worker (one engine per process and config)"""
+    key = json.dumps(config, sort_keys=True, default=str)
+    engine = _SCAN_ENGINES.get(key)
+    if engine is None:
+        engine = _SCAN_ENGINES[key] = HAiEdgeEngine(config)
+    return engine._ensemble_signal(symbol, data, news_data, events_data, fii_data, benchmark)
+
+
+def snapshot_row(result: Dict[str, Any], data: pd.DataFrame, scanned_at: datetime) -> Dict[str, Any]:
+    """Flatten an ensemble result into one row of the signal snapshot table"""
+    components = result.get('individual_signals', {})
+    return {
+        'symbol': result['symbol'],
+        'as_of': pd.Timestamp(data.index[-1]).tz_localize(None) if len(data) else pd.NaT,
+        'close': float(data['Close'].iloc[-1]) if len(data) else np.nan,
+        'signal': float(result['signal']),
+        'confidence': float(result['confidence']),
+        'signal_strength': result['signal_strength'],
+        **{name: float(components.get(name, {}).get('overall', np.nan)) for name in SIGNAL_COMPONENTS},
+        'ml_training': components.get('ml_traditional', {}).get('training'),
+        'market_data_points': int(result.get('market_data_points', len(data))),
+        'news_items': int(result.get('news_items', 0)),
+        'events_count': int(result.get('events_count', 0)),
+        'error': result.get('error'),
+        'scanned_at': scanned_at,
+    }
+
+
+
 class HAiEdgeEngine:
     """
     Hybrid AI/ML Engine for Portfolio Management
@@ -56,6 +395,7 @@ class HAiEdgeEngine:
         self.models = {}
         self.scalers = {}
         self.logger = self._setup_logger()
+        self.signal_cache = OrderedDict()  # (symbol, last bar, replay digest) -> point-in-time signal frame
         
         # API URLs
         self.news_api_url = "https://service.upstox.com/content/open/v5/news/sub-category/news/list//market-news/stocks"
@@ -87,7 +427,31 @@ class HAiEdgeEngine:
                 'max_drawdown': 0.10         # 10% max portfolio drawdown
             },
             'rebalance_frequency': 'weekly',
-            'benchmark': '^NSEI'  # NIFTY 50
+            'benchmark': '^NSEI',  # NIFTY 50
+            'model_store': {
+                'enabled': True,
+                'full_refit_bars': 21,   # New bars absorbed by warm starts before a from-scratch refit
+                'warm_start_trees': 5    # Trees/stages added to the forest and boosting models per warm start
+            },
+            'backtest': {
+                'target_stocks': 20,        # Positions held per day (as optimize_portfolio)
+                'transaction_cost': 0.001,  # Per unit of turnover
+                'stop_cooldown_days': 5,    # Re-entry ban after a stop-loss / take-profit exit
+                'warmup_days': 400,         # Calendar days of history before start_date for indicators
+                'ml_refit_days': 126,       # Walk-forward refit cadence of the ML members
+                'ml_models': ['random_forest', 'gradient_boost', 'linear', 'ridge', 'svr'],
+                'ml_trees': 30,             # Trees per forest/boosting model during replay
+                'workers': min(8, os.cpu_count() or 1),
+                'signal_cache_size': 4096,
+                'max_symbols': 50           # Symbols per run; the default universe slice (as the original backtest)
+            },
+            'scan': {
+                'period_days': 730,          # Calendar days of history per symbol (as generate_ensemble_signal)
+                'workers': min(8, os.cpu_count() or 1),
+                'chunksize': 4,              # Symbols per process-pool task
+                'snapshot_dir': None,        # HAI_EDGE_SNAPSHOT_DIR or data/hai_edge_snapshots
+                'snapshot_keep': 30
+            }
         }
     
     def _load_stock_symbols(self) -> List[str]:
@@ -123,14 +487,15 @@ class HAiEdgeEngine:
         
         for symbol in symbols:
             try:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period)
+                if HISTORY_STORE_AVAILABLE:
+                    data = stored_history(symbol, period=period)
+                else:
+                    data = yf.Ticker(symbol).history(period=period)
                 
                 if not data.empty:
-                    # Add technical indicators
-                    data = add_all_ta_features(data, open="Open", high="High", 
-                                             low="Low", close="Close", volume="Volume")
-                    market_data[symbol] = dropna(data)
+                    # Add the technical indicators the signals read (dropna over the full
+                    # add_all_ta_features set leaves no rows: psar up/down are never both set)
+                    market_data[symbol] = ta_feature_frames({symbol: data})[symbol]
                     
             except Exception as e:
                 self.logger.warning(f"Error fetching data for {symbol}: {e}")
@@ -284,7 +649,7 @@ class HAiEdgeEngine:
     
     # ==================== STATISTICAL MODELS ====================
     
-    def statistical_signals(self, data: pd.DataFrame, symbol: str) -> Dict[str, float]:
+    def statistical_signals(self, data: pd.DataFrame, symbol: str, benchmark: pd.Series = None) -> Dict[str, float]:
         """Generate statistical model signals"""
         try:
             signals = {}
@@ -333,7 +698,7 @@ class HAiEdgeEngine:
             
             # Correlation with market
             try:
-                nifty_data = yf.Ticker('^NSEI').history(period='1y')['Close']
+                nifty_data = benchmark if benchmark is not None else yf.Ticker('^NSEI').history(period='1y')['Close']
                 if len(nifty_data) > 0 and len(data) > 0:
                     # Align dates
                     common_dates = data.index.intersection(nifty_data.index)
@@ -383,9 +748,7 @@ class HAiEdgeEngine:
             ])
             
             # Technical indicators (if available)
-            tech_indicators = [col for col in data.columns if any(prefix in col for prefix in 
-                              ['momentum_', 'trend_', 'volatility_', 'volume_'])]
-            features.extend(tech_indicators)
+            features.extend(TA_ML_FEATURES)
             
             # Price ratios
             if all(col in data.columns for col in ['High', 'Low', 'Close']):
@@ -428,84 +791,61 @@ class HAiEdgeEngine:
             return pd.DataFrame(), pd.Series()
     
     def train_ml_models(self, data: pd.DataFrame, symbol: str) -> Dict[str, Any]:
-        """Train multiple ML models"""
+        """Score the classical ML ensemble, reusing the stored fit until new bars arrive"""
         try:
             X, y = self.prepare_ml_features(data)
             
             if len(X) < 50:  # Need minimum data
                 return {'overall': 0.5}
             
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, shuffle=False
-            )
-            
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
-            
-            models = {
-                'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
-                'gradient_boost': GradientBoostingRegressor(n_estimators=100, random_state=42),
-                'linear': LinearRegression(),
-                'ridge': Ridge(alpha=1.0),
-                'svr': SVR(kernel='rbf', C=1.0)
-            }
+            settings = self.config.get('model_store', {})
+            store = get_model_store() if MODEL_STORE_AVAILABLE and settings.get('enabled', True) else None
+            schema = schema_id(X.columns, extra=ML_MODEL_NAMES) if store else None
+            train_end = X.index[-1]
+            
+            bundle = store.load('hai_edge', symbol, schema) if store else None
+            if bundle is None:
+                bundle, training = self._fit_ml_bundle(X, y, symbol), 'full'
+            elif train_end > bundle['train_end']:
+                new_bars = int((X.index > bundle['train_end']).sum())
+                if bundle['bars_since_full'] + new_bars >= settings.get('full_refit_bars', 21):
+                    bundle, training = self._fit_ml_bundle(X, y, symbol), 'full'
+                else:
+                    bundle, training = self._warm_start_ml_bundle(bundle, X, y, new_bars,
+                                                                  settings.get('warm_start_trees', 5)), 'warm_start'
+            else:
+                training = 'loaded'
+            if store and training != 'loaded':
+                store.save('hai_edge', symbol, schema, bundle['train_end'], bundle)
             
+            # Generate signals for the latest data from whichever members are fitted
+            latest_features = X.iloc[-1:].values
             predictions = {}
             scores = {}
-            
-            for name, model in models.items():
-                try:
-                    if name == 'svr':
-                        model.fit(X_train_scaled, y_train)
-                        y_pred = model.predict(X_test_scaled)
-                    else:
-                        model.fit(X_train, y_train)
-                        y_pred = model.predict(X_test)
-                    
-                    score = r2_score(y_test, y_pred)
-                    scores[name] = max(0, min(1, score))  # Normalize to 0-1
-                    
-                    # Generate signal for latest data
-                    latest_features = X.iloc[-1:].values
-                    if name == 'svr':
-                        latest_scaled = scaler.transform(latest_features)
-                        pred = model.predict(latest_scaled)[0]
-                    else:
-                        pred = model.predict(latest_features)[0]
-                    
-                    # Convert prediction to signal (0-1)
-                    if pred > 0.02:  # > 2% expected return
-                        predictions[name] = 0.8
-                    elif pred > 0.01:  # > 1% expected return
-                        predictions[name] = 0.7
-                    elif pred > 0:  # Positive return
-                        predictions[name] = 0.6
-                    elif pred > -0.01:  # Small negative
-                        predictions[name] = 0.4
-                    else:  # Large negative
-                        predictions[name] = 0.2
-                    
-                    # Store model for future use
-                    self.models[f"{symbol}_{name}"] = model
-                    if name == 'svr':
-                        self.scalers[f"{symbol}_{name}"] = scaler
-                        
-                except Exception as e:
-                    self.logger.warning(f"Error training {name} for {symbol}: {e}")
+            for name in ML_MODEL_NAMES:
+                model = bundle['models'].get(name)
+                if model is None:
                     predictions[name] = 0.5
                     scores[name] = 0.0
+                    continue
+                features = bundle['scaler'].transform(latest_features) if name == 'svr' else latest_features
+                predictions[name] = prediction_to_signal(model.predict(features)[0])
+                scores[name] = bundle['scores'][name]
+                
+                # Keep the in-memory view for callers that inspect self.models
+                self.models[f"{symbol}_{name}"] = model
+                if name == 'svr':
+                    self.scalers[f"{symbol}_{name}"] = bundle['scaler']
             
             # Ensemble prediction (weighted by accuracy)
-            total_weight = sum(scores.values()) if sum(scores.values()) > 0 else len(scores)
-            weighted_prediction = sum(predictions[name] * scores[name] for name in predictions) / total_weight
+            weighted_prediction = combine_ml_predictions(predictions, scores)
             
             result = {
                 'overall': weighted_prediction,
                 'individual_predictions': predictions,
-                'model_scores': scores
+                'model_scores': scores,
+                'training': training,
+                'trained_through': str(pd.Timestamp(bundle['train_end']).date())
             }
             
             return result
@@ -514,6 +854,77 @@ class HAiEdgeEngine:
             self.logger.error(f"Error in ML models for {symbol}: {e}")
             return {'overall': 0.5}
     
+    def _fit_ml_bundle(self, X: pd.DataFrame, y: pd.Series, symbol: str) -> Dict[str, Any]:
+        """Fit every ML member from scratch; R^2 on the chronological 20% holdout weights the members"""
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, shuffle=False
+        )
+        
+        # Scale features
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train.values)
+        X_test_scaled = scaler.transform(X_test.values)
+        
+        fitted = {}
+        scores = {}
+        for name, model in build_ml_models().items():
+            try:
+                if name == 'svr':
+                    model.fit(X_train_scaled, y_train)
+                    y_pred = model.predict(X_test_scaled)
+                else:
+                    model.fit(X_train.values, y_train)
+                    y_pred = model.predict(X_test.values)
+                
+                score = r2_score(y_test, y_pred)
+                scores[name] = max(0, min(1, score))  # Normalize to 0-1
+                fitted[name] = model
+            except Exception as e:
+                self.logger.warning(f"Error training {name} for {symbol}: {e}")
+                scores[name] = 0.0
+        
+        return {
+            'models': fitted,
+            'scaler': scaler,
+            'scores': scores,
+            'features': list(X.columns),
+            'train_end': X.index[-1],
+            'bars_since_full': 0,
+            'warm_starts': 0,
+            'fitted_at': datetime.now().isoformat()
+        }
+    
+    def _warm_start_ml_bundle(self, bundle: Dict[str, Any], X: pd.DataFrame, y: pd.Series,
+                              new_bars: int, extra_trees: int) -> Dict[str, Any]:
+        """Absorb new bars without a full refit: grow the tree ensembles, refit the cheap members"""
+        models = dict(bundle['models'])
+        scaler = StandardScaler().fit(X.values)
+        for name, model in list(models.items()):
+            if name in ('random_forest', 'gradient_boost'):
+                # warm_start fits only the added trees/stages; copy first so readers of the
+                # cached bundle never see a half-grown ensemble
+                model = copy.deepcopy(model)
+                model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_trees)
+                model.fit(X.values, y)
+            elif name == 'svr':
+                model = build_ml_models(['svr'])['svr'].fit(scaler.transform(X.values), y)
+            else:
+                model = build_ml_models([name])[name].fit(X.values, y)
+            models[name] = model
+        
+        # The holdout R^2 from the last full fit keeps weighting the members; warm starts
+        # train on every bar, so there is no clean holdout to rescore on until the next full fit
+        return dict(bundle, models=models, scaler=scaler, train_end=X.index[-1],
+                    bars_since_full=bundle['bars_since_full'] + new_bars,
+                    warm_starts=bundle['warm_starts'] + 1, fitted_at=datetime.now().isoformat())
+
+    def refresh_ml_models(self, symbols: List[str] = None) -> Dict[str, str]:
+        """Scheduled retraining pass: bring every stored ML bundle up to the latest bar"""
+        symbols = symbols or self.symbols
+        market_data = self.fetch_market_data(symbols, period="2y")
+        return {symbol: self.train_ml_models(data, symbol).get('training', 'failed')
+                for symbol, data in market_data.items()}
+
     # ==================== DEEP LEARNING MODELS ====================
     
     def deep_learning_signals(self, data: pd.DataFrame, symbol: str) -> Dict[str, float]:
@@ -646,7 +1057,8 @@ class HAiEdgeEngine:
     
     # ==================== EVENT-DRIVEN SIGNALS ====================
     
-    def event_driven_signals(self, symbol: str, events_data: List[Dict], fii_data: Dict) -> Dict[str, float]:
+    def event_driven_signals(self, symbol: str, events_data: List[Dict], fii_data: Dict,
+                             benchmark: pd.Series = None) -> Dict[str, float]:
         """Generate event-driven signals"""
         try:
             signals = {}
@@ -704,8 +1116,11 @@ class HAiEdgeEngine:
             # Market regime analysis
             try:
                 # Get NIFTY data for market context
-                nifty = yf.Ticker('^NSEI')
-                nifty_data = nifty.history(period='1mo')
+                if benchmark is not None:
+                    nifty_data = benchmark[benchmark.index >= benchmark.index[-1] - pd.DateOffset(months=1)].to_frame('Close')
+                else:
+                    nifty = yf.Ticker('^NSEI')
+                    nifty_data = nifty.history(period='1mo')
                 
                 if not nifty_data.empty:
                     nifty_return = (nifty_data['Close'][-1] / nifty_data['Close'][0] - 1)
@@ -753,13 +1168,30 @@ class HAiEdgeEngine:
             events_data = self.fetch_events_data()
             fii_data = self.fetch_fii_dii_data()
             
+            return self._ensemble_signal(symbol, data, news_data, events_data, fii_data)
+            
+        except Exception as e:
+            self.logger.error(f"Error generating ensemble signal for {symbol}: {e}")
+            return {
+                'symbol': symbol,
+                'signal': 0.5,
+                'confidence': 0.0,
+                'signal_strength': 'hold',
+                'error': str(e)
+            }
+    
+    def _ensemble_signal(self, symbol: str, data: pd.DataFrame, news_data: List[Dict], events_data: List[Dict],
+                         fii_data: Dict, benchmark: pd.Series = None) -> Dict[str, Any]:
+        """Combine all model signals for one symbol from already fetched market and external data
+        (benchmark: NIFTY closes covering the last year; fetched per call when omitted)"""
+        try:
             # Generate signals from all models
             symbolic = self.symbolic_signals(data, symbol)
-            statistical = self.statistical_signals(data, symbol)
+            statistical = self.statistical_signals(data, symbol, benchmark)
             ml_signals = self.train_ml_models(data, symbol)
             dl_signals = self.deep_learning_signals(data, symbol)
             sentiment = self.sentiment_signals(symbol, news_data)
-            events = self.event_driven_signals(symbol, events_data, fii_data)
+            events = self.event_driven_signals(symbol, events_data, fii_data, benchmark)
             
             # Combine signals using configured weights
             weights = self.config['model_weights']
@@ -832,11 +1264,134 @@ class HAiEdgeEngine:
                 'error': str(e)
             }
     
+    # ==================== UNIVERSE SCAN ====================
+    
+    def _scan_settings(self) -> Dict[str, Any]:
+        settings = dict(self._default_config()['scan'])
+        settings.update(self.config.get('scan', {}))
+        settings['snapshot_dir'] = (settings.get('snapshot_dir') or os.getenv('HAI_EDGE_SNAPSHOT_DIR')
+                                    or os.path.join('data', 'hai_edge_snapshots'))
+        return settings
+    
+    def scan_universe(self, symbols: List[str] = None) -> pd.DataFrame:
+        """Score a whole universe in one cycle and publish the result as a signal snapshot.
+        
+        Runs as the scheduled 'hai_edge_universe_scan' task. External feeds are fetched once per
+        cycle instead of once per symbol, the ta columns are computed for all symbols in one
+        grouped pass, and the per-symbol model work is spread over a process pool (in-process
+        fallback). Returns the snapshot table."""
+        settings = self._scan_settings()
+        symbols = list(symbols or self.symbols)
+        started = time.perf_counter()
+        end = pd.Timestamp.now().normalize()
+        
+        histories = self._fetch_histories(symbols, end - pd.Timedelta(days=settings['period_days']), end,
+                                          settings['workers'])
+        frames = ta_feature_frames(histories)
+        news_data = self.fetch_news_data()
+        events_data = self.fetch_events_data()
+        fii_data = self.fetch_fii_dii_data()
+        benchmark = self._scan_benchmark(end)
+        
+        scanned_at = datetime.now()
+        names = [s for s in symbols if s in frames and len(frames[s])]
+        results = {}
+        if settings['workers'] > 1 and len(names) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=settings['workers']) as pool:
+                    jobs = pool.map(scan_symbol_signal, [self.config] * len(names), names,
+                                    [frames[s] for s in names], [news_data] * len(names),
+                                    [events_data] * len(names), [fii_data] * len(names),
+                                    [benchmark] * len(names), chunksize=settings['chunksize'])
+                    results = dict(zip(names, jobs))
+            except Exception as e:
+                self.logger.warning(f"Parallel universe scan unavailable, continuing in-process: {e}")
+                results = {}
+        for symbol in names:
+            if symbol not in results:
+                results[symbol] = self._ensemble_signal(symbol, frames[symbol], news_data, events_data, fii_data,
+                                                        benchmark)
+        
+        snapshot = pd.DataFrame([snapshot_row(results[s], frames[s], scanned_at) for s in names],
+                                columns=SNAPSHOT_COLUMNS)
+        path = self._write_signal_snapshot(snapshot, settings)
+        self.logger.info(f"Universe scan scored {len(snapshot)}/{len(symbols)} symbols in "
+                         f"{time.perf_counter() - started:.1f}s -> {path}")
+        return snapshot
+    
+    def _scan_benchmark(self, end: pd.Timestamp) -> pd.Series:
+        """One year of benchmark closes, fetched once per scan; an empty series when unavailable"""
+        if not self.config.get('benchmark'):
+            return pd.Series(dtype=float)
+        try:
+            return _fetch_ohlcv(self.config['benchmark'], end - pd.Timedelta(days=365), end)['Close']
+        except Exception as e:
+            self.logger.warning(f"Benchmark unavailable for the universe scan: {e}")
+            return pd.Series(dtype=float)
+    
+    def _write_signal_snapshot(self, snapshot: pd.DataFrame, settings: Dict[str, Any]) -> str:
+        """Publish a snapshot atomically and keep the newest `snapshot_keep` files"""
+        folder = settings['snapshot_dir']
+        os.makedirs(folder, exist_ok=True)
+        ext = '.parquet' if PYARROW_AVAILABLE else '.pkl'
+        path = os.path.join(folder, f"signals_{datetime.now():%Y%m%d_%H%M%S_%f}{ext}")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        if PYARROW_AVAILABLE:
+            snapshot.to_parquet(tmp, index=False)
+        else:
+            snapshot.to_pickle(tmp)
+        os.replace(tmp, path)
+        for old in self._snapshot_files(folder)[:-settings['snapshot_keep']]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return path
+    
+    @staticmethod
+    def _snapshot_files(folder: str) -> List[str]:
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return []
+        return [os.path.join(folder, n) for n in sorted(names)
+                if n.startswith('signals_') and n.endswith(('.parquet', '.pkl'))]
+    
+    def load_signal_snapshot(self, max_age_hours: float) -> pd.DataFrame:
+        """Newest published signal snapshot, or None when there is none or it is older than max_age_hours"""
+        files = self._snapshot_files(self._scan_settings()['snapshot_dir'])
+        if not files:
+            return None
+        path = files[-1]
+        if time.time() - os.path.getmtime(path) > max_age_hours * 3600:
+            return None
+        try:
+            return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+        except Exception as e:
+            self.logger.warning(f"Unreadable signal snapshot {path}: {e}")
+            return None
+    
+    def snapshot_signals(self, symbols: List[str], max_age_hours: float) -> Dict[str, Dict]:
+        """{symbol: snapshot row} for the requested symbols the latest snapshot scored without error;
+        None when no snapshot is younger than max_age_hours"""
+        snapshot = self.load_signal_snapshot(max_age_hours)
+        if snapshot is None:
+            return None
+        rows = snapshot[snapshot['error'].isna() & snapshot['symbol'].isin(symbols)]
+        return {row['symbol']: row for row in rows.to_dict('records')}
+    
     # ==================== PORTFOLIO OPTIMIZATION ====================
     
-    def optimize_portfolio(self, signals: List[Dict], target_stocks: int = 20) -> List[Dict]:
-        """Optimize portfolio allocation based on signals"""
+    def optimize_portfolio(self, signals: List[Dict] = None, target_stocks: int = 20,
+                           max_age_hours: float = SNAPSHOT_MAX_AGE_HOURS) -> List[Dict]:
+        """Optimize portfolio allocation based on signals (the latest scan snapshot when omitted)"""
         try:
+            if signals is None:
+                snapshot = self.load_signal_snapshot(max_age_hours)
+                if snapshot is None:
+                    return []
+                signals = snapshot[snapshot['error'].isna()].to_dict('records')
+            
             # Filter signals by confidence and strength
             valid_signals = [s for s in signals if s['confidence'] > 0.3 and s['signal'] > 0.5]
             
@@ -879,66 +1434,260 @@ class HAiEdgeEngine:
     
     # ==================== BACKTESTING ====================
     
-    def backtest_strategy(self, start_date: str, end_date: str, initial_capital: float = 1000000) -> Dict[str, Any]:
-        """Backtest the hAi-Edge strategy"""
+    def _backtest_settings(self) -> Dict[str, Any]:
+        return dict(self._default_config()['backtest'], **self.config.get('backtest', {}))
+    
+    def _fetch_histories(self, symbols: List[str], start: pd.Timestamp, end: pd.Timestamp,
+                         workers: int) -> Dict[str, pd.DataFrame]:
+        """Plain OHLCV for many symbols, fetched concurrently (network bound)"""
+        def fetch(symbol):
+            try:
+                return symbol, _fetch_ohlcv(symbol, start, end)
+            except Exception as e:
+                self.logger.warning(f"Error fetching data for {symbol}: {e}")
+                return symbol, pd.DataFrame()
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(16, workers * 2))) as pool:
+            return {s: df for s, df in pool.map(fetch, symbols) if len(df)}
+    
+    def _replay_signals(self, histories: Dict[str, pd.DataFrame], start: pd.Timestamp, benchmark: pd.Series,
+                        settings: Dict[str, Any], weights: Dict[str, float] = None
+                        ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, int]]:
+        """Point-in-time signal frames per symbol, from the cache or computed across worker processes.
+        
+        Indicators and ML refits see the whole history from its first bar, and frames start at
+        `start`, so a cached frame is reused only for the same first bar, last bar and start."""
+        weights = weights or self.config['model_weights']
+        params = {k: settings[k] for k in ('ml_refit_days', 'ml_models', 'ml_trees')}
+        digest = hashlib.sha1(json.dumps([weights, params, self.config.get('benchmark')],
+                                         sort_keys=True, default=str).encode()).hexdigest()[:16]
+        frames, todo = {}, []
+        for symbol, ohlcv in histories.items():
+            key = (symbol, str(ohlcv.index[0].date()), str(ohlcv.index[-1].date()), str(pd.Timestamp(start).date()), digest)
+            cached = self.signal_cache.get(key)
+            if cached is not None and len(cached):
+                self.signal_cache.move_to_end(key)
+                frames[symbol] = cached
+            else:
+                todo.append((symbol, key))
+        
+        def store(symbol, key, frame):
+            frames[symbol] = frame
+            self.signal_cache[key] = frame
+            while len(self.signal_cache) > settings['signal_cache_size']:
+                self.signal_cache.popitem(last=False)
+        
+        args = [(s, histories[s], start, weights, benchmark, params) for s, _ in todo]
+        done = set()
+        if settings['workers'] > 1 and len(todo) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=settings['workers']) as pool:
+                    for (symbol, key), frame in zip(todo, pool.map(replay_symbol_signals, *zip(*args))):
+                        store(symbol, key, frame)
+                        done.add(symbol)
+            except Exception as e:
+                self.logger.warning(f"Parallel signal replay unavailable, continuing in-process: {e}")
+        for (symbol, key), a in zip(todo, args):
+            if symbol not in done:
+                try:
+                    store(symbol, key, replay_symbol_signals(*a))
+                except Exception as e:
+                    self.logger.warning(f"Signal replay failed for {symbol}: {e}")
+        return frames, {'cached': len(histories) - len(todo), 'computed': len(todo)}
+    
+    def _simulate_portfolio(self, prices: np.ndarray, signal: np.ndarray,
+                            confidence: np.ndarray, initial_capital: float, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Daily-rebalanced, event-driven replay over (dates x symbols) matrices.
+        
+        At each close: positions earn the day's return, stop-loss / take-profit exits fire, then the
+        book is rebalanced to optimize_portfolio's weights for that close's signals (so a signal
+        first earns the next day's return), paying transaction costs on turnover.
+        """
+        risk = self.config['risk_parameters']
+        D, N = prices.shape
+        cost_rate = settings['transaction_cost']
+        w = np.zeros(N)
+        entry_px = np.full(N, np.nan)
+        barred_until = np.full(N, -1)
+        ever_held = np.zeros(N, dtype=bool)
+        equity = np.empty(D)
+        value = float(initial_capital)
+        trade_returns, entries, exits = [], 0, 0
+        turnover_total, positions = 0.0, []
+        
+        for d in range(D):
+            px = prices[d]
+            if d > 0:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    r = np.where(np.isfinite(px) & np.isfinite(prices[d - 1]), px / prices[d - 1] - 1, 0.0)
+                growth = 1 + float(w @ r)
+                value *= growth
+                if growth > 0:
+                    w = w * (1 + r) / growth
+            held = w > 0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                pos_ret = px / entry_px - 1
+            stopped = held & ((pos_ret <= -risk['stop_loss']) | (pos_ret >= risk['take_profit']))
+            barred_until[stopped] = d + settings['stop_cooldown_days']
+            
+            if d < D - 1:
+                eligible = (confidence[d] > 0.3) & (signal[d] > 0.5) & np.isfinite(px) & (barred_until < d)
+                target = _signal_weights(signal[d] * confidence[d], eligible, settings['target_stocks'],
+                                         risk['max_position_size'])
+            else:
+                target = w  # mark to market on the last day
+            
+            closing = held & (target == 0)
+            opening = (target > 0) & ~held
+            trade_returns.extend(pos_ret[closing].tolist())
+            entry_px[closing] = np.nan
+            entry_px[opening] = px[opening]
+            entries += int(opening.sum())
+            exits += int(closing.sum())
+            ever_held |= opening
+            
+            turnover = float(np.abs(target - w).sum())
+            turnover_total += turnover
+            value *= 1 - turnover * cost_rate
+            w = target
+            equity[d] = value
+            positions.append(int((w > 0).sum()))
+        
+        open_positions = w > 0
+        trade_returns.extend((prices[-1][open_positions] / entry_px[open_positions] - 1).tolist())
+        trade_returns = [t for t in trade_returns if np.isfinite(t)]
+        return {
+            'equity': equity,
+            'entries': entries,
+            'exits': exits,
+            'trade_returns': trade_returns,
+            'ever_held': ever_held,
+            'turnover': turnover_total,
+            'avg_positions': float(np.mean(positions)) if positions else 0.0,
+        }
+    
+    def backtest_strategy(self, start_date: str, end_date: str, initial_capital: float = 1000000,
+                          symbols: List[str] = None, workers: int = None, max_symbols: int = None,
+                          model_weights: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        Backtest the hAi-Edge strategy by replaying the ensemble signal over history.
+        
+        Indicators are computed once per symbol, each day's signal uses only data up to that day
+        (cached per symbol across runs), symbols are replayed in parallel worker processes, and the
+        portfolio is rebalanced daily with the same selection and sizing rules as optimize_portfolio.
+        Without `symbols` the first `max_symbols` of the universe are used; `workers=1` replays
+        in-process (HTTP handlers pass it so no process pool is started inside a web worker, along
+        with max_symbols=REQUEST_BACKTEST_MAX_SYMBOLS). `model_weights` (signal components or
+        portfolio weight keys) override the configured ensemble weights for this run.
+        """
         try:
+            started = time.time()
             self.logger.info(f"Starting backtest from {start_date} to {end_date}")
-            
-            # This is a simplified backtest - in production, you'd want more sophisticated backtesting
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            # Sample symbols for backtest (you'd use all symbols in production)
-            sample_symbols = self.symbols[:50]  # First 50 symbols
-            
-            # Fetch historical data
-            market_data = self.fetch_market_data(sample_symbols, period="2y")
-            
-            # Simulate trading
-            portfolio_value = initial_capital
-            trades = []
-            daily_returns = []
-            
-            # Simple buy-and-hold simulation (replace with actual strategy)
-            selected_symbols = list(market_data.keys())[:10]  # Top 10 stocks
-            equal_weight = 1.0 / len(selected_symbols)
-            
-            for symbol in selected_symbols:
-                data = market_data[symbol]
-                if len(data) > 0:
-                    initial_price = data['Close'].iloc[0]
-                    final_price = data['Close'].iloc[-1]
-                    stock_return = (final_price / initial_price - 1)
-                    portfolio_return = stock_return * equal_weight
-                    daily_returns.append(portfolio_return)
-            
-            total_return = sum(daily_returns)
-            final_value = initial_capital * (1 + total_return)
-            
-            # Calculate metrics
-            if daily_returns:
-                volatility = np.std(daily_returns) * np.sqrt(252)  # Annualized
-                sharpe_ratio = (total_return / volatility) if volatility > 0 else 0
-            else:
-                volatility = 0
-                sharpe_ratio = 0
+            settings = self._backtest_settings()
+            if workers is not None:
+                settings['workers'] = max(1, int(workers))
+            if max_symbols is not None:
+                settings['max_symbols'] = max(1, int(max_symbols))
+            weights = dict(self.config['model_weights'])
+            for key, value in (model_weights or {}).items():
+                component = PORTFOLIO_WEIGHT_KEYS.get(key, key)
+                if component in weights:
+                    weights[component] = float(value)
+            start = pd.Timestamp(datetime.strptime(start_date, '%Y-%m-%d'))
+            end = pd.Timestamp(datetime.strptime(end_date, '%Y-%m-%d'))
+            if end <= start:
+                return {'error': 'end_date must be after start_date'}
+            fetch_start = start - pd.Timedelta(days=settings['warmup_days'])
+            universe = list(symbols) if symbols else self.symbols[:settings['max_symbols']]
+            if len(universe) > settings['max_symbols']:
+                return {'error': f"At most {settings['max_symbols']} symbols per backtest"}
+            
+            histories = self._fetch_histories(universe, fetch_start, end, settings['workers'])
+            benchmark_symbol = self.config.get('benchmark')
+            benchmark = None
+            if benchmark_symbol:
+                try:
+                    bench = _fetch_ohlcv(benchmark_symbol, fetch_start, end)
+                    benchmark = bench['Close'] if len(bench) else None
+                except Exception as e:
+                    self.logger.warning(f"Benchmark {benchmark_symbol} unavailable: {e}")
+            
+            frames, cache_stats = self._replay_signals(histories, start, benchmark, settings, weights)
+            frames = {s: f for s, f in frames.items() if len(f.loc[start:end])}
+            if not frames:
+                return {'error': 'No market data available for the backtest window'}
+            
+            # Align on trading dates (plus the bar before start, which sets the opening book)
+            names = sorted(frames)
+            dates = pd.DatetimeIndex(sorted(set().union(*(f.index for f in frames.values()))))
+            first = max(int(dates.searchsorted(start)) - 1, 0)
+            dates = dates[first:dates.searchsorted(end, side='right')]
+            
+            def matrix(column, limit=None):
+                return pd.DataFrame({s: frames[s][column] for s in names}).reindex(dates).ffill(limit=limit).to_numpy()
+            
+            prices = matrix('close', limit=5)
+            sim = self._simulate_portfolio(prices, matrix('signal', limit=5), matrix('confidence', limit=5),
+                                           initial_capital, settings)
+            
+            equity = sim['equity']
+            daily = equity[1:] / equity[:-1] - 1
+            n_days = len(daily)
+            total_return = float(equity[-1] / initial_capital - 1)
+            annualized_return = float((1 + total_return) ** (252 / n_days) - 1) if n_days else 0.0
+            std = float(daily.std(ddof=1)) if n_days > 1 else 0.0
+            volatility = std * np.sqrt(252)
+            sharpe_ratio = float(daily.mean() / std * np.sqrt(252)) if std > 0 else 0.0
+            max_drawdown = float(-(equity / np.maximum.accumulate(equity) - 1).min())
+            trades = sim['trade_returns']
             
             backtest_results = {
                 'start_date': start_date,
                 'end_date': end_date,
                 'initial_capital': initial_capital,
-                'final_value': final_value,
+                'final_value': float(equity[-1]),
                 'total_return': total_return,
-                'annualized_return': total_return,  # Simplified
-                'volatility': volatility,
+                'annualized_return': annualized_return,
+                'volatility': float(volatility),
                 'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': 0.05,  # Placeholder
-                'win_rate': 0.65,  # Placeholder
-                'total_trades': len(selected_symbols),
-                'symbols_traded': selected_symbols
+                'max_drawdown': max_drawdown,
+                'win_rate': float(np.mean([t > 0 for t in trades])) if trades else 0.0,
+                'total_trades': sim['entries'] + sim['exits'],
+                'closed_positions': len(trades),
+                'symbols_traded': [s for s, held in zip(names, sim['ever_held']) if held],
+                'avg_positions': sim['avg_positions'],
+                'annual_turnover': float(sim['turnover'] / max(n_days, 1) * 252),
+                'trading_days': n_days,
+                'universe_size': len(universe),
+                'symbols_with_data': len(names),
+                'signal_cache': cache_stats,
+                'model_weights': weights,
+                'equity_curve': [{'date': str(d.date()), 'value': float(v)} for d, v in zip(dates, equity)],
+                'elapsed_seconds': round(time.time() - started, 2)
             }
             
-            self.logger.info(f"Backtest completed. Total return: {total_return:.2%}")
+            if benchmark is not None:
+                bench = benchmark.reindex(dates).ffill().to_numpy()
+                bench_daily = bench[1:] / bench[:-1] - 1
+                ok = np.isfinite(bench_daily)
+                if ok.sum() > 1:
+                    p, b = daily[ok], bench_daily[ok]
+                    benchmark_return = float(np.prod(1 + b) - 1)
+                    beta = float(np.cov(p, b)[0, 1] / b.var(ddof=1)) if b.var(ddof=1) > 0 else 0.0
+                    bench_annual = (1 + benchmark_return) ** (252 / n_days) - 1
+                    active = p - b
+                    backtest_results.update({
+                        'benchmark': benchmark_symbol,
+                        'benchmark_return': benchmark_return,
+                        'beta': beta,
+                        'alpha': float(annualized_return - beta * bench_annual),
+                        'information_ratio': (float(active.mean() / active.std(ddof=1) * np.sqrt(252))
+                                              if active.std(ddof=1) > 0 else 0.0)
+                    })
+            
+            self.logger.info(f"Backtest completed. Total return: {total_return:.2%} over {len(names)} symbols "
+                             f"in {backtest_results['elapsed_seconds']}s")
             
             return backtest_results
             
@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 import json
 import pandas as pd
 import yfinance as yf
-from hai_edge_engine import HAiEdgeEngine
+from hai_edge_engine import HAiEdgeEngine, REQUEST_BACKTEST_MAX_SYMBOLS, SNAPSHOT_MAX_AGE_HOURS
 from hai_edge_models import *
 import plotly.graph_objs as go
 import plotly.utils
@@ -159,40 +159,39 @@ hai_engine = HAiEdgeEngine()
             if not portfolio:
                 return jsonify({'success': False, 'error': 'Portfolio not found'})
             
-            # Get a sample of symbols to analyze (limit for demo)
+            # Signals come from the scheduled universe scan's snapshot, not a per-request model run
             symbols_to_analyze = hai_engine.symbols[:50]  # First 50 symbols
+            snapshot = hai_engine.snapshot_signals(symbols_to_analyze, max_age_hours=SNAPSHOT_MAX_AGE_HOURS)
+            if snapshot is None:
+                return jsonify({'success': False,
+                                'error': f'No signal snapshot from the last {SNAPSHOT_MAX_AGE_HOURS:g} hours; '
+                                         'the universe scan has not published one yet'}), 503
             
             signals_generated = 0
             for symbol in symbols_to_analyze:
-                try:
-                    # Generate ensemble signal
-                    signal_data = hai_engine.generate_ensemble_signal(symbol)
-                    
-                    if 'error' not in signal_data:
-                        # Save signal to database
-                        signal = HAiEdgeSignal(
-                            portfolio_id=portfolio_id,
-                            symbol=symbol,
-                            signal_type='buy' if signal_data['signal'] > 0.6 else 'sell' if signal_data['signal'] < 0.4 else 'hold',
-                            signal_strength=signal_data['signal'],
-                            target_weight=signal_data['signal'] * 0.1,  # Max 10% weight
-                            symbolic_score=signal_data['individual_signals']['symbolic']['overall'],
-                            statistical_score=signal_data['individual_signals']['statistical']['overall'],
-                            ml_score=signal_data['individual_signals']['ml_traditional']['overall'],
-                            dl_score=signal_data['individual_signals']['deep_learning']['overall'],
-                            sentiment_score=signal_data['individual_signals']['sentiment']['overall'],
-                            event_score=signal_data['individual_signals']['event_driven']['overall'],
-                            technical_indicators=json.dumps(signal_data['individual_signals'].get('technical', {})),
-                            news_events=json.dumps({'count': signal_data.get('news_items', 0)}),
-                            calendar_events=json.dumps({'count': signal_data.get('events_count', 0)})
-                        )
-                        
-                        db.session.add(signal)
-                        signals_generated += 1
-                
-                except Exception as e:
-                    app.logger.warning(f"Error generating signal for {symbol}: {e}")
+                signal_data = snapshot.get(symbol)
+                if signal_data is None:
                     continue
+                # Save signal to database
+                signal = HAiEdgeSignal(
+                    portfolio_id=portfolio_id,
+                    symbol=symbol,
+                    signal_type='buy' if signal_data['signal'] > 0.6 else 'sell' if signal_data['signal'] < 0.4 else 'hold',
+                    signal_strength=signal_data['signal'],
+                    target_weight=signal_data['signal'] * 0.1,  # Max 10% weight
+                    symbolic_score=signal_data['symbolic'],
+                    statistical_score=signal_data['statistical'],
+                    ml_score=signal_data['ml_traditional'],
+                    dl_score=signal_data['deep_learning'],
+                    sentiment_score=signal_data['sentiment'],
+                    event_score=signal_data['event_driven'],
+                    technical_indicators=json.dumps({}),
+                    news_events=json.dumps({'count': signal_data['news_items']}),
+                    calendar_events=json.dumps({'count': signal_data['events_count']})
+                )
+                
+                db.session.add(signal)
+                signals_generated += 1
             
             db.session.commit()
             
@@ -308,10 +307,14 @@ hai_engine = HAiEdgeEngine()
             end_date = datetime.now().strftime('%Y-%m-%d')
             start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
             
+            # Request path: a small default universe, replayed in-process with the portfolio's weights
             backtest_results = hai_engine.backtest_strategy(
                 start_date=start_date,
                 end_date=end_date,
-                initial_capital=portfolio.initial_capital
+                initial_capital=portfolio.initial_capital,
+                workers=1,
+                max_symbols=REQUEST_BACKTEST_MAX_SYMBOLS,
+                model_weights=json.loads(portfolio.model_weights or '{}')
             )
             
             if 'error' not in backtest_results:
@@ -328,10 +331,10 @@ hai_engine = HAiEdgeEngine()
                     sharpe_ratio=backtest_results['sharpe_ratio'],
                     max_drawdown=backtest_results['max_drawdown'],
                     win_rate=backtest_results['win_rate'],
-                    benchmark_return=0.12,  # Placeholder
-                    alpha=backtest_results['total_return'] - 0.12,
-                    beta=1.0,  # Placeholder
-                    information_ratio=0.5,  # Placeholder
+                    benchmark_return=backtest_results.get('benchmark_return'),
+                    alpha=backtest_results.get('alpha'),
+                    beta=backtest_results.get('beta'),
+                    information_ratio=backtest_results.get('information_ratio'),
                     total_trades=backtest_results['total_trades'],
                     model_scores=json.dumps({'ensemble': 'active'}),
                     run_by=session.get('username', 'System')
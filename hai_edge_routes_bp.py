@@ -5,9 +5,10 @@ from flask import Blueprint, render_template, request, jsonify, flash, redirect,
 from sqlalchemy import desc, asc
 from datetime import datetime, timedelta
 import json
+import math
 import pandas as pd
 import yfinance as yf
-from hai_edge_engine import HAiEdgeEngine
+from hai_edge_engine import HAiEdgeEngine, REQUEST_BACKTEST_MAX_SYMBOLS, SIGNAL_COMPONENTS, SNAPSHOT_MAX_AGE_HOURS
 from hai_edge_models import HAiEdgePortfolio, HAiEdgeHolding, HAiEdgeSignal, HAiEdgeBacktest, HAiEdgePerformance, HAiEdgeNewsEvent, HAiEdgeModelConfig
 from extensions import db
 import plotly.graph_objs as go
@@ -53,6 +54,14 @@ def _can_view_all_models():
     user_type, _ = _current_user_context()
     return user_type in ['admin', 'analyst', 'investor']
 
+def _finite(value):
+    """Snapshot number as a float, or None when missing/NaN/inf (jsonify would emit invalid NaN)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
 @hai_edge_bp.route('/demo-login')
 def demo_login():
     """Demo login for hAi-Edge system"""
@@ -409,38 +418,49 @@ def generate_signals(portfolio_id):
         # Get model weights
         model_weights = json.loads(portfolio.model_weights)
         
+        # Signals come from the scheduled universe scan's snapshot, not a per-request model run
+        snapshot = hai_engine.snapshot_signals(symbols, max_age_hours=SNAPSHOT_MAX_AGE_HOURS)
+        if snapshot is None:
+            return jsonify({'error': f'No signal snapshot from the last {SNAPSHOT_MAX_AGE_HOURS:g} hours; '
+                                     'the universe scan has not published one yet'}), 503
+        
         signals = []
+        missing = []
         for symbol in symbols:
-            # Generate ensemble signal
-            signal_data = hai_engine.generate_ensemble_signal(symbol)
+            signal_data = snapshot.get(symbol) or {}
+            score, confidence, price = (_finite(signal_data.get(k)) for k in ('signal', 'confidence', 'close'))
+            if None in (score, confidence, price):
+                missing.append(symbol)  # not scanned, or the scan could not score it
+                continue
+            action = 'buy' if score > 0.6 else 'sell' if score < 0.4 else 'hold'
+            reasoning = {name: _finite(signal_data.get(name)) for name in SIGNAL_COMPONENTS}
             
             # Save signal to database
             signal = HAiEdgeSignal(
                 portfolio_id=portfolio_id,
                 symbol=symbol,
-                signal_type=signal_data['action'],
-                confidence=signal_data['confidence'],
-                entry_price=signal_data['current_price'],
-                target_price=signal_data.get('target_price'),
-                stop_loss=signal_data.get('stop_loss'),
-                reasoning=json.dumps(signal_data['reasoning']),
+                signal_type=action,
+                confidence=confidence,
+                entry_price=price,
+                reasoning=json.dumps(reasoning),
                 status='pending'
             )
             
             db.session.add(signal)
             signals.append({
                 'symbol': symbol,
-                'action': signal_data['action'],
-                'confidence': signal_data['confidence'],
-                'current_price': signal_data['current_price'],
-                'reasoning': signal_data['reasoning']
+                'action': action,
+                'confidence': confidence,
+                'current_price': price,
+                'reasoning': reasoning
             })
         
         db.session.commit()
         
         return jsonify({
             'status': 'success',
-            'signals': signals
+            'signals': signals,
+            'missing': missing
         })
     
     except Exception as e:
@@ -532,15 +552,18 @@ def run_backtest(portfolio_id):
         # Get backtest parameters
         start_date = request.json.get('start_date', (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'))
         end_date = request.json.get('end_date', datetime.now().strftime('%Y-%m-%d'))
-        symbols = request.json.get('symbols', ['NIFTY', 'BANKNIFTY'])
+        symbols = request.json.get('symbols')  # None: the first REQUEST_BACKTEST_MAX_SYMBOLS of the universe
         
         # Get model weights
-        model_weights = json.loads(portfolio.model_weights)
+        model_weights = json.loads(portfolio.model_weights or '{}')
         
-        # Run backtest
+        # Run backtest in-process and capped; a process pool does not belong inside a web worker
         backtest_results = hai_engine.backtest_strategy(
-            symbols, start_date, end_date, model_weights, portfolio.initial_capital
+            start_date, end_date, portfolio.initial_capital, symbols=symbols, workers=1,
+            max_symbols=REQUEST_BACKTEST_MAX_SYMBOLS, model_weights=model_weights
         )
+        if 'error' in backtest_results:
+            return jsonify({'error': backtest_results['error']}), 400
         
         # Save backtest results
         backtest = HAiEdgeBacktest(
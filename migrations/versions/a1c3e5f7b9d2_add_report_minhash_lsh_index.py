@@ -0,0 +1,67 @@
+"""add report_minhash and report_lsh_band tables
+
+Revision ID: a1c3e5f7b9d2
+Revises: f5a6b7c8d9e0
+Create Date: 2026-10-16 10:00:00.000000
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b9d2'
+down_revision = 'f5a6b7c8d9e0'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'report_minhash',
+        sa.Column('report_id', sa.String(length=32), sa.ForeignKey('report.id'), primary_key=True),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('num_perm', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'report_lsh_band',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('band_key', sa.String(length=40), nullable=False),
+        sa.Column('report_id', sa.String(length=32), sa.ForeignKey('report.id'), nullable=False),
+    )
+    op.create_index('ix_report_lsh_band_band_key', 'report_lsh_band', ['band_key'])
+    op.create_index('ix_report_lsh_band_report_id', 'report_lsh_band', ['report_id'])
+    _backfill()
+
+def _backfill(batch=500):
+    """Index every existing report once; new reports are indexed by the app as they are inserted"""
+    from utils.minhash_lsh import MinHasher
+    mh = MinHasher()
+    conn = op.get_bind()
+    report = sa.table('report', sa.column('id', sa.String), sa.column('original_text', sa.Text))
+    minhash = sa.table('report_minhash', sa.column('report_id', sa.String), sa.column('signature', sa.LargeBinary),
+                       sa.column('num_perm', sa.Integer), sa.column('updated_at', sa.DateTime))
+    band = sa.table('report_lsh_band', sa.column('band_key', sa.String), sa.column('report_id', sa.String))
+    last = ''
+    while True:
+        rows = conn.execute(sa.select(report.c.id, report.c.original_text)
+                            .where(report.c.original_text.isnot(None)).where(report.c.id > last)
+                            .order_by(report.c.id).limit(batch)).all()
+        if not rows:
+            break
+        signatures, bands = [], []
+        for report_id, text in rows:
+            sig, keys = mh.index_keys(text)
+            signatures.append({'report_id': report_id, 'signature': mh.to_bytes(sig), 'num_perm': mh.num_perm,
+                               'updated_at': datetime.utcnow()})
+            bands.extend({'band_key': k, 'report_id': report_id} for k in keys)
+        conn.execute(minhash.insert(), signatures)
+        if bands:
+            conn.execute(band.insert(), bands)
+        last = rows[-1][0]
+
+def downgrade():
+    op.drop_index('ix_report_lsh_band_report_id', table_name='report_lsh_band')
+    op.drop_index('ix_report_lsh_band_band_key', table_name='report_lsh_band')
+    op.drop_table('report_lsh_band')
+    op.drop_table('report_minhash')
@@ -0,0 +1,32 @@
+"""add scheduled_task table
+
+Revision ID: a7c9e1f3b5d7
+Revises: f6b8d0e2a4c6
+Create Date: 2026-10-16 17:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b5d7'
+down_revision = 'f6b8d0e2a4c6'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'scheduled_task',
+        sa.Column('name', sa.String(length=64), primary_key=True),
+        sa.Column('enabled', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('interval_seconds', sa.Float(), nullable=False, server_default='60'),
+        sa.Column('config_json', sa.Text(), nullable=True),
+        sa.Column('status_json', sa.Text(), nullable=True),
+        sa.Column('leader', sa.String(length=80), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(), nullable=True),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+def downgrade():
+    op.drop_table('scheduled_task')
@@ -0,0 +1,41 @@
+"""add tfidf_vocabulary, tfidf_term and tfidf_learned_report tables
+
+Revision ID: b2d4f6a8c0e1
+Revises: a1c3e5f7b9d2
+Create Date: 2026-10-16 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c0e1'
+down_revision = 'a1c3e5f7b9d2'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'tfidf_vocabulary',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('n_docs', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'tfidf_term',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('term', sa.String(length=64), nullable=False, unique=True),
+        sa.Column('df', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'tfidf_learned_report',
+        sa.Column('report_id', sa.String(length=32), primary_key=True),
+        sa.Column('learned_at', sa.DateTime(), nullable=True),
+    )
+
+def downgrade():
+    op.drop_table('tfidf_learned_report')
+    op.drop_table('tfidf_term')
+    op.drop_table('tfidf_vocabulary')
@@ -0,0 +1,47 @@
+"""add published_model_job table
+
+Revision ID: c3e5a7b9d1f2
+Revises: b2d4f6a8c0e1
+Create Date: 2026-10-16 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d1f2'
+down_revision = 'b2d4f6a8c0e1'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'published_model_job',
+        sa.Column('id', sa.String(length=80), primary_key=True),
+        sa.Column('published_model_id', sa.String(length=40), sa.ForeignKey('published_models.id'), nullable=False),
+        sa.Column('owner_key', sa.String(length=120), nullable=True),
+        sa.Column('investor_id', sa.String(length=32), nullable=True),
+        sa.Column('plan', sa.String(length=20), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('function_name', sa.String(length=120), nullable=True),
+        sa.Column('payload_json', sa.Text(), nullable=True),
+        sa.Column('context_json', sa.Text(), nullable=True),
+        sa.Column('result_json', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=True),
+        sa.Column('worker', sa.String(length=80), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('queue_rank_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_published_model_job_published_model_id', 'published_model_job', ['published_model_id'])
+    op.create_index('ix_published_model_job_owner_key', 'published_model_job', ['owner_key'])
+    op.create_index('ix_published_model_job_investor_id', 'published_model_job', ['investor_id'])
+    op.create_index('ix_published_model_job_status', 'published_model_job', ['status'])
+    op.create_index('ix_published_model_job_created_at', 'published_model_job', ['created_at'])
+    op.create_index('ix_published_model_job_queue_rank_at', 'published_model_job', ['queue_rank_at'])
+
+def downgrade():
+    op.drop_table('published_model_job')
@@ -0,0 +1,76 @@
+"""add search_document and search_posting (BM25 index)
+
+Revision ID: d4f6b8c0e2a4
+Revises: c3e5a7b9d1f2
+Create Date: 2026-10-16 13:00:00.000000
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e2a4'
+down_revision = 'c3e5a7b9d1f2'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'search_document',
+        sa.Column('doc_type', sa.String(length=10), primary_key=True),
+        sa.Column('doc_id', sa.String(length=100), primary_key=True),
+        sa.Column('length', sa.Float(), nullable=False),
+        sa.Column('indexed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'search_posting',
+        sa.Column('term', sa.String(length=40), primary_key=True),
+        sa.Column('doc_type', sa.String(length=10), primary_key=True),
+        sa.Column('doc_id', sa.String(length=100), primary_key=True),
+        sa.Column('tf', sa.Float(), nullable=False),
+        sa.Column('first_offset', sa.Integer(), nullable=True),
+    )
+    # Deleting/replacing one document's postings looks them up by document
+    op.create_index('ix_search_posting_doc', 'search_posting', ['doc_type', 'doc_id'])
+    _backfill()
+
+def _backfill(batch=500):
+    """Index every existing KB entry and report once; new rows are indexed by the app as they are written"""
+    from utils.bm25_index import KB_FIELDS, REPORT_FIELDS, analyze, row_fields
+    conn = op.get_bind()
+    existing = set(sa.inspect(conn).get_table_names())
+    document = sa.table('search_document', sa.column('doc_type', sa.String), sa.column('doc_id', sa.String),
+                        sa.column('length', sa.Float), sa.column('indexed_at', sa.DateTime))
+    posting = sa.table('search_posting', sa.column('term', sa.String), sa.column('doc_type', sa.String),
+                       sa.column('doc_id', sa.String), sa.column('tf', sa.Float), sa.column('first_offset', sa.Integer))
+    for doc_type, name, id_type, spec in (('kb', 'knowledge_base', sa.Integer, KB_FIELDS),
+                                          ('report', 'report', sa.String, REPORT_FIELDS)):
+        if name not in existing:
+            continue
+        source = sa.table(name, sa.column('id', id_type), *(sa.column(f[0], sa.Text) for f in spec))
+        last = None
+        while True:
+            query = sa.select(source).order_by(source.c.id).limit(batch)
+            if last is not None:
+                query = query.where(source.c.id > last)
+            rows = conn.execute(query).all()
+            if not rows:
+                break
+            documents, postings = [], []
+            for row in rows:
+                doc_id = str(row.id)
+                terms, length = analyze(row_fields(spec, row))
+                documents.append({'doc_type': doc_type, 'doc_id': doc_id, 'length': length,
+                                  'indexed_at': datetime.utcnow()})
+                postings.extend({'term': t, 'doc_type': doc_type, 'doc_id': doc_id, 'tf': tf, 'first_offset': off}
+                                for t, (tf, off) in terms.items())
+            conn.execute(document.insert(), documents)
+            if postings:
+                conn.execute(posting.insert(), postings)
+            last = rows[-1].id
+
+def downgrade():
+    op.drop_index('ix_search_posting_doc', table_name='search_posting')
+    op.drop_table('search_posting')
+    op.drop_table('search_document')
@@ -0,0 +1,89 @@
+"""add report_score and analyst_metrics_rollup (materialized dashboard metrics)
+
+Revision ID: e5a7c9d1f3b5
+Revises: d4f6b8c0e2a4
+Create Date: 2026-10-16 14:00:00.000000
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d1f3b5'
+down_revision = 'd4f6b8c0e2a4'
+branch_labels = None
+depends_on = None
+
+METRICS = ('factual_accuracy', 'predictive_power', 'bias_score', 'originality', 'risk_disclosure', 'transparency')
+
+def upgrade():
+    op.create_table(
+        'report_score',
+        sa.Column('report_id', sa.String(length=32), primary_key=True),
+        sa.Column('analyst', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('quality', sa.Float(), nullable=True),
+        *[sa.Column(m, sa.Float(), nullable=True) for m in METRICS],
+        sa.Column('sebi_compliance', sa.Float(), nullable=True),
+        sa.Column('alert_count', sa.Float(), nullable=True),
+        sa.Column('ai_probability', sa.Float(), nullable=True),
+        sa.Column('plagiarism_score', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_report_score_analyst_created', 'report_score', ['analyst', 'created_at'])
+    op.create_index('ix_report_score_created', 'report_score', ['created_at'])
+    op.create_index('ix_report_score_quality', 'report_score', ['quality'])
+    op.create_table(
+        'analyst_metrics_rollup',
+        sa.Column('analyst', sa.String(length=100), primary_key=True),
+        sa.Column('report_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('scored_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('quality_sum', sa.Float(), nullable=False, server_default='0'),
+        *[sa.Column(f'{m}_sum', sa.Float(), nullable=False, server_default='0') for m in METRICS],
+        *[sa.Column(f'{m}_n', sa.Integer(), nullable=False, server_default='0') for m in METRICS],
+        sa.Column('sebi_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('sebi_n', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('alert_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('ai_probability_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('plagiarism_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('best_report_id', sa.String(length=32), nullable=True),
+        sa.Column('best_quality', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    _backfill()
+
+def _backfill(batch=1000):
+    """Score every existing report and fill the rollups (later writes are kept in step by the app)"""
+    from utils.report_metrics import ROLLUP_COLUMNS, SCORE_FIELDS, add_to_rollups, extract_scores
+    bind = op.get_bind()
+    report = sa.table('report', sa.column('id'), sa.column('analyst'), sa.column('created_at'),
+                      sa.column('analysis_result'), sa.column('ai_probability'), sa.column('plagiarism_score'))
+    score = sa.table('report_score', *[sa.column(c) for c in ('report_id', 'analyst', 'created_at', 'updated_at') + SCORE_FIELDS])
+    rollup = sa.table('analyst_metrics_rollup', *[sa.column(c) for c in
+                      ('analyst',) + ROLLUP_COLUMNS + ('best_report_id', 'best_quality', 'updated_at')])
+    now = datetime.utcnow()
+    rollups = {}
+    last_id = ''
+    while True:
+        reports = bind.execute(sa.select(report).where(report.c.id > last_id).order_by(report.c.id).limit(batch)).mappings().all()
+        if not reports:
+            break
+        rows = []
+        for r in reports:
+            row = extract_scores(r['analysis_result'])
+            row.update(report_id=r['id'], analyst=r['analyst'] or '', created_at=r['created_at'], updated_at=now,
+                       ai_probability=r['ai_probability'] or 0.0, plagiarism_score=r['plagiarism_score'] or 0.0)
+            add_to_rollups(rollups, row)
+            rows.append(row)
+        bind.execute(score.insert(), rows)
+        last_id = reports[-1]['id']
+    if rollups:
+        bind.execute(rollup.insert(), [dict(r, updated_at=now) for r in rollups.values()])
+
+def downgrade():
+    op.drop_table('analyst_metrics_rollup')
+    op.drop_index('ix_report_score_quality', table_name='report_score')
+    op.drop_index('ix_report_score_created', table_name='report_score')
+    op.drop_index('ix_report_score_analyst_created', table_name='report_score')
+    op.drop_table('report_score')
@@ -0,0 +1,34 @@
+"""add report_pipeline_job table
+
+Revision ID: f6b8d0e2a4c6
+Revises: e5a7c9d1f3b5
+Create Date: 2026-10-16 16:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0e2a4c6'
+down_revision = 'e5a7c9d1f3b5'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'report_pipeline_job',
+        sa.Column('report_id', sa.String(length=32), primary_key=True),
+        sa.Column('tickers_json', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('worker', sa.String(length=80), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_report_pipeline_job_status', 'report_pipeline_job', ['status'])
+    op.create_index('ix_report_pipeline_job_created_at', 'report_pipeline_job', ['created_at'])
+
+def downgrade():
+    op.drop_table('report_pipeline_job')
@@ -11,6 +11,8 @@ from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 import logging
 
+from models.options_chain_analytics import get_chain_analytics
+
 logger = logging.getLogger(__name__)
 
 class EnhancedOptionsAnalytics:
@@ -22,33 +24,24 @@ class EnhancedOptionsAnalytics:
         """Calculate advanced Greeks and risk metrics"""
         try:
             enhanced_metrics = {}
+            chain = get_chain_analytics(options_data)
             
             # Portfolio-level Greeks
-            portfolio_delta = sum(row.get('call_delta', 0) * row.get('call_oi', 0) + 
-                                 row.get('put_delta', 0) * row.get('put_oi', 0) 
-                                 for row in options_data)
-            
-            portfolio_gamma = sum(row.get('call_gamma', 0) * row.get('call_oi', 0) + 
-                                 row.get('put_gamma', 0) * row.get('put_oi', 0) 
-                                 for row in options_data)
+            portfolio = chain.portfolio_greeks()
             
             # Gamma exposure calculation
-            gamma_exposure = {}
-            for row in options_data:
-                strike = row['strike']
-                call_gamma_exposure = row.get('call_gamma', 0) * row.get('call_oi', 0) * spot_price * spot_price / 100
-                put_gamma_exposure = row.get('put_gamma', 0) * row.get('put_oi', 0) * spot_price * spot_price / 100
-                gamma_exposure[strike] = call_gamma_exposure + put_gamma_exposure
+            net_gex = chain.gamma_exposure(spot_price)['net']
+            gamma_exposure = dict(zip(chain.strikes.tolist(), net_gex.tolist()))
             
             # Dark pools and gamma walls
-            max_gamma_strike = max(gamma_exposure.keys(), key=lambda k: gamma_exposure[k])
+            wall = int(np.argmax(net_gex))
             
             enhanced_metrics.update({
-                'portfolio_delta': portfolio_delta,
-                'portfolio_gamma': portfolio_gamma, 
+                'portfolio_delta': portfolio['delta'],
+                'portfolio_gamma': portfolio['gamma'], 
                 'gamma_exposure_by_strike': gamma_exposure,
-                'max_gamma_strike': max_gamma_strike,
-                'gamma_wall_strength': gamma_exposure[max_gamma_strike]
+                'max_gamma_strike': float(chain.strikes[wall]),
+                'gamma_wall_strength': float(net_gex[wall])
             })
             
             return enhanced_metrics
@@ -60,16 +53,16 @@ class EnhancedOptionsAnalytics:
     def calculate_volatility_analytics(self, options_data):
         """Advanced volatility surface analysis"""
         try:
-            call_ivs = [row.get('call_iv', 0) for row in options_data if row.get('call_iv', 0) > 0]
-            put_ivs = [row.get('put_iv', 0) for row in options_data if row.get('put_iv', 0) > 0]
+            chain = get_chain_analytics(options_data)
+            call_strikes, call_ivs = chain.iv_points('call')
+            put_strikes, put_ivs = chain.iv_points('put')
             
-            if not call_ivs or not put_ivs:
+            if not len(call_ivs) or not len(put_ivs):
                 return {}
             
-            # Volatility skew analysis
-            strikes = [row['strike'] for row in options_data]
-            call_iv_skew = np.polyfit(strikes, call_ivs, 2) if len(call_ivs) > 2 else [0, 0, 0]
-            put_iv_skew = np.polyfit(strikes, put_ivs, 2) if len(put_ivs) > 2 else [0, 0, 0]
+            # Volatility skew analysis (each side fitted on the strikes that quote an IV)
+            call_iv_skew = np.polyfit(call_strikes, call_ivs, 2) if len(call_ivs) > 2 else [0, 0, 0]
+            put_iv_skew = np.polyfit(put_strikes, put_ivs, 2) if len(put_ivs) > 2 else [0, 0, 0]
             
             # Term structure analysis (simplified)
             volatility_analytics = {
@@ -82,7 +75,7 @@ class EnhancedOptionsAnalytics:
                 'put_iv_skew_coefficient': put_iv_skew[0],
                 'volatility_smile_asymmetry': skew(call_ivs),
                 'volatility_smile_kurtosis': kurtosis(call_ivs),
-                'iv_percentile_rank': self._calculate_iv_percentile(call_ivs)
+                'iv_percentile_rank': self._calculate_iv_percentile(call_ivs.tolist())
             }
             
             return volatility_analytics
@@ -94,43 +87,31 @@ class EnhancedOptionsAnalytics:
     def analyze_flow_patterns(self, options_data):
         """Analyze options flow patterns and sentiment"""
         try:
-            call_volume = sum(row.get('call_volume', 0) for row in options_data)
-            put_volume = sum(row.get('put_volume', 0) for row in options_data)
-            
-            call_oi = sum(row.get('call_oi', 0) for row in options_data)
-            put_oi = sum(row.get('put_oi', 0) for row in options_data)
+            chain = get_chain_analytics(options_data)
+            pcr = chain.pcr()
             
             # Flow analysis
             flow_analytics = {
-                'total_call_volume': call_volume,
-                'total_put_volume': put_volume,
-                'volume_pcr': put_volume / max(call_volume, 1),
-                'oi_pcr': put_oi / max(call_oi, 1),
-                'volume_oi_ratio_calls': call_volume / max(call_oi, 1),
-                'volume_oi_ratio_puts': put_volume / max(put_oi, 1)
+                'total_call_volume': pcr['total_call_volume'],
+                'total_put_volume': pcr['total_put_volume'],
+                'volume_pcr': pcr['volume_pcr'],
+                'oi_pcr': pcr['oi_pcr'],
+                'volume_oi_ratio_calls': pcr['total_call_volume'] / max(pcr['total_call_oi'], 1),
+                'volume_oi_ratio_puts': pcr['total_put_volume'] / max(pcr['total_put_oi'], 1)
             }
             
-            # Unusual activity detection
+            # Unusual activity detection (volume above twice the open interest)
+            ratios = {side: chain[f'{side}_volume'] / np.maximum(chain[f'{side}_oi'], 1) for side in ('call', 'put')}
             unusual_activity = []
-            for row in options_data:
-                call_vol_oi_ratio = row.get('call_volume', 0) / max(row.get('call_oi', 1), 1)
-                put_vol_oi_ratio = row.get('put_volume', 0) / max(row.get('put_oi', 1), 1)
-                
-                if call_vol_oi_ratio > 2.0:  # High call activity
-                    unusual_activity.append({
-                        'strike': row['strike'],
-                        'type': 'call',
-                        'activity_ratio': call_vol_oi_ratio,
-                        'volume': row.get('call_volume', 0)
-                    })
-                
-                if put_vol_oi_ratio > 2.0:  # High put activity
-                    unusual_activity.append({
-                        'strike': row['strike'],
-                        'type': 'put',
-                        'activity_ratio': put_vol_oi_ratio,
-                        'volume': row.get('put_volume', 0)
-                    })
+            for i in np.flatnonzero((ratios['call'] > 2.0) | (ratios['put'] > 2.0)):
+                for side in ('call', 'put'):
+                    if ratios[side][i] > 2.0:
+                        unusual_activity.append({
+                            'strike': float(chain.strikes[i]),
+                            'type': side,
+                            'activity_ratio': float(ratios[side][i]),
+                            'volume': float(chain[f'{side}_volume'][i])
+                        })
             
             flow_analytics['unusual_activity'] = unusual_activity
             flow_analytics['sentiment_score'] = self._calculate_sentiment_score(flow_analytics)
@@ -144,29 +125,12 @@ class EnhancedOptionsAnalytics:
     def calculate_support_resistance_levels(self, options_data, spot_price):
         """Calculate support and resistance levels from options data"""
         try:
-            # Weighted by open interest
-            levels = []
-            
-            for row in options_data:
-                strike = row['strike']
-                total_oi = row.get('call_oi', 0) + row.get('put_oi', 0)
-                
-                if total_oi > 0:
-                    # Gamma exposure calculation for strike significance
-                    gamma_weight = (row.get('call_gamma', 0) + row.get('put_gamma', 0)) * total_oi
-                    levels.append({
-                        'strike': strike,
-                        'oi_weight': total_oi,
-                        'gamma_weight': gamma_weight,
-                        'distance_from_spot': abs(strike - spot_price) / spot_price * 100
-                    })
-            
-            # Sort by significance (OI + Gamma weight)
-            levels.sort(key=lambda x: x['oi_weight'] + x['gamma_weight'], reverse=True)
+            # Weighted by open interest and OI-weighted gamma
+            walls = get_chain_analytics(options_data).oi_walls(spot_price, top=3)
             
             # Identify key levels
-            resistance_levels = [l for l in levels if l['strike'] > spot_price][:3]
-            support_levels = [l for l in levels if l['strike'] < spot_price][:3]
+            resistance_levels = walls['resistance']
+            support_levels = walls['support']
             
             return {
                 'resistance_levels': resistance_levels,
@@ -230,13 +194,9 @@ class EnhancedOptionsAnalytics:
         """Calculate portfolio risk metrics"""
         try:
             # VaR calculation (simplified)
-            total_delta = sum(row.get('call_delta', 0) * row.get('call_oi', 0) + 
-                             row.get('put_delta', 0) * row.get('put_oi', 0) 
-                             for row in options_data)
-            
-            total_gamma = sum(row.get('call_gamma', 0) * row.get('call_oi', 0) + 
-                             row.get('put_gamma', 0) * row.get('put_oi', 0) 
-                             for row in options_data)
+            portfolio = get_chain_analytics(options_data).portfolio_greeks()
+            total_delta = portfolio['delta']
+            total_gamma = portfolio['gamma']
             
             # Risk scenarios
             scenarios = {
@@ -267,11 +227,12 @@ class EnhancedOptionsAnalytics:
         try:
             insights = []
             
-            # Analyze the data
-            advanced_greeks = self.calculate_advanced_greeks(options_data, spot_price)
-            volatility_analytics = self.calculate_volatility_analytics(options_data)
-            flow_patterns = self.analyze_flow_patterns(options_data)
-            support_resistance = self.calculate_support_resistance_levels(options_data, spot_price)
+            # Analyze the data (one chain instance shared by every analytic)
+            chain = get_chain_analytics(options_data)
+            advanced_greeks = self.calculate_advanced_greeks(chain, spot_price)
+            volatility_analytics = self.calculate_volatility_analytics(chain)
+            flow_patterns = self.analyze_flow_patterns(chain)
+            support_resistance = self.calculate_support_resistance_levels(chain, spot_price)
             
             # Generate insights based on analysis
             if volatility_analytics.get('iv_spread', 0) > 2:
@@ -333,17 +294,19 @@ class EnhancedOptionsAnalytics:
     def comprehensive_analysis(self, options_data, spot_price, risk_free_rate=0.05):
         """Run comprehensive enhanced analytics"""
         try:
+            # Build (or look up) the chain arrays once and pass the instance to every analytic
+            chain = get_chain_analytics(options_data)
             result = {
                 'timestamp': datetime.now().isoformat(),
                 'spot_price': spot_price,
                 'analytics': {
-                    'advanced_greeks': self.calculate_advanced_greeks(options_data, spot_price, risk_free_rate),
-                    'volatility_analytics': self.calculate_volatility_analytics(options_data),
-                    'flow_patterns': self.analyze_flow_patterns(options_data),
-                    'support_resistance': self.calculate_support_resistance_levels(options_data, spot_price),
+                    'advanced_greeks': self.calculate_advanced_greeks(chain, spot_price, risk_free_rate),
+                    'volatility_analytics': self.calculate_volatility_analytics(chain),
+                    'flow_patterns': self.analyze_flow_patterns(chain),
+                    'support_resistance': self.calculate_support_resistance_levels(chain, spot_price),
                     'institutional_positioning': self.analyze_institutional_positioning(options_data),
-                    'risk_metrics': self.calculate_risk_metrics(options_data, spot_price),
-                    'market_insights': self.generate_market_insights(options_data, spot_price)
+                    'risk_metrics': self.calculate_risk_metrics(chain, spot_price),
+                    'market_insights': self.generate_market_insights(chain, spot_price)
                 }
             }
             
@@ -0,0 +1,281 @@
+"""
+Multi-underlying unusual options activity scanner.
+
+Each refresh pulls the chain of every target (underlying, expiry) concurrently through a fetcher
+that returns transform_upstox_data-shaped dicts, then scores every strike of every chain with
+array operations against rolling in-memory baselines:
+
+    - volume spike: z-score of the volume traded since the previous refresh, scaled to one
+      `interval` of elapsed time, against an exponentially weighted mean/variance of earlier
+      per-interval volumes (per strike and side), so a late or skipped refresh is not a spike;
+    - IV change: move in implied volatility (vol points) since the previous refresh;
+    - gamma wall: strikes near spot holding a large share of the chain's gamma exposure
+      (models.options_chain_analytics).
+
+Alerts are ranked by a single score and returned in the /api/options/realtime_scanner payload
+shape. The cycle is bounded by the refresh interval: chains that have not arrived by then are
+reported as late, and their targets are skipped until that fetch returns. The caller schedules
+the cycles (the app runs one scanner as a scheduled task and shares its result).
+
+Usage:
+    scanner = OptionsActivityScanner(fetch_upstox_chain, [("NSE_INDEX|Nifty 50", "30-09-2025")])
+    result = scanner.latest(max_age=60)       # single-flight refresh when older than 60s
+    scanner.set_targets([("NSE_INDEX|Nifty 50", "28-10-2025")])  # drops the cached result
+"""
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models.options_chain_analytics import ChainAnalytics
+
+SIDES = ('call', 'put')
+
+DEFAULT_SCANNER_CONFIG: Dict[str, Any] = {
+    'interval': 60.0,           # seconds between refreshes; also the cycle deadline
+    'workers': 8,
+    'halflife': 20,             # refreshes for the volume baseline to halve its weight
+    'min_samples': 5,           # refreshes before a strike's volume z-score is trusted
+    'volume_z': 3.0,
+    'min_volume': 500.0,        # contracts traded since the last refresh
+    'iv_change': 2.0,           # vol points since the last refresh
+    'gamma_share': 0.10,        # share of the chain's |GEX| at one strike
+    'gamma_distance_pct': 2.0,  # only walls within this % of spot
+    'max_alerts': 50,
+}
+
+
+def display_symbol(asset_key: str) -> str:
+    """'NSE_INDEX|Nifty 50' -> 'Nifty 50'"""
+    return str(asset_key).split('|', 1)[-1]
+
+
+class StrikeBaseline:
+    """Rolling per-strike, per-side state for one chain: last values and EWMA volume statistics."""
+
+    def __init__(self, alpha: float, period: float = 60.0):
+        self.alpha = alpha
+        self.period = float(period)
+        self.last_at: Optional[float] = None
+        self.strikes = np.empty(0)
+        empty = np.empty((0, 2))
+        self.last_volume, self.last_iv, self.last_oi = empty, empty, empty
+        self.mean, self.var, self.count = empty, empty, empty
+
+    def _align(self, strikes: np.ndarray) -> None:
+        """Re-index state onto `strikes` (new strikes start empty, vanished strikes are dropped)."""
+        if np.array_equal(strikes, self.strikes):
+            return
+        if len(self.strikes):
+            pos = np.clip(np.searchsorted(self.strikes, strikes), 0, len(self.strikes) - 1)
+            found = self.strikes[pos] == strikes
+        else:
+            pos, found = np.zeros(len(strikes), dtype=int), np.zeros(len(strikes), dtype=bool)
+
+        def take(arr, fill):
+            out = np.full((len(strikes), 2), fill, dtype=float)
+            if found.any():
+                out[found] = arr[pos[found]]
+            return out
+
+        self.last_volume, self.last_iv, self.last_oi = (take(a, np.nan) for a in
+                                                        (self.last_volume, self.last_iv, self.last_oi))
+        self.mean, self.var, self.count = take(self.mean, 0.0), take(self.var, 0.0), take(self.count, 0.0)
+        self.strikes = strikes
+
+    def update(self, strikes: np.ndarray, volume: np.ndarray, iv: np.ndarray, oi: np.ndarray,
+               at: Optional[float] = None):
+        """Fold one refresh taken at monotonic time `at` in.
+
+        Returns traded volume, traded volume per `period` seconds, the rate's z-score, IV and OI
+        change, and the prior mean/count of the rate.
+        """
+        self._align(strikes)
+        traded = volume - self.last_volume
+        traded = np.where(traded < 0, volume, traded)  # cumulative volume reset: new session
+        rate = traded
+        if at is not None and self.last_at is not None:
+            rate = traded * (self.period / max(at - self.last_at, 1.0))
+        std = np.sqrt(self.var)
+        z = np.where((self.count >= 1) & ~np.isnan(rate),
+                     (rate - self.mean) / np.maximum(std, np.maximum(1.0, 0.1 * self.mean)), 0.0)
+        iv_change = np.where((self.last_iv > 0) & (iv > 0), (iv - self.last_iv) * 100, 0.0)
+        oi_change = np.nan_to_num(oi - self.last_oi)
+        baseline = self.mean.copy()
+        count = self.count.copy()
+
+        seen = ~np.isnan(rate)
+        delta = np.where(seen, rate - self.mean, 0.0)
+        first = seen & (self.count == 0)
+        self.mean = np.where(first, rate, self.mean + self.alpha * delta)
+        self.var = np.where(first, 0.0, np.where(seen, (1 - self.alpha) * (self.var + self.alpha * delta ** 2),
+                                                 self.var))
+        self.count = self.count + seen
+        self.last_volume, self.last_iv, self.last_oi = volume, np.where(iv > 0, iv, self.last_iv), oi
+        self.last_at = at if at is not None else self.last_at
+        return np.nan_to_num(traded), np.nan_to_num(rate), z, iv_change, oi_change, baseline, count
+
+
+class OptionsActivityScanner:
+    """Concurrent chain fetch + vectorized scoring with single-flight refreshes.
+
+    A target whose previous fetch is still running is skipped (a running future cannot be
+    cancelled), so a slow upstream never has more than one request per target outstanding.
+    """
+
+    def __init__(self, fetch: Callable[[str, str], Dict[str, Any]],
+                 targets: Iterable[Tuple[str, str]], config: Optional[Dict[str, Any]] = None):
+        self.fetch = fetch
+        self.config = {**DEFAULT_SCANNER_CONFIG, **(config or {})}
+        self.targets: List[Tuple[str, str]] = [(str(u), str(e)) for u, e in targets]
+        self._alpha = 1 - 0.5 ** (1 / max(1.0, float(self.config['halflife'])))
+        self._baselines: Dict[Tuple[str, str], StrikeBaseline] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(self.config['workers'])),
+                                        thread_name_prefix='options-scan')
+        self._scan_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._latest: Optional[Dict[str, Any]] = None
+        self._latest_at = 0.0
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+
+    def set_targets(self, targets: Iterable[Tuple[str, str]]) -> bool:
+        """Replace the scanned targets; a change drops the cached result and removed chains' baselines."""
+        targets = [(str(u), str(e)) for u, e in targets]
+        with self._state_lock:
+            if targets == self.targets:
+                return False
+            self.targets = targets
+            keep = set(targets)
+            self._baselines = {k: v for k, v in self._baselines.items() if k in keep}
+            self._latest, self._latest_at = None, 0.0
+        return True
+
+    # ----- scoring -----
+    def score_chain(self, underlying: str, expiry: str, chain: Dict[str, Any],
+                    at: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Update the chain's baselines with a chain fetched at monotonic time `at` and return its alerts."""
+        cfg = self.config
+        arrays = ChainAnalytics(chain.get('raw') or [])
+        strikes = arrays.strikes
+        spot = float(chain.get('underlying_price') or 0)
+        stack = lambda field: np.column_stack([arrays[f'{side}_{field}'] for side in SIDES])
+        volume, iv, oi = stack('volume'), stack('iv'), stack('oi')
+
+        key = (underlying, expiry)
+        with self._state_lock:
+            baseline = self._baselines.get(key)
+            if baseline is None:
+                baseline = self._baselines[key] = StrikeBaseline(self._alpha, float(cfg['interval']))
+            traded, rate, z, iv_change, oi_change, mean, count = baseline.update(strikes, volume, iv, oi, at)
+
+        symbol = display_symbol(underlying)
+        implied_move = None
+        if spot > 0 and len(strikes):
+            atm = int(np.argmin(np.abs(strikes - spot)))
+            straddle = arrays['call_ltp'][atm] + arrays['put_ltp'][atm]
+            implied_move = round(float(straddle / spot * 100), 2) if straddle > 0 else None
+
+        spikes = (count >= cfg['min_samples']) & (z >= cfg['volume_z']) & (rate >= cfg['min_volume'])
+        unusual = [{
+            'symbol': symbol, 'underlying': underlying, 'expiry': expiry, 'strike': float(strikes[i]),
+            'type': SIDES[j], 'unusual_volume': float(traded[i, j]), 'avg_volume': round(float(mean[i, j]), 2),
+            'volume_ratio': round(float(rate[i, j] / max(mean[i, j], 1.0)), 2), 'z_score': round(float(z[i, j]), 2),
+            'oi_change': float(oi_change[i, j]),
+            'implied_move': implied_move, 'alert_type': 'volume_spike', 'score': float(z[i, j]),
+        } for i, j in zip(*np.nonzero(spikes))]
+
+        expanding = np.abs(iv_change) >= cfg['iv_change']
+        movers = [{
+            'symbol': symbol, 'underlying': underlying, 'expiry': expiry, 'strike': float(strikes[i]),
+            'type': SIDES[j], 'iv_change': round(float(iv_change[i, j]), 2), 'volume': float(volume[i, j]),
+            'alert_type': 'iv_expansion' if iv_change[i, j] > 0 else 'iv_crush',
+            'score': float(abs(iv_change[i, j]) / cfg['iv_change']),
+        } for i, j in zip(*np.nonzero(expanding))]
+
+        walls = []
+        if spot > 0 and len(strikes):
+            gex = arrays.gamma_exposure(spot)['net']
+            total = np.abs(gex).sum()
+            distance = np.abs(strikes - spot) / spot * 100
+            share = np.abs(gex) / total if total > 0 else np.zeros_like(gex)
+            near = (share >= cfg['gamma_share']) & (distance <= cfg['gamma_distance_pct'])
+            walls = [{
+                'symbol': symbol, 'underlying': underlying, 'expiry': expiry, 'strike': float(strikes[i]),
+                'gamma_exposure': float(gex[i]), 'gamma_share': round(float(share[i]), 4),
+                'distance_from_spot': round(float(distance[i]), 2), 'alert_type': 'gamma_wall',
+                'score': float(share[i] / cfg['gamma_share']),
+            } for i in np.flatnonzero(near)]
+        return {'unusual_activity': unusual, 'top_movers': movers, 'gamma_alerts': walls}
+
+    # ----- cycle -----
+    def _fetch_at(self, underlying: str, expiry: str) -> Tuple[Dict[str, Any], float]:
+        chain = self.fetch(underlying, expiry)
+        return chain, time.monotonic()
+
+    def scan(self) -> Dict[str, Any]:
+        """One refresh: fetch every idle target concurrently, score what arrives within the interval."""
+        started = time.monotonic()
+        futures: Dict[Future, Tuple[str, str]] = {}
+        busy: List[Tuple[str, str]] = []
+        with self._state_lock:
+            targets = list(self.targets)
+            for target in targets:
+                running = self._inflight.get(target)
+                if running is not None and not running.done():
+                    busy.append(target)
+                    continue
+                future = self._inflight[target] = self._pool.submit(self._fetch_at, *target)
+                futures[future] = target
+            self._inflight = {t: f for t, f in self._inflight.items() if t in set(targets)}
+        done, late = wait(futures, timeout=float(self.config['interval']))
+        alerts: Dict[str, List[Dict[str, Any]]] = {'unusual_activity': [], 'top_movers': [], 'gamma_alerts': []}
+        errors: Dict[str, str] = {}
+        scanned = 0
+        for future in done:
+            underlying, expiry = futures[future]
+            try:
+                chain, at = future.result()
+                chain = chain or {}
+                if not chain.get('ok', True) or not chain.get('raw'):
+                    raise ValueError(chain.get('error') or 'empty chain')
+                for name, items in self.score_chain(underlying, expiry, chain, at).items():
+                    alerts[name].extend(items)
+                scanned += 1
+            except Exception as e:
+                errors[f"{underlying}|{expiry}"] = str(e)
+        for future in late:
+            future.cancel()  # only stops fetches that never started; running ones block their target
+        limit = int(self.config['max_alerts'])
+        for name in alerts:
+            alerts[name].sort(key=lambda a: a['score'], reverse=True)
+            alerts[name] = alerts[name][:limit]
+        result = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            **alerts,
+            'scanned': scanned,
+            'targets': len(targets),
+            'late': [f"{u}|{e}" for u, e in (futures[f] for f in late)],
+            'skipped': [f"{u}|{e}" for u, e in busy],
+            'errors': errors,
+            'cycle_seconds': round(time.monotonic() - started, 3),
+        }
+        with self._state_lock:
+            if targets == self.targets:  # targets changed mid-scan: don't cache a result for the old set
+                self._latest, self._latest_at = result, time.monotonic()
+        return result
+
+    def latest(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Newest scan result, refreshing first when older than `max_age` (one scan at a time)."""
+        max_age = float(self.config['interval'] if max_age is None else max_age)
+        with self._state_lock:
+            if self._latest is not None and time.monotonic() - self._latest_at < max_age:
+                return self._latest
+        with self._scan_lock:
+            with self._state_lock:  # another request may have refreshed while we waited
+                if self._latest is not None and time.monotonic() - self._latest_at < max_age:
+                    return self._latest
+            return self.scan()
@@ -0,0 +1,257 @@
+"""
+Chain-wide aggregates for an option chain, computed once from sorted strike arrays.
+
+Max pain, the gamma exposure (GEX) profile, put/call ratios, OI walls and IV skew all come
+from the same strike-sorted numpy columns, using prefix/suffix sums instead of per-strike
+DataFrame lookups, so max pain costs one sort plus linear passes instead of O(n^2) filtered
+lookups. Each aggregate is memoised on the instance (per spot price where it depends on one),
+and instances are cached by a hash of the raw input taken before any array is built, so the
+options endpoints and analyzers that receive the same chain share one computation:
+
+    from models.options_chain_analytics import get_chain_analytics
+    chain = get_chain_analytics(options_rows)                # list of dicts, a DataFrame or a ChainAnalytics
+    chain.max_pain()['max_pain_strike'], chain.pcr()['oi_pcr'], chain.oi_walls(spot)['resistance']
+
+Rows use the transform_upstox_data / OptionsMLAnalyzer column names (strike, call_oi, put_oi,
+call_volume, call_iv, call_gamma, ...); missing or null fields count as zero. The cache key is
+the chain input only, so spot-dependent metrics take the spot price as an argument. Arrays are
+read-only and dict results are fresh copies, since instances are shared between callers.
+"""
+from __future__ import annotations
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('call_oi', 'put_oi', 'call_volume', 'put_volume', 'call_iv', 'put_iv',
+          'call_gamma', 'put_gamma', 'call_delta', 'put_delta', 'call_ltp', 'put_ltp')
+SKEW_STRIKES = 5  # OTM strikes per side averaged for the IV skew
+_MEMO_SIZE = 32  # spot-keyed results kept per instance
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def _column(options_data, field: str) -> np.ndarray:
+    if isinstance(options_data, pd.DataFrame):
+        if field not in options_data:
+            return np.zeros(len(options_data))
+        return pd.to_numeric(options_data[field], errors='coerce').fillna(0).to_numpy(dtype=float)
+    return np.array([float(row.get(field) or 0) for row in options_data], dtype=float)
+
+
+class ChainAnalytics:
+    """Strike-sorted arrays of one chain plus lazily computed aggregates."""
+
+    def __init__(self, options_data):
+        strikes = _column(options_data, 'strike')
+        order = np.argsort(strikes, kind='stable')
+        self.strikes = _frozen(strikes[order])
+        self.columns = {f: _frozen(_column(options_data, f)[order]) for f in FIELDS}
+        self._memo: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def _memoised(self, key, compute):
+        """compute() once per key; spot-keyed entries are bounded by _MEMO_SIZE."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        value = compute()
+        if len(self._memo) >= _MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = value
+        return value
+
+    # ----- max pain -----
+    @cached_property
+    def pain(self) -> np.ndarray:
+        """Total writer payout if expiry settles at each strike."""
+        K, call_oi, put_oi = self.strikes, self['call_oi'], self['put_oi']
+        zero = np.zeros(1)
+        call_n = np.concatenate([zero, np.cumsum(call_oi)])
+        call_w = np.concatenate([zero, np.cumsum(call_oi * K)])
+        put_n = np.concatenate([zero, np.cumsum(put_oi)])
+        put_w = np.concatenate([zero, np.cumsum(put_oi * K)])
+        below = np.searchsorted(K, K, side='left')   # strikes strictly below each strike
+        above = np.searchsorted(K, K, side='right')  # first strike strictly above
+        call_pain = K * call_n[below] - call_w[below]
+        put_pain = (put_w[-1] - put_w[above]) - K * (put_n[-1] - put_n[above])
+        return _frozen(call_pain + put_pain)
+
+    def max_pain(self) -> Dict[str, Any]:
+        if not len(self):
+            return {'max_pain_strike': 0, 'pain_levels': []}
+        pain = self.pain
+        return {
+            'max_pain_strike': float(self.strikes[int(np.argmin(pain))]),
+            'pain_levels': [{'strike': k, 'pain': p} for k, p in zip(self.strikes.tolist(), pain.tolist())],
+        }
+
+    # ----- gamma exposure -----
+    def gamma_exposure(self, spot_price: float) -> Dict[str, np.ndarray]:
+        """Per-strike GEX arrays (gamma x OI x spot^2 / 100 per side, summed as net)."""
+        def compute():
+            scale = float(spot_price) ** 2 / 100
+            call = self['call_gamma'] * self['call_oi'] * scale
+            put = self['put_gamma'] * self['put_oi'] * scale
+            return {'call': _frozen(call), 'put': _frozen(put), 'net': _frozen(call + put)}
+        return dict(self._memoised(('gex', float(spot_price)), compute))
+
+    def gex_profile(self, spot_price: float) -> List[Dict[str, float]]:
+        spot = float(spot_price)
+        gex = self.gamma_exposure(spot)
+        distance = np.abs(self.strikes - spot)
+        return [{'strike': k, 'call_gamma_exposure': c, 'put_gamma_exposure': p, 'net_gamma_exposure': n,
+                 'distance_from_spot': d}
+                for k, c, p, n, d in zip(self.strikes.tolist(), gex['call'].tolist(), gex['put'].tolist(),
+                                         gex['net'].tolist(), distance.tolist())]
+
+    @cached_property
+    def _greeks(self) -> Dict[str, float]:
+        return {
+            'delta': float(self['call_delta'] @ self['call_oi'] + self['put_delta'] @ self['put_oi']),
+            'gamma': float(self['call_gamma'] @ self['call_oi'] + self['put_gamma'] @ self['put_oi']),
+        }
+
+    def portfolio_greeks(self) -> Dict[str, float]:
+        """OI-weighted delta and gamma summed across the chain."""
+        return dict(self._greeks)
+
+    # ----- flow -----
+    @cached_property
+    def _pcr(self) -> Dict[str, float]:
+        call_volume, put_volume = float(self['call_volume'].sum()), float(self['put_volume'].sum())
+        call_oi, put_oi = float(self['call_oi'].sum()), float(self['put_oi'].sum())
+        return {
+            'total_call_volume': call_volume,
+            'total_put_volume': put_volume,
+            'total_call_oi': call_oi,
+            'total_put_oi': put_oi,
+            'volume_pcr': put_volume / max(call_volume, 1),
+            'oi_pcr': put_oi / max(call_oi, 1),
+        }
+
+    def pcr(self) -> Dict[str, float]:
+        return dict(self._pcr)
+
+    @cached_property
+    def _wall_ranking(self):
+        """(strike order by OI + OI-weighted gamma, total OI, gamma weight); spot only splits it."""
+        total_oi = self['call_oi'] + self['put_oi']
+        gamma_weight = (self['call_gamma'] + self['put_gamma']) * total_oi
+        ranked = np.argsort(-(total_oi + gamma_weight), kind='stable')
+        return _frozen(ranked[total_oi[ranked] > 0]), _frozen(total_oi), _frozen(gamma_weight)
+
+    def oi_walls(self, spot_price: float, top: int = 3) -> Dict[str, List[Dict[str, float]]]:
+        """Strikes ranked by OI + OI-weighted gamma; resistance above spot, support below."""
+        spot = float(spot_price)
+        ranked, total_oi, gamma_weight = self._wall_ranking
+
+        def levels(mask):
+            idx = ranked[mask[ranked]][:top]
+            return [{'strike': float(self.strikes[i]), 'oi_weight': float(total_oi[i]),
+                     'gamma_weight': float(gamma_weight[i]),
+                     'distance_from_spot': float(abs(self.strikes[i] - spot) / spot * 100)} for i in idx]
+
+        return {'resistance': levels(self.strikes > spot), 'support': levels(self.strikes < spot)}
+
+    # ----- implied volatility -----
+    def iv_points(self, side: str):
+        """(strikes, ivs) for the rows quoting a positive IV on `side` ('call' or 'put')."""
+        def compute():
+            iv = self[f'{side}_iv']
+            valid = iv > 0
+            return _frozen(self.strikes[valid]), _frozen(iv[valid])
+        return self._memoised(('iv_points', side), compute)
+
+    def iv_skew(self, spot_price: float) -> Dict[str, Any]:
+        """ATM IV, OTM put-minus-call skew and quadratic smile fits in strike space."""
+        spot = float(spot_price)
+        return copy.deepcopy(self._memoised(('iv_skew', spot), lambda: self._iv_skew(spot)))
+
+    def _iv_skew(self, spot: float) -> Dict[str, Any]:
+        call_k, call_iv = self.iv_points('call')
+        put_k, put_iv = self.iv_points('put')
+        out: Dict[str, Any] = {'atm_strike': None, 'atm_iv': None, 'otm_call_iv': None, 'otm_put_iv': None,
+                               'skew': None, 'call_smile': None, 'put_smile': None}
+        if len(self):
+            atm = int(np.argmin(np.abs(self.strikes - spot)))
+            quoted = [v for v in (self['call_iv'][atm], self['put_iv'][atm]) if v > 0]
+            out['atm_strike'] = float(self.strikes[atm])
+            out['atm_iv'] = float(np.mean(quoted)) if quoted else None
+        otm_calls = call_iv[call_k > spot][:SKEW_STRIKES]
+        otm_puts = put_iv[put_k < spot][-SKEW_STRIKES:]
+        if len(otm_calls):
+            out['otm_call_iv'] = float(otm_calls.mean())
+        if len(otm_puts):
+            out['otm_put_iv'] = float(otm_puts.mean())
+        if len(otm_calls) and len(otm_puts):
+            out['skew'] = out['otm_put_iv'] - out['otm_call_iv']
+        if len(call_k) > 2:
+            out['call_smile'] = np.polyfit(call_k, call_iv, 2).tolist()
+        if len(put_k) > 2:
+            out['put_smile'] = np.polyfit(put_k, put_iv, 2).tolist()
+        return out
+
+    def summary(self, spot_price: float) -> Dict[str, Any]:
+        spot = float(spot_price)
+        gex = self.gamma_exposure(spot)['net']
+        return {
+            'max_pain': self.max_pain()['max_pain_strike'],
+            'pcr': self.pcr(),
+            'total_gamma_exposure': float(gex.sum()),
+            'max_gamma_strike': float(self.strikes[int(np.argmax(gex))]) if len(self) else None,
+            'oi_walls': self.oi_walls(spot),
+            'iv_skew': self.iv_skew(spot),
+        }
+
+
+_CACHE_SIZE = 64
+_cache: "OrderedDict[str, ChainAnalytics]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _input_key(options_data) -> str:
+    """Hash of the raw rows (order included), taken without building any strike arrays."""
+    if isinstance(options_data, pd.DataFrame):
+        h = hashlib.sha1(repr(list(options_data.columns)).encode())
+        h.update(pd.util.hash_pandas_object(options_data, index=False).to_numpy().tobytes())
+        return 'frame:' + h.hexdigest()
+    payload = json.dumps(options_data, sort_keys=True, default=str)
+    return 'rows:' + hashlib.sha1(payload.encode()).hexdigest()
+
+
+def get_chain_analytics(options_data) -> ChainAnalytics:
+    """Shared ChainAnalytics for this chain input, so repeated callers reuse computed aggregates.
+
+    Pass a ChainAnalytics through to skip the lookup when one caller runs several analytics.
+    """
+    if isinstance(options_data, ChainAnalytics):
+        return options_data
+    key = _input_key(options_data)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    chain = ChainAnalytics(options_data)
+    with _cache_lock:
+        chain = _cache.setdefault(key, chain)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return chain
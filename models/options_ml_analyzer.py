@@ -11,6 +11,8 @@ from scipy.stats import norm
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from models.options_chain_analytics import get_chain_analytics
+from models.options_pricing import probability_of_profit
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -291,33 +293,13 @@ class OptionsMLAnalyzer:
             }
     
     def calculate_probability_of_profit(self, strike, premium, spot_price, iv, days_to_expiry, is_call=True):
-        """Calculate probability of profit for option trade"""
+        """Calculate probability of profit for option trade (scalars or whole strike arrays)"""
         try:
-            if days_to_expiry <= 0 or iv <= 0:
-                return 0.5
-            
-            # Convert IV from percentage to decimal
-            iv_decimal = iv / 100
-            
-            # Calculate break-even price
-            if is_call:
-                breakeven = strike + premium
-            else:
-                breakeven = strike - premium
-            
-            # Time to expiry in years
-            T = days_to_expiry / 365
-            
-            # Calculate z-score using Black-Scholes framework
-            if is_call:
-                z = (np.log(breakeven / spot_price)) / (iv_decimal * np.sqrt(T))
-            else:
-                z = (np.log(spot_price / breakeven)) / (iv_decimal * np.sqrt(T))
-            
-            # Calculate probability using normal CDF
-            pop = norm.cdf(z)
-            
-            return max(0.01, min(0.99, pop))
+            # Long call profits above strike + premium, long put below strike - premium;
+            # IV arrives in percent
+            pop = probability_of_profit(strike, premium, spot_price, np.asarray(iv, dtype=float) / 100,
+                                        days_to_expiry, is_call)
+            return np.clip(pop, 0.01, 0.99) if np.ndim(pop) else max(0.01, min(0.99, pop))
             
         except Exception as e:
             logger.error(f"Error calculating POP: {e}")
@@ -353,12 +335,12 @@ class OptionsMLAnalyzer:
                 (df['call_ltp'] > 1.0)
             ].nlargest(3, ['call_oi_change'])
             
-            for _, row in call_candidates.iterrows():
-                pop = self.calculate_probability_of_profit(
-                    row['strike'], row['call_ltp'], spot_price, 
-                    row['call_iv'], days_to_expiry, True
-                )
-                
+            call_pops = np.broadcast_to(self.calculate_probability_of_profit(
+                call_candidates['strike'].values, call_candidates['call_ltp'].values, spot_price,
+                call_candidates['call_iv'].values, days_to_expiry, True
+            ), (len(call_candidates),))
+            
+            for (_, row), pop in zip(call_candidates.iterrows(), call_pops):
                 recommendations.append({
                     'strategy': 'BUY CALL',
                     'strike': row['strike'],
@@ -379,12 +361,12 @@ class OptionsMLAnalyzer:
                 (df['put_ltp'] > 1.0)
             ].nlargest(3, ['put_oi_change'])
             
-            for _, row in put_candidates.iterrows():
-                pop = self.calculate_probability_of_profit(
-                    row['strike'], row['put_ltp'], spot_price,
-                    row['put_iv'], days_to_expiry, False
-                )
-                
+            put_pops = np.broadcast_to(self.calculate_probability_of_profit(
+                put_candidates['strike'].values, put_candidates['put_ltp'].values, spot_price,
+                put_candidates['put_iv'].values, days_to_expiry, False
+            ), (len(put_candidates),))
+            
+            for (_, row), pop in zip(put_candidates.iterrows(), put_pops):
                 recommendations.append({
                     'strategy': 'BUY PUT',
                     'strike': row['strike'],
@@ -406,34 +388,8 @@ class OptionsMLAnalyzer:
     def calculate_max_pain(self, df):
         """Calculate max pain point"""
         try:
-            max_pain_data = []
-            
-            for _, row in df.iterrows():
-                strike = row['strike']
-                call_oi = row['call_oi']
-                put_oi = row['put_oi']
-                
-                # Calculate pain for this strike
-                call_pain = sum([
-                    max(0, strike - s) * df.loc[df['strike'] == s, 'call_oi'].iloc[0]
-                    for s in df['strike'] if s < strike
-                ])
-                
-                put_pain = sum([
-                    max(0, s - strike) * df.loc[df['strike'] == s, 'put_oi'].iloc[0]
-                    for s in df['strike'] if s > strike
-                ])
-                
-                total_pain = call_pain + put_pain
-                max_pain_data.append({'strike': strike, 'pain': total_pain})
-            
-            max_pain_df = pd.DataFrame(max_pain_data)
-            max_pain_strike = max_pain_df.loc[max_pain_df['pain'].idxmin(), 'strike']
-            
-            return {
-                'max_pain_strike': float(max_pain_strike),
-                'pain_levels': max_pain_data
-            }
+            # Writer payout at every strike from cumulative OI sums over the sorted chain
+            return get_chain_analytics(df).max_pain()
             
         except Exception as e:
             logger.error(f"Error calculating max pain: {e}")
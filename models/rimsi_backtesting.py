@@ -46,6 +46,290 @@ try:
 except ImportError:
     PYPFOPT_AVAILABLE = False
 
+# =============================================================================
+# VECTORIZED NATIVE ENGINE
+# =============================================================================
+
+NATIVE_ALLOCATION = 0.95  # fraction of cash committed on each entry
+TRADING_DAYS = 252
+
+DEFAULT_STRATEGY_PARAMS = {
+    'short_window': 20,
+    'long_window': 50,
+    'rsi_period': 14,
+    'oversold': 30,
+    'overbought': 70,
+}
+
+
+def strategy_kind(strategy_code: str) -> str:
+    """'sma', 'rsi' or 'buy_hold' - the pattern the native/vectorbt signal parser recognises"""
+    code = (strategy_code or '').lower()
+    if 'moving average' in code or 'sma' in code:
+        return 'sma'
+    if 'rsi' in code:
+        return 'rsi'
+    return 'buy_hold'
+
+
+def close_prices(data: pd.DataFrame) -> pd.Series:
+    """Close column as a Series (newer yfinance returns a one-column frame per ticker)"""
+    close = data['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.astype(float)
+
+
+def _shift(a: np.ndarray) -> np.ndarray:
+    out = np.empty_like(a)
+    out[0] = np.nan
+    out[1:] = a[:-1]
+    return out
+
+
+def strategy_signals(strategy_code: str, close, param_sets: List[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Entry/exit matrices for a close series and a batch of parameter sets.
+
+    Args:
+        close: (T,) prices, giving one column per parameter set, or (T, N) prices of N assets
+               evaluated with a single parameter set
+        param_sets: list of overrides of DEFAULT_STRATEGY_PARAMS (None = one default set)
+
+    Returns:
+        (entries, exits) boolean arrays of shape (T, K)
+    """
+    close = np.asarray(close, dtype=float)
+    param_sets = [dict(DEFAULT_STRATEGY_PARAMS, **(p or {})) for p in (param_sets or [{}])]
+    if close.ndim == 2 and len(param_sets) != 1:
+        raise ValueError('Multi-asset signals take a single parameter set')
+    frame = pd.DataFrame(close if close.ndim == 2 else close[:, None])
+    kind = strategy_kind(strategy_code)
+    cache: Dict[Tuple[str, int], np.ndarray] = {}
+    moves: Dict[str, pd.DataFrame] = {}
+
+    def rolling_mean(name: str, window: int) -> np.ndarray:
+        # Shared by every parameter set using the same window
+        if (name, window) not in cache:
+            if name not in moves:
+                delta = frame.diff()
+                moves['gain'] = delta.where(delta > 0, 0)
+                moves['loss'] = -delta.where(delta < 0, 0)
+            values = frame if name == 'close' else moves[name]
+            cache[(name, window)] = values.rolling(window=int(window)).mean().to_numpy()
+        return cache[(name, window)]
+
+    def signals_for(p: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        if kind == 'sma':
+            short, long = rolling_mean('close', p['short_window']), rolling_mean('close', p['long_window'])
+            short1, long1 = _shift(short), _shift(long)
+            return (short > long) & (short1 <= long1), (short < long) & (short1 >= long1)
+        if kind == 'rsi':
+            gain, loss = rolling_mean('gain', p['rsi_period']), rolling_mean('loss', p['rsi_period'])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - (100 / (1 + gain / loss))
+            rsi1 = _shift(rsi)
+            return ((rsi < p['oversold']) & (rsi1 >= p['oversold']),
+                    (rsi > p['overbought']) & (rsi1 <= p['overbought']))
+        entries = np.zeros(frame.shape, dtype=bool)
+        exits = np.zeros(frame.shape, dtype=bool)
+        if len(frame):
+            entries[0] = True
+            exits[-1] = True
+        return entries, exits
+
+    pairs = [signals_for(p) for p in param_sets]
+    return np.hstack([e for e, _ in pairs]), np.hstack([x for _, x in pairs])
+
+
+class SimulationResult:
+    """Per-bar state of a native simulation; every array is (T, K)"""
+
+    __slots__ = ('prices', 'equity', 'cash', 'position', 'buys', 'sells', 'initial_capital')
+
+    def __init__(self, prices, equity, cash, position, buys, sells, initial_capital):
+        self.prices = prices
+        self.equity = equity
+        self.cash = cash
+        self.position = position
+        self.buys = buys
+        self.sells = sells
+        self.initial_capital = initial_capital
+
+    def trades(self, column: int = 0, index=None) -> List[Dict]:
+        """Trade list of one column in the format the bar-by-bar engine produced"""
+        rows = np.flatnonzero(self.buys[:, column] | self.sells[:, column])
+        out = []
+        for t in rows:
+            price = float(self.prices[t, column])
+            buy = bool(self.buys[t, column])
+            shares = int(self.position[t, column] if buy else self.position[t - 1, column])
+            out.append({
+                'date': index[t] if index is not None else int(t),
+                'action': 'BUY' if buy else 'SELL',
+                'price': price,
+                'shares': shares,
+                'value': shares * price,
+            })
+        return out
+
+
+def _round_trip_prices(prices: np.ndarray, buys: np.ndarray, sells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(K, R) buy and sell prices of each column's k-th round trip (NaN where absent)"""
+    K = buys.shape[1]
+    n_buys = buys.sum(axis=0)
+    R = int(n_buys.max()) if K else 0
+    buy_px = np.full((K, R), np.nan)
+    sell_px = np.full((K, R), np.nan)
+    for flags, out in ((buys, buy_px), (sells, sell_px)):
+        cols, rows = np.nonzero(flags.T)  # column-major: bars in time order within each column
+        if len(cols):
+            counts = np.bincount(cols, minlength=K)
+            ordinal = np.arange(len(cols)) - np.repeat(np.cumsum(counts) - counts, counts)
+            out[cols, ordinal] = prices[rows, cols]
+    return buy_px, sell_px
+
+
+def _simulate_column(prices, entries, exits, initial_capital, commission, allocation):
+    """Bar-by-bar reference path for one column (used when a buy cannot be afforded)"""
+    T = len(prices)
+    cash_out = np.empty(T)
+    pos_out = np.zeros(T)
+    cash, position = float(initial_capital), 0
+    for i in range(T):
+        price = prices[i]
+        if entries[i] and position == 0:
+            shares = int(cash * allocation / price)
+            if shares > 0:
+                position = shares
+                cash -= shares * price * (1 + commission)
+        elif exits[i] and position > 0:
+            cash += position * price * (1 - commission)
+            position = 0
+        cash_out[i] = cash
+        pos_out[i] = position
+    return cash_out, pos_out
+
+
+def simulate_signals(close, entries, exits, initial_capital=100000, commission: float = 0.001,
+                     allocation: float = NATIVE_ALLOCATION) -> SimulationResult:
+    """
+    Long-only, all-in/all-out simulation of K signal columns with array operations.
+
+    An entry while flat buys int(cash * allocation / price) shares at the close; an exit while
+    long sells everything. When a bar carries both signals the entry wins while flat and the exit
+    while long, exactly like the bar-by-bar engine. Position state is derived for the whole
+    series at once (latest decisive signal plus parity of the ambiguous bars since), and fills /
+    cash are resolved per round-trip ordinal across all columns together.
+
+    Args:
+        close: (T,) prices shared by all columns or (T, K) prices per column
+        entries, exits: (T,) or (T, K) boolean signals
+        initial_capital: scalar or (K,) starting cash per column
+    """
+    E = np.asarray(entries, dtype=bool)
+    X = np.asarray(exits, dtype=bool)
+    if E.ndim == 1:
+        E, X = E[:, None], X[:, None]
+    T, K = E.shape
+    P = np.asarray(close, dtype=float)
+    P = np.ascontiguousarray(np.broadcast_to(P[:, None] if P.ndim == 1 else P, (T, K)))
+    capital = np.broadcast_to(np.asarray(initial_capital, dtype=float), (K,)).copy()
+
+    t_idx = np.arange(T)[:, None]
+    decisive = E ^ X
+    last = np.maximum.accumulate(np.where(decisive, t_idx, -1), axis=0)
+    at_last = np.maximum(last, 0)
+    base = np.take_along_axis(E & decisive, at_last, axis=0) & (last >= 0)
+    both = np.cumsum(E & X, axis=0)
+    toggles = both - np.where(last >= 0, np.take_along_axis(both, at_last, axis=0), 0)
+    held = base ^ (toggles % 2 == 1)
+
+    prev = np.zeros_like(held)
+    prev[1:] = held[:-1]
+    buys = held & ~prev
+    sells = prev & ~held
+
+    buy_px, sell_px = _round_trip_prices(P, buys, sells)
+    R = buy_px.shape[1]
+    shares = np.zeros((K, R))
+    cash_after = np.empty((K, 2 * R))
+    unaffordable = np.zeros(K, dtype=bool)
+    cash = capital.copy()
+    with np.errstate(invalid='ignore'):
+        for k in range(R):
+            pb, ps = buy_px[:, k], sell_px[:, k]
+            bought = ~np.isnan(pb)
+            n = np.where(bought, np.floor(cash * allocation / pb), 0.0)
+            unaffordable |= bought & (n <= 0)
+            cash = np.where(bought, cash - n * pb * (1 + commission), cash)
+            cash_after[:, 2 * k] = cash
+            sold = ~np.isnan(ps)
+            cash = np.where(sold, cash + n * ps * (1 - commission), cash)
+            cash_after[:, 2 * k + 1] = cash
+            shares[:, k] = n
+
+    cols = np.arange(K)[None, :]
+    n_events = np.cumsum(buys | sells, axis=0)
+    cash_t = np.where(n_events > 0, cash_after[cols, np.maximum(n_events - 1, 0)] if R else 0.0, capital[None, :])
+    trip = np.cumsum(buys, axis=0)
+    position = np.where(held, shares[cols, np.maximum(trip - 1, 0)] if R else 0.0, 0.0)
+
+    for c in np.flatnonzero(unaffordable):
+        cash_t[:, c], position[:, c] = _simulate_column(P[:, c], E[:, c], X[:, c], capital[c], commission, allocation)
+        was = np.r_[0.0, position[:-1, c]]
+        buys[:, c] = (position[:, c] > 0) & (was == 0)
+        sells[:, c] = (position[:, c] == 0) & (was > 0)
+
+    return SimulationResult(P, cash_t + position * P, cash_t, position, buys, sells, capital)
+
+
+def equity_metrics(equity: np.ndarray, initial) -> Dict[str, np.ndarray]:
+    """Return/risk statistics of (T, K) equity curves, as (K,) arrays"""
+    K = equity.shape[1]
+    n = len(equity) - 1
+    returns = equity[1:] / equity[:-1] - 1 if n > 0 else np.zeros((0, K))
+    total_return = (equity[-1] - initial) / initial
+    if n > 0:
+        annualized = (1 + total_return) ** (TRADING_DAYS / n) - 1
+        volatility = (returns.std(axis=0, ddof=1) if n > 1 else np.full(K, np.nan)) * np.sqrt(TRADING_DAYS)
+        var_95 = np.quantile(returns, 0.05, axis=0)
+    else:
+        annualized, volatility, var_95 = np.zeros(K), np.full(K, np.nan), np.zeros(K)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(volatility > 0, annualized / volatility, 0.0)
+    max_drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0)
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+        'volatility': volatility,
+        'final_value': equity[-1],
+        'var_95': var_95,
+    }
+
+
+def backtest_metrics(sim: SimulationResult) -> Dict[str, np.ndarray]:
+    """Performance and trade statistics of every column of a simulation, as (K,) arrays"""
+    metrics = equity_metrics(sim.equity, sim.initial_capital)
+    buy_px, sell_px = _round_trip_prices(sim.prices, sim.buys, sim.sells)
+    completed = (~np.isnan(sell_px)).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        wins = (sell_px > buy_px).sum(axis=1)
+    metrics['win_rate'] = np.where(completed > 0, wins / np.maximum(completed, 1), 0.0)
+    metrics['total_trades'] = sim.buys.sum(axis=0) + sim.sells.sum(axis=0)
+    return metrics
+
+
+def _metrics_row(metrics: Dict[str, np.ndarray], column: int) -> Dict:
+    row = {}
+    for key, values in metrics.items():
+        v = values[column]
+        row[key] = int(v) if key == 'total_trades' else float(v)
+    return row
+
+
 class RIMSIBacktester:
     """
     Advanced backtesting engine with multiple framework support
@@ -213,106 +497,90 @@ class RIMSIBacktester:
             return {'error': f'Zipline backtest failed: {str(e)}'}
     
     async def _run_native_backtest(self, strategy_code: str, config: Dict) -> Dict:
-        """Run backtest using native implementation"""
+        """Run backtest using native implementation (vectorized over the whole series)"""
         
         try:
+            if len(config.get('symbols') or []) > 1:
+                return self.run_multi_asset_backtest(strategy_code, config)
+            
             # Get market data
             data = self._get_market_data(config)
-            
-            # Initialize portfolio
             initial_capital = config.get('initial_capital', 100000)
-            cash = initial_capital
-            position = 0
-            portfolio_values = []
-            trades = []
             
-            # Parse strategy signals
-            signals = self._parse_strategy_signals_native(strategy_code, data, config)
-            
-            # Simulate trading
-            for i in range(len(data)):
-                price = data['Close'].iloc[i]
-                date = data.index[i]
-                
-                # Check for entry signal
-                if signals['entries'].iloc[i] and position == 0:
-                    # Buy signal
-                    shares_to_buy = int(cash * 0.95 / price)  # Use 95% of cash
-                    if shares_to_buy > 0:
-                        position = shares_to_buy
-                        cash -= shares_to_buy * price * (1 + config.get('commission', 0.001))
-                        trades.append({
-                            'date': date,
-                            'action': 'BUY',
-                            'price': price,
-                            'shares': shares_to_buy,
-                            'value': shares_to_buy * price
-                        })
-                
-                # Check for exit signal
-                elif signals['exits'].iloc[i] and position > 0:
-                    # Sell signal
-                    cash += position * price * (1 - config.get('commission', 0.001))
-                    trades.append({
-                        'date': date,
-                        'action': 'SELL',
-                        'price': price,
-                        'shares': position,
-                        'value': position * price
-                    })
-                    position = 0
-                
-                # Calculate portfolio value
-                portfolio_value = cash + position * price
-                portfolio_values.append(portfolio_value)
-            
-            # Calculate returns
-            portfolio_series = pd.Series(portfolio_values, index=data.index)
-            returns = portfolio_series.pct_change().dropna()
-            
-            # Calculate metrics
-            total_return = (portfolio_values[-1] - initial_capital) / initial_capital
-            annualized_return = (1 + total_return) ** (252 / len(returns)) - 1
-            volatility = returns.std() * np.sqrt(252)
-            sharpe_ratio = annualized_return / volatility if volatility > 0 else 0
-            
-            # Calculate drawdown
-            cumulative = portfolio_series / portfolio_series.cummax()
-            max_drawdown = (cumulative - 1).min()
-            
-            # Calculate win rate
-            winning_trades = [t for t in trades[1::2] if len(trades) > 1]  # Sell trades
-            if len(winning_trades) > 0 and len(trades) > 1:
-                profitable_trades = 0
-                for i in range(0, len(trades) - 1, 2):
-                    if i + 1 < len(trades):
-                        buy_price = trades[i]['price']
-                        sell_price = trades[i + 1]['price']
-                        if sell_price > buy_price:
-                            profitable_trades += 1
-                win_rate = profitable_trades / (len(trades) // 2)
-            else:
-                win_rate = 0
+            # Parse strategy signals and simulate every bar at once
+            close = close_prices(data)
+            entries, exits = strategy_signals(strategy_code, close.to_numpy(), [config.get('params')])
+            sim = simulate_signals(close.to_numpy(), entries, exits, initial_capital,
+                                   config.get('commission', 0.001), config.get('allocation', NATIVE_ALLOCATION))
             
-            return {
-                'engine': 'native',
-                'total_return': total_return,
-                'annualized_return': annualized_return,
-                'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': max_drawdown,
-                'volatility': volatility,
-                'win_rate': win_rate,
-                'total_trades': len(trades),
-                'final_value': portfolio_values[-1],
+            result = {'engine': 'native'}
+            result.update(_metrics_row(backtest_metrics(sim), 0))
+            result.update({
                 'initial_capital': initial_capital,
-                'trades': trades,
-                'portfolio_values': portfolio_values,
-                'var_95': returns.quantile(0.05) if len(returns) > 0 else 0
-            }
+                'trades': sim.trades(0, data.index),
+                'portfolio_values': sim.equity[:, 0].tolist(),
+            })
+            return result
             
         except Exception as e:
             return {'error': f'Native backtest failed: {str(e)}'}
     
+    def run_parameter_batch(self, strategy_code: str, config: Dict, param_sets: List[Dict],
+                            data: pd.DataFrame = None) -> List[Dict]:
+        """
+        Evaluate many parameter sets of one strategy on one data load.
+        
+        Signals for every set become columns of one (T, K) matrix and are simulated together.
+        Returns one metrics dict per parameter set, in order, each with its effective 'params'.
+        """
+        if data is None:
+            data = self._get_market_data(config)
+        close = close_prices(data).to_numpy()
+        params = [dict(DEFAULT_STRATEGY_PARAMS, **(p or {})) for p in (param_sets or [{}])]
+        entries, exits = strategy_signals(strategy_code, close, params)
+        sim = simulate_signals(close, entries, exits, config.get('initial_capital', 100000),
+                               config.get('commission', 0.001), config.get('allocation', NATIVE_ALLOCATION))
+        metrics = backtest_metrics(sim)
+        return [dict(_metrics_row(metrics, k), params=p) for k, p in enumerate(params)]
+    
+    def run_multi_asset_backtest(self, strategy_code: str, config: Dict,
+                                 data: Dict[str, pd.DataFrame] = None) -> Dict:
+        """
+        Run the strategy on every symbol in config['symbols'] with capital split equally.
+        
+        Closes are aligned on common dates and simulated as columns of one matrix; the
+        portfolio equity is the sum of the per-asset sleeves.
+        """
+        symbols = list(config.get('symbols') or [config.get('symbol', 'SPY')])
+        if data is None:
+            data = get_rimsi_data_provider().get_multiple_assets(
+                symbols, config.get('start_date', '2022-01-01'), config.get('end_date', '2023-12-31'))
+        closes = pd.concat({s: close_prices(data[s]) for s in symbols if s in data}, axis=1, join='inner').dropna()
+        if closes.empty:
+            raise ValueError(f"No overlapping data available for {symbols}")
+        
+        initial_capital = config.get('initial_capital', 100000)
+        n_assets = closes.shape[1]
+        entries, exits = strategy_signals(strategy_code, closes.to_numpy(), [config.get('params')])
+        sim = simulate_signals(closes.to_numpy(), entries, exits, initial_capital / n_assets,
+                               config.get('commission', 0.001), config.get('allocation', NATIVE_ALLOCATION))
+        per_asset = backtest_metrics(sim)
+        
+        equity = sim.equity.sum(axis=1, keepdims=True)
+        result = {'engine': 'native'}
+        result.update(_metrics_row(equity_metrics(equity, np.array([float(initial_capital)])), 0))
+        result.update({
+            'win_rate': float(np.mean(per_asset['win_rate'])),
+            'total_trades': int(per_asset['total_trades'].sum()),
+            'initial_capital': initial_capital,
+            'symbols': list(closes.columns),
+            'assets': {sym: _metrics_row(per_asset, k) for k, sym in enumerate(closes.columns)},
+            'trades': [dict(t, symbol=sym) for k, sym in enumerate(closes.columns)
+                       for t in sim.trades(k, closes.index)],
+            'portfolio_values': equity[:, 0].tolist(),
+        })
+        return result
+    
     def _get_market_data(self, config: Dict) -> pd.DataFrame:
         """Get market data for backtesting"""
         
@@ -337,45 +605,12 @@ class RIMSIBacktester:
     def _parse_strategy_signals(self, strategy_code: str, data: pd.DataFrame, config: Dict) -> Dict:
         """Parse strategy code to extract buy/sell signals for vectorbt"""
         
-        # This is a simplified signal parser
-        # In production, you'd want more sophisticated code analysis
-        
-        # Create default signals (buy and hold)
-        entries = pd.Series(False, index=data.index)
-        exits = pd.Series(False, index=data.index)
-        
-        # Set first day as entry, last day as exit
-        entries.iloc[0] = True
-        exits.iloc[-1] = True
-        
-        # Look for common strategy patterns in code
-        if 'moving average' in strategy_code.lower() or 'sma' in strategy_code.lower():
-            # Moving average crossover strategy
-            short_window = 20
-            long_window = 50
-            
-            data['SMA_short'] = data['Close'].rolling(window=short_window).mean()
-            data['SMA_long'] = data['Close'].rolling(window=long_window).mean()
-            
-            entries = (data['SMA_short'] > data['SMA_long']) & (data['SMA_short'].shift(1) <= data['SMA_long'].shift(1))
-            exits = (data['SMA_short'] < data['SMA_long']) & (data['SMA_short'].shift(1) >= data['SMA_long'].shift(1))
-        
-        elif 'rsi' in strategy_code.lower():
-            # RSI strategy
-            delta = data['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            entries = (rsi < 30) & (rsi.shift(1) >= 30)  # Oversold
-            exits = (rsi > 70) & (rsi.shift(1) <= 70)    # Overbought
-        
-        return {'entries': entries, 'exits': exits}
-    
-    def _parse_strategy_signals_native(self, strategy_code: str, data: pd.DataFrame, config: Dict) -> Dict:
-        """Parse strategy code for native backtester"""
-        return self._parse_strategy_signals(strategy_code, data, config)
+        # This is a simplified signal parser: SMA crossover, RSI thresholds or buy and hold,
+        # with windows/thresholds taken from config['params'] (DEFAULT_STRATEGY_PARAMS otherwise)
+        close = close_prices(data)
+        entries, exits = strategy_signals(strategy_code, close.to_numpy(), [config.get('params')])
+        return {'entries': pd.Series(entries[:, 0], index=data.index),
+                'exits': pd.Series(exits[:, 0], index=data.index)}
     
     def _create_backtrader_strategy(self, strategy_code: str, config: Dict):
         """Create Backtrader strategy class from code"""
@@ -0,0 +1,292 @@
+"""
+RIMSI Parameter Sweep & Walk-Forward Optimization
+Evaluate a strategy over a grid or random sample of parameters on one data load
+"""
+
+import itertools
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from models.rimsi_backtesting import (DEFAULT_STRATEGY_PARAMS, NATIVE_ALLOCATION, backtest_metrics,
+                                          simulate_signals, strategy_signals)
+except ImportError:
+    from rimsi_backtesting import (DEFAULT_STRATEGY_PARAMS, NATIVE_ALLOCATION, backtest_metrics,
+                                   simulate_signals, strategy_signals)
+
+SWEEP_WORKERS = int(os.getenv('RIMSI_SWEEP_WORKERS', str(max(1, min(8, os.cpu_count() or 1)))))
+MAX_SWEEP_COMBINATIONS = int(os.getenv('RIMSI_MAX_SWEEP_COMBINATIONS', '5000'))
+OBJECTIVES = ('sharpe_ratio', 'total_return', 'annualized_return', 'win_rate', 'max_drawdown', 'final_value')
+LEADERBOARD_SIZE = 10
+
+Window = Tuple[int, int]
+Split = Tuple[Window, Optional[Window]]
+
+
+# =============================================================================
+# SEARCH SPACE
+# =============================================================================
+
+def valid_params(params: Dict) -> bool:
+    """Reject combinations the signal parser cannot use (inverted windows or thresholds)"""
+    p = dict(DEFAULT_STRATEGY_PARAMS, **params)
+    return (2 <= p['short_window'] < p['long_window']
+            and p['rsi_period'] >= 2
+            and 0 <= p['oversold'] < p['overbought'] <= 100)
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict]:
+    """Cartesian product of {name: [values]}, dropping invalid combinations"""
+    names = list(grid)
+    total = math.prod(len(list(grid[n])) for n in names)
+    if total > MAX_SWEEP_COMBINATIONS:  # checked before the product is materialised
+        raise ValueError(f'{total} combinations exceed the limit of {MAX_SWEEP_COMBINATIONS}')
+    combos = (dict(zip(names, values)) for values in itertools.product(*(list(grid[n]) for n in names)))
+    return [c for c in combos if valid_params(c)]
+
+
+def sample_space(space: Dict[str, Any], n_samples: int, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Random search over a space of parameters.
+
+    Each entry is either a list of choices or a range {'low': a, 'high': b, 'int': bool, 'log': bool}.
+    Duplicates and invalid combinations are dropped, so fewer than n_samples may come back;
+    n_samples is capped at MAX_SWEEP_COMBINATIONS.
+    """
+    n_samples = min(max(0, int(n_samples)), MAX_SWEEP_COMBINATIONS)
+    rng = np.random.default_rng(seed)
+    out, seen = [], set()
+    for _ in range(n_samples * 4):
+        if len(out) >= n_samples:
+            break
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, dict):
+                low, high = float(spec['low']), float(spec['high'])
+                if spec.get('log'):
+                    value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                else:
+                    value = float(rng.uniform(low, high))
+                params[name] = int(round(value)) if spec.get('int', True) else value
+            else:
+                choices = list(spec)
+                params[name] = choices[int(rng.integers(len(choices)))]
+        key = tuple(sorted(params.items()))
+        if key not in seen and valid_params(params):
+            seen.add(key)
+            out.append(params)
+    return out
+
+
+def walk_forward_splits(n_bars: int, n_splits: int = 4, mode: str = 'rolling',
+                        train_size: Optional[int] = None, test_size: Optional[int] = None) -> List[Split]:
+    """
+    (train, test) bar windows for walk-forward evaluation.
+
+    The last n_splits * test_size bars are cut into consecutive test windows; each is preceded by
+    its training window - all earlier bars ('anchored') or the train_size bars just before it
+    ('rolling', default train_size = the bars before the first test window).
+    n_splits=0 evaluates the whole series in-sample only.
+    """
+    if n_splits <= 0:
+        return [((0, n_bars), None)]
+    test_size = int(test_size or n_bars // (n_splits + 1))
+    first_test = n_bars - n_splits * test_size
+    train_size = int(train_size or first_test)
+    if test_size < 2 or first_test < 2:
+        raise ValueError(f'{n_bars} bars are not enough for {n_splits} walk-forward splits')
+    splits = []
+    for i in range(n_splits):
+        start = first_test + i * test_size
+        train_start = 0 if mode == 'anchored' else max(0, start - train_size)
+        splits.append(((train_start, start), (start, start + test_size)))
+    return splits
+
+
+# =============================================================================
+# EVALUATION
+# =============================================================================
+
+def _clean(metrics: Dict[str, np.ndarray], k: int) -> Dict[str, Any]:
+    row = {}
+    for key, values in metrics.items():
+        v = float(values[k])
+        row[key] = int(v) if key == 'total_trades' else (v if math.isfinite(v) else None)
+    return row
+
+
+def evaluate_chunk(strategy_code: str, close: np.ndarray, param_sets: List[Dict], splits: List[Split],
+                   config: Dict) -> List[Dict]:
+    """
+    Backtest a batch of parameter sets on every walk-forward window (runs inside a pool worker).
+
+    Signals come from the full series - indicators only look back, so a window's first bars keep
+    their warm-up - and each window is then simulated from a flat position with fresh capital.
+    """
+    entries, exits = strategy_signals(strategy_code, close, param_sets)
+    capital = config.get('initial_capital', 100000)
+    commission = config.get('commission', 0.001)
+    allocation = config.get('allocation', NATIVE_ALLOCATION)
+
+    def window_metrics(window: Window) -> Dict[str, np.ndarray]:
+        a, b = window
+        return backtest_metrics(simulate_signals(close[a:b], entries[a:b], exits[a:b], capital, commission, allocation))
+
+    folds = [(window_metrics(train), window_metrics(test) if test else None) for train, test in splits]
+    return [{
+        'params': params,
+        'train': [_clean(train, k) for train, _ in folds],
+        'test': [_clean(test, k) for _, test in folds if test is not None],
+    } for k, params in enumerate(param_sets)]
+
+
+_sweep_pool: Optional[ProcessPoolExecutor] = None
+_sweep_pool_lock = threading.Lock()
+
+
+def get_sweep_pool() -> ProcessPoolExecutor:
+    """Shared process pool for sweep chunks (signal building and simulation hold the GIL in places)"""
+    global _sweep_pool
+    if _sweep_pool is None:
+        with _sweep_pool_lock:
+            if _sweep_pool is None:
+                _sweep_pool = ProcessPoolExecutor(max_workers=SWEEP_WORKERS)
+    return _sweep_pool
+
+
+def _reset_sweep_pool() -> None:
+    global _sweep_pool
+    with _sweep_pool_lock:
+        pool, _sweep_pool = _sweep_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _chunks(items: List[Dict], workers: int, chunk_size: Optional[int]) -> List[List[Dict]]:
+    size = chunk_size or max(8, math.ceil(len(items) / max(1, workers * 4)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_sweep(strategy_code: str, close, param_sets: List[Dict], splits: List[Split], config: Dict,
+              objective: str = 'sharpe_ratio', workers: Optional[int] = None,
+              chunk_size: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Evaluate every parameter set, yielding ('results', {...}) as each chunk completes and finally
+    ('report', summary). workers=0 (or a single chunk) evaluates in the calling process.
+    """
+    # Validated here, before the first event is requested
+    if objective not in OBJECTIVES:
+        raise ValueError(f'objective must be one of {OBJECTIVES}')
+    if len(param_sets) > MAX_SWEEP_COMBINATIONS:
+        raise ValueError(f'{len(param_sets)} combinations exceed the limit of {MAX_SWEEP_COMBINATIONS}')
+    close = np.ascontiguousarray(close, dtype=float)
+    workers = SWEEP_WORKERS if workers is None else workers
+    return _sweep_events(strategy_code, close, param_sets, splits, config, objective,
+                         workers, _chunks(param_sets, workers, chunk_size))
+
+
+def _sweep_events(strategy_code, close, param_sets, splits, config, objective, workers, chunks):
+    rows: List[Dict] = []
+
+    def progress(batch: List[Dict]) -> Tuple[str, Dict]:
+        rows.extend(batch)
+        return 'results', {'completed': len(rows), 'total': len(param_sets),
+                           'rows': [dict(r, score=_scores(r, objective)) for r in batch]}
+
+    pending = list(chunks)
+    if workers > 0 and len(chunks) > 1:
+        try:
+            pool = get_sweep_pool()
+            futures = {pool.submit(evaluate_chunk, strategy_code, close, c, splits, config): i
+                       for i, c in enumerate(chunks)}
+            for future in as_completed(futures):
+                batch = future.result()
+                pending[futures[future]] = None
+                yield progress(batch)
+        except BrokenProcessPool:
+            _reset_sweep_pool()
+    for chunk in pending:
+        if chunk is not None:
+            yield progress(evaluate_chunk(strategy_code, close, chunk, splits, config))
+    yield 'report', summarize(rows, objective)
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+def _metric(values: List[Dict], objective: str) -> np.ndarray:
+    return np.array([np.nan if m.get(objective) is None else m[objective] for m in values], dtype=float)
+
+
+def _mean(values: np.ndarray) -> Optional[float]:
+    values = values[np.isfinite(values)]
+    return float(values.mean()) if values.size else None
+
+
+def _scores(row: Dict, objective: str) -> Dict[str, Optional[float]]:
+    return {'in_sample': _mean(_metric(row['train'], objective)),
+            'out_of_sample': _mean(_metric(row['test'], objective)) if row['test'] else None}
+
+
+def summarize(rows: List[Dict], objective: str = 'sharpe_ratio') -> Dict:
+    """
+    Best configuration and out-of-sample stability of a finished sweep.
+
+    The best configuration is chosen on in-sample scores only. Walk-forward re-selects the
+    in-sample winner of every fold and reports how that choice did on the following test window.
+    """
+    if not rows:
+        return {'objective': objective, 'evaluated': 0, 'best': None, 'leaderboard': [], 'walk_forward': None}
+    train = np.array([_metric(r['train'], objective) for r in rows])  # (P, folds)
+    has_test = bool(rows[0]['test'])
+    test = np.array([_metric(r['test'], objective) for r in rows]) if has_test else None
+    finite = np.isfinite(train)
+    counts = finite.sum(axis=1)
+    in_sample = np.where(counts > 0, np.where(finite, train, 0.0).sum(axis=1) / np.maximum(counts, 1), -np.inf)
+    ranked = np.argsort(-in_sample, kind='stable')
+
+    def entry(i: int) -> Dict:
+        out = {'params': rows[i]['params'], 'in_sample': _mean(train[i])}
+        if has_test:
+            oos = test[i][np.isfinite(test[i])]
+            out.update({
+                'out_of_sample': float(oos.mean()) if oos.size else None,
+                'oos_std': float(oos.std()) if oos.size else None,
+                'oos_positive_folds': float((oos > 0).mean()) if oos.size else None,
+                'efficiency': (float(oos.mean() / out['in_sample'])
+                               if oos.size and out['in_sample'] and out['in_sample'] > 0 else None),
+            })
+        return out
+
+    report = {'objective': objective, 'evaluated': len(rows), 'best': entry(int(ranked[0])),
+              'leaderboard': [entry(int(i)) for i in ranked[:LEADERBOARD_SIZE]], 'walk_forward': None}
+    if has_test:
+        folds, chosen = [], []
+        for f in range(train.shape[1]):
+            column = np.where(np.isfinite(train[:, f]), train[:, f], -np.inf)
+            w = int(np.argmax(column))
+            chosen.append(w)
+            folds.append({'fold': f, 'params': rows[w]['params'],
+                          'in_sample': rows[w]['train'][f].get(objective),
+                          'out_of_sample': rows[w]['test'][f].get(objective),
+                          'test_return': rows[w]['test'][f].get('total_return')})
+        is_scores = np.array([np.nan if x['in_sample'] is None else x['in_sample'] for x in folds])
+        oos_scores = np.array([np.nan if x['out_of_sample'] is None else x['out_of_sample'] for x in folds])
+        returns = np.array([x['test_return'] or 0.0 for x in folds])
+        is_mean, oos_mean = _mean(is_scores), _mean(oos_scores)
+        report['walk_forward'] = {
+            'folds': folds,
+            'in_sample': is_mean,
+            'out_of_sample': oos_mean,
+            'efficiency': oos_mean / is_mean if is_mean and is_mean > 0 and oos_mean is not None else None,
+            'stitched_return': float(np.prod(1 + returns) - 1),
+            'selection_consistency': max(chosen.count(c) for c in set(chosen)) / len(chosen),
+        }
+    return report
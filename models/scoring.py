@@ -3,6 +3,12 @@ import numpy as np
 from datetime import datetime, timedelta
 import re
 
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 class ResearchReportScorer:
     def __init__(self, llm_client):
         self.llm_client = llm_client
@@ -639,7 +645,7 @@ class ResearchReportScorer:
         
         return comparison_result
     
-    def _calculate_plagiarism_between_reports(self, reports_data):
+    def _calculate_plagiarism_between_reports(self, reports_data, threshold=0.30, top_k=None):
         """
         Calculate plagiarism similarity matrix between all reports
         """
@@ -654,54 +660,83 @@ class ResearchReportScorer:
         }
         
         try:
-            similarities = []
+            n = len(reports_data)
+            ids = [report.get('id', f'Report_{i+1}') for i, report in enumerate(reports_data)]
+            sim = self.similarity_matrix([report.get('original_text', '') for report in reports_data])
+            rounded = np.round(sim, 3)
             
-            for i, report1 in enumerate(reports_data):
-                report1_id = report1.get('id', f'Report_{i+1}')
-                plagiarism_matrix["similarity_matrix"][report1_id] = {}
-                
-                for j, report2 in enumerate(reports_data):
-                    report2_id = report2.get('id', f'Report_{j+1}')
-                    
-                    if i == j:
-                        # Same report
-                        similarity = 1.0
-                    else:
-                        # Calculate similarity between different reports
-                        text1 = report1.get('original_text', '')
-                        text2 = report2.get('original_text', '')
-                        similarity = self._calculate_text_similarity(text1, text2)
-                        
-                        if i < j:  # Avoid duplicate comparisons
-                            similarities.append(similarity)
-                            plagiarism_matrix["summary"]["total_comparisons"] += 1
-                            
-                            # Track high similarity pairs
-                            if similarity > 0.30:  # Above 30% similarity threshold
-                                plagiarism_matrix["high_similarity_pairs"].append({
-                                    "report1_id": report1_id,
-                                    "report1_analyst": report1.get('analyst', 'Unknown'),
-                                    "report2_id": report2_id,
-                                    "report2_analyst": report2.get('analyst', 'Unknown'),
-                                    "similarity": round(similarity, 3),
-                                    "severity": self._get_similarity_severity(similarity)
-                                })
-                    
-                    plagiarism_matrix["similarity_matrix"][report1_id][report2_id] = round(similarity, 3)
+            for i, report1_id in enumerate(ids):
+                plagiarism_matrix["similarity_matrix"][report1_id] = {
+                    report2_id: float(rounded[i, j]) for j, report2_id in enumerate(ids)
+                }
             
-            # Calculate summary statistics
-            if similarities:
-                plagiarism_matrix["summary"]["max_similarity"] = round(max(similarities), 3)
-                plagiarism_matrix["summary"]["average_similarity"] = round(sum(similarities) / len(similarities), 3)
+            # Upper triangle = each unordered pair once
+            iu, ju = np.triu_indices(n, k=1)
+            pair_sims = sim[iu, ju]
+            plagiarism_matrix["summary"]["total_comparisons"] = int(len(pair_sims))
+            if len(pair_sims):
+                plagiarism_matrix["summary"]["max_similarity"] = round(float(pair_sims.max()), 3)
+                plagiarism_matrix["summary"]["average_similarity"] = round(float(pair_sims.mean()), 3)
             
-            # Sort high similarity pairs by similarity score
-            plagiarism_matrix["high_similarity_pairs"].sort(key=lambda x: x["similarity"], reverse=True)
+            # Track high similarity pairs (above threshold), best first
+            hits = np.flatnonzero(pair_sims > threshold)
+            hits = hits[np.argsort(-pair_sims[hits], kind='stable')]
+            if top_k is not None:
+                hits = hits[:top_k]
+            for h in hits:
+                i, j = int(iu[h]), int(ju[h])
+                similarity = float(pair_sims[h])
+                plagiarism_matrix["high_similarity_pairs"].append({
+                    "report1_id": ids[i],
+                    "report1_analyst": reports_data[i].get('analyst', 'Unknown'),
+                    "report2_id": ids[j],
+                    "report2_analyst": reports_data[j].get('analyst', 'Unknown'),
+                    "similarity": round(similarity, 3),
+                    "severity": self._get_similarity_severity(similarity)
+                })
             
         except Exception as e:
             plagiarism_matrix["error"] = f"Plagiarism calculation failed: {str(e)}"
         
         return plagiarism_matrix
     
+    def similarity_matrix(self, texts, metric='jaccard'):
+        """
+        N x N word-set similarity for all texts at once (diagonal = 1.0).
+        
+        Each text becomes a binary word-incidence row; one sparse X @ X.T gives every pairwise
+        intersection, from which Jaccard (|A&B| / |A or B|) or cosine (|A&B| / sqrt(|A||B|)) follows.
+        Same tokenisation as _calculate_text_similarity, so scores are identical to the pairwise path.
+        """
+        n = len(texts)
+        if not SCIPY_AVAILABLE:
+            out = np.eye(n)
+            for i in range(n):
+                for j in range(i + 1, n):
+                    out[i, j] = out[j, i] = self._calculate_text_similarity(texts[i], texts[j])
+            return out
+        
+        vocab = {}
+        rows, cols = [], []
+        for r, text in enumerate(texts):
+            for w in set((text or '').lower().split()):
+                rows.append(r)
+                cols.append(vocab.setdefault(w, len(vocab)))
+        x = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(n, max(1, len(vocab)))
+        )
+        inter = (x @ x.T).toarray().astype(np.float64)
+        sizes = np.diag(inter).copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if metric == 'cosine':
+                denom = np.sqrt(np.outer(sizes, sizes))
+            else:
+                denom = sizes[:, None] + sizes[None, :] - inter
+            out = np.where(denom > 0, inter / denom, 0.0)
+        np.fill_diagonal(out, 1.0)
+        return out
+    
     def _calculate_text_similarity(self, text1, text2):
         """
         Calculate similarity between two texts using word overlap
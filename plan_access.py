@@ -1,11 +1,16 @@
 """Plan-based feature access control matching existing hourly/daily quota system.
 Uses the established investor plan structure from USAGE_AND_PLANS.md.
-Replace in-memory counters with Redis/DB in production.
+Counters live in the shared quota store (utils.quota_store), so limits hold across gunicorn
+workers; the hourly quota is a sliding 60-minute window and daily limits a sliding 24 hours.
 """
 from datetime import datetime
-from collections import defaultdict
 from flask import session, jsonify
 
+try:
+    from utils.quota_store import DAY, HOUR, Window, get_counter_store
+except ImportError:
+    from quota_store import DAY, HOUR, Window, get_counter_store
+
 PLAN_LEVELS = {"retail":0,"pro":1,"pro_plus":2}
 
 # Hourly quotas per plan (from USAGE_AND_PLANS.md)
@@ -40,9 +45,9 @@ FEATURE_MIN_PLAN = {
     "unlimited_subscriptions": "pro_plus"
 }
 
-# In-memory counters: {date_hour: {investor_id: count}}, {date: {investor_id: {feature: count}}}
-_hourly_counters = defaultdict(lambda: defaultdict(int))
-_daily_counters = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+# Sliding windows: 1-minute buckets for the hour, 1-hour buckets for the day
+HOURLY_BUCKET_SECONDS = 60
+DAILY_BUCKET_SECONDS = 3600
 
 
 def _current_date_key():
@@ -51,21 +56,18 @@ def _current_date_key():
 def _current_hour_key():
     return datetime.now().strftime('%Y-%m-%d %H')
 
-def get_current_usage(investor_id, plan):
-    """Get current hourly and daily usage for an investor."""
-    hour_key = _current_hour_key()
-    day_key = _current_date_key()
-    
-    # Get hourly usage across all requests
-    hourly_usage = _hourly_counters[hour_key][investor_id]
-    
-    # Get daily usage across all features
-    daily_usage = sum(_daily_counters[day_key][investor_id].values())
-    
-    # Get quotas for this plan
+def _hourly_window(investor_id, plan=None):
+    return Window(f"h:{investor_id}", HOUR, HOURLY_BUCKET_SECONDS, HOURLY_QUOTAS.get(plan, 0) if plan else None)
+
+def _daily_window(investor_id, plan=None):
+    return Window(f"d:{investor_id}", DAY, DAILY_BUCKET_SECONDS, DAILY_CAPS.get(plan, 0) if plan else None)
+
+def _feature_window(investor_id, feature, limit=None):
+    return Window(f"f:{investor_id}:{feature}", DAY, DAILY_BUCKET_SECONDS, limit)
+
+def _usage_dict(investor_id, plan, hourly_usage, daily_usage):
     hourly_quota = HOURLY_QUOTAS.get(plan, 0)
     daily_cap = DAILY_CAPS.get(plan, 0)
-    
     return {
         "hourly_usage": hourly_usage,
         "hourly_quota": hourly_quota,
@@ -73,10 +75,16 @@ def get_current_usage(investor_id, plan):
         "daily_usage": daily_usage,
         "daily_cap": daily_cap,
         "daily_remaining": max(0, daily_cap - daily_usage),
-        "hour_key": hour_key,
-        "day_key": day_key
+        "hour_key": _current_hour_key(),
+        "day_key": _current_date_key()
     }
 
+def get_current_usage(investor_id, plan):
+    """Get current hourly and daily usage for an investor."""
+    h, d = _hourly_window(investor_id), _daily_window(investor_id)
+    used = get_counter_store().usage([h, d])
+    return _usage_dict(investor_id, plan, used[h.key], used[d.key])
+
 def check_quota_availability(investor_id, plan, feature=None):
     """Check if investor has quota available (hourly and daily limits)."""
     usage = get_current_usage(investor_id, plan)
@@ -91,8 +99,7 @@ def check_quota_availability(investor_id, plan, feature=None):
     
     # Check feature-specific daily limit if specified
     if feature and feature in FEATURE_LIMITS:
-        day_key = _current_date_key()
-        feature_usage = _daily_counters[day_key][investor_id][feature]
+        feature_usage = _get_usage(investor_id, feature)
         feature_limit = FEATURE_LIMITS[feature].get(plan, 0)
         
         if feature_usage >= feature_limit:
@@ -100,19 +107,17 @@ def check_quota_availability(investor_id, plan, feature=None):
     
     return True, "Quota available"
 
+def _consume(investor_id, plan, feature, feature_limit=None, cost=1):
+    """Atomically check hourly/daily/feature windows and count the request if all have room."""
+    windows = [_hourly_window(investor_id, plan), _daily_window(investor_id, plan)]
+    if feature:
+        windows.append(_feature_window(investor_id, feature, feature_limit))
+    return get_counter_store().consume(windows, cost)
+
 def _increment_usage(investor_id, feature, cost=1):
     """Increment both hourly and daily usage counters."""
-    hour_key = _current_hour_key()
-    day_key = _current_date_key()
-    
-    # Increment hourly counter
-    _hourly_counters[hour_key][investor_id] += cost
-    
-    # Increment feature-specific daily counter
-    if feature:
-        _daily_counters[day_key][investor_id][feature] += cost
-    
-    return _daily_counters[day_key][investor_id][feature]
+    decision = _consume(investor_id, None, feature, cost=cost)
+    return decision.usage.get(f"f:{investor_id}:{feature}", 0) if feature else 0
 
 
 def get_investor_plan(default="retail"):
@@ -143,8 +148,8 @@ def has_min_plan(required_plan: str) -> bool:
 
 
 def _get_usage(investor_id, feature):
-    day = _current_date_key()
-    return _daily_counters[day][investor_id][feature]
+    w = _feature_window(investor_id, feature)
+    return get_counter_store().usage([w])[w.key]
 
 
 def enforce_feature(feature_name):
@@ -156,16 +161,6 @@ def enforce_feature(feature_name):
             investor_id = session.get('investor_id') or session.get('user_id') or 'anon'
             plan = get_investor_plan()
             
-            # Check hourly and daily quotas first
-            quota_ok, quota_msg = check_quota_availability(investor_id, plan, feature_name)
-            if not quota_ok:
-                return jsonify({
-                    'error': 'quota_exceeded',
-                    'message': quota_msg,
-                    'feature': feature_name,
-                    'plan': plan
-                }), 429
-            
             # Minimum plan gate
             min_plan = FEATURE_MIN_PLAN.get(feature_name)
             if min_plan and not has_min_plan(min_plan):
@@ -176,51 +171,58 @@ def enforce_feature(feature_name):
                     'current_plan': plan
                 }), 403
             
-            # Feature-specific daily limit gate
+            # Hourly quota, daily cap and feature limit: checked and counted in one atomic step
             limits = FEATURE_LIMITS.get(feature_name)
-            if limits:
-                limit = limits.get(plan, limits.get('retail', 0))
-                used = _get_usage(investor_id, feature_name)
-                if limit > 0 and used >= limit:
+            limit = limits.get(plan, limits.get('retail', 0)) if limits else None
+            decision = _consume(investor_id, plan, feature_name, limit if limit and limit > 0 else None)
+            usage_info = _usage_dict(investor_id, plan,
+                                     decision.usage[f"h:{investor_id}"], decision.usage[f"d:{investor_id}"])
+            if not decision.allowed:
+                denied = decision.denied
+                if denied.key.startswith('f:'):
                     return jsonify({
                         'error':'daily_limit_reached',
                         'feature': feature_name,
                         'plan': plan,
                         'limit': limit,
-                        'used': used
+                        'used': decision.usage[denied.key]
                     }), 429
+                if denied.key.startswith('h:'):
+                    quota_msg = f"Hourly quota exceeded ({usage_info['hourly_usage']}/{usage_info['hourly_quota']})"
+                else:
+                    quota_msg = f"Daily cap exceeded ({usage_info['daily_usage']}/{usage_info['daily_cap']})"
+                return jsonify({
+                    'error': 'quota_exceeded',
+                    'message': quota_msg,
+                    'feature': feature_name,
+                    'plan': plan
+                }), 429
+            
+            resp = fn(*args, **kwargs)
+            if not limits:
+                return resp
+            # Attach usage headers via response object after execution
+            try:
+                # If response is a tuple (resp, status), handle first element
+                if isinstance(resp, tuple):
+                    flask_resp = resp[0]
+                    status = resp[1]
+                else:
+                    flask_resp = resp
+                    status = None
+                hdr_target = flask_resp
                 
-                # Increment usage counters (both hourly and daily)
-                new_used = _increment_usage(investor_id, feature_name)
-                
-                # Attach usage headers via response object after execution
-                resp = fn(*args, **kwargs)
-                try:
-                    # If response is a tuple (resp, status), handle first element
-                    if isinstance(resp, tuple):
-                        flask_resp = resp[0]
-                        status = resp[1]
-                    else:
-                        flask_resp = resp
-                        status = None
-                    hdr_target = flask_resp
-                    
-                    # Add comprehensive usage headers
-                    usage_info = get_current_usage(investor_id, plan)
-                    hdr_target.headers['X-Feature-Usage'] = f"{feature_name}:{new_used}/{limit}"
-                    hdr_target.headers['X-Hourly-Usage'] = f"{usage_info['hourly_usage']}/{usage_info['hourly_quota']}"
-                    hdr_target.headers['X-Daily-Usage'] = f"{usage_info['daily_usage']}/{usage_info['daily_cap']}"
-                    
-                    if status:
-                        return flask_resp, status
-                    return flask_resp
-                except Exception:
-                    return resp
-            else:
-                # No feature limits, just increment hourly usage
-                _increment_usage(investor_id, feature_name)
+                # Add comprehensive usage headers
+                new_used = decision.usage[f"f:{investor_id}:{feature_name}"]
+                hdr_target.headers['X-Feature-Usage'] = f"{feature_name}:{new_used}/{limit}"
+                hdr_target.headers['X-Hourly-Usage'] = f"{usage_info['hourly_usage']}/{usage_info['hourly_quota']}"
+                hdr_target.headers['X-Daily-Usage'] = f"{usage_info['daily_usage']}/{usage_info['daily_cap']}"
                 
-            return fn(*args, **kwargs)
+                if status:
+                    return flask_resp, status
+                return flask_resp
+            except Exception:
+                return resp
         return wrapper
     return decorator
 
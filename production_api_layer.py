@@ -25,6 +25,12 @@ from functools import wraps
 import threading
 from collections import defaultdict, deque
 
+try:
+    from utils.ohlcv_cache import get_ohlcv_cache
+    OHLCV_CACHE_AVAILABLE = True
+except ImportError:
+    OHLCV_CACHE_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -197,6 +203,27 @@ class BaseDataProvider:
             key_parts.append(f"{k}:{v}")
         return "|".join(key_parts)
     
+    def _cached_history(self, symbol: str, interval: str, span: str, fetch, ttl: int = 3600) -> Optional[pd.DataFrame]:
+        """Raw history frame from the shared tiered OHLCV cache; `fetch` runs only on a miss"""
+        def _fetch():
+            if not self.rate_limiter.acquire():
+                logger.warning(f"Rate limit hit for {self.credentials.provider.value} historical: {symbol}")
+                return None
+            return fetch()
+        
+        if OHLCV_CACHE_AVAILABLE:
+            return get_ohlcv_cache().get_or_fetch(
+                symbol, interval, span, _fetch, ttl=ttl, source=self.credentials.provider.value
+            )
+        
+        cache_key = self._make_cache_key(symbol, DataType.HISTORICAL, span=span, interval=interval)
+        data = self.cache.get(cache_key, ttl=ttl)
+        if data is None:
+            data = _fetch()
+            if data is not None and not data.empty:
+                self.cache.set(cache_key, data)
+        return data
+    
     async def get_real_time_data(self, symbol: str) -> Optional[MarketData]:
         """Get real-time market data"""
         raise NotImplementedError
@@ -283,41 +310,32 @@ class YFinanceProvider(BaseDataProvider):
     async def get_historical_data(self, symbol: str, start_date: datetime, 
                                  end_date: datetime, interval: str = "1d") -> Optional[pd.DataFrame]:
         """Get historical data from YFinance"""
-        cache_key = self._make_cache_key(symbol, DataType.HISTORICAL, 
-                                       start=start_date.date(), end=end_date.date(), interval=interval)
-        
-        # Check cache (longer TTL for historical data)
-        cached_data = self.cache.get(cache_key, ttl=3600)  # 1-hour cache
-        if cached_data is not None:
-            return cached_data
-        
-        if not self.rate_limiter.acquire():
-            logger.warning(f"Rate limit hit for YFinance historical: {symbol}")
-            return None
-        
         try:
             import yfinance as yf
             
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(
-                start=start_date.date(),
-                end=end_date.date(),
-                interval=interval,
-                auto_adjust=True,
-                prepost=True,
-                threads=True
+            def _fetch():
+                return yf.Ticker(symbol).history(
+                    start=start_date.date(),
+                    end=end_date.date(),
+                    interval=interval,
+                    auto_adjust=True,
+                    prepost=True,
+                    threads=True
+                )
+            
+            # Raw frame lives in the shared cache so other workers/modules reuse the download
+            data = self._cached_history(
+                symbol, interval, f"s={start_date.date()}_e={end_date.date()}_adj", _fetch
             )
             
-            if data.empty:
+            if data is None or data.empty:
                 return None
+            data = data.copy()
             
             # Standardize column names
             data.columns = [col.lower().replace(' ', '_') for col in data.columns]
             data['symbol'] = symbol
             data['provider'] = DataProvider.YFINANCE.value
-            
-            # Cache the result
-            self.cache.set(cache_key, data)
             return data
             
         except Exception as e:
@@ -411,46 +429,36 @@ class FyersProvider(BaseDataProvider):
         if not self.client:
             return None
         
-        cache_key = self._make_cache_key(symbol, DataType.HISTORICAL, 
-                                       start=start_date.date(), end=end_date.date(), interval=interval)
-        
-        cached_data = self.cache.get(cache_key, ttl=3600)
-        if cached_data is not None:
-            return cached_data
-        
-        if not self.rate_limiter.acquire():
-            logger.warning(f"Rate limit hit for Fyers historical: {symbol}")
-            return None
-        
         try:
             fyers_symbol = self._convert_to_fyers_symbol(symbol)
             
-            data = {
-                "symbol": fyers_symbol,
-                "resolution": interval,
-                "date_format": "1",
-                "range_from": start_date.strftime("%Y-%m-%d"),
-                "range_to": end_date.strftime("%Y-%m-%d"),
-                "cont_flag": "1"
-            }
-            
-            response = self.client.history(data)
+            def _fetch():
+                response = self.client.history({
+                    "symbol": fyers_symbol,
+                    "resolution": interval,
+                    "date_format": "1",
+                    "range_from": start_date.strftime("%Y-%m-%d"),
+                    "range_to": end_date.strftime("%Y-%m-%d"),
+                    "cont_flag": "1"
+                })
+                
+                if response.get('code') != 200 or not response.get('candles'):
+                    return None
+                
+                # Convert to DataFrame
+                df = pd.DataFrame(response['candles'], columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+                return df.set_index('timestamp')
             
-            if response.get('code') != 200 or 'candles' not in response:
-                return None
+            df = self._cached_history(
+                symbol, interval, f"s={start_date.date()}_e={end_date.date()}", _fetch
+            )
             
-            candles = response['candles']
-            if not candles:
+            if df is None or df.empty:
                 return None
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-            df.set_index('timestamp', inplace=True)
+            df = df.copy()
             df['symbol'] = symbol
             df['provider'] = DataProvider.FYERS.value
-            
-            self.cache.set(cache_key, df)
             return df
             
         except Exception as e:
@@ -13,6 +13,7 @@ Run this script as admin to populate the published models catalog.
 """
 
 import os
+import shutil
 import sys
 import requests
 import json
@@ -28,6 +29,13 @@ from werkzeug.security import generate_password_hash
 import uuid
 from datetime import datetime
 
+# Copied next to every published model.py (paths relative to the app directory)
+SHIPPED_HELPERS = (
+    'PublishableML/history_source.py',
+    'utils/history_store.py',
+    'utils/ohlcv_cache.py',
+)
+
 def create_analyst_accounts():
     """Create analyst accounts for different model categories"""
     
@@ -257,6 +265,12 @@ Generated automatically from PublishableML directory.
             except Exception as e:
                 print(f"❌ Failed to create artifact for {filename}: {e}")
                 continue
+            # Shared price-history helper the models import (history_source.price_history) and the
+            # history store behind it; sandboxed runs only see the artifact directory
+            for helper in SHIPPED_HELPERS:
+                helper = app_dir / helper
+                if helper.exists():
+                    shutil.copyfile(helper, artifact_dir / helper.name)
             
             # Create database entry
             import hashlib
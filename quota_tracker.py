@@ -1,11 +1,21 @@
 """Production quota tracking with database backend.
 Replaces in-memory counters with persistent database storage.
+Increments are a single upsert ... RETURNING round trip; old hour/day rows are purged after
+QUOTA_RETENTION_DAYS. Without a database the shared counter store (utils.quota_store) is used.
 """
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from typing import Dict, Tuple, Optional
 from sqlalchemy import create_engine, text
 import os
 
+try:
+    from utils.quota_store import DAY, HOUR, Window, get_counter_store
+except ImportError:
+    from quota_store import DAY, HOUR, Window, get_counter_store
+
+QUOTA_RETENTION_DAYS = int(os.getenv('QUOTA_RETENTION_DAYS', '2'))
+
 class DatabaseQuotaTracker:
     """Database-backed quota tracking system."""
     
@@ -14,6 +24,7 @@ class DatabaseQuotaTracker:
             database_url = os.getenv('DATABASE_URL', 'sqlite:///investor_terminal.db')
         
         self.engine = create_engine(database_url)
+        self._last_purge = 0.0
         self._ensure_tables()
     
     def _ensure_tables(self):
@@ -39,7 +50,9 @@ class DatabaseQuotaTracker:
         
         try:
             with self.engine.connect() as conn:
-                conn.execute(text(quota_tables_sql))
+                # One statement per execute (sqlite3 rejects multi-statement strings)
+                for stmt in filter(None, (part.strip() for part in quota_tables_sql.split(';'))):
+                    conn.execute(text(stmt))
                 conn.commit()
         except Exception as e:
             print(f"Warning: Could not create quota tables: {e}")
@@ -84,18 +97,20 @@ class DatabaseQuotaTracker:
         """Increment hourly usage counter."""
         try:
             with self.engine.connect() as conn:
-                # Upsert (insert or update)
-                conn.execute(
+                # Upsert (insert or update) returning the new count: one round trip, no re-read
+                row = conn.execute(
                     text("""
                     INSERT INTO hourly_usage (investor_id, hour_key, usage_count, updated_at)
                     VALUES (:investor_id, :hour_key, :cost, CURRENT_TIMESTAMP)
                     ON CONFLICT (investor_id, hour_key)
-                    DO UPDATE SET usage_count = usage_count + :cost, updated_at = CURRENT_TIMESTAMP
+                    DO UPDATE SET usage_count = hourly_usage.usage_count + :cost, updated_at = CURRENT_TIMESTAMP
+                    RETURNING usage_count
                     """),
                     {"investor_id": investor_id, "hour_key": hour_key, "cost": cost}
-                )
+                ).fetchone()
                 conn.commit()
-                return self.get_hourly_usage(investor_id, hour_key)
+                self._maybe_purge()
+                return row[0] if row else 0
         except Exception as e:
             print(f"Error incrementing hourly usage: {e}")
             return 0
@@ -104,22 +119,41 @@ class DatabaseQuotaTracker:
         """Increment daily feature usage counter."""
         try:
             with self.engine.connect() as conn:
-                # Upsert (insert or update)
-                conn.execute(
+                # Upsert (insert or update) returning the new count: one round trip, no re-read
+                row = conn.execute(
                     text("""
                     INSERT INTO daily_feature_usage (investor_id, date_key, feature_name, usage_count, updated_at)
                     VALUES (:investor_id, :date_key, :feature, :cost, CURRENT_TIMESTAMP)
                     ON CONFLICT (investor_id, date_key, feature_name)
-                    DO UPDATE SET usage_count = usage_count + :cost, updated_at = CURRENT_TIMESTAMP
+                    DO UPDATE SET usage_count = daily_feature_usage.usage_count + :cost, updated_at = CURRENT_TIMESTAMP
+                    RETURNING usage_count
                     """),
                     {"investor_id": investor_id, "date_key": date_key, "feature": feature, "cost": cost}
-                )
+                ).fetchone()
                 conn.commit()
-                return self.get_daily_feature_usage(investor_id, date_key, feature)
+                return row[0] if row else 0
         except Exception as e:
             print(f"Error incrementing feature usage: {e}")
             return 0
 
+    def purge_expired(self, retention_days: int = QUOTA_RETENTION_DAYS) -> None:
+        """Delete hour/day rows older than the retention period (keys sort chronologically)."""
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        with self.engine.connect() as conn:
+            conn.execute(text("DELETE FROM hourly_usage WHERE hour_key < :k"), {"k": cutoff.strftime('%Y-%m-%d %H')})
+            conn.execute(text("DELETE FROM daily_feature_usage WHERE date_key < :k"), {"k": cutoff.strftime('%Y-%m-%d')})
+            conn.commit()
+
+    def _maybe_purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            self.purge_expired()
+        except Exception as e:
+            print(f"Warning: quota purge failed: {e}")
+
 # Global tracker instance (fallback to in-memory if DB fails)
 _db_tracker = None
 
@@ -129,10 +163,12 @@ except Exception as e:
     print(f"Warning: Database quota tracker failed, using fallback: {e}")
     _db_tracker = None
 
-# Fallback to in-memory tracking
-from collections import defaultdict
-_hourly_counters = defaultdict(lambda: defaultdict(int))
-_daily_counters = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+# Fallback: shared sliding-window counter store (same keys as plan_access)
+def _fallback_windows(investor_id: str, feature: Optional[str] = None):
+    windows = [Window(f"h:{investor_id}", HOUR, 60), Window(f"d:{investor_id}", DAY, 3600)]
+    if feature:
+        windows.append(Window(f"f:{investor_id}:{feature}", DAY, 3600))
+    return windows
 
 def get_quota_usage_db(investor_id: str, plan: str) -> Dict:
     """Get current usage with database backend."""
@@ -147,9 +183,10 @@ def get_quota_usage_db(investor_id: str, plan: str) -> Dict:
         hourly_usage = _db_tracker.get_hourly_usage(investor_id, hour_key)
         daily_usage = _db_tracker.get_daily_total_usage(investor_id, date_key)
     else:
-        # Fallback to in-memory
-        hourly_usage = _hourly_counters[hour_key][investor_id]
-        daily_usage = sum(_daily_counters[date_key][investor_id].values())
+        # Fallback to the shared counter store
+        used = get_counter_store().usage(_fallback_windows(investor_id))
+        hourly_usage = used[f"h:{investor_id}"]
+        daily_usage = used[f"d:{investor_id}"]
     
     hourly_quota = HOURLY_QUOTAS.get(plan, 0)
     daily_cap = DAILY_CAPS.get(plan, 0)
@@ -163,7 +200,7 @@ def get_quota_usage_db(investor_id: str, plan: str) -> Dict:
         "daily_remaining": max(0, daily_cap - daily_usage),
         "hour_key": hour_key,
         "date_key": date_key,
-        "backend": "database" if _db_tracker else "memory"
+        "backend": "database" if _db_tracker else "counter_store"
     }
 
 def increment_usage_db(investor_id: str, feature: str, cost: int = 1) -> int:
@@ -177,10 +214,9 @@ def increment_usage_db(investor_id: str, feature: str, cost: int = 1) -> int:
         _db_tracker.increment_hourly_usage(investor_id, hour_key, cost)
         return _db_tracker.increment_feature_usage(investor_id, date_key, feature, cost)
     else:
-        # Fallback to in-memory
-        _hourly_counters[hour_key][investor_id] += cost
-        _daily_counters[date_key][investor_id][feature] += cost
-        return _daily_counters[date_key][investor_id][feature]
+        # Fallback to the shared counter store
+        decision = get_counter_store().consume(_fallback_windows(investor_id, feature), cost)
+        return decision.usage[f"f:{investor_id}:{feature}"]
 
 def get_feature_usage_db(investor_id: str, feature: str) -> int:
     """Get current feature usage with database backend."""
@@ -189,4 +225,5 @@ def get_feature_usage_db(investor_id: str, feature: str) -> int:
     if _db_tracker:
         return _db_tracker.get_daily_feature_usage(investor_id, date_key, feature)
     else:
-        return _daily_counters[date_key][investor_id][feature]
+        w = _fallback_windows(investor_id, feature)[-1]
+        return get_counter_store().usage([w])[w.key]
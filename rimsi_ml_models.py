@@ -32,8 +32,14 @@ try:
 except ImportError:
     JOBLIB_AVAILABLE = False
 
+import copy
 import json
 import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional, Any
 import logging
 
@@ -41,6 +47,152 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# =============================================================================
+# SHARED FEATURE FRAME
+# =============================================================================
+
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+try:
+    from functools import cached_property
+except ImportError:  # Python < 3.8
+    cached_property = property
+
+
+class FeatureFrame:
+    """Derived series of one price history, computed once and shared by every model.
+
+    All series are contiguous float64 arrays built lazily on first use, so a model that only needs
+    returns never pays for drawdowns, and running the whole suite on a symbol computes each
+    transform exactly once. Models accept a FeatureFrame wherever they take price_data (or a
+    return series, in which case they read `frame.returns`).
+    """
+
+    def __init__(self, prices, volumes=None, symbol: str = None, ewma_lambda: float = 0.94):
+        self.prices = np.ascontiguousarray(prices, dtype=np.float64)
+        self.volumes = None if volumes is None else np.ascontiguousarray(volumes, dtype=np.float64)
+        self.symbol = symbol
+        self.ewma_lambda = ewma_lambda
+        self._windows = {}
+
+    @classmethod
+    def from_returns(cls, returns, base: float = 100.0, **kwargs) -> 'FeatureFrame':
+        """Frame over a compounded price path; `returns` is kept exactly as given"""
+        rets = np.ascontiguousarray(returns, dtype=np.float64)
+        frame = cls(base * np.concatenate(([1.0], np.cumprod(1.0 + rets))), **kwargs)
+        frame.__dict__['returns'] = rets
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @cached_property
+    def digest(self) -> str:
+        """Content hash (prices, volumes, lambda) used as the prediction cache key"""
+        h = hashlib.blake2b(self.prices.tobytes(), digest_size=20)
+        if self.volumes is not None:
+            h.update(b'|v' + self.volumes.tobytes())
+        if 'returns' in self.__dict__:
+            h.update(b'|r' + self.returns.tobytes())
+        h.update(repr(self.ewma_lambda).encode())
+        return h.hexdigest()
+
+    @cached_property
+    def returns(self) -> np.ndarray:
+        p = self.prices
+        return np.ascontiguousarray(np.diff(p) / p[:-1])
+
+    @cached_property
+    def log_prices(self) -> np.ndarray:
+        return np.log(self.prices)
+
+    @cached_property
+    def log_returns(self) -> np.ndarray:
+        return np.ascontiguousarray(np.diff(self.log_prices))
+
+    @cached_property
+    def cumulative(self) -> np.ndarray:
+        return self.prices / self.prices[0]
+
+    @cached_property
+    def running_max(self) -> np.ndarray:
+        return np.maximum.accumulate(self.cumulative)
+
+    @cached_property
+    def drawdowns(self) -> np.ndarray:
+        return (self.cumulative - self.running_max) / self.running_max
+
+    @cached_property
+    def ewma_variance(self) -> np.ndarray:
+        """RiskMetrics variance v_t = lambda * v_(t-1) + (1 - lambda) * r_t^2, seeded with the sample variance"""
+        r2 = self.returns ** 2
+        if not len(r2):
+            return r2
+        lam = self.ewma_lambda
+        seed = float(np.var(self.returns[:min(20, len(r2))]))
+        if SCIPY_AVAILABLE:
+            out, _ = lfilter([1.0 - lam], [1.0, -lam], r2, zi=[lam * seed])
+            return np.ascontiguousarray(out)
+        out = np.empty_like(r2)
+        prev = seed
+        for i, x in enumerate(r2):
+            prev = lam * prev + (1.0 - lam) * x
+            out[i] = prev
+        return out
+
+    def _windowed(self, series: str, window: int) -> np.ndarray:
+        data = getattr(self, series)
+        if window <= 0 or len(data) < window:
+            return np.empty((0, max(window, 0)))
+        return np.lib.stride_tricks.sliding_window_view(data, window)
+
+    def rolling_mean(self, window: int, series: str = 'prices') -> np.ndarray:
+        """Mean of every full window; element i covers series[i:i + window]"""
+        key = ('mean', series, window)
+        if key not in self._windows:
+            self._windows[key] = np.ascontiguousarray(self._windowed(series, window).mean(axis=1))
+        return self._windows[key]
+
+    def rolling_std(self, window: int, series: str = 'returns') -> np.ndarray:
+        """Population std of every full window; element i covers series[i:i + window]"""
+        key = ('std', series, window)
+        if key not in self._windows:
+            self._windows[key] = np.ascontiguousarray(self._windowed(series, window).std(axis=1))
+        return self._windows[key]
+
+    def momentum(self, period: int) -> np.ndarray:
+        """period-step simple returns: element j = prices[j + period] / prices[j] - 1"""
+        key = ('momentum', 'prices', period)
+        if key not in self._windows:
+            p = self.prices
+            self._windows[key] = np.ascontiguousarray((p[period:] - p[:-period]) / p[:-period])
+        return self._windows[key]
+
+
+def as_feature_frame(price_data, volume_data=None) -> FeatureFrame:
+    """Wrap raw prices in a FeatureFrame (frames pass through unchanged)"""
+    if isinstance(price_data, FeatureFrame):
+        return price_data
+    return FeatureFrame(price_data, volume_data)
+
+
+def as_return_series(return_data) -> np.ndarray:
+    """Return series of a model input: a frame's returns, or the raw values as float64"""
+    if isinstance(return_data, FeatureFrame):
+        return return_data.returns
+    return np.asarray(return_data, dtype=np.float64)
+
+
+def _frame_volumes(price_data, volume_data):
+    if volume_data is None and isinstance(price_data, FeatureFrame) and price_data.volumes is not None:
+        return price_data.volumes
+    return volume_data
+
+
 class RIMSIMLModels:
     """
     Advanced ML Models Suite for RIMSI Trading Terminal
@@ -149,8 +301,10 @@ class IntradayPriceDriftModel:
     def predict(self, price_data: List[float], volume_data: List[float] = None) -> Dict:
         """Predict intraday price drift"""
         try:
-            prices = np.array(price_data[-self.lookback_period:])
-            returns = np.diff(prices) / prices[:-1]
+            frame = as_feature_frame(price_data)
+            volume_data = _frame_volumes(price_data, volume_data)
+            prices = frame.prices[-self.lookback_period:]
+            returns = frame.returns[-(len(prices) - 1):] if len(prices) > 1 else frame.returns[:0]
             
             # Calculate drift components
             mean_return = np.mean(returns)
@@ -159,7 +313,7 @@ class IntradayPriceDriftModel:
             
             # Volume-weighted drift adjustment
             volume_weight = 1.0
-            if volume_data:
+            if volume_data is not None and len(volume_data):
                 recent_volume = np.array(volume_data[-len(returns):])
                 avg_volume = np.mean(recent_volume)
                 volume_weight = recent_volume[-1] / avg_volume if avg_volume > 0 else 1.0
@@ -206,8 +360,9 @@ class MultiHorizonReturnForecaster:
     def predict(self, price_data: List[float], features: Dict = None) -> Dict:
         """Predict returns across multiple horizons"""
         try:
-            prices = np.array(price_data)
-            returns = np.diff(prices) / prices[:-1]
+            frame = as_feature_frame(price_data)
+            prices = frame.prices
+            returns = frame.returns
             
             forecasts = {}
             
@@ -267,7 +422,7 @@ class VolatilityEstimator:
     def predict(self, return_data: List[float], **kwargs) -> Dict:
         """Estimate volatility using GARCH(1,1) approximation"""
         try:
-            returns = np.array(return_data)
+            returns = as_return_series(return_data)
             
             if len(returns) < 10:
                 return {'error': 'Insufficient data for volatility estimation'}
@@ -322,13 +477,14 @@ class RealizedVolatilityAggregator:
     def predict(self, price_data: List[float], timestamps: List[str] = None) -> Dict:
         """Calculate realized volatility at multiple frequencies"""
         try:
-            prices = np.array(price_data)
+            frame = as_feature_frame(price_data)
+            prices = frame.prices
             
             if len(prices) < 20:
                 return {'error': 'Insufficient data for realized volatility'}
             
             # Calculate returns
-            returns = np.diff(prices) / prices[:-1]
+            returns = frame.returns
             
             # Simulate different frequency aggregations
             realized_vols = {}
@@ -432,24 +588,26 @@ class RegimeClassificationModel:
     def predict(self, price_data: List[float], volume_data: List[float] = None) -> Dict:
         """Classify current market regime"""
         try:
-            prices = np.array(price_data)
-            returns = np.diff(prices) / prices[:-1]
+            frame = as_feature_frame(price_data)
+            volume_data = _frame_volumes(price_data, volume_data)
+            prices = frame.prices
+            returns = frame.returns
             
             if len(returns) < 20:
                 return {'error': 'Insufficient data for regime classification'}
             
             # Trend indicators
-            short_ma = np.mean(prices[-5:])
-            long_ma = np.mean(prices[-20:])
+            short_ma = frame.rolling_mean(5)[-1]
+            long_ma = frame.rolling_mean(20)[-1]
             trend_strength = (short_ma - long_ma) / long_ma
             
             # Volatility indicators
-            volatility = np.std(returns[-20:])
+            volatility = frame.rolling_std(20)[-1]
             volatility_percentile = self._calculate_percentile(volatility, returns)
             
             # Volume indicators
             volume_trend = 0
-            if volume_data and len(volume_data) >= len(prices):
+            if volume_data is not None and len(volume_data) >= len(prices):
                 volumes = np.array(volume_data[-len(prices):])
                 volume_trend = (np.mean(volumes[-5:]) - np.mean(volumes[-20:])) / np.mean(volumes[-20:])
             
@@ -524,7 +682,7 @@ class FactorExposureEstimator:
     def predict(self, returns: List[float], market_returns: List[float] = None) -> Dict:
         """Estimate factor exposures"""
         try:
-            stock_returns = np.array(returns)
+            stock_returns = as_return_series(returns)
             
             if market_returns is None:
                 # Generate synthetic market returns
@@ -658,15 +816,13 @@ class DrawdownProbabilityModel:
     def predict(self, price_data: List[float], **kwargs) -> Dict:
         """Estimate drawdown probabilities"""
         try:
-            prices = np.array(price_data)
+            frame = as_feature_frame(price_data)
             
-            if len(prices) < 30:
+            if len(frame) < 30:
                 return {'error': 'Insufficient data for drawdown analysis'}
             
             # Calculate historical drawdowns
-            cumulative_returns = prices / prices[0]
-            running_max = np.maximum.accumulate(cumulative_returns)
-            drawdowns = (cumulative_returns - running_max) / running_max
+            drawdowns = frame.drawdowns
             
             # Current drawdown
             current_drawdown = drawdowns[-1]
@@ -724,7 +880,7 @@ class TailRiskEngine:
     def predict(self, returns: List[float], portfolio_value: float = 1000000) -> Dict:
         """Calculate Value at Risk and Conditional Value at Risk"""
         try:
-            rets = np.array(returns)
+            rets = as_return_series(returns)
             
             if len(rets) < 50:
                 return {'error': 'Insufficient data for tail risk analysis'}
@@ -1008,13 +1164,15 @@ class AnomalyDetectionEnsemble:
                 features: Dict = None) -> Dict:
         """Detect anomalies using ensemble approach"""
         try:
-            prices = np.array(price_data)
+            frame = as_feature_frame(price_data)
+            volume_data = _frame_volumes(price_data, volume_data)
+            prices = frame.prices
             
             if len(prices) < 20:
                 return {'error': 'Insufficient data for anomaly detection'}
             
             # Price-based anomaly detection
-            returns = np.diff(prices) / prices[:-1]
+            returns = frame.returns
             
             # Statistical anomaly detection
             returns_mean = np.mean(returns)
@@ -1024,12 +1182,12 @@ class AnomalyDetectionEnsemble:
             statistical_anomalies = z_scores > 2.5
             
             # Volume-price anomaly detection
-            if volume_data and len(volume_data) >= len(prices):
-                volumes = np.array(volume_data[-len(returns):])
-                price_volume_correlation = np.corrcoef(np.abs(returns), volumes[1:])[0, 1] if len(volumes) > 1 else 0
+            if volume_data is not None and len(volume_data) >= len(prices):
+                volumes = np.asarray(volume_data[-len(returns):], dtype=np.float64)  # volume of each return's bar
+                price_volume_correlation = np.corrcoef(np.abs(returns), volumes)[0, 1] if len(volumes) > 1 else 0
                 
                 # Anomalous if high volume with small price change or vice versa
-                volume_normalized = volumes[1:] / np.mean(volumes[1:])
+                volume_normalized = volumes / np.mean(volumes)
                 return_normalized = np.abs(returns) / np.mean(np.abs(returns))
                 
                 volume_price_anomalies = np.abs(volume_normalized - return_normalized) > 2
@@ -1390,7 +1548,9 @@ class BreakoutProbabilityModel:
     def predict(self, price_data: List[float], volume_data: List[float] = None) -> Dict:
         """Predict breakout probability"""
         try:
-            prices = np.array(price_data)
+            frame = as_feature_frame(price_data)
+            volume_data = _frame_volumes(price_data, volume_data)
+            prices = frame.prices
             
             if len(prices) < 20:
                 return {'error': 'Insufficient data for breakout analysis'}
@@ -1407,7 +1567,7 @@ class BreakoutProbabilityModel:
             range_position = (current_price - recent_low) / (recent_high - recent_low)
             
             # Volume analysis
-            if volume_data and len(volume_data) >= len(prices):
+            if volume_data is not None and len(volume_data) >= len(prices):
                 volumes = np.array(volume_data[-20:])
                 avg_volume = np.mean(volumes[:-5])
                 recent_volume = np.mean(volumes[-5:])
@@ -1416,9 +1576,8 @@ class BreakoutProbabilityModel:
                 volume_ratio = 1.0
             
             # Volatility compression
-            returns = np.diff(prices[-20:]) / prices[-21:-1]
-            current_volatility = np.std(returns)
-            long_term_volatility = np.std(np.diff(prices) / prices[:-1])
+            current_volatility = frame.rolling_std(19)[-1]  # the returns inside the last 20 prices
+            long_term_volatility = np.std(frame.returns)
             volatility_compression = current_volatility / long_term_volatility if long_term_volatility > 0 else 1.0
             
             # Breakout probability calculation
@@ -1467,20 +1626,14 @@ class VolatilityCompressionDetector:
     def predict(self, price_data: List[float]) -> Dict:
         """Detect volatility compression"""
         try:
-            prices = np.array(price_data)
-            returns = np.diff(prices) / prices[:-1]
+            frame = as_feature_frame(price_data)
+            returns = frame.returns
             
             if len(returns) < 30:
                 return {'error': 'Insufficient data for volatility analysis'}
             
-            # Calculate rolling volatility
-            rolling_vols = []
-            for i in range(10, len(returns)):
-                window_returns = returns[max(0, i-10):i]
-                vol = np.std(window_returns)
-                rolling_vols.append(vol)
-            
-            rolling_vols = np.array(rolling_vols)
+            # Rolling 10-period volatility of returns[i-10:i] for i in 10..n-1 (window ending before i)
+            rolling_vols = frame.rolling_std(10)[:-1]
             
             # Current vs historical volatility
             current_vol = rolling_vols[-1]
@@ -1519,7 +1672,8 @@ class MomentumPersistenceModel:
     def predict(self, price_data: List[float]) -> Dict:
         """Analyze momentum persistence"""
         try:
-            prices = np.array(price_data)
+            frame = as_feature_frame(price_data)
+            prices = frame.prices
             
             if len(prices) < 25:
                 return {'error': 'Insufficient data for momentum analysis'}
@@ -1532,12 +1686,7 @@ class MomentumPersistenceModel:
                     current_momentum = (prices[-1] - prices[-period]) / prices[-period]
                     
                     # Historical momentum consistency
-                    momentum_series = []
-                    for i in range(period, len(prices)):
-                        mom = (prices[i] - prices[i-period]) / prices[i-period]
-                        momentum_series.append(mom)
-                    
-                    momentum_series = np.array(momentum_series)
+                    momentum_series = frame.momentum(period)
                     
                     # Momentum persistence (autocorrelation)
                     if len(momentum_series) > 1:
@@ -1584,13 +1733,13 @@ class MeanReversionHalfLifeModel:
     def predict(self, price_data: List[float]) -> Dict:
         """Calculate mean reversion half-life"""
         try:
-            prices = np.array(price_data)
+            frame = as_feature_frame(price_data)
             
-            if len(prices) < 30:
+            if len(frame) < 30:
                 return {'error': 'Insufficient data for mean reversion analysis'}
             
             # Calculate log prices and deviations from mean
-            log_prices = np.log(prices)
+            log_prices = frame.log_prices
             mean_log_price = np.mean(log_prices)
             deviations = log_prices - mean_log_price
             
@@ -1638,6 +1787,85 @@ class MeanReversionHalfLifeModel:
         except Exception as e:
             return {'error': f'Mean reversion analysis failed: {str(e)}'}
 
+# =============================================================================
+# SHARED COVARIANCE KERNEL
+# =============================================================================
+
+class CovarianceEstimate:
+    """Result of ewma_covariance: N x N matrices plus per-asset moments (float64 arrays)"""
+
+    __slots__ = ('symbols', 'cov', 'corr', 'vol', 'mean', 'shrinkage', 'effective_obs')
+
+    def __init__(self, symbols, cov, corr, vol, mean, shrinkage, effective_obs):
+        self.symbols = symbols
+        self.cov = cov
+        self.corr = corr
+        self.vol = vol
+        self.mean = mean
+        self.shrinkage = shrinkage
+        self.effective_obs = effective_obs
+
+
+def align_returns(returns_data: Dict[str, List[float]]) -> Tuple[List[str], np.ndarray]:
+    """(symbols, T x N float64 matrix) of the most recent common window of every symbol's returns"""
+    symbols = list(returns_data.keys())
+    if not symbols:
+        return symbols, np.empty((0, 0))
+    min_length = min(len(returns_data[s]) for s in symbols)
+    if min_length == 0:
+        return symbols, np.empty((0, len(symbols)))
+    matrix = np.empty((min_length, len(symbols)), dtype=np.float64)
+    for j, s in enumerate(symbols):
+        matrix[:, j] = np.asarray(returns_data[s], dtype=np.float64)[-min_length:]
+    return symbols, matrix
+
+
+def ewma_covariance(returns: np.ndarray, decay: Optional[float] = 0.94, demean: bool = True,
+                    shrinkage=None, symbols: List[str] = None) -> CovarianceEstimate:
+    """Exponentially weighted covariance/correlation of a T x N return matrix in one pass.
+
+    decay      weight of observation t is decay**(T-1-t), normalised; None or 1.0 = equal weights
+               (with demean=True this reproduces np.cov exactly)
+    demean     subtract the weighted mean (and apply the weighted-sample bias correction); False
+               gives RiskMetrics-style raw second moments
+    shrinkage  None, a fixed intensity in [0, 1], or 'ledoit_wolf' for the Ledoit-Wolf optimal
+               intensity towards the scaled identity (weighted form of the 2004 estimator)
+    """
+    X = np.ascontiguousarray(returns, dtype=np.float64)
+    T, N = X.shape
+    if decay is None or decay >= 1.0:
+        w = np.full(T, 1.0 / T)
+    else:
+        w = decay ** np.arange(T - 1, -1, -1, dtype=np.float64)
+        w /= w.sum()
+    mean = w @ X
+    Xc = X - mean if demean else X
+    S = (Xc * w[:, None]).T @ Xc  # biased weighted second moment
+    w2 = float(w @ w)
+    intensity = 0.0
+    if shrinkage is not None and N > 1:
+        mu = np.trace(S) / N
+        target_dist = np.sum((S - mu * np.eye(N)) ** 2) / N
+        if shrinkage == 'ledoit_wolf':
+            norms = np.einsum('ti,ti->t', Xc, Xc)
+            quad = np.einsum('ti,ti->t', Xc @ S, Xc)
+            beta = (w ** 2 @ norms ** 2 - 2.0 * (w ** 2 @ quad) + w2 * np.sum(S ** 2)) / N
+            intensity = float(min(max(beta, 0.0), target_dist) / target_dist) if target_dist > 0 else 0.0
+        else:
+            intensity = float(min(max(float(shrinkage), 0.0), 1.0))
+        if intensity:
+            S = (1.0 - intensity) * S
+            S[np.diag_indices(N)] += intensity * mu
+    if demean and w2 < 1.0:
+        S /= (1.0 - w2)
+    vol = np.sqrt(np.clip(np.diag(S), 0.0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = S / np.outer(vol, vol)
+    corr[~np.isfinite(corr)] = 0.0
+    np.fill_diagonal(corr, np.where(vol > 0, 1.0, 0.0))
+    return CovarianceEstimate(symbols or list(range(N)), S, corr, vol, mean, intensity, 1.0 / w2 if w2 else 0.0)
+
+
 # =============================================================================
 # PORTFOLIO MODELS
 # =============================================================================
@@ -1654,44 +1882,16 @@ class CorrelationMatrixForecaster:
             if len(returns_data) < 2:
                 return {'error': 'Need at least 2 assets for correlation analysis'}
             
-            # Convert to aligned arrays
-            symbols = list(returns_data.keys())
-            min_length = min(len(returns) for returns in returns_data.values())
-            
-            if min_length < 10:
+            symbols, returns_matrix = align_returns(returns_data)
+            if len(returns_matrix) < 10:
                 return {'error': 'Insufficient data for correlation forecasting'}
             
-            # Align returns data
-            aligned_returns = {}
-            for symbol in symbols:
-                aligned_returns[symbol] = np.array(returns_data[symbol][-min_length:])
-            
-            # Calculate correlation matrix
-            returns_matrix = np.array([aligned_returns[symbol] for symbol in symbols])
-            correlation_matrix = np.corrcoef(returns_matrix)
-            
-            # Exponentially weighted correlation
-            ewma_correlations = {}
-            for i, symbol1 in enumerate(symbols):
-                for j, symbol2 in enumerate(symbols):
-                    if i != j:
-                        ret1 = aligned_returns[symbol1]
-                        ret2 = aligned_returns[symbol2]
-                        
-                        # EWMA correlation
-                        weights = np.array([self.decay_factor**k for k in range(len(ret1))][::-1])
-                        weights /= np.sum(weights)
-                        
-                        weighted_corr = np.sum(weights * ret1 * ret2) / np.sqrt(
-                            np.sum(weights * ret1**2) * np.sum(weights * ret2**2)
-                        )
-                        
-                        ewma_correlations[f'{symbol1}_{symbol2}'] = float(weighted_corr)
+            # Sample correlation plus RiskMetrics EWMA correlation (zero-mean second moments)
+            correlation_matrix = ewma_covariance(returns_matrix, decay=None).corr
+            ewma_correlation_matrix = ewma_covariance(returns_matrix, decay=self.decay_factor, demean=False).corr
             
             # Average correlation
-            correlations_list = [abs(correlation_matrix[i, j]) 
-                               for i in range(len(symbols)) 
-                               for j in range(i+1, len(symbols))]
+            correlations_list = np.abs(correlation_matrix[np.triu_indices(len(symbols), k=1)])
             avg_correlation = np.mean(correlations_list)
             
             # Correlation stability
@@ -1699,7 +1899,8 @@ class CorrelationMatrixForecaster:
             
             return {
                 'correlation_matrix': correlation_matrix.tolist(),
-                'ewma_correlations': ewma_correlations,
+                'ewma_correlation_matrix': ewma_correlation_matrix.tolist(),
+                'decay_factor': self.decay_factor,
                 'average_correlation': float(avg_correlation),
                 'correlation_stability': float(1 / (1 + correlation_std)),
                 'symbols': symbols,
@@ -1714,29 +1915,24 @@ class PortfolioOptimizationEngine:
     
     def __init__(self):
         self.risk_free_rate = 0.05  # 5% risk-free rate
+        self.decay_factor = 0.94
+        self.shrinkage = 'ledoit_wolf'
         
     def predict(self, returns_data: Dict[str, List[float]], 
                 target_return: float = None, risk_tolerance: str = 'moderate') -> Dict:
         """Optimize portfolio allocation"""
         try:
-            symbols = list(returns_data.keys())
+            symbols, returns_matrix = align_returns(returns_data)
             
             if len(symbols) < 2:
                 return {'error': 'Need at least 2 assets for optimization'}
             
-            # Align returns data
-            min_length = min(len(returns) for returns in returns_data.values())
-            if min_length < 20:
+            if len(returns_matrix) < 20:
                 return {'error': 'Insufficient data for optimization'}
             
-            returns_matrix = np.array([
-                np.array(returns_data[symbol][-min_length:]) 
-                for symbol in symbols
-            ])
-            
             # Calculate expected returns and covariance
-            expected_returns = np.mean(returns_matrix, axis=1)
-            cov_matrix = np.cov(returns_matrix)
+            expected_returns = np.mean(returns_matrix, axis=0)
+            cov_matrix = ewma_covariance(returns_matrix, decay=self.decay_factor, shrinkage=self.shrinkage).cov
             
             # Risk tolerance mapping
             risk_levels = {
@@ -1796,6 +1992,8 @@ class BlackLittermanExtension:
     def __init__(self):
         self.tau = 0.025  # Scaling factor
         self.risk_aversion = 3.0
+        self.decay_factor = 0.94
+        self.shrinkage = 'ledoit_wolf'
         
     def predict(self, returns_data: Dict[str, List[float]], 
                 views: Dict[str, float] = None, confidence: Dict[str, float] = None) -> Dict:
@@ -1811,13 +2009,8 @@ class BlackLittermanExtension:
             market_weights = np.ones(n_assets) / n_assets
             
             # Historical data
-            min_length = min(len(returns) for returns in returns_data.values())
-            returns_matrix = np.array([
-                np.array(returns_data[symbol][-min_length:]) 
-                for symbol in symbols
-            ])
-            
-            cov_matrix = np.cov(returns_matrix)
+            _, returns_matrix = align_returns(returns_data)
+            cov_matrix = ewma_covariance(returns_matrix, decay=self.decay_factor, shrinkage=self.shrinkage).cov
             
             # Implied equilibrium returns
             implied_returns = self.risk_aversion * np.dot(cov_matrix, market_weights)
@@ -1887,6 +2080,8 @@ class RiskParityAllocator:
     def __init__(self):
         self.max_iterations = 100
         self.tolerance = 1e-6
+        self.decay_factor = 0.94
+        self.shrinkage = 'ledoit_wolf'
         
     def predict(self, returns_data: Dict[str, List[float]]) -> Dict:
         """Calculate risk parity allocation"""
@@ -1897,13 +2092,8 @@ class RiskParityAllocator:
                 return {'error': 'Need at least 2 assets for risk parity'}
             
             # Calculate covariance matrix
-            min_length = min(len(returns) for returns in returns_data.values())
-            returns_matrix = np.array([
-                np.array(returns_data[symbol][-min_length:]) 
-                for symbol in symbols
-            ])
-            
-            cov_matrix = np.cov(returns_matrix)
+            _, returns_matrix = align_returns(returns_data)
+            cov_matrix = ewma_covariance(returns_matrix, decay=self.decay_factor, shrinkage=self.shrinkage).cov
             
             # Risk parity optimization (simplified)
             # Equal risk contribution from each asset
@@ -1960,6 +2150,124 @@ class RiskParityAllocator:
 # MODEL REGISTRY AND MANAGEMENT
 # =============================================================================
 
+PREDICTION_CACHE_SIZE = int(os.getenv('RIMSI_PREDICTION_CACHE_SIZE', '512'))
+PREDICTION_CACHE_TTL = float(os.getenv('RIMSI_PREDICTION_CACHE_TTL', '300'))
+ENSEMBLE_WORKERS = int(os.getenv('RIMSI_ENSEMBLE_WORKERS', str(min(8, (os.cpu_count() or 2) * 2))))
+LATENCY_SAMPLES = 1000  # per-model ring buffer behind the p50/p95/p99 figures
+FEATURE_FRAME_CACHE_SIZE = int(os.getenv('RIMSI_FEATURE_FRAME_CACHE_SIZE', '64'))
+
+# Models whose first argument may be a FeatureFrame (price- or return-series models)
+SERIES_MODELS = (
+    'intraday_drift', 'multi_horizon_forecaster', 'volatility_estimator', 'realized_volatility',
+    'regime_classifier', 'factor_exposure', 'drawdown_probability', 'tail_risk', 'anomaly_detection',
+    'breakout_probability', 'volatility_compression', 'momentum_persistence', 'mean_reversion',
+)
+
+
+def _feed_digest(h, value) -> None:
+    """Feed a canonical byte form of a model input into a hash (arrays by dtype/shape/raw bytes)"""
+    if isinstance(value, FeatureFrame):
+        h.update(b'F' + value.digest.encode())
+    elif isinstance(value, np.ndarray):
+        h.update(b'A' + str(value.dtype).encode() + str(value.shape).encode())
+        h.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode())
+    elif isinstance(value, (pd.Series, pd.DataFrame)):
+        h.update(b'P' + repr(list(getattr(value, 'columns', [value.name]))).encode())
+        _feed_digest(h, value.to_numpy())
+        _feed_digest(h, value.index.to_numpy())
+    elif isinstance(value, (list, tuple)):
+        if value and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+            h.update(b'N')  # numeric sequences hash as one float64 buffer
+            h.update(np.asarray(value, dtype=np.float64).tobytes())
+        else:
+            h.update(b'L' + str(len(value)).encode())
+            for v in value:
+                _feed_digest(h, v)
+    elif isinstance(value, dict):
+        h.update(b'D' + str(len(value)).encode())
+        for k in sorted(value, key=str):
+            h.update(str(k).encode() + b'=')
+            _feed_digest(h, value[k])
+    else:
+        h.update(b'S' + type(value).__name__.encode() + b':' + repr(value).encode())
+    h.update(b';')
+
+
+def prediction_cache_key(model_name: str, data: Any, kwargs: Dict) -> str:
+    """Content hash of (model, input, params); equal inputs map to the same key regardless of identity"""
+    h = hashlib.blake2b(model_name.encode(), digest_size=20)
+    _feed_digest(h, data)
+    _feed_digest(h, kwargs)
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """Thread-safe LRU of successful predictions with a freshness limit"""
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and time.monotonic() - entry[0] > self.ttl):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, result: Dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_ensemble_pool = None
+_ensemble_pool_lock = threading.Lock()
+
+
+def get_ensemble_pool() -> ThreadPoolExecutor:
+    """Shared worker pool for ensemble members (numpy releases the GIL for the heavy parts)"""
+    global _ensemble_pool
+    if _ensemble_pool is None:
+        with _ensemble_pool_lock:
+            if _ensemble_pool is None:
+                _ensemble_pool = ThreadPoolExecutor(max_workers=max(1, ENSEMBLE_WORKERS),
+                                                    thread_name_prefix='rimsi-ensemble')
+    return _ensemble_pool
+
+
 class RIMSIModelRegistry:
     """Central registry for managing all RIMSI ML models"""
     
@@ -1968,6 +2276,10 @@ class RIMSIModelRegistry:
         self.model_performance = {}
         self.model_metadata = {}
         self.ensemble_configs = {}
+        self.prediction_cache = PredictionCache()
+        self.feature_frames = PredictionCache(max_entries=FEATURE_FRAME_CACHE_SIZE)
+        self._latency = {}  # model -> recent execution times (seconds)
+        self._metrics_lock = threading.Lock()
         
         # Initialize models
         self._register_all_models()
@@ -2046,8 +2358,10 @@ class RIMSIModelRegistry:
             'successful_predictions': 0,
             'failed_predictions': 0,
             'average_execution_time': 0.0,
+            'cache_hits': 0,
             'last_used': None
         }
+        self._latency[name] = deque(maxlen=LATENCY_SAMPLES)
     
     def _get_model_category(self, model_name: str) -> str:
         """Get model category based on name"""
@@ -2071,34 +2385,56 @@ class RIMSIModelRegistry:
         """Get a model by name"""
         return self.models.get(name)
     
-    def predict(self, model_name: str, data: Any, **kwargs) -> Dict:
-        """Make prediction using specified model with performance tracking"""
+    def predict(self, model_name: str, data: Any, use_cache: bool = True, **kwargs) -> Dict:
+        """Make prediction using specified model with performance tracking.
+        
+        Successful results are memoized by a content hash of (model, data, kwargs); a repeat of the
+        same input is answered from the cache with 'cached': True."""
         if model_name not in self.models:
             return {
                 'error': f'Model {model_name} not found',
                 'available_models': list(self.models.keys())
             }
         
-        start_time = datetime.now()
+        cache_key = None
+        if use_cache:
+            try:
+                cache_key = prediction_cache_key(model_name, data, kwargs)
+            except Exception:
+                cache_key = None  # unhashable input: just compute
+        start_time = time.perf_counter()
+        if cache_key is not None:
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                with self._metrics_lock:
+                    self.model_performance[model_name]['cache_hits'] += 1
+                # Deep copy: callers may mutate the nested prediction; timing fields describe this call
+                output = copy.deepcopy(cached)
+                output.update(cached=True, execution_time=time.perf_counter() - start_time,
+                              timestamp=datetime.now().isoformat())
+                return output
         
         try:
             model = self.models[model_name]
             result = model.predict(data, **kwargs)
             
             # Update performance metrics
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start_time
             self._update_performance_metrics(model_name, True, execution_time)
             
-            return {
+            output = {
                 'model': model_name,
                 'prediction': result,
                 'execution_time': execution_time,
                 'timestamp': datetime.now().isoformat(),
                 'success': True
             }
+            if cache_key is not None:
+                self.prediction_cache.put(cache_key, copy.deepcopy(output))
+            return output
             
         except Exception as e:
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start_time
             self._update_performance_metrics(model_name, False, execution_time)
             
             logger.error(f"Model {model_name} prediction failed: {e}")
@@ -2111,20 +2447,38 @@ class RIMSIModelRegistry:
             }
     
     def _update_performance_metrics(self, model_name: str, success: bool, execution_time: float):
-        """Update model performance metrics"""
-        metrics = self.model_performance[model_name]
-        metrics['predictions_made'] += 1
-        metrics['last_used'] = datetime.now().isoformat()
-        
-        if success:
-            metrics['successful_predictions'] += 1
-        else:
-            metrics['failed_predictions'] += 1
-        
-        # Update average execution time
-        current_avg = metrics['average_execution_time']
-        predictions_count = metrics['predictions_made']
-        metrics['average_execution_time'] = (current_avg * (predictions_count - 1) + execution_time) / predictions_count
+        """Update model performance metrics (called concurrently by ensemble members)"""
+        with self._metrics_lock:
+            metrics = self.model_performance[model_name]
+            metrics['predictions_made'] += 1
+            metrics['last_used'] = datetime.now().isoformat()
+            
+            if success:
+                metrics['successful_predictions'] += 1
+            else:
+                metrics['failed_predictions'] += 1
+            
+            # Update average execution time
+            current_avg = metrics['average_execution_time']
+            predictions_count = metrics['predictions_made']
+            metrics['average_execution_time'] = (current_avg * (predictions_count - 1) + execution_time) / predictions_count
+            self._latency[model_name].append(execution_time)
+    
+    def get_latency_percentiles(self, model_name: str) -> Dict:
+        """p50/p95/p99 execution time in milliseconds over the model's recent predictions"""
+        with self._metrics_lock:
+            samples = np.array(self._latency.get(model_name, ()), dtype=float)
+        if not samples.size:
+            return {'samples': 0}
+        p50, p95, p99 = np.percentile(samples * 1000.0, [50, 95, 99])
+        return {'samples': int(samples.size), 'p50': round(float(p50), 3),
+                'p95': round(float(p95), 3), 'p99': round(float(p99), 3)}
+    
+    def _performance_snapshot(self, model_name: str) -> Dict:
+        with self._metrics_lock:
+            performance = dict(self.model_performance[model_name])
+        performance['latency_ms'] = self.get_latency_percentiles(model_name)
+        return performance
     
     def get_model_info(self, model_name: str = None) -> Dict:
         """Get model information"""
@@ -2134,7 +2488,7 @@ class RIMSIModelRegistry:
             
             return {
                 'metadata': self.model_metadata[model_name],
-                'performance': self.model_performance[model_name]
+                'performance': self._performance_snapshot(model_name)
             }
         else:
             # Return all models info
@@ -2143,11 +2497,12 @@ class RIMSIModelRegistry:
                 'models': {
                     name: {
                         'metadata': self.model_metadata[name],
-                        'performance': self.model_performance[name]
+                        'performance': self._performance_snapshot(name)
                     }
                     for name in self.models.keys()
                 },
-                'categories': self._get_category_summary()
+                'categories': self._get_category_summary(),
+                'prediction_cache': self.prediction_cache.stats()
             }
     
     def _get_category_summary(self) -> Dict:
@@ -2160,6 +2515,40 @@ class RIMSIModelRegistry:
             categories[category].append(name)
         return categories
     
+    def feature_frame(self, price_data, volume_data=None, symbol: str = None) -> FeatureFrame:
+        """Shared FeatureFrame for a price history; identical histories reuse the same frame"""
+        if isinstance(price_data, FeatureFrame):
+            return price_data
+        key = prediction_cache_key('feature_frame', price_data, {'volumes': volume_data})
+        frame = self.feature_frames.get(key)
+        if frame is None:
+            frame = FeatureFrame(price_data, volume_data, symbol=symbol)
+            self.feature_frames.put(key, frame)
+        return frame
+    
+    def predict_suite(self, price_data, model_names: List[str] = None, volume_data=None,
+                      symbol: str = None) -> Dict:
+        """Run the series models on one symbol over a single shared FeatureFrame (members in parallel)"""
+        start_time = time.perf_counter()
+        frame = self.feature_frame(price_data, volume_data, symbol)
+        names = [m for m in (model_names or SERIES_MODELS) if m in self.models]
+        pool = get_ensemble_pool()
+        futures = {name: pool.submit(self.predict, name, frame) for name in names}
+        predictions = {}
+        for name, future in futures.items():
+            try:
+                predictions[name] = future.result()
+            except Exception as e:
+                predictions[name] = {'model': name, 'error': str(e), 'success': False}
+        return {
+            'symbol': symbol or frame.symbol,
+            'observations': len(frame),
+            'feature_digest': frame.digest,
+            'predictions': predictions,
+            'execution_time': time.perf_counter() - start_time,
+            'timestamp': datetime.now().isoformat()
+        }
+    
     def create_ensemble(self, name: str, model_names: List[str], weights: List[float] = None) -> Dict:
         """Create ensemble of models"""
         # Validate models exist
@@ -2168,7 +2557,7 @@ class RIMSIModelRegistry:
             return {'error': f'Models not found: {missing_models}'}
         
         # Default equal weights
-        if weights is None:
+        if not weights:
             weights = [1.0 / len(model_names)] * len(model_names)
         
         if len(weights) != len(model_names):
@@ -2199,14 +2588,22 @@ class RIMSIModelRegistry:
         
         predictions = []
         errors = []
+        cache_hits = 0
+        start_time = time.perf_counter()
         
-        # Get predictions from all models
-        for model_name in models:
-            result = self.predict(model_name, data, **kwargs)
-            if result['success']:
+        # Run all members concurrently on the shared pool; results are collected in member order
+        pool = get_ensemble_pool()
+        futures = [pool.submit(self.predict, model_name, data, **kwargs) for model_name in models]
+        for model_name, future in zip(models, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            if result.get('success'):
                 predictions.append(result['prediction'])
+                cache_hits += 1 if result.get('cached') else 0
             else:
-                errors.append(f"{model_name}: {result['error']}")
+                errors.append(f"{model_name}: {result.get('error')}")
         
         if not predictions:
             return {
@@ -2221,6 +2618,8 @@ class RIMSIModelRegistry:
             'individual_predictions': predictions,
             'num_successful_models': len(predictions),
             'errors': errors,
+            'cache_hits': cache_hits,
+            'execution_time': time.perf_counter() - start_time,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test BM25 analysis, ranking and snippet offsets used by knowledge base search, and the index backfill migration
+"""
+import importlib.util
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from utils.bm25_index import KB_FIELDS, REPORT_FIELDS, analyze, query_terms, rank, row_fields, snippet
+
+DOCS = {
+    "r1": ("Reliance Industries posted strong refining margins; RELIANCE.NS remains a buy on retail growth.", "RELIANCE.NS"),
+    "r2": ("Banking sector outlook: HDFC Bank and ICICI Bank see credit growth, margins stable.", "HDFCBANK.NS ICICIBANK.NS"),
+    "r3": ("TCS and Infosys report IT services demand recovery; deal wins improve margins.", "TCS.NS INFY.NS"),
+    "r4": ("Macro note on inflation and rate cuts with little company detail.", ""),
+}
+
+
+def _index():
+    postings, lengths = [], {}
+    for doc, (body, tickers) in DOCS.items():
+        terms, length = analyze([(body, 1.0, True), (tickers, 3.0, False)])
+        lengths[doc] = length
+        postings.extend((doc, t, tf, length, off) for t, (tf, off) in terms.items())
+    return postings, lengths
+
+
+def _search(q, k=10):
+    postings, lengths = _index()
+    wanted = set(query_terms(q))
+    return rank([p for p in postings if p[1] in wanted], len(lengths), sum(lengths.values()) / len(lengths), k=k)
+
+
+def test_query_terms_drop_stop_words_and_exchange_suffix():
+    """Query analysis drops stop words and the .NS exchange suffix"""
+    assert query_terms("What is the outlook for TCS.NS and the IT sector?") == ["outlook", "tcs", "sector"]
+
+
+def test_ranking_prefers_rare_and_ticker_terms():
+    """Rare terms and ticker matches rank a report higher; unmatched queries return nothing"""
+    hits = _search("tcs margins")
+    assert hits[0].doc == "r3"
+    assert {h.doc for h in hits} == {"r1", "r2", "r3"}
+    assert set(hits[0].terms) == {"tcs", "margins"}
+    assert hits[0].score > hits[1].score
+    assert _search("reliance")[0].doc == "r1"
+    assert _search("unrelated words") == []
+
+
+def test_snippet_offsets_point_into_body():
+    """Hit offsets point at the matched word so snippets can be cut from the body"""
+    hit = _search("infosys")[0]
+    body = DOCS[hit.doc][0]
+    assert body[hit.offset:hit.offset + 7].lower() == "infosys"
+    start, end, text = snippet(body, hit.offset, width=30)
+    assert text == body[start:end] and "Infosys" in text
+
+
+def test_ticker_only_terms_have_no_offset():
+    """Terms found only in the ticker field carry their boost but no body offset"""
+    terms, length = analyze([("plain body text", 1.0, True), ("XYZ.NS", 3.0, False)])
+    assert terms["xyz"] == (3.0, -1)
+    assert terms["body"] == (1.0, 6)
+    assert length == 6.0
+
+
+def test_migration_backfills_existing_rows():
+    """Creating the index tables indexes every existing KB entry and report, as the app would"""
+    spec = importlib.util.spec_from_file_location(
+        "bm25_migration", "migrations/versions/d4f6b8c0e2a4_add_bm25_search_index_tables.py")
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = sa.create_engine("sqlite://")
+    meta = sa.MetaData()
+    kb = sa.Table("knowledge_base", meta, sa.Column("id", sa.Integer, primary_key=True),
+                  *(sa.Column(c, sa.Text) for c, _, _ in KB_FIELDS))
+    report = sa.Table("report", meta, sa.Column("id", sa.String(32), primary_key=True),
+                      *(sa.Column(c, sa.Text) for c, _, _ in REPORT_FIELDS))
+    with engine.begin() as conn:
+        meta.create_all(conn)
+        conn.execute(kb.insert(), [{"id": i, "title": f"Note {i}", "content": DOCS[d][0], "keywords": None,
+                                    "summary": None} for i, d in enumerate(DOCS, start=1)])
+        conn.execute(report.insert(), [{"id": d, "original_text": body, "tickers": tickers, "topic": None,
+                                        "sub_heading": None, "analyst": "Analyst"}
+                                       for d, (body, tickers) in DOCS.items()])
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+        docs = {(r.doc_type, r.doc_id): r.length for r in conn.execute(sa.text("SELECT * FROM search_document"))}
+        postings = conn.execute(sa.text("SELECT count(*) FROM search_posting")).scalar()
+        rows = conn.execute(sa.select(report)).all() + conn.execute(sa.select(kb)).all()
+
+    assert len(docs) == 2 * len(DOCS)
+    expected = 0
+    for row in rows:
+        doc_type, spec = ("report", REPORT_FIELDS) if isinstance(row.id, str) else ("kb", KB_FIELDS)
+        terms, length = analyze(row_fields(spec, row))
+        assert docs[(doc_type, str(row.id))] == length
+        expected += len(terms)
+    assert postings == expected
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test the dialect-aware insert-or-ignore / upsert helpers on SQLite.
+"""
+import sqlalchemy as sa
+
+from utils.db_upsert import insert_ignore, upsert
+
+META = sa.MetaData()
+TERMS = sa.Table("terms", META, sa.Column("id", sa.Integer, primary_key=True),
+                 sa.Column("term", sa.String(64), unique=True), sa.Column("df", sa.Integer))
+
+
+def _engine():
+    engine = sa.create_engine("sqlite://")
+    META.create_all(engine)
+    return engine
+
+
+def test_insert_ignore_reports_skipped_rows():
+    """A second insert of the same key is skipped and reports rowcount 0."""
+    with _engine().begin() as conn:
+        assert insert_ignore(conn, TERMS, [{"term": "bank", "df": 1}], ["term"]) == 1
+        assert insert_ignore(conn, TERMS, [{"term": "bank", "df": 5}], ["term"]) == 0
+        assert conn.execute(sa.select(TERMS.c.df)).scalar() == 1
+
+
+def test_upsert_increments_existing_rows():
+    """Conflicting rows get the set clause applied, new rows are inserted."""
+    with _engine().begin() as conn:
+        upsert(conn, TERMS, [{"term": "bank", "df": 1}], ["term"], {"df": TERMS.c.df + 1})
+        upsert(conn, TERMS, [{"term": "bank", "df": 1}, {"term": "loan", "df": 1}], ["term"], {"df": TERMS.c.df + 1})
+        upsert(conn, TERMS, [{"term": "loan", "df": 7}], ["term"], lambda new: {"df": TERMS.c.df + new.df})
+        rows = dict(conn.execute(sa.select(TERMS.c.term, TERMS.c.df)).all())
+        assert rows == {"bank": 2, "loan": 8}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the hAi-Edge point-in-time signal replay and the portfolio backtest built on it
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from hai_edge_engine import (REQUEST_BACKTEST_MAX_SYMBOLS, HAiEdgeEngine, _signal_weights, indicator_frame,
+                             replay_symbol_signals)
+
+INDEX = pd.bdate_range("2022-01-03", "2024-06-28")
+
+
+@pytest.fixture
+def backtest_engine(hai_edge_engine, ohlcv):
+    """Offline engine whose i-th symbol replays seeded bars over INDEX, clipped to the requested window"""
+    return hai_edge_engine(lambda i, start, end: ohlcv(INDEX, seed=i).loc[start:end],
+                           backtest={"workers": 1, "ml_models": ["linear", "ridge"]})
+
+
+def test_indicators_match_ta(ohlcv):
+    """The vectorised RSI, MACD and Bollinger columns match the ta package"""
+    from ta.momentum import RSIIndicator
+    from ta.trend import MACD
+    from ta.volatility import BollingerBands
+    data = ohlcv(INDEX, seed=1)
+    ind = indicator_frame(data)
+    assert np.allclose(ind["rsi"], RSIIndicator(data["Close"]).rsi(), equal_nan=True)
+    macd = MACD(data["Close"])
+    assert np.allclose(ind["macd"], macd.macd(), equal_nan=True)
+    assert np.allclose(ind["macd_signal"], macd.macd_signal(), equal_nan=True)
+    assert np.allclose(ind["bb_high"], BollingerBands(data["Close"]).bollinger_hband(), equal_nan=True)
+
+
+def test_replay_is_point_in_time(ohlcv):
+    """Signals replayed up to a date do not change when later bars are added"""
+    weights = HAiEdgeEngine().config["model_weights"]
+    params = {"ml_models": ["linear", "ridge"], "ml_refit_days": 40}
+    data = ohlcv(INDEX, seed=2)
+    full = replay_symbol_signals("X", data, "2023-06-01", weights, None, params)
+    cut = pd.Timestamp("2023-11-30")
+    truncated = replay_symbol_signals("X", data.loc[:cut], "2023-06-01", weights, None, params)
+    pd.testing.assert_frame_equal(full.loc[:cut], truncated)
+    assert full["signal"].between(0, 1).all() and full["confidence"].between(0, 1).all()
+
+
+def test_signal_weights_match_optimize_portfolio():
+    """The vectorised weighting used by the backtest agrees with optimize_portfolio"""
+    engine = HAiEdgeEngine()
+    rng = np.random.default_rng(3)
+    signals = [{"symbol": f"S{i}", "signal": float(s), "confidence": float(c), "signal_strength": "buy"}
+               for i, (s, c) in enumerate(zip(rng.uniform(0.3, 0.9, 40), rng.uniform(0.1, 0.9, 40)))]
+    expected = {p["symbol"]: p["weight"] for p in engine.optimize_portfolio(signals, target_stocks=12)}
+    s = np.array([x["signal"] for x in signals])
+    c = np.array([x["confidence"] for x in signals])
+    w = _signal_weights(s * c, (c > 0.3) & (s > 0.5), 12, engine.config["risk_parameters"]["max_position_size"])
+    assert {f"S{i}": float(w[i]) for i in np.flatnonzero(w)} == expected
+
+
+def test_backtest_replays_and_caches_signals(backtest_engine):
+    """Backtest metrics follow the equity curve, and replayed signals are reused only for the same window"""
+    engine = backtest_engine
+    symbols = [f"S{i}.NS" for i in range(6)]
+    res = engine.backtest_strategy("2023-06-01", "2024-06-28", 1000000, symbols=symbols)
+    assert "error" not in res, res
+    curve = [p["value"] for p in res["equity_curve"]]
+    assert np.isclose(res["final_value"], curve[-1])
+    assert np.isclose(res["total_return"], curve[-1] / 1000000 - 1)
+    assert np.isclose(res["max_drawdown"], -(np.array(curve) / np.maximum.accumulate(curve) - 1).min())
+    assert res["signal_cache"] == {"cached": 0, "computed": 6}
+    assert set(res["symbols_traded"]) <= set(symbols) and res["total_trades"] > 0
+
+    again = engine.backtest_strategy("2023-06-01", "2024-06-28", 1000000, symbols=symbols)
+    assert again["signal_cache"] == {"cached": 6, "computed": 0}
+    assert again["final_value"] == res["final_value"]
+    # A different start (and so a different history window) is never served from those frames
+    later = engine.backtest_strategy("2023-09-01", "2024-06-28", 1000000, symbols=symbols)
+    assert later["signal_cache"] == {"cached": 0, "computed": 6}
+
+
+def test_backtest_universe_is_bounded(backtest_engine, monkeypatch):
+    """Without symbols only the first max_symbols are replayed, and longer explicit lists are rejected"""
+    engine = backtest_engine
+    engine.symbols = [f"S{i}.NS" for i in range(60)]
+    fetched = []
+    monkeypatch.setattr(engine, "_fetch_histories", lambda symbols, *a: fetched.append(symbols) or {})
+    assert engine.backtest_strategy("2023-06-01", "2024-06-28")["error"] == "No market data available for the backtest window"
+    assert fetched == [engine.symbols[:50]]
+    assert engine.backtest_strategy("2023-06-01", "2024-06-28", symbols=engine.symbols) == {
+        "error": "At most 50 symbols per backtest"}
+    assert len(fetched) == 1
+    engine.backtest_strategy("2023-06-01", "2024-06-28", max_symbols=REQUEST_BACKTEST_MAX_SYMBOLS)
+    assert fetched[-1] == engine.symbols[:REQUEST_BACKTEST_MAX_SYMBOLS]
+
+
+def test_backtest_uses_portfolio_model_weights(backtest_engine):
+    """Portfolio weight keys override the matching signal components for one run and key the signal cache"""
+    engine = backtest_engine
+    symbols = [f"S{i}.NS" for i in range(3)]
+    base = engine.backtest_strategy("2023-06-01", "2024-06-28", symbols=symbols)
+    tilted = engine.backtest_strategy("2023-06-01", "2024-06-28", symbols=symbols,
+                                      model_weights={"ml_weight": 0.6, "symbolic": 0.05, "unknown_weight": 1.0})
+    assert base["model_weights"] == engine.config["model_weights"]
+    assert tilted["model_weights"] == dict(engine.config["model_weights"], ml_traditional=0.6, symbolic=0.05)
+    assert tilted["signal_cache"] == {"cached": 0, "computed": 3}
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test the hAi-Edge universe scan, its grouped ta features, the signal snapshot table and the route serving it
+"""
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import hai_edge_engine
+from hai_edge_engine import SNAPSHOT_COLUMNS, TA_ML_FEATURES, indicator_frame, ta_feature_frames
+
+INDEX = pd.bdate_range("2023-01-02", periods=400)
+
+
+@pytest.fixture
+def bars(ohlcv):
+    """History of the i-th symbol: seeded bars starting 10 * i sessions into INDEX"""
+    return lambda i, start=None, end=None: ohlcv(INDEX, seed=i).iloc[10 * i:]
+
+
+@pytest.fixture
+def scan_engine(hai_edge_engine, bars):
+    """make(folder, workers=1): an offline engine writing its snapshots into `folder`"""
+    def make(folder, workers=1):
+        return hai_edge_engine(bars, model_store={"enabled": False},
+                               scan={"workers": workers, "snapshot_dir": folder, "snapshot_keep": 2})
+    return make
+
+
+def test_grouped_ta_columns_match_per_symbol_indicators(ohlcv):
+    """The grouped ta pass matches indicator_frame per symbol, even for ragged histories"""
+    histories = {"A": ohlcv(INDEX, seed=1), "B": ohlcv(INDEX, seed=2).iloc[57:]}
+    frames = ta_feature_frames(histories)
+    for symbol, frame in frames.items():
+        ind = indicator_frame(histories[symbol]).loc[frame.index]
+        for ours, theirs in (("momentum_rsi", "rsi"), ("trend_macd", "macd"), ("trend_macd_signal", "macd_signal"),
+                             ("volatility_bbh", "bb_high"), ("volatility_bbl", "bb_low")):
+            assert np.allclose(frame[ours], ind[theirs])
+        assert frame.index[-1] == histories[symbol].index[-1]
+
+
+def test_ml_features_are_the_ta_ml_set(scan_engine, ohlcv):
+    """The ML ensemble reads TA_ML_FEATURES; extra add_all_ta_features columns do not change its inputs"""
+    engine = scan_engine(None)
+    grouped = ta_feature_frames({"A": ohlcv(INDEX, seed=1)})["A"]
+    extra = grouped.assign(volume_obv=1.0, trend_adx=25.0, momentum_stoch=50.0)  # extra add_all_ta_features columns
+    X_grouped, _ = engine.prepare_ml_features(grouped)
+    X_extra, _ = engine.prepare_ml_features(extra)
+    assert list(X_extra.columns) == list(X_grouped.columns)
+    assert set(TA_ML_FEATURES) <= set(X_grouped.columns)
+
+
+def test_live_frames_come_from_the_grouped_pass(scan_engine, ohlcv, monkeypatch):
+    """fetch_market_data serves the same non-empty frame the scan scores"""
+    history = ohlcv(INDEX, seed=3)
+    monkeypatch.setattr(hai_edge_engine, "HISTORY_STORE_AVAILABLE", True)
+    monkeypatch.setattr(hai_edge_engine, "stored_history", lambda symbol, period: history.copy(), raising=False)
+    live = scan_engine(None).fetch_market_data(["S3.NS"])["S3.NS"]
+    assert len(live) > 300
+    pd.testing.assert_frame_equal(live, ta_feature_frames({"S3.NS": history})["S3.NS"])
+
+
+def test_scan_writes_snapshot_and_feeds_portfolio(scan_engine, bars):
+    """A scan pulls the feeds once, publishes a snapshot and that snapshot drives optimize_portfolio"""
+    with tempfile.TemporaryDirectory() as d:
+        engine = scan_engine(d)
+        snapshot = engine.scan_universe([f"S{i}.NS" for i in range(5)])
+        assert engine.feed_calls == 1  # external feeds pulled once per cycle
+        assert list(snapshot.columns) == SNAPSHOT_COLUMNS and len(snapshot) == 5
+        assert snapshot["signal"].between(0, 1).all() and snapshot["error"].isna().all()
+
+        loaded = engine.load_signal_snapshot(max_age_hours=1)
+        pd.testing.assert_frame_equal(loaded.reset_index(drop=True), snapshot, check_dtype=False)
+        records = snapshot.to_dict("records")
+        assert engine.optimize_portfolio(target_stocks=3) == engine.optimize_portfolio(records, target_stocks=3)
+
+        direct = engine._ensemble_signal("S0.NS", ta_feature_frames({"S0.NS": bars(0)})["S0.NS"], [], [], {},
+                                         pd.Series(dtype=float))
+        assert np.isclose(direct["signal"], snapshot.loc[0, "signal"])
+
+        for _ in range(2):
+            engine.scan_universe(["S0.NS", "S1.NS"])
+        assert len(engine._snapshot_files(d)) == 2 and len(engine.load_signal_snapshot(max_age_hours=1)) == 2
+        assert set(engine.snapshot_signals(["S1.NS", "S9.NS"], max_age_hours=1)) == {"S1.NS"}
+        assert engine.load_signal_snapshot(max_age_hours=0) is None
+        assert engine.snapshot_signals(["S1.NS"], max_age_hours=0) is None
+
+
+def test_parallel_scan_matches_in_process(scan_engine):
+    """Scoring in a process pool gives the same signals as scoring in-process"""
+    with tempfile.TemporaryDirectory() as d:
+        symbols = [f"S{i}.NS" for i in range(4)]
+        inline = scan_engine(d).scan_universe(symbols)
+        pooled = scan_engine(d, workers=2).scan_universe(symbols)
+        assert np.allclose(inline["signal"], pooled["signal"])
+
+
+def test_generate_signals_route_returns_valid_json_for_nan_components(monkeypatch):
+    """NaN snapshot components reach clients as null, and symbols the scan could not score are reported missing"""
+    import json
+
+    from flask import Flask
+
+    import hai_edge_routes_bp as routes
+    from extensions import db
+    from hai_edge_models import HAiEdgePortfolio, HAiEdgeSignal
+
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SECRET_KEY="test")
+    db.init_app(app)
+    app.register_blueprint(routes.hai_edge_bp)
+    row = {name: 0.5 for name in hai_edge_engine.SIGNAL_COMPONENTS}
+    snapshot = {"TCS.NS": dict(row, signal=0.7, confidence=0.8, close=3500.0, sentiment=float("nan")),
+                "INFY.NS": dict(row, signal=float("nan"), confidence=0.0, close=1500.0)}
+    monkeypatch.setattr(routes.hai_engine, "snapshot_signals", lambda symbols, max_age_hours: snapshot)
+    with app.app_context():
+        db.create_all()
+        portfolio = HAiEdgePortfolio(name="P", strategy_type="hybrid", initial_capital=1e6, current_capital=1e6,
+                                     model_weights="{}")
+        db.session.add(portfolio)
+        db.session.commit()
+        resp = app.test_client().post(f"/hai-edge/portfolio/{portfolio.id}/generate-signals",
+                                      json={"symbols": ["TCS.NS", "INFY.NS", "SBIN.NS"]})
+        body = json.loads(resp.get_data(as_text=True),  # browsers reject bare NaN/Infinity
+                          parse_constant=lambda c: pytest.fail(f"invalid JSON constant {c}"))
+        assert resp.status_code == 200, body
+        assert [s["symbol"] for s in body["signals"]] == ["TCS.NS"] and body["missing"] == ["INFY.NS", "SBIN.NS"]
+        assert body["signals"][0]["reasoning"]["sentiment"] is None and body["signals"][0]["action"] == "buy"
+        assert json.loads(HAiEdgeSignal.query.one().reasoning)["sentiment"] is None
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the incremental history store: tail top-ups instead of full re-downloads
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from utils.ohlcv_cache import TieredOHLCVCache
+from utils.history_store import PERIOD_OFFSETS, HistoryStore, merge_tail
+
+_END = pd.Timestamp.now(tz="Asia/Kolkata").normalize()
+_FULL = pd.DataFrame(
+    {"Close": np.arange(800, dtype=float), "Volume": 1000.0},
+    index=pd.date_range(end=_END, periods=800, freq="D"),
+)
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+        self.upto = _END - pd.Timedelta(days=3)
+
+    def __call__(self, symbol, interval, period=None, start=None):
+        self.calls.append(("period", period) if start is None else ("start", start))
+        df = _FULL[_FULL.index <= self.upto]
+        if start is not None:
+            return df[df.index >= start]
+        return df[df.index >= self.upto - PERIOD_OFFSETS[period]]
+
+
+def test_merge_tail_dedupes_last_bar():
+    """A fetched tail replaces the overlapping last bar instead of duplicating it"""
+    a = _FULL.iloc[:10]
+    b = _FULL.iloc[9:12].assign(Close=lambda d: d["Close"] + 0.5)
+    m = merge_tail(a, b)
+    assert len(m) == 12
+    assert m["Close"].iloc[9] == a["Close"].iloc[9] + 0.5
+    assert m.index.is_monotonic_increasing
+
+
+def test_tail_topup_and_slices():
+    """After the first full download only the missing tail is fetched, and shorter periods are sliced locally"""
+    with tempfile.TemporaryDirectory() as d:
+        provider = FakeProvider()
+        store = HistoryStore(cache=TieredOHLCVCache(cache_dir=d), fetch=provider, refresh=0)
+        first = store.get_history("TCS.NS", period="2y")
+        assert provider.calls == [("period", "2y")]
+        provider.upto = _END  # three new bars arrive
+        second = store.get_history("TCS.NS", period="6mo")
+        assert provider.calls[-1][0] == "start"
+        assert second.index[-1] == _END
+        assert second.index[0] >= _END - pd.DateOffset(months=6)
+        full = store.get_history("TCS.NS", period="2y")
+        assert len(full) == len(first) + 3
+        assert not full.index.duplicated().any()
+        assert store.counters["full_fetches"] == 1
+
+
+def test_fresh_store_skips_provider():
+    """A fresh entry is served without the provider, also to another store on the same folder"""
+    with tempfile.TemporaryDirectory() as d:
+        provider = FakeProvider()
+        store = HistoryStore(cache=TieredOHLCVCache(cache_dir=d), fetch=provider, refresh=3600)
+        store.get_history("INFY.NS", period="1y")
+        store.get_history("INFY.NS", period="3mo")
+        assert len(provider.calls) == 1
+        # Another worker sharing the directory picks up the stored frame and metadata
+        other = HistoryStore(cache=TieredOHLCVCache(cache_dir=d), fetch=provider, refresh=3600)
+        other.get_history("INFY.NS", period="6mo")
+        assert len(provider.calls) == 1
+
+
+def test_workers_see_each_others_top_ups():
+    """A top-up written by one worker is read from disk by another without a fetch"""
+    with tempfile.TemporaryDirectory() as d:
+        provider = FakeProvider()
+        reader = HistoryStore(cache=TieredOHLCVCache(cache_dir=d), fetch=provider, refresh=3600)
+        writer = HistoryStore(cache=TieredOHLCVCache(cache_dir=d), fetch=provider, refresh=0)
+        assert reader.get_history("SBIN.NS", period="1y").index[-1] == provider.upto
+        provider.upto = _END
+        writer.get_history("SBIN.NS", period="1y")
+        calls = len(provider.calls)
+        assert reader.get_history("SBIN.NS", period="1y").index[-1] == _END  # re-read from the shared disk tier
+        assert len(provider.calls) == calls and not reader._key_locks
+
+
+
+def test_published_runs_import_the_store():
+    """Under `python -I` with only the artifact directory on sys.path the helper still uses the history store"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        for helper in ("PublishableML/history_source.py", "utils/history_store.py", "utils/ohlcv_cache.py"):
+            shutil.copyfile(os.path.join(root, helper), os.path.join(artifact_dir, os.path.basename(helper)))
+        probe = (
+            f"import sys; sys.path.insert(0, {artifact_dir!r}); import history_source; "
+            "print(history_source.get_history.__module__)"
+        )
+        out = subprocess.run([sys.executable, "-I", "-c", probe], cwd=artifact_dir,
+                             capture_output=True, text=True, timeout=120)
+        assert out.returncode == 0, out.stderr
+        assert out.stdout.strip() == "history_store"
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the published-model job worker pool: plan priorities, ageing and cancellation
+"""
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import app as A
+from utils.job_queue import JobCancelled, JobWorkerPool, plan_priority, run_cancellable
+
+
+def test_plan_priority():
+    """Higher plans get higher base priorities, and unknown or missing plans rank as retail"""
+    assert plan_priority("pro_plus") > plan_priority("pro") > plan_priority("retail") == plan_priority(None)
+    assert plan_priority("PRO") == plan_priority("pro") and plan_priority("gold") == plan_priority("retail")
+
+
+def test_pool_runs_by_priority_with_bounded_workers():
+    """A one-thread pool claims jobs in priority order and never runs two at once"""
+    queue = [("r1", 0), ("p1", 20), ("r2", 0), ("p2", 10)]
+    lock = threading.Lock()
+    order, running, peak = [], [0], [0]
+
+    def claim():
+        with lock:
+            if not queue:
+                return None
+            best = max(queue, key=lambda j: j[1])
+            queue.remove(best)
+            return best[0]
+
+    def execute(job_id):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            order.append(job_id)
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    pool = JobWorkerPool(claim, execute, max_workers=1, poll_interval=0.05).start()
+    deadline = time.time() + 5
+    while len(order) < 4 and time.time() < deadline:
+        time.sleep(0.02)
+    pool.stop()
+    assert order == ["p1", "p2", "r1", "r2"]
+    assert peak[0] == 1
+    assert pool.stats()["completed"] == 4
+
+
+def test_run_cancellable_kills_child():
+    """run_cancellable returns output, and kills the child on cancellation or timeout"""
+    rc, out, _ = run_cancellable([sys.executable, "-c", "print('hi')"], timeout=10)
+    assert rc == 0 and out.strip() == "hi"
+    started = time.time()
+    flag = {"at": started + 0.3}
+    try:
+        run_cancellable([sys.executable, "-c", "import time; time.sleep(30)"], timeout=30,
+                        should_cancel=lambda: time.time() >= flag["at"], poll=0.05)
+        assert False, "expected JobCancelled"
+    except JobCancelled:
+        pass
+    assert time.time() - started < 5
+    try:
+        run_cancellable([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.2, poll=0.05)
+        assert False, "expected TimeoutExpired"
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def _queue_job(job_id, plan, created_at):
+    priority = plan_priority(plan)
+    A.db.session.add(A.PublishedModelJob(
+        id=job_id, published_model_id="pm_queue_test", plan=plan, priority=priority, status="queued",
+        created_at=created_at,
+        queue_rank_at=created_at - timedelta(seconds=priority * A.PUBLISHED_JOB_AGING_SECONDS)))
+
+
+def test_claim_sorts_by_effective_priority_in_the_database():
+    """A fresh pro_plus job is claimed ahead of a long backlog of retail jobs, and positions agree"""
+    with A.app.app_context():
+        A.db.create_all()
+        A.PublishedModelJob.query.delete()
+        now = datetime.utcnow()
+        for i in range(80):
+            _queue_job(f"job_retail_{i:03d}", "retail", now - timedelta(seconds=300 - i))
+        _queue_job("job_pro", "pro", now - timedelta(seconds=1))
+        _queue_job("job_pro_plus", "pro_plus", now)
+        A.db.session.commit()
+        pro_plus, pro, oldest_retail = (A.PublishedModelJob.query.get(j)
+                                        for j in ("job_pro_plus", "job_pro", "job_retail_000"))
+        assert A._published_job_queue_position(pro_plus) == 1
+        assert A._published_job_queue_position(pro) == 2
+        assert A._published_job_queue_position(oldest_retail) == 3
+
+        assert A._claim_published_job() == "job_pro_plus"
+        assert A._claim_published_job() == "job_pro"
+        assert A._claim_published_job() == "job_retail_000"
+        A.PublishedModelJob.query.delete()
+        A.db.session.commit()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test the versioned model store and hAi-Edge model reuse with warm-start retraining
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import utils.model_store as model_store
+from utils.model_store import ModelStore, schema_id
+
+INDEX = pd.bdate_range("2022-01-03", periods=520)
+
+
+def test_versions_prune_and_share_across_instances():
+    """Old versions are pruned and a second store on the same folder sees new saves"""
+    with tempfile.TemporaryDirectory() as d:
+        store = ModelStore(root=d, keep_versions=2)
+        schema = schema_id(["a", "b"])
+        assert schema != schema_id(["b", "a"]) and store.load("ns", "TCS.NS", schema) is None
+        for day in ("2024-01-02", "2024-01-03", "2024-01-04"):
+            store.save("ns", "TCS.NS", schema, pd.Timestamp(day), {"day": day})
+        assert store.versions("ns", "TCS.NS", schema) == ["20240103", "20240104"]
+        assert store.load("ns", "TCS.NS", schema) == {"day": "2024-01-04"}
+        assert store.load("ns", "TCS.NS", schema, version="20240103") == {"day": "2024-01-03"}
+
+        other = ModelStore(root=d)  # another worker process sees the published file
+        assert other.load("ns", "TCS.NS", schema) == {"day": "2024-01-04"}
+        store.save("ns", "TCS.NS", schema, pd.Timestamp("2024-01-05"), {"day": "2024-01-05"})
+        assert other.load("ns", "TCS.NS", schema) == {"day": "2024-01-05"}
+        assert not [n for n in os.listdir(store.directory("ns", "TCS.NS", schema)) if n.endswith(".tmp")]
+
+
+def test_engine_reuses_and_warm_starts_models(ohlcv):
+    """The engine loads stored models, warm-starts on a few new bars and refits after many"""
+    from hai_edge_engine import HAiEdgeEngine
+    data = ohlcv(INDEX, drift=0.0, vol=0.02)
+    with tempfile.TemporaryDirectory() as d:
+        model_store._instance = ModelStore(root=d)
+        try:
+            engine = HAiEdgeEngine()
+            runs = [engine.train_ml_models(data.iloc[:n].copy(), "X") for n in (480, 480, 490, 500, 505)]
+            assert [r["training"] for r in runs] == ["full", "loaded", "warm_start", "warm_start", "full"]
+            assert runs[0]["overall"] == runs[1]["overall"]
+            assert runs[2]["trained_through"] > runs[1]["trained_through"]
+            forest = engine.models["X_random_forest"]
+            assert forest.n_estimators == 100  # full refit after 21 absorbed bars resets the forest
+
+            # A fresh engine (restart / another worker) scores from disk without refitting
+            model_store.get_model_store().clear_memory()
+            again = HAiEdgeEngine().train_ml_models(data.iloc[:505].copy(), "X")
+            assert again["training"] == "loaded" and np.isclose(again["overall"], runs[-1]["overall"])
+        finally:
+            model_store._instance = None
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the tiered OHLCV cache: memory LRU, then disk, then the provider
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+from utils.ohlcv_cache import TieredOHLCVCache
+
+INDEX = pd.date_range("2024-01-01", periods=50, freq="D")
+
+
+def test_memory_then_disk_then_provider(ohlcv):
+    """Repeat reads come from memory, another cache on the same folder reads disk, and the provider is hit once"""
+    with tempfile.TemporaryDirectory() as d:
+        calls = []
+        fetch = lambda: calls.append(1) or ohlcv(INDEX)
+        c1 = TieredOHLCVCache(cache_dir=d)
+        a = c1.get_or_fetch("TCS.NS", "1d", "p=2y", fetch)
+        b = c1.get_or_fetch("TCS.NS", "1d", "p=2y", fetch)
+        assert len(calls) == 1 and a is not b
+        pd.testing.assert_frame_equal(a, b)
+        b.loc[:, "Close"] = 0.0  # callers get their own copy
+        assert c1.get_or_fetch("TCS.NS", "1d", "p=2y", fetch)["Close"].ne(0).all()
+        # A second process/worker sharing the directory reads from disk, not the provider
+        c2 = TieredOHLCVCache(cache_dir=d)
+        c = c2.get_or_fetch("TCS.NS", "1d", "p=2y", fetch)
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(a, c, check_freq=False)
+        assert c1.stats()["misses"] == 1 and c1.stats()["memory_hits"] == 2 and c1.stats()["inflight_keys"] == 0
+        assert c2.stats()["disk_hits"] == 1
+
+
+def test_memory_bound_evicts_lru(ohlcv):
+    """The memory tier stays within its byte budget by evicting the least recently used frames"""
+    with tempfile.TemporaryDirectory() as d:
+        one = ohlcv(INDEX)
+        budget = int(one.memory_usage(index=True, deep=True).sum() * 2.5)
+        c = TieredOHLCVCache(cache_dir=d, max_memory_bytes=budget)
+        for i in range(4):
+            c.get_or_fetch(f"S{i}", "1d", "p=1y", lambda i=i: ohlcv(INDEX, seed=i))
+        st = c.stats()
+        assert st["memory_entries"] == 2
+        assert st["evictions"] == 2
+        assert st["memory_bytes"] <= budget
+
+
+def test_disk_usage_is_kept_without_rescanning(ohlcv, monkeypatch):
+    """stats() walks the cache folder once, then writes and invalidations keep the file and byte counts"""
+    with tempfile.TemporaryDirectory() as d:
+        TieredOHLCVCache(cache_dir=d).set("yfinance|1d|OLD|p=1y", ohlcv(INDEX))
+        c = TieredOHLCVCache(cache_dir=d)
+        assert c.stats()["disk_files"] == 1
+        monkeypatch.setattr("utils.ohlcv_cache.os.walk", lambda *a, **k: (_ for _ in ()).throw(AssertionError("rescanned")))
+        c.set("yfinance|1d|NEW|p=1y", ohlcv(INDEX, seed=1))
+        c.set("yfinance|1d|NEW|p=1y", ohlcv(INDEX, seed=2))  # overwrite keeps the count
+        c.invalidate("yfinance|1d|OLD|p=1y")
+        st = c.stats()
+        assert st["disk_files"] == 1
+        assert st["disk_bytes"] == os.path.getsize(c.path_for("yfinance|1d|NEW|p=1y"))
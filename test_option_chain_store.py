@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the partitioned option chain history store, the chain recorder and the expected-move backtest
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.option_chain_store import ChainRecorder, OptionChainStore, expected_move_backtest
+
+UNDERLYING = "NSE_INDEX|Nifty 50"
+
+
+def _rows(spot, oi_shift=0.0, straddle=None):
+    strikes = np.round(spot / 50) * 50 + 50 * np.arange(-10, 11)
+    rows = []
+    for k in strikes:
+        intrinsic_c, intrinsic_p = max(spot - k, 0), max(k - spot, 0)
+        half = (straddle or 0.02 * spot) / 2
+        rows.append({"strike": float(k), "call_ltp": intrinsic_c + half, "put_ltp": intrinsic_p + half,
+                     "call_oi": 1000 + oi_shift, "put_oi": 800.0, "call_iv": 0.15, "put_iv": 0.16,
+                     "call_volume": 10.0, "put_volume": None})
+    return rows
+
+
+def test_append_query_compact_and_diff():
+    """Appends are queryable by expiry, day, strike and column, compact per day and diff between snapshots"""
+    with tempfile.TemporaryDirectory() as d:
+        store = OptionChainStore(root=d)
+        day1, day2 = pd.Timestamp("2025-08-04 09:30"), pd.Timestamp("2025-08-05 09:30")
+        for i in range(3):
+            store.append(UNDERLYING, "28-08-2025", _rows(24500, oi_shift=i), ts=day1 + pd.Timedelta(minutes=15 * i),
+                         underlying_price=24500)
+        store.append(UNDERLYING, "2025-09-25", _rows(24500), ts=day1, underlying_price=24500)
+        folder = os.path.join(store.partition(UNDERLYING, "28-08-2025"), "20250804")
+        assert len(os.listdir(folder)) == 3 and store.expiries(UNDERLYING) == ["20250828", "20250925"]
+
+        store.append(UNDERLYING, "28-08-2025", _rows(24600), ts=day2, underlying_price=24600)
+        assert os.listdir(folder) == ["day" + store.ext]  # the first write of a new day closes the old one
+
+        frame = store.query(UNDERLYING, "28-08-2025", start="2025-08-04", end="2025-08-04")
+        assert len(frame) == 3 * 21 and frame["ts"].nunique() == 3 and frame["put_volume"].isna().all()
+        everything = store.query(UNDERLYING)
+        assert set(everything["expiry"]) == {"20250828", "20250925"} and len(everything) == 5 * 21
+        atm = store.query(UNDERLYING, "28-08-2025", strikes=[24500], columns=["call_oi"])
+        assert list(atm.columns) == ["ts", "strike", "call_oi", "expiry"] and atm["call_oi"].tolist() == [1000, 1001, 1002, 1000]
+
+        at = store.chain_at(UNDERLYING, "28-08-2025", "2025-08-04 09:50")
+        assert at["ts"].iloc[0] == day1 + pd.Timedelta(minutes=15) and len(at) == 21
+        assert store.chain_at(UNDERLYING, "28-08-2025", "2025-08-01").empty
+
+        diff = store.diff(UNDERLYING, "28-08-2025", day1, day1 + pd.Timedelta(minutes=30))
+        assert (diff["call_oi_change"] == 2).all() and diff.attrs["after"] == day1 + pd.Timedelta(minutes=30)
+
+
+def test_pickle_format_round_trips():
+    """The pickle disk format stores and reads chains like parquet"""
+    with tempfile.TemporaryDirectory() as d:
+        store = OptionChainStore(root=d, disk_format="pickle")
+        store.append(UNDERLYING, "28-08-2025", _rows(24500), ts="2025-08-04 10:00", underlying_price=24500)
+        store.append(UNDERLYING, "28-08-2025", _rows(24500), ts="2025-08-05 10:00", underlying_price=24500)
+        assert len(store.query(UNDERLYING, columns=["call_ltp"])) == 42 and store.ext == ".pkl"
+
+
+def test_expected_move_backtest_scores_settled_expiries():
+    """Each day's ATM straddle is scored against where its expiry settled"""
+    with tempfile.TemporaryDirectory() as d:
+        store = OptionChainStore(root=d)
+        # Straddle prices a 2% move; expiry settles 1% away from the first day's open and ~2.06% from the second's
+        path = {"2025-08-25": 24000, "2025-08-26": 23750, "2025-08-28": 24240}
+        for day, spot in path.items():
+            for minute in (0, 120):
+                store.append(UNDERLYING, "28-08-2025", _rows(spot, straddle=0.02 * spot),
+                             ts=pd.Timestamp(day) + pd.Timedelta(hours=9, minutes=15 + minute), underlying_price=spot)
+        store.append(UNDERLYING, "04-09-2025", _rows(24240), ts="2025-08-28 09:15", underlying_price=24240)
+        result = expected_move_backtest(store, UNDERLYING, "2025-08-01")
+        assert result["total_tests"] == 2 and result["successful_predictions"] == 1 and result["accuracy"] == 50
+        first, second = result["results_by_day"]
+        assert first["date"] == "2025-08-25" and np.isclose(first["predicted_move"], 2.0)
+        assert np.isclose(first["actual_move"], 1.0) and np.isclose(second["actual_move"], 490 / 23750 * 100, atol=1e-4)
+        assert expected_move_backtest(store, "OTHER", "2025-08-01")["total_tests"] == 0
+
+
+def test_recorder_appends_every_target_once_per_cycle():
+    """One recorder cycle writes every healthy target under a shared timestamp and reports failures"""
+    with tempfile.TemporaryDirectory() as d:
+        store = OptionChainStore(root=d)
+        calls = []
+
+        def fetch(symbol, expiry):
+            calls.append((symbol, expiry))
+            if symbol == "BAD":
+                return {"ok": False, "error": "Upstox API returned error"}
+            return {"ok": True, "raw": _rows(24500), "underlying_price": 24500}
+
+        recorder = ChainRecorder(store, fetch, [(UNDERLYING, "28-08-2025"), ("NSE_INDEX|Nifty Bank", "28-08-2025"),
+                                                ("BAD", "28-08-2025")])
+        written = recorder.record_once()
+        assert written == {f"{UNDERLYING}|28-08-2025": 21, "NSE_INDEX|Nifty Bank|28-08-2025": 21}
+        assert list(recorder.last_errors) == ["BAD|28-08-2025"] and len(calls) == 3
+        assert store.timestamps(UNDERLYING, "28-08-2025") == store.timestamps("NSE_INDEX|Nifty Bank", "28-08-2025")
+
+
+def test_months_of_history_query_quickly():
+    """Three months of compacted snapshots read back in under a second"""
+    with tempfile.TemporaryDirectory() as d:
+        store = OptionChainStore(root=d)
+        for day in pd.bdate_range("2025-03-03", periods=90):
+            for minute in (0, 180):
+                store.append(UNDERLYING, "25-09-2025", _rows(24000), ts=day + pd.Timedelta(hours=9, minutes=15 + minute),
+                             underlying_price=24000)
+        store.compact(UNDERLYING, "25-09-2025", before="2030-01-01")
+        start = time.perf_counter()
+        frame = store.query(UNDERLYING, "25-09-2025", start="2025-03-01", end="2025-07-31")
+        assert time.perf_counter() - start < 1.0 and len(frame) == 90 * 2 * 21
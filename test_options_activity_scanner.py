@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the multi-underlying unusual options activity scanner
+"""
+import time
+
+import numpy as np
+
+from models.options_activity_scanner import OptionsActivityScanner, StrikeBaseline
+
+
+class FakeChains:
+    """Cumulative intraday volume that grows ~1000 contracts per strike and side per refresh."""
+
+    def __init__(self, strikes=np.arange(21500, 22550, 50.0), spot=22010.0):
+        self.strikes, self.spot = strikes, spot
+        self.volume = {}
+        self.iv = 0.15
+        self.spike = None  # (underlying, strike, side, extra contracts) for the next refresh
+        self.delay = {}
+        self.rng = np.random.default_rng(0)
+
+    def __call__(self, underlying, expiry):
+        time.sleep(self.delay.get(underlying, 0))
+        vol = self.volume.setdefault(underlying, np.zeros((len(self.strikes), 2)))
+        vol += 1000 + self.rng.normal(0, 50, vol.shape)
+        if self.spike and self.spike[0] == underlying:
+            i = int(np.flatnonzero(self.strikes == self.spike[1])[0])
+            vol[i, 0 if self.spike[2] == "call" else 1] += self.spike[3]
+        rows = [{"strike": k, "call_volume": vol[i, 0], "put_volume": vol[i, 1], "call_oi": 10000.0, "put_oi": 10000.0,
+                 "call_iv": self.iv, "put_iv": self.iv + 0.01, "call_ltp": 100.0, "put_ltp": 90.0,
+                 "call_gamma": 0.002 if k == 22000 else 0.0001, "put_gamma": 0.0001}
+                for i, k in enumerate(self.strikes)]
+        return {"ok": True, "raw": rows, "underlying_price": self.spot}
+
+
+def test_volume_spike_iv_move_and_gamma_wall():
+    """A volume spike, an IV move and a gamma wall near spot are each reported once the baseline is warm"""
+    chains = FakeChains()
+    scanner = OptionsActivityScanner(chains, [("NSE_INDEX|Nifty 50", "30-09-2025"), ("NSE_INDEX|Nifty Bank", "30-09-2025")],
+                                     {"interval": 5, "workers": 2, "max_alerts": 200})
+    for _ in range(6):
+        quiet = scanner.scan()
+    assert quiet["scanned"] == 2 and quiet["unusual_activity"] == [] and quiet["top_movers"] == []
+    walls = quiet["gamma_alerts"]
+    assert {w["strike"] for w in walls} == {22000.0} and walls[0]["distance_from_spot"] < 0.1
+
+    chains.spike = ("NSE_INDEX|Nifty Bank", 22100.0, "put", 20000)
+    chains.iv = 0.18
+    result = scanner.scan()
+    top = result["unusual_activity"][0]
+    assert len(result["unusual_activity"]) == 1 and top["symbol"] == "Nifty Bank" and top["strike"] == 22100.0
+    assert top["type"] == "put" and top["volume_ratio"] > 15 and top["implied_move"] == round(190 / 22010 * 100, 2)
+    movers = result["top_movers"]
+    assert len(movers) == 2 * 2 * len(chains.strikes) and all(np.isclose(m["iv_change"], 3.0) for m in movers)
+
+
+def test_baseline_survives_strike_list_changes():
+    """Added and removed strikes keep their neighbours' history, and a volume reset starts a new session"""
+    base = StrikeBaseline(alpha=0.5)
+    base.update(np.array([100.0, 110.0]), np.array([[10.0, 10], [20, 20]]), np.full((2, 2), 0.2), np.zeros((2, 2)))
+    traded, *_ = base.update(np.array([100.0, 105.0, 110.0]), np.array([[15.0, 15], [5, 5], [30, 30]]),
+                             np.full((3, 2), 0.2), np.zeros((3, 2)))
+    assert traded.tolist() == [[5, 5], [0, 0], [10, 10]]  # new strike has no previous volume yet
+    traded, *_ = base.update(np.array([100.0, 105.0, 110.0]), np.array([[3.0, 3], [6, 6], [31, 31]]),
+                             np.full((3, 2), 0.2), np.zeros((3, 2)))
+    assert traded.tolist() == [[3, 3], [1, 1], [1, 1]]  # a drop in cumulative volume means a new session
+
+
+def test_traded_volume_is_scaled_to_elapsed_time():
+    """Volume traded over a late refresh is scaled to one interval before it reaches the baseline"""
+    base = StrikeBaseline(alpha=0.5, period=60.0)
+    flat = lambda v: np.full((1, 2), v)
+    base.update(np.array([100.0]), flat(0.0), flat(0.2), flat(0.0), at=0.0)
+    for step in range(1, 6):
+        base.update(np.array([100.0]), flat(1000.0 * step), flat(0.2), flat(0.0), at=60.0 * step)
+    traded, rate, z, *_ = base.update(np.array([100.0]), flat(7000.0), flat(0.2), flat(0.0), at=420.0)
+    assert traded.tolist() == [[2000, 2000]] and rate.tolist() == [[1000, 1000]] and np.allclose(z, 0.0)
+
+
+def test_cycle_is_bounded_by_interval_and_single_flight():
+    """Slow chains are reported late and skipped while in flight, and new targets drop the cached result"""
+    chains = FakeChains()
+    chains.delay = {"SLOW": 1.5}
+    scanner = OptionsActivityScanner(chains, [("FAST", "x"), ("SLOW", "x")], {"interval": 0.5, "workers": 2})
+    result = scanner.scan()
+    assert result["late"] == ["SLOW|x"] and result["scanned"] == 1 and result["cycle_seconds"] < 1.0
+    assert scanner.latest() is result  # still fresh: served without another fetch
+    again = scanner.scan()
+    assert again["skipped"] == ["SLOW|x"] and again["late"] == [] and again["scanned"] == 1
+    assert scanner.set_targets([("FAST", "y")]) and scanner.latest(max_age=60) is not again
+    assert not scanner.set_targets([("FAST", "y")])
+
+
+def test_full_fno_universe_scans_within_interval():
+    """Two hundred chains scan well inside the refresh interval"""
+    chains = FakeChains(strikes=np.arange(20000, 24000, 50.0))
+    targets = [(f"NSE_EQ|STOCK{i}", "30-09-2025") for i in range(200)]
+    scanner = OptionsActivityScanner(chains, targets, {"interval": 30, "workers": 8})
+    scanner.scan()
+    result = scanner.scan()
+    assert result["scanned"] == 200 and result["cycle_seconds"] < 10
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the strike-array option chain analytics and the analyzers built on it
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.enhanced_options_analytics import EnhancedOptionsAnalytics
+from models.options_chain_analytics import ChainAnalytics, get_chain_analytics
+from models.options_ml_analyzer import OptionsMLAnalyzer
+
+
+def _chain(n=41, seed=0, spot=22000):
+    rng = np.random.default_rng(seed)
+    strikes = spot + 50 * (np.arange(n) - n // 2)
+    rows = []
+    for k in rng.permutation(strikes):  # arrives unsorted
+        m = (k - spot) / spot
+        rows.append({"strike": float(k), "call_oi": float(rng.integers(0, 90000)), "put_oi": float(rng.integers(0, 90000)),
+                     "call_volume": float(rng.integers(0, 200000)), "put_volume": float(rng.integers(0, 200000)),
+                     "call_iv": 0.15 + 0.2 * m * m - 0.05 * m, "put_iv": 0.16 + 0.25 * m * m - 0.1 * m,
+                     "call_gamma": float(rng.uniform(0, 0.001)), "put_gamma": float(rng.uniform(0, 0.001)),
+                     "call_delta": float(rng.uniform(0, 1)), "put_delta": float(rng.uniform(-1, 0))})
+    return rows
+
+
+def _brute_pain(rows):
+    out = {}
+    for r in rows:
+        k = r["strike"]
+        out[k] = (sum((k - o["strike"]) * o["call_oi"] for o in rows if o["strike"] < k)
+                  + sum((o["strike"] - k) * o["put_oi"] for o in rows if o["strike"] > k))
+    return out
+
+
+def test_max_pain_matches_brute_force():
+    """Max pain over strike arrays matches a brute-force payout sum, duplicate strikes included"""
+    rows = _chain()
+    rows.append(dict(rows[3]))  # duplicate strike rows still price correctly
+    pain = _brute_pain(rows)
+    result = ChainAnalytics(rows).max_pain()
+    assert all(np.isclose(level["pain"], pain[level["strike"]]) for level in result["pain_levels"])
+    assert result["max_pain_strike"] == min(pain, key=pain.get)
+    assert [level["strike"] for level in result["pain_levels"]] == sorted(r["strike"] for r in rows)
+
+    frame = pd.DataFrame(_chain(seed=1)).sort_values("strike")
+    assert OptionsMLAnalyzer().calculate_max_pain(frame) == ChainAnalytics(frame.to_dict("records")).max_pain()
+    assert ChainAnalytics([]).max_pain() == {"max_pain_strike": 0, "pain_levels": []}
+
+
+def test_gex_pcr_and_walls_match_row_loops():
+    """Gamma exposure, put/call ratios and OI walls match per-row loops"""
+    rows, spot = _chain(seed=2), 22010.0
+    chain = ChainAnalytics(rows)
+    profile = {p["strike"]: p for p in chain.gex_profile(spot)}
+    for r in rows:
+        call = r["call_gamma"] * r["call_oi"] * spot * spot / 100
+        assert np.isclose(profile[r["strike"]]["call_gamma_exposure"], call)
+        assert np.isclose(profile[r["strike"]]["net_gamma_exposure"],
+                          call + r["put_gamma"] * r["put_oi"] * spot * spot / 100)
+    assert np.isclose(chain.pcr()["oi_pcr"], sum(r["put_oi"] for r in rows) / sum(r["call_oi"] for r in rows))
+
+    levels = sorted(({"strike": r["strike"], "score": (r["call_oi"] + r["put_oi"]) * (1 + r["call_gamma"] + r["put_gamma"])}
+                     for r in rows), key=lambda x: x["score"], reverse=True)
+    walls = chain.oi_walls(spot)
+    assert [w["strike"] for w in walls["resistance"]] == [l["strike"] for l in levels if l["strike"] > spot][:3]
+    assert [w["strike"] for w in walls["support"]] == [l["strike"] for l in levels if l["strike"] < spot][:3]
+
+    skew = chain.iv_skew(spot)
+    assert skew["atm_strike"] == 22000 and skew["skew"] > 0 and len(skew["call_smile"]) == 3
+
+
+def test_enhanced_analytics_reuse_one_chain():
+    """Equal chains share one cached ChainAnalytics and the analyzers agree with row sums"""
+    rows, spot = _chain(seed=3), 22000
+    analytics = EnhancedOptionsAnalytics()
+    assert get_chain_analytics(rows) is get_chain_analytics([dict(r) for r in rows])
+    result = analytics.comprehensive_analysis(rows, spot)["analytics"]
+    greeks = result["advanced_greeks"]
+    assert np.isclose(greeks["portfolio_gamma"], sum(r["call_gamma"] * r["call_oi"] + r["put_gamma"] * r["put_oi"]
+                                                     for r in rows))
+    assert greeks["gamma_wall_strength"] == max(greeks["gamma_exposure_by_strike"].values())
+    assert result["support_resistance"]["resistance_levels"] == get_chain_analytics(rows).oi_walls(spot)["resistance"]
+    flagged = {(u["strike"], u["type"]) for u in result["flow_patterns"]["unusual_activity"]}
+    assert flagged == {(r["strike"], side) for r in rows for side in ("call", "put")
+                       if r[f"{side}_volume"] / max(r[f"{side}_oi"], 1) > 2.0}
+    assert result["volatility_analytics"]["call_iv_skew_coefficient"] > 0
+
+
+def test_cache_hits_skip_building_and_aggregates_are_memoised(monkeypatch):
+    """A cached chain is not rebuilt, and repeat aggregates are served from the memo"""
+    rows, spot = _chain(seed=5), 22000
+    builds = []
+    init = ChainAnalytics.__init__
+    monkeypatch.setattr(ChainAnalytics, "__init__", lambda self, data: builds.append(1) or init(self, data))
+    EnhancedOptionsAnalytics().comprehensive_analysis(rows, spot)
+    assert len(builds) == 1
+    chain = get_chain_analytics([dict(r) for r in rows])
+    assert len(builds) == 1 and get_chain_analytics(chain) is chain
+    assert get_chain_analytics(pd.DataFrame(rows)) is get_chain_analytics(pd.DataFrame(rows)) and len(builds) == 2
+
+    assert chain.gamma_exposure(spot)["net"] is chain.gamma_exposure(spot)["net"]
+    assert chain.gamma_exposure(spot + 50)["net"] is not chain.gamma_exposure(spot)["net"]
+    assert not chain.gamma_exposure(spot)["net"].flags.writeable and not chain["call_oi"].flags.writeable
+    chain.pcr()["oi_pcr"] = -1.0
+    chain.iv_skew(spot)["call_smile"].append(0.0)
+    assert chain.pcr()["oi_pcr"] > 0 and len(chain.iv_skew(spot)["call_smile"]) == 3
+
+
+def test_large_chain_is_fast():
+    """A five thousand strike chain builds and aggregates within two seconds"""
+    rows = _chain(n=5000, seed=4)
+    start = time.perf_counter()
+    chain = ChainAnalytics(rows)
+    chain.max_pain()
+    chain.gex_profile(22000)
+    assert time.perf_counter() - start < 2
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the vectorised Black-Scholes and Monte Carlo options kernel
+"""
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from models.options_pricing import (bs_greeks, bs_price, gbm_terminal_prices, pnl_summary, probability_of_profit,
+                                    synthetic_long_option_test)
+
+
+def _scalar_call(S, K, r, sigma, T):
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * math.sqrt(T))
+    N = NormalDist()
+    return S * N.cdf(d1) - K * math.exp(-r * T) * N.cdf(d1 - sigma * math.sqrt(T))
+
+
+def test_prices_match_scalar_formula_and_parity():
+    """Vectorised prices match the scalar formula, put-call parity and the expiry edge cases"""
+    strikes = np.arange(21000, 23050, 50.0)
+    calls = bs_price(22000, strikes, 0.05, 0.18, 0.065)
+    puts = bs_price(22000, strikes, 0.05, 0.18, 0.065, is_call=False)
+    assert np.allclose(calls, [_scalar_call(22000, k, 0.065, 0.18, 0.05) for k in strikes])
+    assert np.allclose(calls - puts, 22000 - strikes * math.exp(-0.065 * 0.05))
+    assert bs_price(100, 90, 0, 0.2) == 10 and bs_price(100, 90, 0.1, 0.0, is_call=False) == 0
+    assert isinstance(bs_price(100, 100, 0.1, 0.2), float)
+
+
+def test_greeks_match_finite_differences():
+    """Analytic greeks match finite differences of the price for calls and puts"""
+    S, K, T, sig, h = 22000.0, np.array([21500.0, 22000.0, 22600.0]), 0.08, 0.2, 1.0
+    for is_call in (True, False):
+        g = bs_greeks(S, K, T, sig, 0.05, is_call)
+        price = lambda s=S, t=T, v=sig: bs_price(s, K, t, v, 0.05, is_call)
+        assert np.allclose(g["delta"], (price(S + h) - price(S - h)) / (2 * h), atol=1e-5)
+        assert np.allclose(g["gamma"], (price(S + h) - 2 * price() + price(S - h)) / h ** 2, rtol=1e-3)
+        assert np.allclose(g["vega"], (price(v=sig + 1e-4) - price(v=sig - 1e-4)) / 2e-4 / 100, rtol=1e-4)
+        assert np.allclose(g["theta"], (price(t=T - 1 / 365) - price()), rtol=2e-2)
+
+
+def test_variance_reduction_and_percentiles():
+    """Antithetic and Sobol paths cut the estimator spread versus plain sampling"""
+    plain = [gbm_terminal_prices(100, 0.3, 0.25, 2000, method="plain", seed=s).mean() for s in range(40)]
+    anti = [gbm_terminal_prices(100, 0.3, 0.25, 2000, seed=s).mean() for s in range(40)]
+    sobol = [gbm_terminal_prices(100, 0.3, 0.25, 2048, method="sobol", seed=s).mean() for s in range(40)]
+    assert np.std(anti) < 0.5 * np.std(plain) and np.std(sobol) < 0.5 * np.std(plain)
+    assert abs(np.mean(anti) - 100) < 0.1  # martingale under zero rates
+
+    values = np.random.default_rng(0).normal(size=1001)
+    ordered = sorted(values)
+    summary = pnl_summary(values)
+    assert summary["p05"] == round(ordered[50], 4) and summary["p95"] == round(ordered[950], 4)
+    assert summary["samples"] == values.tolist() and len(pnl_summary(np.zeros(5000))["samples"]) == 2000
+    assert pnl_summary([])["samples"] == []
+
+
+def test_full_chain_synthetic_test_is_interactive():
+    """The synthetic long-option test over a full chain finishes within ten seconds"""
+    strikes = np.arange(20000, 24050, 50.0)
+    premiums = bs_price(22000, strikes, 10 / 252, 0.15)
+    start = time.perf_counter()
+    results = synthetic_long_option_test(strikes, premiums, 22000, 0.15, 10, 100_000, seed=1)
+    assert time.perf_counter() - start < 10
+    assert len(results) == len(strikes) and len(results[0]["samples"]) == 2000
+    # Every strike is marked against the same scenarios, so a single-strike run is one column of the chain run
+    assert synthetic_long_option_test(strikes[40], premiums[40], 22000, 0.15, 10, 100_000, seed=1) == results[40]
+
+
+def test_probability_of_profit_vectorized():
+    """Probability of profit per strike agrees with a direct simulation"""
+    strikes = np.array([21800.0, 22000.0, 22400.0])
+    pop = probability_of_profit(strikes, 100.0, 22000, 0.15, 7)
+    assert np.all(np.diff(pop) < 0)  # further OTM calls need a bigger move
+    z = np.random.default_rng(3).standard_normal(400_000)
+    S_T = 22000 * np.exp(-0.5 * 0.15 ** 2 * 7 / 365 + 0.15 * math.sqrt(7 / 365) * z)
+    assert np.allclose(pop, [(S_T > k + 100).mean() for k in strikes], atol=3e-3)
+    put = probability_of_profit(22000.0, 100.0, 22000, 0.15, 7, is_call=False)
+    assert abs(put - (S_T < 21900).mean()) < 3e-3
+    assert probability_of_profit(22000.0, 100.0, 22000, 0.0, 7) == 0.5
+
+
+def test_recorded_scenarios_are_the_simulated_count(monkeypatch):
+    """Backtest and forward-test records store the path count after the SYNTHETIC_TEST_MAX_PATHS cap"""
+    import app as A
+
+    monkeypatch.setattr(A, "SYNTHETIC_TEST_MAX_PATHS", 1000)
+    with A.app.app_context():
+        A.db.create_all()
+        rec = A.OptionsCallRecommendation(user_key="admin", asset_key="NIFTY", expiry="30-12-2026", strike=24500.0,
+                                          call_ltp=120.0, call_iv=0.18, underlying_price=24400.0)
+        A.db.session.add(rec)
+        A.db.session.commit()
+        client = A.app.test_client()
+        with client.session_transaction() as sess:
+            sess.update(user_role="admin", admin_authenticated=True)
+        for kind in ("backtest", "forwardtest"):
+            resp = client.post(f"/api/options/call_recommendations/{rec.id}/{kind}", json={"n_scenarios": 10 ** 9})
+            assert resp.status_code == 200, resp.get_json()
+            assert A.db.session.get(A.OptionsCallBacktest, resp.get_json()["test_id"]).n_scenarios == 1000
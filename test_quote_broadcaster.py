@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test per-client SSE quote fan-out with symbol filters and coalescing
+"""
+import threading
+
+from utils.quote_broadcaster import QuoteBroadcaster
+
+
+def _delta(sym, **f):
+    return {"t": "delta", "sym": sym, "f": f}
+
+
+def test_every_client_gets_its_own_symbols():
+    """Each subscriber receives only its symbols, and unfiltered subscribers receive everything"""
+    hub = QuoteBroadcaster()
+    a = hub.subscribe({"TCS.NS"})
+    b = hub.subscribe({"INFY.NS", "TCS.NS"})
+    everyone = hub.subscribe()
+    hub.publish([_delta("TCS.NS", price=1.0), _delta("INFY.NS", price=2.0), {"t": "alert", "data": {"symbol": "INFY.NS"}}])
+    assert [i["sym"] for i in a.get(timeout=0)] == ["TCS.NS"]
+    got_b = b.get(timeout=0)
+    assert len(got_b) == 3
+    assert len(everyone.get(timeout=0)) == 3
+    assert hub.symbols() == {"TCS.NS", "INFY.NS"}
+
+
+def test_slow_consumer_is_coalesced_latest_wins():
+    """A slow subscriber gets one coalesced update per symbol carrying the latest values"""
+    hub = QuoteBroadcaster()
+    slow = hub.subscribe({"TCS.NS"})
+    for px in range(100):
+        hub.publish([_delta("TCS.NS", price=float(px), ts=px)])
+    items = slow.get(timeout=0)
+    assert len(items) == 1
+    assert items[0]["f"] == {"price": 99.0, "ts": 99}
+    assert slow.coalesced == 99
+
+
+def test_get_wakes_on_publish_and_unsubscribe_stops_delivery():
+    """A waiting get wakes on publish, and unsubscribing stops delivery"""
+    hub = QuoteBroadcaster()
+    sub = hub.subscribe()
+    threading.Timer(0.05, hub.publish, args=([_delta("X", price=1.0)],)).start()
+    assert sub.get(timeout=2)[0]["sym"] == "X"
+    hub.unsubscribe(sub)
+    hub.publish([_delta("X", price=2.0)])
+    assert sub.get(timeout=0) == []
+    assert hub.stats()["subscribers"] == 0
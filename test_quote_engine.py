@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the batched quote engine: vectorised snapshots and deltas
+"""
+import numpy as np
+import pandas as pd
+
+from utils.quote_engine import BatchQuoteEngine, _panels_from_download, compute_snapshots
+
+
+def _download_like(symbols, minutes=30, bump=0.0):
+    idx = pd.date_range("2025-01-02 09:15", periods=minutes, freq="min")
+    cols = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], symbols], names=["Price", "Ticker"])
+    data = {}
+    for j, s in enumerate(symbols):
+        base = 100.0 + j + np.arange(minutes) * 0.1
+        data[("Open", s)] = base
+        data[("High", s)] = base + 0.5
+        data[("Low", s)] = base - 0.5
+        data[("Close", s)] = base + 0.05
+        data[("Volume", s)] = np.full(minutes, 10.0)
+    df = pd.DataFrame(data, index=idx)[cols]
+    if "AAA" in symbols:
+        df.loc[df.index[-1], ("Close", "AAA")] += bump
+    return df
+
+
+def test_snapshots_vectorised():
+    """Snapshots come from the panels in one pass, tolerating halted symbols and missing volume"""
+    syms = ["AAA", "BBB", "CCC"]
+    panels = _panels_from_download(_download_like(syms), syms)
+    panels["Close"].iloc[-3:, 2] = np.nan  # CCC stopped trading early
+    panels["Volume"].iloc[:, 1] = np.nan  # BBB has no volume prints (e.g. an index)
+    snap = compute_snapshots(panels, ts_ms=1)
+    assert list(snap.index) == syms
+    assert snap.loc["AAA", "open"] == 100.0
+    assert snap.loc["AAA", "volume"] == 300 and np.isnan(snap.loc["BBB", "volume"])
+    assert np.isclose(snap.loc["CCC", "price"], 102.0 + 26 * 0.1 + 0.05)
+    assert np.isclose(snap.loc["AAA", "change"], 2.9 + 0.05)
+
+
+def test_tick_emits_snapshots_then_deltas_and_falls_back():
+    """The first tick sends snapshots, later ticks send only changed fields, and missing symbols are fetched singly"""
+    state = {"bump": 0.0}
+    batch_calls, single_calls = [], []
+
+    def batch(chunk):
+        batch_calls.append(list(chunk))
+        present = [s for s in chunk if s != "ZZZ"]
+        return _panels_from_download(_download_like(present, bump=state["bump"]), present)
+
+    def single(sym):
+        single_calls.append(sym)
+        return _panels_from_download(_download_like([sym]).xs(sym, level=1, axis=1), [sym])
+
+    eng = BatchQuoteEngine(fetch_batch=batch, fetch_single=single, batch_size=2, max_workers=2)
+    syms = ["AAA", "BBB", "CCC", "ZZZ"]
+    first = eng.tick(syms)
+    assert sorted(u["sym"] for u in first) == syms and all(u["t"] == "snapshot" for u in first)
+    assert len(batch_calls) == 2 and single_calls == ["ZZZ"]
+    assert eng.tick(syms) == []  # nothing moved
+    assert eng.snapshot("AAA")["volume"] == 300
+    state["bump"] = 1.0
+    third = eng.tick(syms)
+    assert [u["sym"] for u in third] == ["AAA"] and third[0]["t"] == "delta"
+    assert set(third[0]["f"]) == {"price", "change", "change_pct", "ts"}
+    m = eng.metrics()
+    assert m["ticks"] == 3 and "p95" in m["total_ms"]
+
+
+def test_stale_snapshots_expire_and_fetch_errors_are_counted():
+    """Symbols no longer ticked drop out after the snapshot TTL, and failed fetches add to the error count"""
+    def batch(chunk):
+        if "BAD" in chunk:
+            raise RuntimeError("provider down")
+        return _panels_from_download(_download_like(chunk), chunk)
+
+    eng = BatchQuoteEngine(fetch_batch=batch, fetch_single=lambda sym: {}, batch_size=1, max_workers=2,
+                           snapshot_ttl=60)
+    eng.tick(["AAA", "BBB", "BAD"])
+    assert eng.snapshot("AAA") and eng.snapshot("BBB") and eng.metrics()["errors"] == 1
+    eng._last.loc["BBB", "ts"] -= 120 * 1000  # BBB last quoted two minutes ago
+    eng.tick(["AAA"])
+    assert eng.snapshot("BBB") is None and eng.metrics()["snapshots"] == 1
+
+
+def test_quote_loop_rotates_and_bounds_requested_symbols(monkeypatch):
+    """Watchlists past the per-tick cap are ticked in rotating slices, and requested symbols are LRU-bounded"""
+    import app as A
+
+    monkeypatch.setattr(A, "_QUOTE_MAX_SYMBOLS", 2)
+    monkeypatch.setattr(A, "_QUOTE_CACHE_SYMBOLS", 3)
+    monkeypatch.setattr(A, "_QUOTE_CACHE", A.OrderedDict())
+    symbols, offset, seen = {"A", "B", "C", "D", "E"}, 0, []
+    for _ in range(3):
+        batch, offset = A._next_quote_batch(symbols, offset)
+        assert len(batch) == 2
+        seen.extend(batch)
+    assert set(seen) == symbols
+    assert A._next_quote_batch({"A"}, offset) == (["A"], 0)
+
+    for sym in ("A", "B", "C", "A", "D"):
+        A._quote_track(sym)
+    assert list(A._QUOTE_CACHE) == ["C", "A", "D"]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test typed score extraction and the additive rollup counters behind the dashboard metrics
+"""
+import json
+
+from utils.report_metrics import (
+    PLATFORM_KEY, ROLLUP_COLUMNS, add_to_rollups, averages, extract_scores, quality_trend, rollup_delta,
+)
+
+
+def _analysis(quality, **scores):
+    return json.dumps({
+        "composite_quality_score": quality,
+        "scores": scores,
+        "sebi_compliance_detailed": {"overall_compliance_score": 0.9},
+        "flagged_alerts": {"alerts": [{"type": "x"}, {"type": "y"}]},
+    })
+
+
+def test_extract_scores_types_and_missing_values():
+    """Scores are read as floats, with None for missing or unparsable values"""
+    s = extract_scores(_analysis(0.8, factual_accuracy=0.7, bias_score="0.2"))
+    assert s["quality"] == 0.8 and s["factual_accuracy"] == 0.7 and s["bias_score"] == 0.2
+    assert s["originality"] is None
+    assert s["sebi_compliance"] == 0.9 and s["alert_count"] == 2.0
+    assert extract_scores("not json")["quality"] is None
+    assert extract_scores(None)["alert_count"] is None
+    assert extract_scores({"composite_quality_score": 0})["quality"] is None  # falsy = unscored
+
+
+def test_rollup_deltas_match_full_recompute():
+    """Adding and removing reports through deltas matches recomputing the rollups"""
+    reports = {
+        "a": extract_scores(_analysis(0.8, factual_accuracy=0.7)),
+        "b": extract_scores(_analysis(0.6, factual_accuracy=0.5, originality=0.4)),
+        "c": extract_scores("{}"),
+    }
+    for s in reports.values():
+        s["ai_probability"], s["plagiarism_score"] = 0.1, 0.0
+    row = {c: 0 for c in ROLLUP_COLUMNS}
+    for s in reports.values():
+        for c, d in rollup_delta(None, s).items():
+            row[c] += d
+    # re-analysis of "b" then deletion of "a"
+    b2 = dict(reports["b"], quality=0.9, originality=None)
+    for c, d in rollup_delta(reports["b"], b2).items():
+        row[c] += d
+    for c, d in rollup_delta(reports["a"], None).items():
+        row[c] += d
+    assert row["report_count"] == 2 and row["scored_count"] == 1
+    assert abs(row["quality_sum"] - 0.9) < 1e-9
+    assert row["originality_n"] == 0 and row["factual_accuracy_n"] == 1
+    avg = averages(row)
+    assert abs(avg["quality"] - 0.9) < 1e-9 and abs(avg["ai_probability"] - 0.1) < 1e-9
+    assert avg["originality"] == 0.0 and avg["sebi_compliance"] == 0.9
+    assert all(v == 0 for v in rollup_delta(reports["b"], reports["b"]).values())
+
+
+def test_backfill_rollups_match_deltas():
+    """Backfilled per-analyst and platform rollups equal the sum of each report's delta"""
+    rows = [dict(extract_scores(_analysis(q)), report_id=f"r{i}", analyst=a, ai_probability=0.1, plagiarism_score=0.0)
+            for i, (a, q) in enumerate([("x", 0.5), ("y", 0.9), ("x", 0.7), ("x", 0)])]
+    rollups = {}
+    for r in rows:
+        add_to_rollups(rollups, r)
+    expected = {c: 0 for c in ROLLUP_COLUMNS}
+    for r in rows:
+        if r["analyst"] == "x":
+            for c, d in rollup_delta(None, r).items():
+                expected[c] += d
+    assert {c: rollups["x"][c] for c in ROLLUP_COLUMNS} == expected
+    assert rollups["x"]["best_report_id"] == "r2" and rollups[PLATFORM_KEY]["best_report_id"] == "r1"
+    assert rollups[PLATFORM_KEY]["report_count"] == 4
+
+
+def test_quality_trend():
+    """Recent versus earlier quality is classed as improving, declining or stable"""
+    assert quality_trend([0.9, 0.9, 0.8], [0.5, 0.5, 0.6]) == "Improving"
+    assert quality_trend([0.5, 0.5, 0.5], [0.9, 0.8, 0.9]) == "Declining"
+    assert quality_trend([0.7, 0.7, 0.7], [0.7, 0.72, 0.68]) == "Stable"
+    assert quality_trend([0.7], [0.7]) == "Insufficient Data"
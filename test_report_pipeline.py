@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test the queued background /analyze stages: status transitions, failures, retries and the status endpoint
+"""
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import app as A
+
+TEXT = "Reliance retail margins expand as store additions slow and digital commerce scales across tier two cities"
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """App context with an empty job queue, no pool threads and stubbed corpus stages"""
+    calls = {"plagiarism": 0}
+
+    def check_plagiarism(text, report_id, similarity_threshold=0.2):
+        calls["plagiarism"] += 1
+        return []
+
+    monkeypatch.setattr(A, "get_report_pipeline_pool", lambda: SimpleNamespace(notify=lambda: None))
+    monkeypatch.setattr(A, "update_report_embeddings", lambda report_id, text: None)
+    monkeypatch.setattr(A, "check_plagiarism", check_plagiarism)
+    with A.app.app_context():
+        A.db.create_all()
+        A.ReportPipelineJob.query.delete()
+        A.db.session.commit()
+        yield calls
+        A.db.session.rollback()
+
+
+def _queue_report(stages=None, tickers=(), report_type="equity"):
+    report_id = f"rp_{uuid.uuid4().hex[:12]}"
+    stages = stages or {"plagiarism": "pending", "knowledge_base": "pending"}
+    A.db.session.add(A.Report(id=report_id, analyst="Pipeline Tester", original_text=TEXT, report_type=report_type,
+                              tickers=json.dumps(list(tickers)),
+                              analysis_result=json.dumps({"pipeline": {"status": "running", "stages": stages}})))
+    A.db.session.commit()
+    A.enqueue_report_pipeline(report_id, list(tickers))
+    return report_id
+
+
+def _status(report_id):
+    client = A.app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_role"] = "admin"
+    response = client.get(f"/api/report/{report_id}/pipeline")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_stages_move_from_pending_through_running_to_done(pipeline, monkeypatch):
+    """Each stage is recorded as running before its result, and the job finishes as done"""
+    seen = []
+    update = A._update_report_pipeline
+
+    def spy(report, stage, status, **results):
+        seen.append((stage, status))
+        return update(report, stage, status, **results)
+
+    monkeypatch.setattr(A, "_update_report_pipeline", spy)
+    report_id = _queue_report()
+    assert _status(report_id)["job"]["status"] == "queued"
+
+    assert A._claim_report_pipeline_job() == report_id
+    assert A._claim_report_pipeline_job() is None
+    A._run_report_pipeline_job(report_id)
+
+    assert seen == [("plagiarism", "running"), ("plagiarism", "done"),
+                    ("knowledge_base", "running"), ("knowledge_base", "done")]
+    body = _status(report_id)
+    assert body["pipeline"]["status"] == "complete"
+    assert body["pipeline"]["stages"] == {"plagiarism": "done", "knowledge_base": "done"}
+    assert body["plagiarism_detection"]["checked"] is True
+    assert body["job"]["status"] == "done" and body["job"]["attempts"] == 1 and body["job"]["error"] is None
+
+
+def test_failed_stages_fail_the_job(pipeline, monkeypatch):
+    """A raising plagiarism check and a knowledge base write that fails are both reported"""
+    def broken_check(text, report_id, similarity_threshold=0.2):
+        raise RuntimeError("corpus unavailable")
+
+    def broken_entry(self, **kwargs):
+        raise RuntimeError("knowledge base unavailable")
+
+    monkeypatch.setattr(A, "check_plagiarism", broken_check)
+    monkeypatch.setattr(A.KnowledgeBase, "__init__", broken_entry)
+    report_id = _queue_report(tickers=["RELIANCE.NS"])
+    A._run_report_pipeline_job(A._claim_report_pipeline_job())
+
+    body = _status(report_id)
+    assert body["pipeline"]["stages"] == {"plagiarism": "failed", "knowledge_base": "failed"}
+    assert body["pipeline"]["status"] == "complete"
+    assert body["plagiarism_detection"]["status"] == "failed"
+    assert body["job"]["status"] == "failed"
+    assert body["job"]["error"] == "stages failed: plagiarism, knowledge_base"
+
+
+def test_stale_jobs_are_requeued_then_given_up(pipeline):
+    """A job whose worker died is retried without re-running finished stages, up to the attempt limit"""
+    report_id = _queue_report(stages={"plagiarism": "done", "knowledge_base": "running"})
+    assert A._claim_report_pipeline_job() == report_id
+    stale = datetime.utcnow() - timedelta(seconds=A.REPORT_PIPELINE_STALE_SECONDS + 1)
+    A.ReportPipelineJob.query.filter_by(report_id=report_id).update({"heartbeat_at": stale})
+    A.db.session.commit()
+
+    A._maintain_report_pipeline_jobs()
+    assert _status(report_id)["job"]["status"] == "queued"
+    assert A._claim_report_pipeline_job() == report_id
+    A._run_report_pipeline_job(report_id)
+    assert pipeline["plagiarism"] == 0
+    body = _status(report_id)
+    assert body["job"]["status"] == "done" and body["job"]["attempts"] == 2
+    assert body["pipeline"]["stages"] == {"plagiarism": "done", "knowledge_base": "done"}
+
+    lost_id = _queue_report()
+    assert A._claim_report_pipeline_job() == lost_id
+    A.ReportPipelineJob.query.filter_by(report_id=lost_id).update(
+        {"heartbeat_at": stale, "attempts": A.REPORT_PIPELINE_MAX_ATTEMPTS})
+    A.db.session.commit()
+    A._maintain_report_pipeline_jobs()
+    body = _status(lost_id)
+    assert body["job"]["status"] == "failed" and body["job"]["error"] == "worker lost"
+    assert body["pipeline"]["stages"] == {"plagiarism": "failed", "knowledge_base": "failed"}
+
+
+def test_long_stages_keep_the_job_alive(pipeline, monkeypatch):
+    """A stage running past the stale timeout keeps heart-beating, so the job is not requeued under it"""
+    monkeypatch.setattr(A, "REPORT_PIPELINE_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(A, "REPORT_PIPELINE_STALE_SECONDS", 0.3)
+    seen = []
+
+    def slow_check(text, report_id, similarity_threshold=0.2):
+        time.sleep(0.6)  # twice the stale timeout, with no stage transition in between
+        A._maintain_report_pipeline_jobs()
+        seen.append(A.db.session.query(A.ReportPipelineJob.status).filter_by(report_id=report_id).scalar())
+        return []
+
+    monkeypatch.setattr(A, "check_plagiarism", slow_check)
+    report_id = _queue_report()
+    A._run_report_pipeline_job(A._claim_report_pipeline_job())
+    assert seen == ["running"]
+    body = _status(report_id)
+    assert body["job"]["status"] == "done" and body["job"]["attempts"] == 1
+
+
+def test_quick_plagiarism_scans_corpus_while_index_is_empty(pipeline):
+    """Without any stored MinHash signatures the quick check falls back to the whole corpus"""
+    _queue_report()
+    A.ReportLshBand.query.delete()
+    A.ReportMinHash.query.delete()
+    A.db.session.commit()
+    assert A.quick_plagiarism_score(TEXT) == pytest.approx(1.0)
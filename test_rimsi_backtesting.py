@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test that the vectorised native RIMSI backtest engine reproduces the bar-by-bar reference
+"""
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.rimsi_backtesting import backtest_metrics, simulate_signals, strategy_signals
+
+RNG = np.random.default_rng(5)
+INDEX = pd.bdate_range("2022-01-03", periods=500)
+
+
+@pytest.fixture
+def data(ohlcv):
+    """Daily bars served by the fixture backtester"""
+    return ohlcv(INDEX, seed=5, drift=0.0003)
+
+
+def reference(prices, entries, exits, capital, commission=0.001, allocation=0.95):
+    """The former per-bar loop, kept as the oracle."""
+    cash, position, values, trades = capital, 0, [], []
+    for i in range(len(prices)):
+        price = prices[i]
+        if entries[i] and position == 0:
+            shares = int(cash * allocation / price)
+            if shares > 0:
+                position = shares
+                cash -= shares * price * (1 + commission)
+                trades.append(("BUY", i, shares, price))
+        elif exits[i] and position > 0:
+            cash += position * price * (1 - commission)
+            trades.append(("SELL", i, position, price))
+            position = 0
+        values.append(cash + position * price)
+    return np.array(values), trades
+
+
+def test_simulation_matches_reference_loop(data):
+    """Batched signal simulation matches the former per-bar loop, including unaffordable buys"""
+    close = data["Close"].to_numpy()
+    T, K = len(close), 40
+    entries = RNG.random((T, K)) < 0.05
+    exits = RNG.random((T, K)) < 0.05
+    entries[::37, :5] = exits[::37, :5] = True  # bars carrying both signals
+    capital = np.full(K, 100000.0)
+    capital[-3:] = 90.0  # some buys cannot be afforded
+    sim = simulate_signals(close, entries, exits, capital)
+    for k in range(K):
+        values, trades = reference(close, entries[:, k], exits[:, k], capital[k])
+        assert np.allclose(sim.equity[:, k], values, rtol=1e-12, atol=1e-9)
+        got = [(t["action"], t["date"], t["shares"], t["price"]) for t in sim.trades(k)]
+        assert got == trades
+
+
+def test_native_backtest_and_parameter_batch(data, rimsi_backtester):
+    """The native backtest and a parameter batch agree with the reference and with each other"""
+    close = data["Close"].to_numpy()
+    bt = rimsi_backtester(data)
+    out = asyncio.run(bt.run_strategy("sma crossover", {"initial_capital": 100000}))
+    entries, exits = strategy_signals("sma", close)
+    values, trades = reference(close, entries[:, 0], exits[:, 0], 100000)
+    assert out["engine"] == "native" and out["total_trades"] == len(trades)
+    assert np.isclose(out["final_value"], values[-1])
+    returns = pd.Series(values).pct_change().dropna()
+    assert np.isclose(out["volatility"], returns.std() * np.sqrt(252))
+    assert np.isclose(out["var_95"], returns.quantile(0.05))
+
+    grid = [{"short_window": s, "long_window": l} for s in (5, 10, 20) for l in (30, 50, 100)]
+    t0 = time.perf_counter()
+    rows = bt.run_parameter_batch("sma", {}, grid, data=data)
+    assert time.perf_counter() - t0 < 1.0
+    assert [r["params"]["long_window"] for r in rows[:3]] == [30, 50, 100]
+    assert rows[4]["params"]["short_window"] == 10
+    single = bt.run_parameter_batch("sma", {}, [{"short_window": 20, "long_window": 50}], data=data)[0]
+    assert np.isclose(single["final_value"], out["final_value"])
+
+    rsi = bt.run_parameter_batch("rsi", {}, [{"rsi_period": 14}, {"rsi_period": 7, "oversold": 25}], data=data)
+    assert all(np.isfinite(r["final_value"]) for r in rsi)
+
+
+def test_multi_asset_splits_capital(data, rimsi_backtester):
+    """A multi-asset backtest splits capital evenly and sums the per-asset results"""
+    close = data["Close"].to_numpy()
+    other = data.copy()
+    other["Close"] = close[::-1].copy()
+    bt = rimsi_backtester(data)
+    out = bt.run_multi_asset_backtest("buy and hold", {"symbols": ["A", "B"], "initial_capital": 100000},
+                                      data={"A": data, "B": other})
+    assert set(out["assets"]) == {"A", "B"} and out["total_trades"] == 4
+    sim = simulate_signals(np.c_[close, close[::-1]], *strategy_signals("hold", np.c_[close, close[::-1]]), 50000)
+    assert np.isclose(out["final_value"], sim.equity[-1].sum())
+    assert np.allclose(backtest_metrics(sim)["final_value"], [out["assets"][s]["final_value"] for s in "AB"])
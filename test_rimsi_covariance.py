@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the shared EWMA covariance kernel and the portfolio models built on it
+"""
+import time
+
+import numpy as np
+
+from rimsi_ml_models import (BlackLittermanExtension, CorrelationMatrixForecaster, PortfolioOptimizationEngine,
+                             RiskParityAllocator, align_returns, ewma_covariance)
+
+RNG = np.random.default_rng(7)
+
+
+def _returns(t, n):
+    factor = RNG.normal(0, 0.01, (t, 1))
+    return factor * RNG.uniform(0.5, 1.5, n) + RNG.normal(0.0004, 0.012, (t, n))
+
+
+def test_equal_weights_match_numpy():
+    """Without decay the kernel reproduces numpy's covariance, correlation and mean"""
+    x = _returns(120, 6)
+    est = ewma_covariance(x, decay=None)
+    assert np.allclose(est.cov, np.cov(x, rowvar=False))
+    assert np.allclose(est.corr, np.corrcoef(x, rowvar=False))
+    assert np.allclose(est.mean, x.mean(axis=0))
+    assert np.isclose(est.effective_obs, 120)
+
+
+def test_ewma_matches_pairwise_formula():
+    """Decayed correlations match the explicit weighted pairwise formula"""
+    x = _returns(80, 4)
+    lam = 0.94
+    w = np.array([lam ** k for k in range(len(x))][::-1])
+    w /= w.sum()
+    corr = ewma_covariance(x, decay=lam, demean=False).corr
+    for i in range(4):
+        for j in range(4):
+            expected = np.sum(w * x[:, i] * x[:, j]) / np.sqrt(np.sum(w * x[:, i] ** 2) * np.sum(w * x[:, j] ** 2))
+            assert np.isclose(corr[i, j], expected)
+
+
+def test_ledoit_wolf_intensity_matches_sklearn():
+    """The Ledoit-Wolf shrinkage intensity matches scikit-learn when it is installed"""
+    try:
+        from sklearn.covariance import LedoitWolf
+    except ImportError:
+        return
+    x = _returns(60, 40)
+    est = ewma_covariance(x, decay=None, shrinkage='ledoit_wolf')
+    lw = LedoitWolf().fit(x)
+    assert np.isclose(est.shrinkage, lw.shrinkage_)
+    assert np.allclose(est.cov * (59 / 60), lw.covariance_)
+    assert np.all(np.linalg.eigvalsh(est.cov) > 0)
+
+
+def test_fixed_shrinkage_and_zero_volatility():
+    """Fixed shrinkage is applied and a constant series gets zero correlation instead of NaN"""
+    x = _returns(50, 3)
+    x[:, 2] = 0.0
+    est = ewma_covariance(x, decay=0.97)
+    assert np.all(np.isfinite(est.corr)) and est.corr[2, 2] == 0.0
+    assert np.allclose(np.diag(est.corr)[:2], 1.0)
+    shrunk = ewma_covariance(x, decay=0.97, shrinkage=0.5)
+    assert shrunk.shrinkage == 0.5 and shrunk.vol[2] > 0
+    assert np.allclose(shrunk.cov[0, 1], 0.5 * est.cov[0, 1])
+
+
+def test_models_share_kernel_and_scale():
+    """A five hundred asset correlation forecast stays under a second and the allocators sum to one"""
+    x = _returns(250, 500)
+    data = {f"S{i}": list(x[:, i]) for i in range(500)}
+    symbols, matrix = align_returns(data)
+    assert symbols[0] == "S0" and matrix.shape == (250, 500)
+    t0 = time.perf_counter()
+    out = CorrelationMatrixForecaster().predict(data)
+    elapsed = time.perf_counter() - t0
+    assert "error" not in out and elapsed < 1.0
+    assert np.array(out["ewma_correlation_matrix"]).shape == (500, 500)
+    small = {k: data[k] for k in list(data)[:8]}
+    for model in (PortfolioOptimizationEngine(), BlackLittermanExtension(), RiskParityAllocator()):
+        res = model.predict(small)
+        assert "error" not in res, res
+        assert np.isclose(sum(res["allocation"].values()), 1.0)
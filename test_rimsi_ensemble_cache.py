@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test RIMSI registry prediction memoisation, concurrent ensembles and latency percentiles
+"""
+import numpy as np
+
+from rimsi_ml_models import PredictionCache, RIMSIModelRegistry, prediction_cache_key
+
+RETURNS = list(np.random.default_rng(7).normal(0, 0.01, 400))
+
+
+def test_cache_key_is_content_based():
+    """Cache keys depend on the model, the data values and the parameters"""
+    a = prediction_cache_key("tail_risk", RETURNS, {"portfolio_value": 1e6})
+    assert a == prediction_cache_key("tail_risk", list(RETURNS), {"portfolio_value": 1e6})
+    assert a != prediction_cache_key("tail_risk", RETURNS[:-1], {"portfolio_value": 1e6})
+    assert a != prediction_cache_key("tail_risk", RETURNS, {"portfolio_value": 2e6})
+    assert a != prediction_cache_key("volatility_estimator", RETURNS, {"portfolio_value": 1e6})
+
+
+def test_lru_eviction_and_stats():
+    """The prediction cache evicts the least recently used entry and counts hits and misses"""
+    cache = PredictionCache(max_entries=2, ttl=0)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "a" becomes most recent
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None and cache.get("c") == {"v": 3}
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1 and stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_ensemble_runs_members_and_reuses_results():
+    """An ensemble runs every member and serves repeat predictions from the cache"""
+    reg = RIMSIModelRegistry()
+    members = ["volatility_estimator", "momentum_persistence", "tail_risk"]
+    assert reg.create_ensemble("e", members, [])["status"] == "created"
+    first = reg.predict_ensemble("e", RETURNS)
+    assert first["num_successful_models"] == 3 and first["cache_hits"] == 0
+    second = reg.predict_ensemble("e", list(RETURNS))
+    assert second["cache_hits"] == 3
+    assert second["individual_predictions"] == first["individual_predictions"]
+    perf = reg.get_model_info("tail_risk")["performance"]
+    assert perf["predictions_made"] == 1 and perf["cache_hits"] == 1
+    for _ in range(20):
+        reg.predict("tail_risk", RETURNS, use_cache=False)
+    lat = reg.get_model_info("tail_risk")["performance"]["latency_ms"]
+    assert lat["samples"] == 21 and 0 < lat["p50"] <= lat["p95"] <= lat["p99"]
+
+
+def test_cache_hits_are_private_copies():
+    """Mutating a returned prediction does not change what the cache serves next"""
+    reg = RIMSIModelRegistry()
+    first = reg.predict("tail_risk", RETURNS)
+    first["prediction"]["tampered"] = True
+    hit = reg.predict("tail_risk", RETURNS)
+    assert hit["cached"] is True and "tampered" not in hit["prediction"]
+    hit["prediction"]["tampered"] = True
+    assert "tampered" not in reg.predict("tail_risk", RETURNS)["prediction"]
+    assert hit["timestamp"] >= first["timestamp"] and hit["execution_time"] >= 0
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test that RIMSI models give the same answers on a shared FeatureFrame as on raw prices
+"""
+import numpy as np
+
+from rimsi_ml_models import SERIES_MODELS, FeatureFrame, RIMSIModelRegistry
+
+RNG = np.random.default_rng(11)
+PRICES = list(100 * np.cumprod(1 + RNG.normal(0.0005, 0.015, 300)))
+RETURNS = list(np.diff(PRICES) / np.array(PRICES[:-1]))
+RETURN_MODELS = {"volatility_estimator", "tail_risk"}
+PRICE_MODELS = ("intraday_drift", "multi_horizon_forecaster", "realized_volatility", "regime_classifier",
+                "drawdown_probability", "volatility_compression", "momentum_persistence", "mean_reversion",
+                "breakout_probability", "anomaly_detection")
+
+
+def _close(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_close(a[k], b[k]) for k in a if k != "calculation_timestamp")
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_close(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float):
+        return abs(a - b) <= 1e-9 * max(1.0, abs(a))
+    return a == b
+
+
+def test_frame_series_match_direct_computation():
+    """FeatureFrame series match returns, log returns and rolling values computed directly"""
+    f = FeatureFrame(PRICES)
+    p = np.array(PRICES)
+    assert f.prices.flags["C_CONTIGUOUS"] and f.prices.dtype == np.float64
+    assert np.allclose(f.returns, RETURNS)
+    assert np.allclose(f.log_returns, np.diff(np.log(p)))
+    assert np.allclose(f.drawdowns, p / np.maximum.accumulate(p) - 1)
+    assert np.allclose(f.rolling_mean(5)[-1], p[-5:].mean())
+    assert np.allclose(f.rolling_std(20)[-1], np.std(RETURNS[-20:]))
+    assert np.allclose(f.momentum(10), p[10:] / p[:-10] - 1)
+    lam, v = 0.94, np.var(RETURNS[:20])
+    for r in RETURNS:
+        v = lam * v + (1 - lam) * r * r
+    assert np.isclose(f.ewma_variance[-1], v)
+    assert f.rolling_std(20) is f.rolling_std(20)  # memoized
+
+
+def test_models_agree_on_frame_and_raw_inputs():
+    """Every price model predicts the same from a FeatureFrame as from the raw list"""
+    reg = RIMSIModelRegistry()
+    frame = FeatureFrame(PRICES)
+    for name in PRICE_MODELS:
+        raw = reg.models[name].predict(PRICES)
+        assert "error" not in raw, (name, raw)
+        assert _close(raw, reg.models[name].predict(frame)), name
+    for name in RETURN_MODELS:
+        assert _close(reg.models[name].predict(RETURNS), reg.models[name].predict(frame)), name
+
+
+def test_from_returns_keeps_returns_and_suite_shares_frame():
+    """A frame built from returns keeps them exactly, and the registry reuses one frame per series"""
+    frame = FeatureFrame.from_returns(RETURNS)
+    assert np.array_equal(frame.returns, np.asarray(RETURNS))
+    assert np.allclose(frame.prices[1:] / frame.prices[:-1] - 1, RETURNS)
+    reg = RIMSIModelRegistry()
+    assert reg.feature_frame(PRICES) is reg.feature_frame(list(PRICES))
+    suite = reg.predict_suite(PRICES)
+    assert set(suite["predictions"]) == set(SERIES_MODELS)
+    ok = [n for n, r in suite["predictions"].items() if r["success"] and "error" not in r["prediction"]]
+    assert set(PRICE_MODELS) <= set(ok)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the RIMSI parameter sweep and its walk-forward report
+"""
+import numpy as np
+
+from models.rimsi_backtesting import backtest_metrics, simulate_signals, strategy_signals
+from models.rimsi_sweep import (MAX_SWEEP_COMBINATIONS, evaluate_chunk, expand_grid, run_sweep, sample_space,
+                                summarize, walk_forward_splits)
+
+RNG = np.random.default_rng(17)
+CLOSE = 100 * np.cumprod(1 + RNG.normal(0.0004, 0.017, 750))
+GRID = {"short_window": [5, 10, 20, 40], "long_window": [20, 50, 100]}
+
+
+def test_search_space():
+    """Grids drop invalid window pairs, seeded sampling is repeatable and oversized spaces are capped"""
+    combos = expand_grid(GRID)
+    assert len(combos) == 10 and all(c["short_window"] < c["long_window"] for c in combos)
+    space = {"short_window": {"low": 3, "high": 30}, "long_window": [50, 100, 200]}
+    sampled = sample_space(space, 25, seed=1)
+    assert sampled == sample_space(space, 25, seed=1)
+    assert len({tuple(sorted(p.items())) for p in sampled}) == len(sampled) <= 25
+    assert all(3 <= p["short_window"] <= 30 for p in sampled)
+    wide = {"short_window": {"low": 2, "high": 10**6}, "long_window": {"low": 10**6 + 1, "high": 10**7}}
+    assert len(sample_space(wide, 10**9, seed=2)) <= MAX_SWEEP_COMBINATIONS
+    try:
+        expand_grid({"short_window": list(range(2, 2000)), "long_window": list(range(3, 2000))})
+        assert False, "expected the grid size limit"
+    except ValueError:
+        pass
+
+
+def test_walk_forward_splits():
+    """Rolling and anchored walk-forward splits cover the expected train and test ranges"""
+    rolling = walk_forward_splits(750, 4)
+    assert [t for _, t in rolling] == [(150, 300), (300, 450), (450, 600), (600, 750)]
+    assert all(tr[1] == te[0] and tr[1] - tr[0] == 150 for tr, te in rolling)
+    anchored = walk_forward_splits(750, 3, mode="anchored", test_size=100)
+    assert [tr for tr, _ in anchored] == [(0, 450), (0, 550), (0, 650)]
+    assert walk_forward_splits(750, 0) == [((0, 750), None)]
+
+
+def test_fold_metrics_match_direct_simulation():
+    """Per-fold sweep metrics equal a direct simulation of the same parameters"""
+    params = expand_grid(GRID)
+    splits = walk_forward_splits(len(CLOSE), 3)
+    rows = evaluate_chunk("sma", CLOSE, params, splits, {})
+    entries, exits = strategy_signals("sma", CLOSE, params[3:4])
+    a, b = splits[1][1]
+    direct = backtest_metrics(simulate_signals(CLOSE[a:b], entries[a:b], exits[a:b], 100000))
+    assert np.isclose(rows[3]["test"][1]["final_value"], direct["final_value"][0])
+    assert len(rows[3]["train"]) == len(rows[3]["test"]) == 3
+
+
+def test_sweep_streams_batches_and_reports():
+    """The sweep streams result batches then a report, identically inline and in a pool"""
+    params = expand_grid(GRID)
+    splits = walk_forward_splits(len(CLOSE), 3)
+    inline = list(run_sweep("sma", CLOSE, params, splits, {}, workers=0, chunk_size=3))
+    pooled = list(run_sweep("sma", CLOSE, params, splits, {}, workers=2, chunk_size=3))
+    assert [k for k, _ in inline] == ["results"] * 4 + ["report"]
+    assert pooled[-1][0] == "report" and pooled[-2][1]["completed"] == len(params)
+    assert inline[-1][1]["best"] == pooled[-1][1]["best"]
+
+    report = inline[-1][1]
+    rows = [r for kind, p in inline if kind == "results" for r in p["rows"]]
+    best_is = max(r["score"]["in_sample"] for r in rows if r["score"]["in_sample"] is not None)
+    assert np.isclose(report["best"]["in_sample"], best_is)
+    wf = report["walk_forward"]
+    assert len(wf["folds"]) == 3 and 0 < wf["selection_consistency"] <= 1
+    for f, fold in enumerate(wf["folds"]):
+        fold_best = max(r["train"][f]["sharpe_ratio"] for r in rows if r["train"][f]["sharpe_ratio"] is not None)
+        assert np.isclose(fold["in_sample"], fold_best)
+    assert summarize([], "sharpe_ratio")["best"] is None
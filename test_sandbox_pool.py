@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the warm sandbox interpreter pool used by published model runs
+"""
+import os
+import subprocess
+import tempfile
+import time
+
+from utils.job_queue import JobCancelled
+from utils.sandbox_pool import SandboxPool
+
+MODEL = '''
+import os, sys, time
+CALLS = []
+def add(a, b):
+    print("chatter on stdout must not break the protocol")
+    return a + b
+def ask():
+    return input("Symbol?")
+def pid():
+    return os.getpid()
+def remember():
+    CALLS.append(1)
+    print("secret from the previous run", file=sys.stderr)
+    return len(CALLS)
+def boom():
+    raise ValueError("bad input")
+def slow():
+    time.sleep(30)
+'''
+
+
+def _request(d, fn, **extra):
+    req = {"artifact": os.path.join(d, "model.py"), "ext_path": os.path.join(d, "extensions_m.py"),
+           "function": fn, "args": [], "kwargs": {}, "inputs": {}, "cwd": d}
+    req.update(extra)
+    return req
+
+
+def _pool(d):
+    with open(os.path.join(d, "model.py"), "w") as f:
+        f.write(MODEL)
+    return SandboxPool(size=1, memory_mb=0, preload="json").warm()
+
+
+def test_inputs_and_extensions():
+    """Calls receive their arguments and scripted input() answers, and an extensions module overrides the model"""
+    with tempfile.TemporaryDirectory() as d:
+        pool = _pool(d)
+        try:
+            assert pool.run(_request(d, "add", args=[2, 3]), timeout=30) == {"ok": True, "result": "5"}
+            assert pool.run(_request(d, "ask", inputs={"Symbol?": "TCS"}), timeout=30)["result"] == "'TCS'"
+            with open(os.path.join(d, "extensions_m.py"), "w") as f:
+                f.write("def add(a, b):\n    return a * b\n")
+            assert pool.run(_request(d, "add", args=[2, 3]), timeout=30)["result"] == "6"
+        finally:
+            pool.shutdown()
+
+
+def test_workers_are_single_use():
+    """Every run gets a fresh interpreter, so module state and stderr never leak into the next run"""
+    with tempfile.TemporaryDirectory() as d:
+        pool = _pool(d)
+        try:
+            first = pool.run(_request(d, "pid"), timeout=30)["result"]
+            assert pool.run(_request(d, "pid"), timeout=30)["result"] != first
+            # Module state and stderr from one run never reach the next one
+            assert pool.run(_request(d, "remember"), timeout=30)["result"] == "1"
+            assert pool.run(_request(d, "remember"), timeout=30)["result"] == "1"
+            out = pool.run(_request(d, "boom"), timeout=30)
+            assert out["ok"] is False and "bad input" in out["error"]
+            assert "secret" not in out.get("stderr", "")
+            assert pool.counters["recycled"] == 5
+        finally:
+            pool.shutdown()
+
+
+def test_timeout_and_cancel_kill_worker():
+    """A run past its timeout or cancelled midway kills its worker"""
+    with tempfile.TemporaryDirectory() as d:
+        pool = _pool(d)
+        try:
+            try:
+                pool.run(_request(d, "slow"), timeout=0.5)
+                assert False, "expected TimeoutExpired"
+            except subprocess.TimeoutExpired:
+                pass
+            at = time.time() + 0.3
+            try:
+                pool.run(_request(d, "slow"), timeout=30, should_cancel=lambda: time.time() >= at)
+                assert False, "expected JobCancelled"
+            except JobCancelled:
+                pass
+            assert pool.counters["timeouts"] == 1 and pool.counters["cancelled"] == 1
+            assert pool.run(_request(d, "add", args=[1, 1]), timeout=30)["ok"]
+        finally:
+            pool.shutdown()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test the leased scheduled tasks, the scheduled chain recorder, hAi-Edge scan and ML refresh, and the
+per-owner partition for saved chains
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import app as A
+import hai_edge_engine
+import utils.model_store as model_store
+from utils.model_store import ModelStore
+from utils.option_chain_store import OptionChainStore
+
+UNDERLYING = "NSE_INDEX|Nifty 50"
+ROWS = [{"strike": 24500.0 + 50 * i, "call_ltp": 100.0, "put_ltp": 90.0, "call_oi": 1000.0, "put_oi": 800.0}
+        for i in range(-2, 3)]
+
+
+@pytest.fixture
+def tasks(monkeypatch, tmp_path):
+    """App context with an empty task table, no pool threads and temporary chain stores"""
+    shared, user = OptionChainStore(root=str(tmp_path / "shared")), OptionChainStore(root=str(tmp_path / "user"))
+    monkeypatch.setattr(A, "get_scheduled_task_pool", lambda: SimpleNamespace(notify=lambda: None))
+    monkeypatch.setattr(A, "get_option_chain_store", lambda: shared)
+    monkeypatch.setattr(A, "get_user_chain_store", lambda: user)
+    monkeypatch.setattr(A, "_scheduled_tasks_running", set())
+    with A.app.app_context():
+        A.db.create_all()
+        A.ScheduledTask.query.delete()
+        A.db.session.commit()
+        yield SimpleNamespace(shared=shared, user=user)
+        A.db.session.rollback()
+
+
+def _client(**sess_values):
+    client = A.app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(sess_values)
+    return client
+
+
+def test_only_the_lease_holder_runs_a_task(tasks, monkeypatch):
+    """A due task is claimed once, its status is shared, and other workers wait for the lease to lapse"""
+    runs = []
+    monkeypatch.setitem(A._SCHEDULED_TASK_HANDLERS, "probe", lambda config: runs.append(config) or {"n": len(runs)})
+    A.configure_scheduled_task("probe", True, interval=60, config={"x": 1})
+
+    assert A._claim_scheduled_task() == "probe"
+    assert A._claim_scheduled_task() is None  # still running here, and no longer due
+    A._run_scheduled_task("probe")
+    status = A.scheduled_task_status("probe")
+    assert runs == [{"interval": 60.0, "x": 1}] and status["running"] and status["leader"] == A._SCHEDULED_TASK_WORKER_ID
+    assert status["last_status"]["ok"] and status["last_status"]["result"] == {"n": 1}
+
+    A.ScheduledTask.query.filter_by(name="probe").update({"next_run_at": datetime.utcnow()})
+    A.db.session.commit()
+    monkeypatch.setattr(A, "_SCHEDULED_TASK_WORKER_ID", "other-host:pid1")
+    assert A._claim_scheduled_task() is None
+    A.ScheduledTask.query.filter_by(name="probe").update({"lease_until": datetime.utcnow() - timedelta(seconds=1)})
+    A.db.session.commit()
+    assert A._claim_scheduled_task() == "probe"
+    assert A.scheduled_task_status("probe")["leader"] == "other-host:pid1"
+
+    A.configure_scheduled_task("probe", False)
+    A._run_scheduled_task("probe")
+    assert len(runs) == 1 and not A.scheduled_task_status("probe")["running"]
+
+
+def test_recorder_is_configured_in_the_database(tasks, monkeypatch):
+    """Starting the recorder stores its targets; the claimed cycle writes the shared store and reports back"""
+    monkeypatch.setattr(A, "fetch_upstox_chain",
+                        lambda symbol, expiry: {"ok": True, "raw": ROWS, "underlying_price": 24500.0})
+    client = _client(user_role="admin")
+    response = client.post("/api/options/chain_recorder",
+                           json={"action": "start", "targets": [[UNDERLYING, "28-08-2025"]], "interval": 30})
+    body = response.get_json()["recorder"]
+    assert body["enabled"] and body["interval"] == 30 and body["config"]["targets"] == [[UNDERLYING, "28-08-2025"]]
+
+    A._run_scheduled_task(A._claim_scheduled_task())
+    body = client.get("/api/options/chain_recorder").get_json()["recorder"]
+    assert body["last_status"]["result"]["written"] == {f"{UNDERLYING}|28-08-2025": len(ROWS)}
+    assert body["store"]["rows"] == len(ROWS)
+
+    body = client.post("/api/options/chain_recorder", json={"action": "stop"}).get_json()["recorder"]
+    assert not body["enabled"] and not body["running"]
+
+
+def test_saved_chains_stay_out_of_the_shared_history(tasks):
+    """A user's posted chain lands in their own partition and never reaches the backtested store"""
+    client = _client(user_role="investor", investor_id="inv-1")
+    for metrics in ({"pcr": 1.0}, {"pcr": 1.1}):
+        response = client.post("/api/options/save_chain", json={
+            "assetKey": UNDERLYING, "expiry": "28-08-2025", "strategy_chain_type": "PC_CHAIN",
+            "metrics": metrics, "raw": ROWS, "underlying_price": 24500.0})
+        assert response.get_json()["strikes_saved"] == len(ROWS)
+
+    assert tasks.shared.underlyings() == []
+    saved = tasks.user.query(A.user_underlying("investor_inv-1", UNDERLYING), "28-08-2025")
+    assert len(saved) == 2 * len(ROWS) and len(tasks.user.underlyings()) == 1
+    assert client.get("/api/options/expected_move_backtest").get_json()["total_tests"] == 0
+
+
+def test_scanner_endpoint_serves_the_shared_result(tasks, monkeypatch):
+    """The first request schedules the scanner; every worker then serves the leader's last published scan"""
+    fetched = []
+    monkeypatch.setattr(A, "_options_scanner", None)
+    monkeypatch.setattr(A, "fetch_upstox_chain",
+                        lambda symbol, expiry: fetched.append(symbol) or {"ok": True, "raw": ROWS,
+                                                                         "underlying_price": 24500.0})
+    client = _client(user_role="admin")
+    body = client.get("/api/options/realtime_scanner?refresh=1&expiry=01-01-2030").get_json()["data"]
+    assert body["pending"] and body["scanned"] == 0 and fetched == []
+
+    assert A._claim_scheduled_task() == "options_scanner"
+    A._run_scheduled_task("options_scanner")
+    body = client.get("/api/options/realtime_scanner").get_json()["data"]
+    assert body["scanned"] == len(A.OPTIONS_SCANNER_UNDERLYINGS) == len(fetched)
+    assert client.get("/api/options/realtime_scanner?refresh=1").get_json()["data"] == body
+    assert len(fetched) == len(A.OPTIONS_SCANNER_UNDERLYINGS)
+
+
+def test_default_tasks_are_created_once_and_run_the_hai_edge_scan(tasks, monkeypatch):
+    """Starting the pool creates the hAi-Edge tasks, keeps an edited row, and the scan task publishes a scan"""
+    monkeypatch.setattr(A, "SCHEDULED_TASK_WORKERS", 1)
+    A._start_scheduled_task_pool()
+    status = A.scheduled_task_status("hai_edge_universe_scan")
+    assert status["enabled"] and status["interval"] == A.HAI_EDGE_SCAN_INTERVAL
+    status = A.scheduled_task_status("hai_edge_ml_refresh")
+    assert status["enabled"] and status["interval"] == A.HAI_EDGE_ML_REFRESH_INTERVAL
+    A.configure_scheduled_task("hai_edge_ml_refresh", False)
+
+    A.configure_scheduled_task("hai_edge_universe_scan", True, interval=600, config={"symbols": ["TCS.NS"]})
+    A._start_scheduled_task_pool()
+    assert A.scheduled_task_status("hai_edge_universe_scan")["interval"] == 600
+
+    scanned = []
+    snapshot = pd.DataFrame({"symbol": ["TCS.NS"], "as_of": [pd.Timestamp("2026-10-15")], "error": [None]})
+    monkeypatch.setattr(hai_edge_engine.HAiEdgeEngine, "scan_universe",
+                        lambda self, symbols=None: scanned.append(symbols) or snapshot)
+    assert A._claim_scheduled_task() == "hai_edge_universe_scan"
+    A._run_scheduled_task("hai_edge_universe_scan")
+    assert scanned == [["TCS.NS"]]
+    assert A.scheduled_task_status("hai_edge_universe_scan")["last_status"]["result"] == {
+        "scored": 1, "failed": 0, "as_of": "2026-10-15 00:00:00"}
+
+
+def test_ml_refresh_task_retrains_incrementally(tasks, monkeypatch, tmp_path, ohlcv):
+    """Each leased ML refresh run warm-starts the stored bundles on the bars added since the last run"""
+    data = ohlcv(pd.bdate_range("2022-01-03", periods=520), drift=0.0, vol=0.02)
+    bars = iter((480, 480, 490))
+    monkeypatch.setattr(hai_edge_engine.HAiEdgeEngine, "fetch_market_data",
+                        lambda self, symbols, period="2y": {s: data.iloc[:next(bars)].copy() for s in symbols})
+    monkeypatch.setattr(model_store, "_instance", ModelStore(root=str(tmp_path / "models")))
+    results = []
+    for _ in range(3):
+        A.configure_scheduled_task("hai_edge_ml_refresh", True, config={"symbols": ["X"]})
+        assert A._claim_scheduled_task() == "hai_edge_ml_refresh"
+        A._run_scheduled_task("hai_edge_ml_refresh")
+        results.append(A.scheduled_task_status("hai_edge_ml_refresh")["last_status"]["result"])
+    assert results == [{"symbols": 1, "full": 1}, {"symbols": 1, "loaded": 1}, {"symbols": 1, "warm_start": 1}]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the stable, versioned TF-IDF vocabulary used by PlagiarismDetector
+"""
+from utils.tfidf_vocab import TfidfVocabulary
+
+DOCS = [
+    "Infosys reported strong quarterly revenue growth driven by digital deals",
+    "TCS margins expanded as attrition eased and pricing held firm",
+    "HDFC Bank loan growth slowed while deposits grew faster than expected",
+    "Reliance retail and telecom segments offset weakness in refining margins",
+]
+
+
+def test_indices_are_stable_and_versions_tagged():
+    """Term indices never move as documents are added, and embeddings carry their version"""
+    v = TfidfVocabulary(min_docs_per_version=2)
+    for d in DOCS[:2]:
+        v.add_document(d)
+    before = dict(v.terms)
+    blob_v1 = v.embed(DOCS[0])
+    for d in DOCS[2:]:
+        v.add_document(d)
+    assert all(v.terms[t] == i for t, i in before.items())
+    assert TfidfVocabulary.blob_version(blob_v1) == 1
+    assert v.version >= 2
+    assert TfidfVocabulary.blob_version(v.embed(DOCS[0])) == v.version
+    assert TfidfVocabulary.blob_version(b"\x00" * 800) is None  # legacy dense blob
+
+
+def test_cosine_matches_dense_computation():
+    """Sparse cosine similarity matches a dense TF-IDF computation"""
+    v = TfidfVocabulary()
+    for d in DOCS:
+        v.add_document(d, allow_cut=False)
+    v.cut_version()
+    a, b = v.embed(DOCS[0] + " " + DOCS[1]), v.embed(DOCS[1])
+    assert abs(TfidfVocabulary.cosine(a, a) - 1.0) < 1e-5
+    sim = TfidfVocabulary.cosine(a, b)
+    assert 0.3 < sim < 1.0
+    assert TfidfVocabulary.cosine(v.embed(DOCS[2]), v.embed(DOCS[3])) < 0.2
+
+
+def test_payload_roundtrip():
+    """A vocabulary survives a payload round trip"""
+    v = TfidfVocabulary()
+    for d in DOCS:
+        v.add_document(d)
+    w = TfidfVocabulary.from_payload(v.to_payload())
+    assert w.terms == v.terms and w.version == v.version and w.n_docs == v.n_docs
+    assert w.embed(DOCS[2]) == v.embed(DOCS[2])
+
+
+def test_frozen_snapshot_from_database_rows():
+    """A frozen snapshot built from stored rows embeds like the live vocabulary and detects drift"""
+    v = TfidfVocabulary()
+    for d in DOCS:
+        v.add_document(d, allow_cut=False)
+    v.cut_version()
+    rows = [(i + 10, t, int(v.df[i])) for t, i in v.terms.items()]  # sparse ids, as a sequence leaves them
+    snap = TfidfVocabulary.frozen(rows, v.n_docs, 3)
+    again = TfidfVocabulary.from_payload(snap.to_payload())
+    assert snap.version == again.version == 3 and again.terms == snap.terms
+    blob = again.embed(DOCS[1])
+    assert TfidfVocabulary.blob_version(blob) == 3
+    _, idx, vals = TfidfVocabulary.decode(blob)
+    _, ref_idx, ref_vals = TfidfVocabulary.decode(v.embed(DOCS[1]))
+    assert (idx == ref_idx + 10).all() and abs(vals - ref_vals).max() < 1e-6
+    assert not snap.drifted(len(DOCS) + 1, len(rows))
+    assert snap.drifted(len(DOCS) + 10, len(rows))
@@ -46,6 +46,12 @@ try:
 except ImportError:
     YFINANCE_AVAILABLE = False
 
+try:
+    from utils.history_store import get_history as stored_history
+    HISTORY_STORE_AVAILABLE = True
+except ImportError:
+    HISTORY_STORE_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 class UnifiedPortfolioAgent:
@@ -117,8 +123,10 @@ class UnifiedPortfolioAgent:
         
         try:
             for symbol in symbols:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period)
+                if HISTORY_STORE_AVAILABLE:
+                    data = stored_history(symbol, period=period)
+                else:
+                    data = yf.Ticker(symbol).history(period=period)
                 
                 if not data.empty:
                     # Add additional metrics
@@ -0,0 +1,131 @@
+"""
+BM25 ranking over an inverted index of (term -> document postings).
+
+Documents are analysed once, when they are written: each field's tokens are counted (with a
+per-field weight, e.g. titles count double) and, for the snippet field, the character offset of the
+first occurrence of every term is kept next to its term frequency. A query then needs only the
+postings of its own terms - no table scan - and scores every candidate in one vectorised pass:
+
+    idf(t)   = ln(1 + (N - df + 0.5) / (df + 0.5))
+    score(d) = sum_t idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(d) / avglen))
+
+The storage of postings is up to the caller (app.py keeps them in search_posting/search_document).
+KB_FIELDS / REPORT_FIELDS say which columns are indexed and how they are weighted, so the app and the
+migration that backfills the index analyse rows the same way.
+
+Usage:
+    terms, length = analyze([(body, 1.0, True), (title, 2.0, False)])   # {term: (tf, first_offset)}
+    terms, length = analyze(row_fields(KB_FIELDS, kb_row))
+    hits = rank(postings, n_docs, avg_len, k=10)   # postings: (doc, term, tf, doc_len, offset)
+    start, end, text = snippet(body, hits[0].offset)
+"""
+from __future__ import annotations
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Common English words plus exchange suffixes (TCS.NS -> "tcs"; "ns" alone carries no signal)
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or our that the their "
+    "this to was were what when which who will with you your about into than then there these those "
+    "can could should would may might do does did not no yes ns bo".split()
+)
+MAX_TERM_LEN = 40
+# (column, weight, is_snippet_field) per indexed column; offsets point into the snippet field
+KB_FIELDS = (('content', 1.0, True), ('title', 2.0, False), ('keywords', 1.5, False), ('summary', 0.5, False))
+REPORT_FIELDS = (('original_text', 1.0, True), ('tickers', 3.0, False), ('topic', 2.0, False),
+                 ('sub_heading', 1.5, False), ('analyst', 1.0, False))
+
+
+class Hit(NamedTuple):
+    doc: object
+    score: float
+    offset: int  # char offset of the best matching term in the snippet field (-1 = none)
+    terms: Tuple[str, ...]  # query terms that matched
+
+
+def tokens(text: str) -> Iterable[Tuple[str, int]]:
+    for m in TOKEN_RE.finditer((text or "").lower()):
+        t = m.group()
+        if len(t) > 1 and len(t) <= MAX_TERM_LEN and t not in STOP_WORDS:
+            yield t, m.start()
+
+
+def query_terms(text: str) -> List[str]:
+    seen: Dict[str, None] = {}
+    for t, _ in tokens(text):
+        seen.setdefault(t)
+    return list(seen)
+
+
+def analyze(fields: Sequence[Tuple[str, float, bool]]) -> Tuple[Dict[str, Tuple[float, int]], float]:
+    """fields: (text, weight, is_snippet_field). Returns ({term: (weighted_tf, first_offset)}, length)."""
+    tf: Dict[str, float] = defaultdict(float)
+    first: Dict[str, int] = {}
+    length = 0.0
+    for text, weight, is_snippet in fields:
+        for t, pos in tokens(text):
+            tf[t] += weight
+            length += weight
+            if is_snippet and t not in first:
+                first[t] = pos
+    return {t: (v, first.get(t, -1)) for t, v in tf.items()}, length
+
+
+def row_fields(spec: Sequence[Tuple[str, float, bool]], row) -> List[Tuple[str, float, bool]]:
+    """analyze() input for an ORM object or a Core row: (text, weight, is_snippet_field) per column."""
+    return [(getattr(row, column) or "", weight, is_snippet) for column, weight, is_snippet in spec]
+
+
+def rank(postings: Iterable[Tuple[object, str, float, float, int]], n_docs: int, avg_len: float,
+         k: int = 10, k1: float = 1.2, b: float = 0.75) -> List[Hit]:
+    """Score (doc, term, tf, doc_len, offset) postings with BM25 and return the top k hits."""
+    rows = list(postings)
+    if not rows or n_docs <= 0:
+        return []
+    docs: Dict[object, int] = {}
+    doc_idx = np.fromiter((docs.setdefault(r[0], len(docs)) for r in rows), dtype=np.int64, count=len(rows))
+    terms: Dict[str, int] = {}
+    term_idx = np.fromiter((terms.setdefault(r[1], len(terms)) for r in rows), dtype=np.int64, count=len(rows))
+    tf = np.fromiter((r[2] for r in rows), dtype=float, count=len(rows))
+    dl = np.fromiter((r[3] for r in rows), dtype=float, count=len(rows))
+    df = np.bincount(term_idx, minlength=len(terms)).astype(float)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    norm = k1 * (1.0 - b + b * dl / (avg_len or 1.0))
+    contrib = idf[term_idx] * tf * (k1 + 1.0) / (tf + norm)
+    scores = np.bincount(doc_idx, weights=contrib, minlength=len(docs))
+    top = np.argsort(-scores, kind="stable")[:k]
+    doc_keys = list(docs)
+    # Per doc: offset of its highest-idf matching term that has one, plus the matched terms
+    best: Dict[int, Tuple[float, int]] = {}
+    matched: Dict[int, List[str]] = defaultdict(list)
+    wanted = set(top.tolist())
+    for i, r in enumerate(rows):
+        d = int(doc_idx[i])
+        if d not in wanted:
+            continue
+        matched[d].append(r[1])
+        w = idf[term_idx[i]]
+        if r[4] >= 0 and (d not in best or w > best[d][0]):
+            best[d] = (w, int(r[4]))
+    return [
+        Hit(doc_keys[d], float(scores[d]), best.get(d, (0.0, -1))[1], tuple(matched[d]))
+        for d in top.tolist() if scores[d] > 0
+    ]
+
+
+def snippet(text: str, offset: int, width: int = 240) -> Tuple[int, int, str]:
+    """Window of ~width chars around offset, widened to word boundaries; text[start:end] is the snippet."""
+    text = text or ""
+    if offset < 0:
+        offset = 0
+    start = max(0, offset - width // 3)
+    end = min(len(text), start + width)
+    while start > 0 and not text[start - 1].isspace() and offset - start < width // 2:
+        start -= 1
+    while end < len(text) and not text[end].isspace() and end - start < width + 40:
+        end += 1
+    return start, end, text[start:end]
@@ -0,0 +1,105 @@
+"""
+Dialect-aware INSERT ... ON CONFLICT helpers for Core writes on a session connection.
+
+PostgreSQL and SQLite use ON CONFLICT, MySQL/MariaDB use INSERT IGNORE / ON DUPLICATE KEY UPDATE.
+Other dialects fall back to UPDATE-then-INSERT, which is only race-free under a serialising
+transaction. Errors propagate so the caller's transaction (or SAVEPOINT) decides what to undo.
+
+Usage:
+    from utils.db_upsert import insert_ignore, upsert
+    insert_ignore(conn, learned, [{"report_id": rid}], ["report_id"])  # 0 when the row existed
+    upsert(conn, terms, rows, ["term"], {"df": terms.c.df + 1})
+    upsert(conn, rollup, rows, ["analyst"], lambda new: {"total": rollup.c.total + new.total})
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+
+SetClause = Union[Dict[str, Any], Callable[[Any], Dict[str, Any]]]
+
+
+def _dialect_insert(conn, table) -> Optional[Any]:
+    name = conn.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        return None
+    return insert(table)
+
+
+def _is_mysql(conn) -> bool:
+    return conn.dialect.name in ("mysql", "mariadb")
+
+
+def _run(conn, stmt, rows: List[Dict[str, Any]]) -> int:
+    # A single row runs as one statement so rowcount is exact; executemany counts vary by driver
+    result = conn.execute(stmt.values(**rows[0])) if len(rows) == 1 else conn.execute(stmt, rows)
+    return max(0, result.rowcount or 0)
+
+
+class _RowValues:
+    """Stands in for EXCLUDED/VALUES() in the generic fallback: attribute -> bound literal."""
+
+    def __init__(self, row: Dict[str, Any]):
+        self._row = row
+
+    def __getattr__(self, name: str) -> Any:
+        return sa.literal(self._row[name])
+
+
+def _where_keys(table, row: Dict[str, Any], index_elements: Sequence[str]):
+    return sa.and_(*[table.c[c] == row[c] for c in index_elements])
+
+
+def insert_ignore(conn, table, rows: Iterable[Dict[str, Any]], index_elements: Sequence[str]) -> int:
+    """Insert rows, skipping those whose key already exists; returns the rowcount reported by the driver."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    stmt = _dialect_insert(conn, table)
+    if stmt is None:
+        inserted = 0
+        for row in rows:
+            exists = conn.execute(sa.select(sa.literal(1)).select_from(table).where(_where_keys(table, row, index_elements))).first()
+            if exists is None:
+                conn.execute(table.insert().values(**row))
+                inserted += 1
+        return inserted
+    if _is_mysql(conn):
+        stmt = stmt.prefix_with("IGNORE")
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(index_elements))
+    return _run(conn, stmt, rows)
+
+
+def upsert(conn, table, rows: Iterable[Dict[str, Any]], index_elements: Sequence[str], set_: SetClause) -> int:
+    """Insert rows or, on a key conflict, apply `set_` to the existing row.
+
+    `set_` maps column names to expressions over the existing row (`table.c.df + 1`); pass a callable
+    to also reference the proposed row, e.g. `lambda new: {"n": table.c.n + new.n}`.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    stmt = _dialect_insert(conn, table)
+    if stmt is None:
+        written = 0
+        for row in rows:
+            values = set_(_RowValues(row)) if callable(set_) else set_
+            res = conn.execute(table.update().where(_where_keys(table, row, index_elements)).values(**values))
+            if not res.rowcount:
+                conn.execute(table.insert().values(**row))
+            written += 1
+        return written
+    if _is_mysql(conn):
+        values = set_(stmt.inserted) if callable(set_) else set_
+        stmt = stmt.on_duplicate_key_update(**values)
+    else:
+        values = set_(stmt.excluded) if callable(set_) else set_
+        stmt = stmt.on_conflict_do_update(index_elements=list(index_elements), set_=values)
+    return _run(conn, stmt, rows)
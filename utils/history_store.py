@@ -0,0 +1,225 @@
+"""
+Incremental OHLCV history store: keep one growing frame per symbol/interval and only fetch the tail.
+
+Callers still ask for a period ("6mo", "1y", "2y", ...). The store keeps the longest window it has
+seen for each symbol/interval in the shared tiered cache (utils.ohlcv_cache), remembers how far back
+that window reaches and when it was last topped up, and on the next request:
+    - serves a slice straight from the stored frame while it is fresher than `refresh` seconds;
+    - otherwise downloads only the bars from the last stored bar onwards (the last bar is
+      re-fetched because an intraday bar is still moving), merges + dedupes, and stores the result;
+    - falls back to a full period download only when the stored frame does not reach back far enough.
+
+Usage:
+    from utils.history_store import get_history
+    df = get_history("TCS.NS", period="2y")          # first call: full 2y download
+    df = get_history("TCS.NS", period="6mo")         # later calls: tail top-up + slice
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from utils.ohlcv_cache import TieredOHLCVCache, get_ohlcv_cache
+except ImportError:  # imported as a sibling module
+    from ohlcv_cache import TieredOHLCVCache, get_ohlcv_cache  # type: ignore
+
+try:
+    import yfinance as yf  # type: ignore
+    YF_AVAILABLE = True
+except Exception:
+    YF_AVAILABLE = False
+
+# yfinance period strings -> lookback offsets ('max' / unknown -> whole stored frame)
+PERIOD_OFFSETS: Dict[str, pd.DateOffset] = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+_PERIOD_ORDER = list(PERIOD_OFFSETS) + ["ytd", "max"]
+
+# Fetcher signature: fetch(symbol, interval, period=None, start=None) -> DataFrame
+Fetcher = Callable[..., pd.DataFrame]
+
+
+def _yfinance_fetch(symbol: str, interval: str, period: Optional[str] = None, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    if not YF_AVAILABLE:
+        return pd.DataFrame()
+    t = yf.Ticker(symbol)
+    if start is not None:
+        return t.history(start=start.strftime("%Y-%m-%d"), interval=interval)
+    return t.history(period=period or "1y", interval=interval)
+
+
+def _longer_period(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if not a:
+        return b
+    if not b:
+        return a
+    ia = _PERIOD_ORDER.index(a) if a in _PERIOD_ORDER else len(_PERIOD_ORDER)
+    ib = _PERIOD_ORDER.index(b) if b in _PERIOD_ORDER else len(_PERIOD_ORDER)
+    return a if ia >= ib else b
+
+
+def _cutoff(index: pd.DatetimeIndex, period: Optional[str]) -> Optional[pd.Timestamp]:
+    if not period or period == "max":
+        return None
+    now = pd.Timestamp.now(tz=index.tz) if index.tz is not None else pd.Timestamp.now()
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    off = PERIOD_OFFSETS.get(period)
+    return (now - off) if off is not None else None
+
+
+def merge_tail(stored: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame:
+    """Append `tail` to `stored`, later rows winning on duplicate timestamps."""
+    if stored is None or stored.empty:
+        return tail.sort_index() if tail is not None else pd.DataFrame()
+    if tail is None or tail.empty:
+        return stored
+    if stored.index.tz is not None and tail.index.tz is not None and str(tail.index.tz) != str(stored.index.tz):
+        tail = tail.tz_convert(stored.index.tz)
+    merged = pd.concat([stored, tail[tail.columns.intersection(stored.columns)] if len(stored.columns) else tail])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+class HistoryStore:
+    """Per symbol/interval history kept in the tiered cache and topped up incrementally."""
+
+    SOURCE = "history"
+
+    def __init__(self, cache: Optional[TieredOHLCVCache] = None, fetch: Optional[Fetcher] = None, refresh: int = 900):
+        self.cache = cache or get_ohlcv_cache()
+        self.fetch = fetch or _yfinance_fetch
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, list] = {}  # key -> [lock, threads using it]
+        self._meta: Dict[str, Tuple[float, Dict[str, Any]]] = {}  # key -> (sidecar mtime, meta)
+        self.counters = {"served_from_store": 0, "tail_fetches": 0, "full_fetches": 0}
+
+    # ----- metadata (covered period + last top-up), shared across workers next to the frame -----
+    def _meta_path(self, key: str) -> str:
+        return self.cache.path_for(key) + ".meta.json"
+
+    def _load_meta(self, key: str) -> Dict[str, Any]:
+        """Sidecar metadata, re-read whenever another worker has rewritten it.
+
+        A newer sidecar means another worker also stored a newer frame, so the in-process copy of
+        the frame is dropped too and the next read comes from the shared disk tier.
+        """
+        path = self._meta_path(key)
+        try:
+            mtime = os.path.getmtime(path) if self.cache.disk_enabled else 0.0
+        except OSError:
+            mtime = 0.0
+        cached = self._meta.get(key)
+        if cached is not None and (cached[0] == mtime or not self.cache.disk_enabled):
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except Exception:
+            meta = {}
+        if cached is not None:
+            self.cache.forget(key)
+        self._meta[key] = (mtime, meta)
+        return meta
+
+    def _save_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        mtime = 0.0
+        if self.cache.disk_enabled:
+            path = self._meta_path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                os.replace(tmp, path)
+                mtime = os.path.getmtime(path)
+            except Exception:
+                pass
+        self._meta[key] = (mtime, meta)
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    # ----- public API -----
+    def get_history(self, symbol: str, period: str = "1y", interval: str = "1d", refresh: Optional[int] = None) -> pd.DataFrame:
+        """Return a copy of the last `period` of bars for `symbol`, fetching only what is missing."""
+        refresh = self.refresh if refresh is None else refresh
+        key = self.cache.make_key(symbol, interval, "full", self.SOURCE)
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return self._get_history(key, symbol, period, interval, refresh)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def _get_history(self, key: str, symbol: str, period: str, interval: str, refresh: int) -> pd.DataFrame:
+        meta = self._load_meta(key)
+        stored = self.cache.get(key, ttl=0)
+        covered = meta.get("period")
+        have_window = stored is not None and not stored.empty and _longer_period(covered, period) == covered
+
+        if not have_window:
+            want = _longer_period(covered, period)
+            fresh = self.fetch(symbol, interval, period=want)
+            self._incr("full_fetches")
+            if fresh is None or fresh.empty:
+                return self._slice(stored, period)
+            stored = merge_tail(stored, fresh) if stored is not None else fresh.sort_index()
+            self.cache.set(key, stored, ttl=0)
+            self._save_meta(key, {"period": want, "topped_up": time.time()})
+        elif time.time() - float(meta.get("topped_up") or 0) > refresh:
+            last = stored.index[-1]
+            tail = self.fetch(symbol, interval, start=last)
+            self._incr("tail_fetches")
+            if tail is not None and not tail.empty:
+                stored = merge_tail(stored, tail)
+                self.cache.set(key, stored, ttl=0)
+            self._save_meta(key, {"period": covered, "topped_up": time.time()})
+        else:
+            self._incr("served_from_store")
+        return self._slice(stored, period)
+
+    @staticmethod
+    def _slice(df: Optional[pd.DataFrame], period: Optional[str]) -> pd.DataFrame:
+        if df is None or df.empty:
+            return pd.DataFrame()
+        cut = _cutoff(df.index, period) if isinstance(df.index, pd.DatetimeIndex) else None
+        out = df[df.index >= cut] if cut is not None else df
+        return out.copy()
+
+
+_instance: Optional[HistoryStore] = None
+_instance_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = HistoryStore()
+    return _instance
+
+
+def get_history(symbol: str, period: str = "1y", interval: str = "1d", refresh: Optional[int] = None) -> pd.DataFrame:
+    return get_history_store().get_history(symbol, period=period, interval=interval, refresh=refresh)
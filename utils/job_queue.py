@@ -0,0 +1,162 @@
+"""
+Bounded, priority-ordered worker pool for persisted background jobs.
+
+Jobs live in a shared table (any gunicorn worker can enqueue, poll or cancel them); each process
+runs a small pool of threads that *claim* the best queued job with an atomic status transition,
+execute it in-process and write the result back. Nothing is held in process memory beyond the
+threads themselves, so a job queued by one worker can be picked up, polled or cancelled from any
+other.
+
+Ordering is by plan-tier priority with ageing, done by the job table itself: each job stores
+`queue_rank_at = created_at - priority * aging_seconds` when it is queued, and claim() takes the
+lowest queue_rank_at (oldest created_at on ties). One priority point is worth `aging_seconds` of
+waiting, so lower tiers are delayed under load but never starved.
+
+The storage side is supplied by the caller:
+    claim()   -> job or None      atomically move the best queued job to 'running'
+    execute(job)                  run it and persist the outcome
+    maintain()                    optional periodic housekeeping (orphans, retention)
+
+Usage:
+    from utils.job_queue import JobWorkerPool, plan_priority, run_cancellable
+    pool = JobWorkerPool(claim, execute, max_workers=2)
+    pool.start(); pool.notify()          # wake an idle thread after enqueueing
+    rc, out, err = run_cancellable(cmd, timeout=60, should_cancel=lambda: False)
+"""
+from __future__ import annotations
+import os
+import subprocess
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+PLAN_PRIORITY = {"retail": 0, "pro": 10, "pro_plus": 20}
+
+
+class JobCancelled(Exception):
+    """Raised by run_cancellable when the job was cancelled while running."""
+
+
+def plan_priority(plan: Optional[str]) -> int:
+    return PLAN_PRIORITY.get((plan or "retail").lower(), 0)
+
+
+def run_cancellable(cmd: List[str], timeout: float, cwd: Optional[str] = None,
+                    should_cancel: Optional[Callable[[], bool]] = None, poll: float = 0.5) -> Tuple[int, str, str]:
+    """subprocess.run(capture_output=True, text=True) that also kills the child when cancelled."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=cwd)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            out, err = proc.communicate(timeout=poll)
+            return proc.returncode, out, err
+        except subprocess.TimeoutExpired:
+            pass
+        if time.monotonic() >= deadline:
+            proc.kill()
+            proc.communicate()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if should_cancel is not None and should_cancel():
+            proc.kill()
+            proc.communicate()
+            raise JobCancelled()
+
+
+class JobWorkerPool:
+    """`max_workers` daemon threads claiming and executing jobs until stopped."""
+
+    def __init__(self, claim: Callable[[], object], execute: Callable[[object], None],
+                 maintain: Optional[Callable[[], None]] = None, max_workers: Optional[int] = None,
+                 poll_interval: float = 5.0, maintain_interval: float = 60.0, name: str = "job-worker"):
+        self.claim = claim
+        self.execute = execute
+        self.maintain = maintain
+        self.max_workers = max_workers or int(os.getenv("JOB_WORKERS", "2"))
+        self.poll_interval = poll_interval
+        self.maintain_interval = maintain_interval
+        self.name = name
+        self._wake = threading.Condition()
+        self._pending_wakeups = 0
+        self._stop = False
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._last_maintain = 0.0
+        self.busy = 0
+        self.completed = 0
+        self.errors = 0
+
+    def start(self) -> "JobWorkerPool":
+        with self._lock:
+            if self._threads:
+                return self
+            self._stop = False
+            for i in range(self.max_workers):
+                th = threading.Thread(target=self._loop, name=f"{self.name}-{i}", daemon=True)
+                th.start()
+                self._threads.append(th)
+        return self
+
+    @property
+    def started(self) -> bool:
+        return bool(self._threads)
+
+    def notify(self) -> None:
+        with self._wake:
+            self._pending_wakeups += 1
+            self._wake.notify()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._wake:
+            self._stop = True
+            self._wake.notify_all()
+        for th in self._threads:
+            th.join(timeout)
+        with self._lock:
+            self._threads = []
+
+    def _maybe_maintain(self) -> None:
+        if self.maintain is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_maintain < self.maintain_interval:
+                return
+            self._last_maintain = now
+        try:
+            self.maintain()
+        except Exception:
+            self.errors += 1
+
+    def _loop(self) -> None:
+        while not self._stop:
+            self._maybe_maintain()
+            try:
+                job = self.claim()
+            except Exception:
+                self.errors += 1
+                job = None
+            if job is None:
+                with self._wake:
+                    if self._pending_wakeups == 0 and not self._stop:
+                        self._wake.wait(self.poll_interval)
+                    self._pending_wakeups = max(0, self._pending_wakeups - 1)
+                continue
+            with self._lock:
+                self.busy += 1
+            try:
+                self.execute(job)
+                self.completed += 1
+            except Exception:
+                self.errors += 1
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._threads),
+            "max_workers": self.max_workers,
+            "busy": self.busy,
+            "completed": self.completed,
+            "errors": self.errors,
+        }
@@ -20,6 +20,13 @@ from typing import Any, Iterable, Optional
 
 import pandas as pd
 
+try:
+    from utils.ohlcv_cache import get_ohlcv_cache
+    from utils.history_store import get_history as stored_history
+except ImportError:  # imported as a sibling module
+    from ohlcv_cache import get_ohlcv_cache  # type: ignore
+    from history_store import get_history as stored_history  # type: ignore
+
 # Optional: yfinance as the default implementation
 try:
     import yfinance as yf  # type: ignore
@@ -45,6 +52,9 @@ class Quote:
     market_cap: Optional[float]
     pe_ratio: Optional[float]
 
+def _history_span(period: Optional[str], start: Optional[str], end: Optional[str]) -> str:
+    return f"p={period}" if period else f"s={start}_e={end}"
+
 class BaseProvider:
     def get_quote(self, symbol: str) -> dict:
         raise NotImplementedError
@@ -102,16 +112,25 @@ class YFinanceProvider(BaseProvider):
 
     def get_history(self, symbol: str, period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
         if period:
-            return yf.Ticker(symbol).history(period=period)
-        return yf.Ticker(symbol).history(start=start, end=end)
+            # Rolling windows are topped up incrementally instead of re-downloaded
+            return stored_history(symbol, period=period)
+        return get_ohlcv_cache().get_or_fetch(
+            symbol, "1d", _history_span(period, start, end),
+            lambda: yf.Ticker(symbol).history(start=start, end=end),
+            source="yfinance",
+        )
 
     def download(self, symbols: Iterable[str] | str, period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
-        if period:
-            out = yf.download(symbols, period=period)
-        else:
-            out = yf.download(symbols, start=start, end=end)
-        # Ensure we always return a DataFrame
-        return out if isinstance(out, pd.DataFrame) else pd.DataFrame()
+        syms = [symbols] if isinstance(symbols, str) else list(symbols)
+
+        def _fetch() -> pd.DataFrame:
+            if period:
+                out = yf.download(symbols, period=period)
+            else:
+                out = yf.download(symbols, start=start, end=end)
+            # Ensure we always return a DataFrame
+            return out if isinstance(out, pd.DataFrame) else pd.DataFrame()
+        return get_ohlcv_cache().get_or_fetch(",".join(sorted(syms)), "1d", _history_span(period, start, end), _fetch, source="yfinance_dl")
 
 class CustomProvider(BaseProvider):
     """
@@ -215,8 +234,15 @@ class FyersProvider(BaseProvider):
             return {"price": None, "change": None, "volume": None, "market_cap": None, "pe_ratio": None}
 
     def get_history(self, symbol: str, period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
-        from datetime import datetime, timedelta
         sym = self._to_fyers_symbol(symbol)
+        return get_ohlcv_cache().get_or_fetch(
+            sym, "D", _history_span(period, start, end),
+            lambda: self._fetch_history(sym, period, start, end),
+            source="fyers",
+        )
+
+    def _fetch_history(self, sym: str, period: Optional[str], start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        from datetime import datetime, timedelta
         if period and not (start or end):
             days_map = {"1mo": 30, "3mo": 90, "6mo": 180, "1y": 365, "2y": 730, "5y": 1825}
             days = days_map.get(period, 365)
@@ -0,0 +1,99 @@
+"""
+MinHash signatures + LSH banding for near-duplicate report search.
+
+A report is reduced to word k-shingles, hashed once, and summarised by `num_perm` minimum hash
+values (one per random permutation). The fraction of equal positions between two signatures
+estimates the Jaccard similarity of their shingle sets. Signatures are cut into `bands` bands of
+`rows` values; two reports sharing any band key become candidates, so a lookup only touches the
+buckets of the query's band keys instead of every stored report.
+
+Candidate probability for Jaccard s is 1 - (1 - s**rows) ** bands. The defaults (128 perms,
+64 bands x 2 rows, 3-word shingles) give ~0.47 at s=0.1, ~0.93 at s=0.2 and ~1.0 above 0.3,
+which suits partial copy detection where only some paragraphs are lifted.
+
+Usage:
+    from utils.minhash_lsh import MinHasher
+    mh = MinHasher()
+    sig = mh.signature(text)
+    keys = mh.band_keys(sig)            # persist next to the report id
+    mh.jaccard(sig, other_sig)          # rank the candidates
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+from typing import List, Set
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def _hash32(items: Set[str]) -> np.ndarray:
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in items),
+        dtype=np.uint64,
+        count=len(items),
+    )
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = None, bands: int = None, shingle_size: int = None, seed: int = 20250901):
+        self.num_perm = num_perm or int(os.getenv("PLAG_MINHASH_PERMS", "128"))
+        self.bands = bands or int(os.getenv("PLAG_LSH_BANDS", "64"))
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = self.num_perm // self.bands
+        self.shingle_size = shingle_size or int(os.getenv("PLAG_SHINGLE_SIZE", "3"))
+        rng = np.random.default_rng(seed)
+        # (a * x + b) mod p stays below 2**64 because a, b < 2**31 and x < 2**32
+        self._a = rng.integers(1, 1 << 31, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=self.num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        sh = shingles(text, self.shingle_size)
+        if not sh:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        x = _hash32(sh)
+        out = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # Chunk the shingle axis so memory stays ~num_perm x 4096 words for long reports
+        for i in range(0, len(x), 4096):
+            chunk = x[i:i + 4096]
+            hv = ((np.outer(self._a, chunk) + self._b[:, None]) % _PRIME) & _MAX_HASH
+            np.minimum(out, hv.min(axis=1), out=out)
+        return out.astype(np.uint32)
+
+    def band_keys(self, sig: np.ndarray) -> List[str]:
+        rows = sig.reshape(self.bands, self.rows)
+        return [f"{i}:{hashlib.blake2b(rows[i].tobytes(), digest_size=8).hexdigest()}" for i in range(self.bands)]
+
+    def index_keys(self, text: str, sig: np.ndarray = None):
+        """(signature, band keys to store) for one report. Texts without shingles get no keys:
+        their all-max signatures would put every such report in the same buckets."""
+        sig = self.signature(text or "") if sig is None else sig
+        if not (text or "").strip() or bool((sig == _MAX_HASH).all()):
+            return sig, []
+        return sig, self.band_keys(sig)
+
+    @staticmethod
+    def jaccard(sig1: np.ndarray, sig2: np.ndarray) -> float:
+        if sig1.shape != sig2.shape or sig1.size == 0:
+            return 0.0
+        return float(np.count_nonzero(sig1 == sig2)) / sig1.size
+
+    @staticmethod
+    def to_bytes(sig: np.ndarray) -> bytes:
+        return np.asarray(sig, dtype=np.uint32).tobytes()
+
+    @staticmethod
+    def from_bytes(blob: bytes) -> np.ndarray:
+        return np.frombuffer(blob, dtype=np.uint32)
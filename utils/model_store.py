@@ -0,0 +1,178 @@
+"""
+Versioned on-disk store for fitted model bundles, shared by every worker on the host.
+
+Layout under MODEL_STORE_DIR (default: data/model_store):
+
+    <namespace>/<symbol>/<schema>/<train_end>.joblib
+
+`schema` identifies the feature set and library versions the bundle was fitted with (see
+schema_id), `train_end` is the last training bar as YYYYMMDD, so the newest version of a
+symbol/schema is simply the lexicographically largest file. Writes go to a temp file and are
+published with os.replace(); loaded bundles are kept in a small per-process LRU and revalidated
+against the file's mtime so a retrain in one worker is picked up by the others.
+
+Usage:
+    from utils.model_store import get_model_store, schema_id
+    store = get_model_store()
+    schema = schema_id(feature_names, extra=("rf", "svr"))
+    bundle = store.load("hai_edge", "TCS.NS", schema)       # newest version or None
+    store.save("hai_edge", "TCS.NS", schema, train_end, {"models": {...}, "scores": {...}})
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import joblib
+import pandas as pd
+
+try:
+    import sklearn
+    SKLEARN_VERSION = sklearn.__version__
+except ImportError:
+    SKLEARN_VERSION = "none"
+
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_.=-]+")
+_EXT = ".joblib"
+
+
+def _safe(part: Any) -> str:
+    return _SAFE_RE.sub("_", str(part if part not in (None, "") else "-"))
+
+
+def schema_id(features: Iterable[str], extra: Iterable[Any] = ()) -> str:
+    """Short digest of the ordered feature names, extra tags and the sklearn version."""
+    text = "|".join(map(str, features)) + "#" + "|".join(map(str, extra)) + "#" + SKLEARN_VERSION
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def version_for(train_end: Any) -> str:
+    return pd.Timestamp(train_end).strftime("%Y%m%d")
+
+
+class ModelStore:
+    """Disk-backed bundle store with a per-process LRU of loaded bundles."""
+
+    def __init__(self, root: Optional[str] = None, max_memory_entries: int = 256, keep_versions: int = 3):
+        self.root = root or os.getenv("MODEL_STORE_DIR") or os.path.join("data", "model_store")
+        self.max_memory_entries = max(0, int(max_memory_entries))
+        self.keep_versions = max(1, int(keep_versions))
+        self._lock = threading.RLock()
+        self._lru: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # path -> (mtime, bundle)
+        self._counters = {"memory_hits": 0, "disk_loads": 0, "misses": 0, "saves": 0, "errors": 0}
+
+    # ----- paths -----
+    def directory(self, namespace: str, symbol: str, schema: str) -> str:
+        return os.path.join(self.root, _safe(namespace), _safe(symbol), _safe(schema))
+
+    def versions(self, namespace: str, symbol: str, schema: str) -> List[str]:
+        """Stored train_end versions, oldest first."""
+        try:
+            names = os.listdir(self.directory(namespace, symbol, schema))
+        except OSError:
+            return []
+        return sorted(n[:-len(_EXT)] for n in names if n.endswith(_EXT))
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    # ----- public API -----
+    def load(self, namespace: str, symbol: str, schema: str, version: Optional[str] = None) -> Optional[Any]:
+        """Return the bundle for `version` (newest when None), or None when nothing is stored."""
+        if version is None:
+            found = self.versions(namespace, symbol, schema)
+            if not found:
+                self._incr("misses")
+                return None
+            version = found[-1]
+        path = os.path.join(self.directory(namespace, symbol, schema), version + _EXT)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            self._incr("misses")
+            return None
+        with self._lock:
+            item = self._lru.get(path)
+            if item is not None and item[0] == mtime:
+                self._lru.move_to_end(path)
+                self._counters["memory_hits"] += 1
+                return item[1]
+        try:
+            bundle = joblib.load(path)
+        except Exception:
+            self._incr("errors")
+            return None
+        self._incr("disk_loads")
+        self._remember(path, mtime, bundle)
+        return bundle
+
+    def save(self, namespace: str, symbol: str, schema: str, train_end: Any, bundle: Any) -> str:
+        """Publish `bundle` as the version for `train_end` and prune older versions."""
+        version = version_for(train_end)
+        folder = self.directory(namespace, symbol, schema)
+        path = os.path.join(folder, version + _EXT)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(folder, exist_ok=True)
+            joblib.dump(bundle, tmp)
+            os.replace(tmp, path)
+        except Exception:
+            self._incr("errors")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return version
+        self._incr("saves")
+        try:
+            self._remember(path, os.path.getmtime(path), bundle)
+        except OSError:
+            pass
+        for old in self.versions(namespace, symbol, schema)[:-self.keep_versions]:
+            self._forget(os.path.join(folder, old + _EXT))
+        return version
+
+    def _remember(self, path: str, mtime: float, bundle: Any) -> None:
+        if not self.max_memory_entries:
+            return
+        with self._lock:
+            self._lru[path] = (mtime, bundle)
+            self._lru.move_to_end(path)
+            while len(self._lru) > self.max_memory_entries:
+                self._lru.popitem(last=False)
+
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            self._lru.pop(path, None)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["memory_entries"] = len(self._lru)
+        out.update({"root": self.root, "pid": os.getpid()})
+        return out
+
+
+_instance: Optional[ModelStore] = None
+_instance_lock = threading.Lock()
+
+
+def get_model_store() -> ModelStore:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = ModelStore()
+    return _instance
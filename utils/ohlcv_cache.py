@@ -0,0 +1,320 @@
+"""
+Tiered OHLCV cache shared by utils.yf_cache, utils.market_data_adapter and production_api_layer.
+
+Lookup order:
+    1. In-process LRU, bounded by approximate DataFrame memory (OHLCV_CACHE_MEM_MB, default 256).
+    2. On-disk columnar store under OHLCV_CACHE_DIR (default: data/ohlcv_cache), one Parquet file
+       per source/interval/symbol/span (Feather or pickle when pyarrow is missing). Every gunicorn
+       worker on the host reads the same directory, so a history downloaded by one worker is
+       reused by the others. Writes go to a temp file and are published with os.replace().
+    3. The provider callable passed to get_or_fetch().
+
+Usage:
+    from utils.ohlcv_cache import get_ohlcv_cache
+    cache = get_ohlcv_cache()
+    df = cache.get_or_fetch("TCS.NS", "1d", "2y", lambda: yf.Ticker("TCS.NS").history(period="2y"))
+    cache.stats()  # hit/miss/eviction counters for this process + disk usage
+"""
+from __future__ import annotations
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_TTL = 900
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_.=-]+")
+
+
+def _safe(part: Any) -> str:
+    return _SAFE_RE.sub("_", str(part if part not in (None, "") else "-"))
+
+
+def _detached(df: Any) -> Any:
+    """Copy a cached frame on the way out so callers cannot mutate the shared entry."""
+    return df.copy() if isinstance(df, (pd.DataFrame, pd.Series)) else df
+
+
+def _frame_nbytes(df: Any) -> int:
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 1024
+
+
+class TieredOHLCVCache:
+    """Memory LRU -> disk columnar store -> provider, with per-process counters."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_bytes: Optional[int] = None, disk_format: Optional[str] = None):
+        self.cache_dir = cache_dir or os.getenv("OHLCV_CACHE_DIR") or os.path.join("data", "ohlcv_cache")
+        if max_memory_bytes is None:
+            max_memory_bytes = int(float(os.getenv("OHLCV_CACHE_MEM_MB", "256")) * 1024 * 1024)
+        self.max_memory_bytes = max(0, int(max_memory_bytes))
+        fmt = (disk_format or os.getenv("OHLCV_CACHE_FORMAT") or ("parquet" if PYARROW_AVAILABLE else "pickle")).lower()
+        if fmt in ("parquet", "feather") and not PYARROW_AVAILABLE:
+            fmt = "pickle"
+        self.disk_format = fmt
+        self.disk_enabled = (os.getenv("OHLCV_CACHE_DISK", "1") != "0")
+
+        self._lock = threading.RLock()
+        self._lru: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()  # key -> (expires, df, nbytes)
+        self._mem_bytes = 0
+        self._key_locks: Dict[str, list] = {}  # key -> [lock, threads using it]; only in-flight keys
+        self._disk_usage: Optional[list] = None  # [files, bytes]; seeded by one scan, then kept by writes/removes
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "disk_writes": 0,
+            "disk_errors": 0,
+            "provider_errors": 0,
+        }
+
+    # ----- keys & paths -----
+    @staticmethod
+    def make_key(symbol: str, interval: str = "1d", span: str = "", source: str = "yfinance") -> str:
+        return f"{source}|{interval}|{symbol}|{span}"
+
+    def path_for(self, key: str) -> str:
+        source, interval, symbol, span = (key.split("|", 3) + ["", "", "", ""])[:4]
+        ext = {"parquet": ".parquet", "feather": ".feather"}.get(self.disk_format, ".pkl")
+        return os.path.join(self.cache_dir, _safe(source), _safe(interval), f"{_safe(symbol)}__{_safe(span)}{ext}")
+
+    def _incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    # ----- tier 1: memory -----
+    def _mem_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._lru.get(key)
+            if item is None:
+                return None
+            expires, df, nbytes = item
+            if time.time() > expires:
+                self._lru.pop(key, None)
+                self._mem_bytes -= nbytes
+                self._counters["expired"] += 1
+                return None
+            self._lru.move_to_end(key)
+            return df
+
+    def _mem_set(self, key: str, df: Any, expires: float) -> None:
+        nbytes = _frame_nbytes(df)
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= old[2]
+            if nbytes > self.max_memory_bytes:
+                return  # larger than the whole budget; disk tier still holds it
+            self._lru[key] = (expires, df, nbytes)
+            self._mem_bytes += nbytes
+            while self._mem_bytes > self.max_memory_bytes and self._lru:
+                _, (_, _, evicted_bytes) = self._lru.popitem(last=False)
+                self._mem_bytes -= evicted_bytes
+                self._counters["evictions"] += 1
+
+    # ----- tier 2: disk -----
+    @staticmethod
+    def _file_size(path: str) -> Optional[int]:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def _track_disk(self, old: Optional[int], new: Optional[int]) -> None:
+        """Apply one file replace/remove to the running disk counters (old/new sizes, None = absent)."""
+        with self._lock:
+            if self._disk_usage is None:
+                return  # not seeded yet; the seeding scan will see the file
+            self._disk_usage[0] += (new is not None) - (old is not None)
+            self._disk_usage[1] += (new or 0) - (old or 0)
+
+    def _scan_disk(self) -> list:
+        files = 0
+        size = 0
+        if os.path.isdir(self.cache_dir):
+            for root, _, names in os.walk(self.cache_dir):
+                for n in names:
+                    if n.endswith(".tmp"):
+                        continue
+                    files += 1
+                    size += self._file_size(os.path.join(root, n)) or 0
+        return [files, size]
+
+    def _disk_get(self, key: str, ttl: int) -> Tuple[Optional[pd.DataFrame], float]:
+        if not self.disk_enabled:
+            return None, 0.0
+        path = self.path_for(key)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None, 0.0
+        if ttl and time.time() - mtime > ttl:
+            return None, 0.0
+        try:
+            if self.disk_format == "parquet":
+                df = pd.read_parquet(path)
+            elif self.disk_format == "feather":
+                df = pd.read_feather(path)
+                if "__index__" in df.columns:
+                    df = df.set_index("__index__")
+                    df.index.name = None
+            else:
+                df = pd.read_pickle(path)
+            return df, mtime
+        except Exception:
+            self._incr("disk_errors")
+            return None, 0.0
+
+    def _disk_set(self, key: str, df: pd.DataFrame) -> None:
+        if not self.disk_enabled:
+            return
+        path = self.path_for(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.disk_format == "parquet":
+                df.to_parquet(tmp)
+            elif self.disk_format == "feather":
+                out = df.copy()
+                out.index.name = "__index__"
+                out.reset_index().to_feather(tmp)
+            else:
+                pd.to_pickle(df, tmp)
+            old, new = self._file_size(path), self._file_size(tmp)
+            os.replace(tmp, path)
+            self._track_disk(old, new)
+            self._incr("disk_writes")
+        except Exception:
+            self._incr("disk_errors")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    # ----- public API -----
+    def get(self, key: str, ttl: int = DEFAULT_TTL) -> Optional[Any]:
+        df = self._mem_get(key)
+        if df is not None:
+            self._incr("memory_hits")
+            return _detached(df)
+        df, mtime = self._disk_get(key, ttl)
+        if df is not None:
+            self._incr("disk_hits")
+            self._mem_set(key, df, mtime + ttl if ttl > 0 else float("inf"))
+            return _detached(df)
+        return None
+
+    def set(self, key: str, df: Any, ttl: int = DEFAULT_TTL) -> None:
+        """Store in memory and on disk; ttl <= 0 keeps the entry until evicted or invalidated."""
+        self._mem_set(key, _detached(df), time.time() + max(1, int(ttl)) if ttl > 0 else float("inf"))
+        # Empty frames are provider hiccups more often than real answers; never persist them.
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            self._disk_set(key, df)
+
+    def get_or_fetch(
+        self,
+        symbol: str,
+        interval: str,
+        span: str,
+        fetcher: Callable[[], Any],
+        ttl: int = DEFAULT_TTL,
+        source: str = "yfinance",
+    ) -> Any:
+        key = self.make_key(symbol, interval, span, source)
+        cached = self.get(key, ttl)
+        if cached is not None:
+            return cached
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        # Only one thread per process goes to the provider for a given key
+        try:
+            with entry[0]:
+                cached = self._mem_get(key)
+                if cached is not None:
+                    self._incr("memory_hits")
+                    return _detached(cached)
+                self._incr("misses")
+                try:
+                    data = fetcher()
+                except Exception:
+                    self._incr("provider_errors")
+                    raise
+                if data is not None:
+                    self.set(key, data, ttl)
+                return data
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def forget(self, key: str) -> None:
+        """Drop the in-process copy only; the next get() re-reads the shared disk tier."""
+        with self._lock:
+            item = self._lru.pop(key, None)
+            if item is not None:
+                self._mem_bytes -= item[2]
+
+    def invalidate(self, key: str) -> None:
+        self.forget(key)
+        path = self.path_for(key)
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        self._track_disk(size, None)
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._mem_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out.update({
+                "memory_entries": len(self._lru),
+                "memory_bytes": self._mem_bytes,
+                "memory_limit_bytes": self.max_memory_bytes,
+                "inflight_keys": len(self._key_locks),
+            })
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = round((out["memory_hits"] + out["disk_hits"]) / lookups, 4) if lookups else 0.0
+        files = size = 0
+        if self.disk_enabled:
+            with self._lock:
+                if self._disk_usage is None:
+                    # One walk per process; afterwards this process's writes and removes keep the
+                    # totals current (files written by other workers show up after a restart).
+                    self._disk_usage = self._scan_disk()
+                files, size = self._disk_usage
+        out.update({"disk_dir": self.cache_dir, "disk_format": self.disk_format, "disk_files": files, "disk_bytes": size, "pid": os.getpid()})
+        return out
+
+
+_instance: Optional[TieredOHLCVCache] = None
+_instance_lock = threading.Lock()
+
+
+def get_ohlcv_cache() -> TieredOHLCVCache:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = TieredOHLCVCache()
+    return _instance
@@ -0,0 +1,432 @@
+"""
+Append-only columnar store of full option chains, one row per strike per snapshot timestamp.
+
+Layout under OPTION_CHAIN_STORE_DIR (default: data/option_chains):
+
+    <underlying>/<expiry YYYYMMDD>/<YYYYMMDD>/snap-<HHMMSSffffff>-<pid>-<n>.parquet   (intraday parts)
+    <underlying>/<expiry YYYYMMDD>/<YYYYMMDD>/day.parquet                            (compacted day)
+
+Every append publishes a new part file with os.replace(), so writers never rewrite data and readers
+never see a half-written file. Once a day is closed its parts are merged into a single day file
+(compact), so a range query over months reads one file per underlying/expiry/day and prunes
+partitions by directory name before touching any data. Pickle is used when pyarrow is missing.
+
+Usage:
+    from utils.option_chain_store import get_option_chain_store
+    store = get_option_chain_store()
+    store.append("NSE_INDEX|Nifty 50", "28-08-2025", chain["raw"], underlying_price=24500.0)
+    frame = store.query("NSE_INDEX|Nifty 50", start="2025-06-01", end="2025-08-31", strikes=[24500])
+    chain = store.chain_at("NSE_INDEX|Nifty 50", "28-08-2025", at="2025-08-20 10:15")
+
+ChainRecorder fetches a list of underlying/expiry targets through a chain fetcher
+(transform_upstox_data-shaped dicts) and appends every snapshot; the caller schedules the cycles.
+
+Only server-side fetches write the shared store. Chains posted by users go to a separate store
+(get_user_chain_store, OPTION_CHAIN_USER_STORE_DIR) partitioned per owner, which the backtest and
+history endpoints never read:
+
+    get_user_chain_store().append(user_underlying(owner, "NSE_INDEX|Nifty 50"), "28-08-2025", rows)
+"""
+from __future__ import annotations
+import itertools
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SIDE_FIELDS = ('bid', 'ask', 'ltp', 'volume', 'oi', 'iv', 'delta', 'gamma', 'theta', 'vega')
+CHAIN_COLUMNS = ['strike'] + [f'{side}_{f}' for side in ('call', 'put') for f in SIDE_FIELDS]
+STORE_COLUMNS = ['ts', 'underlying_price'] + CHAIN_COLUMNS
+DIFF_FIELDS = ('ltp', 'oi', 'iv', 'volume')
+
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_.=-]+")
+_DAY_RE = re.compile(r"^\d{8}$")
+_counter = itertools.count()
+
+
+def _safe(part: Any) -> str:
+    return _SAFE_RE.sub("_", str(part if part not in (None, "") else "-"))
+
+
+def expiry_key(expiry: Any) -> str:
+    """Sortable YYYYMMDD partition name for an expiry given as dd-mm-YYYY, YYYY-MM-DD or a date."""
+    if isinstance(expiry, (datetime, pd.Timestamp)):
+        return pd.Timestamp(expiry).strftime("%Y%m%d")
+    text = str(expiry or "").strip()
+    for fmt in ("%d-%m-%Y", "%Y-%m-%d", "%Y%m%d", "%d%b%Y", "%d-%b-%Y"):
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y%m%d")
+        except ValueError:
+            continue
+    return _safe(text)
+
+
+def user_underlying(owner: str, underlying: str) -> str:
+    """Partition name for chains saved by `owner` in the user store."""
+    return f"{owner}|{underlying}"
+
+
+def _day(value: Any) -> Optional[str]:
+    return None if value is None else pd.Timestamp(value).strftime("%Y%m%d")
+
+
+def chain_frame(rows: Iterable[Dict[str, Any]], ts: Any, underlying_price: Optional[float] = None) -> pd.DataFrame:
+    """Strike-level frame in STORE_COLUMNS order from transform_upstox_data-style rows."""
+    rows = [r for r in rows if r and r.get('strike') not in (None, '')]
+    frame = pd.DataFrame({c: pd.to_numeric(pd.Series([r.get(c) for r in rows], dtype=object), errors='coerce')
+                          for c in CHAIN_COLUMNS}).astype(float)
+    frame.insert(0, 'underlying_price', float(underlying_price) if underlying_price else np.nan)
+    frame.insert(0, 'ts', pd.Timestamp(ts))
+    return frame.sort_values('strike', kind='stable').reset_index(drop=True)
+
+
+class OptionChainStore:
+    """Partitioned, append-only chain history with day-level compaction."""
+
+    def __init__(self, root: Optional[str] = None, disk_format: Optional[str] = None):
+        self.root = root or os.getenv("OPTION_CHAIN_STORE_DIR") or os.path.join("data", "option_chains")
+        fmt = (disk_format or ("parquet" if PYARROW_AVAILABLE else "pickle")).lower()
+        self.disk_format = fmt if fmt == "pickle" or PYARROW_AVAILABLE else "pickle"
+        self.ext = ".parquet" if self.disk_format == "parquet" else ".pkl"
+        self._lock = threading.RLock()
+        self._open_day: Dict[str, str] = {}  # partition dir -> newest day appended by this process
+        self._counters = {"appends": 0, "rows": 0, "compactions": 0, "files_read": 0, "errors": 0}
+
+    # ----- paths -----
+    def partition(self, underlying: str, expiry: Any) -> str:
+        return os.path.join(self.root, _safe(underlying), expiry_key(expiry))
+
+    @staticmethod
+    def _listdir(path: str) -> List[str]:
+        try:
+            return sorted(os.listdir(path))
+        except OSError:
+            return []
+
+    def underlyings(self) -> List[str]:
+        return [n for n in self._listdir(self.root) if os.path.isdir(os.path.join(self.root, n))]
+
+    def expiries(self, underlying: str) -> List[str]:
+        folder = os.path.join(self.root, _safe(underlying))
+        return [n for n in self._listdir(folder) if os.path.isdir(os.path.join(folder, n))]
+
+    def days(self, underlying: str, expiry: Any) -> List[str]:
+        return [n for n in self._listdir(self.partition(underlying, expiry)) if _DAY_RE.match(n)]
+
+    def _incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    # ----- file io -----
+    def _write(self, frame: pd.DataFrame, path: str) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if self.disk_format == "parquet":
+                frame.to_parquet(tmp, index=False)
+            else:
+                frame.to_pickle(tmp)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _read(self, path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        self._incr("files_read")
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path, columns=list(columns) if columns else None)
+        frame = pd.read_pickle(path)
+        return frame[list(columns)] if columns else frame
+
+    def _day_files(self, folder: str) -> Tuple[Optional[str], List[str]]:
+        names = self._listdir(folder)
+        day = next((os.path.join(folder, n) for n in names if n.startswith("day.")), None)
+        parts = [os.path.join(folder, n) for n in names if n.startswith("snap-") and not n.endswith(".tmp")]
+        return day, parts
+
+    # ----- writes -----
+    def append(self, underlying: str, expiry: Any, rows: Iterable[Dict[str, Any]], ts: Any = None,
+               underlying_price: Optional[float] = None) -> int:
+        """Publish one chain snapshot taken at `ts` (default: now); returns the number of strikes stored."""
+        ts = pd.Timestamp(ts if ts is not None else datetime.now())
+        frame = chain_frame(rows, ts, underlying_price)
+        if frame.empty:
+            return 0
+        partition = self.partition(underlying, expiry)
+        day = ts.strftime("%Y%m%d")
+        folder = os.path.join(partition, day)
+        path = os.path.join(folder, f"snap-{ts:%H%M%S%f}-{os.getpid()}-{next(_counter)}{self.ext}")
+        try:
+            os.makedirs(folder, exist_ok=True)
+            self._write(frame, path)
+        except Exception as e:
+            self._incr("errors")
+            logger.warning(f"Option chain append failed for {underlying} {expiry}: {e}")
+            return 0
+        self._incr("appends")
+        self._incr("rows", len(frame))
+        with self._lock:
+            previous = self._open_day.get(partition)
+            self._open_day[partition] = max(previous or day, day)
+        if previous is None or day > previous:
+            self.compact(underlying, expiry, before=day)  # first write of a day closes the earlier ones
+        return len(frame)
+
+    def compact(self, underlying: str, expiry: Any, before: Any = None) -> int:
+        """Merge the part files of every day older than `before` (default: today) into its day file."""
+        cutoff = _day(before) or datetime.now().strftime("%Y%m%d")
+        merged = 0
+        for day in self.days(underlying, expiry):
+            if day >= cutoff:
+                continue
+            folder = os.path.join(self.partition(underlying, expiry), day)
+            day_path, parts = self._day_files(folder)
+            if not parts:
+                continue
+            try:
+                frames = [self._read(p) for p in ([day_path] if day_path else []) + parts]
+                frame = pd.concat(frames, ignore_index=True).sort_values(['ts', 'strike'], kind='stable')
+                self._write(frame.reset_index(drop=True), os.path.join(folder, "day" + self.ext))
+                if day_path and not day_path.endswith(self.ext):
+                    os.remove(day_path)
+            except Exception as e:
+                self._incr("errors")
+                logger.warning(f"Option chain compaction failed for {folder}: {e}")
+                continue
+            for p in parts:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            merged += 1
+        self._incr("compactions", merged)
+        return merged
+
+    # ----- reads -----
+    def _read_day(self, folder: str, columns: Optional[Sequence[str]]) -> List[pd.DataFrame]:
+        day_path, parts = self._day_files(folder)
+        frames = []
+        for path in ([day_path] if day_path else []) + parts:
+            try:
+                frames.append(self._read(path, columns))
+            except Exception as e:  # a part removed by a concurrent compaction is already in day.*
+                if day_path is None or path == day_path:
+                    self._incr("errors")
+                    logger.warning(f"Unreadable option chain file {path}: {e}")
+        return frames
+
+    def query(self, underlying: str, expiry: Any = None, start: Any = None, end: Any = None,
+              strikes: Optional[Iterable[float]] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows with start <= ts <= end (inclusive), across one expiry or all, sorted by ts/expiry/strike."""
+        start_ts = pd.Timestamp(start) if start is not None else None
+        end_ts = pd.Timestamp(end) if end is not None else None
+        if isinstance(end, str) and len(end.strip()) <= 10:
+            end_ts = end_ts + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)  # a date-only end covers the day
+        lo, hi = _day(start_ts), _day(end_ts)
+        wanted = None if columns is None else list(dict.fromkeys(['ts', 'strike', *columns]))
+        frames = []
+        for key in ([expiry_key(expiry)] if expiry is not None else self.expiries(underlying)):
+            folder = os.path.join(self.root, _safe(underlying), key)
+            for day in self._listdir(folder):
+                if not _DAY_RE.match(day) or (lo and day < lo) or (hi and day > hi):
+                    continue
+                for frame in self._read_day(os.path.join(folder, day), wanted):
+                    frames.append(frame.assign(expiry=key))
+        if not frames:
+            return pd.DataFrame(columns=(wanted or STORE_COLUMNS) + ['expiry'])
+        out = pd.concat(frames, ignore_index=True)
+        mask = np.ones(len(out), dtype=bool)
+        if start_ts is not None:
+            mask &= (out['ts'] >= start_ts).to_numpy()
+        if end_ts is not None:
+            mask &= (out['ts'] <= end_ts).to_numpy()
+        if strikes is not None:
+            mask &= out['strike'].isin([float(s) for s in strikes]).to_numpy()
+        return out[mask].sort_values(['ts', 'expiry', 'strike'], kind='stable').reset_index(drop=True)
+
+    def timestamps(self, underlying: str, expiry: Any, start: Any = None, end: Any = None) -> List[pd.Timestamp]:
+        frame = self.query(underlying, expiry, start, end, columns=['ts'])
+        return list(pd.DatetimeIndex(frame['ts'].unique()))
+
+    def chain_at(self, underlying: str, expiry: Any, at: Any = None) -> pd.DataFrame:
+        """The newest stored chain taken at or before `at` (default: latest), or an empty frame."""
+        at_ts = pd.Timestamp(at) if at is not None else None
+        for day in reversed(self.days(underlying, expiry)):
+            if at_ts is not None and day > at_ts.strftime("%Y%m%d"):
+                continue
+            frame = self.query(underlying, expiry, start=pd.Timestamp(day), end=at_ts if at_ts is not None and
+                               day == at_ts.strftime("%Y%m%d") else f"{day[:4]}-{day[4:6]}-{day[6:]}")
+            if not frame.empty:
+                return frame[frame['ts'] == frame['ts'].max()].reset_index(drop=True)
+        return pd.DataFrame(columns=STORE_COLUMNS + ['expiry'])
+
+    def diff(self, underlying: str, expiry: Any, before: Any, after: Any) -> pd.DataFrame:
+        """Per-strike changes in LTP / OI / IV / volume between the chains at `before` and `after`."""
+        old = self.chain_at(underlying, expiry, before)
+        new = self.chain_at(underlying, expiry, after)
+        if old.empty or new.empty:
+            return pd.DataFrame()
+        fields = [f'{side}_{f}' for side in ('call', 'put') for f in DIFF_FIELDS]
+        merged = old[['strike'] + fields].merge(new[['strike'] + fields], on='strike', how='outer',
+                                               suffixes=('_before', '_after')).sort_values('strike')
+        for f in fields:
+            merged[f'{f}_change'] = merged[f'{f}_after'] - merged[f'{f}_before']
+        merged.attrs.update(before=old['ts'].iloc[0], after=new['ts'].iloc[0])
+        return merged.reset_index(drop=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+        out.update({"root": self.root, "format": self.disk_format, "pid": os.getpid()})
+        return out
+
+
+def expected_move_backtest(store: OptionChainStore, underlying: str, start: Any, end: Any = None,
+                           expiry: Any = None) -> Dict[str, Any]:
+    """
+    Score the ATM-straddle expected move against the realised move to expiry.
+
+    For every trading day in [start, end] the day's first stored chain of the nearest later
+    expiry (or `expiry`) gives spot S0 and the ATM straddle; the realised move is |S_expiry - S0|
+    using the last underlying price recorded on or before the expiry date. Only expiries with
+    data recorded through expiry day are scored. Moves are reported in percent of S0.
+    """
+    columns = ['underlying_price', 'call_ltp', 'put_ltp']
+    history = store.query(underlying, expiry, start=start, columns=columns)
+    empty = {'accuracy': 0.0, 'total_tests': 0, 'successful_predictions': 0, 'average_error': 0.0,
+             'results_by_day': []}
+    if history.empty:
+        return empty
+    history = history.dropna(subset=['underlying_price'])
+    # Settlement proxy: last recorded spot on or before each expiry date, across all expiries
+    spots = history.groupby('ts')['underlying_price'].first().sort_index()
+
+    history['day'] = history['ts'].dt.normalize()
+    history['expiry_date'] = pd.to_datetime(history['expiry'], format="%Y%m%d", errors='coerce')
+    history = history.dropna(subset=['expiry_date'])
+    history = history[history['expiry_date'] > history['day']]
+    recorded_through = spots.index.max().normalize()
+    expiries = pd.DatetimeIndex(sorted(history['expiry_date'].unique()))
+    expiries = expiries[expiries <= recorded_through]
+    if not len(expiries):
+        return empty
+    settle_pos = spots.index.searchsorted(expiries + pd.Timedelta(days=1), side='left') - 1
+    settle = pd.Series(spots.to_numpy()[settle_pos], index=expiries)
+
+    # One opening chain per day: nearest expiry that has settled, first snapshot of the day
+    scored = history[history['expiry_date'].isin(expiries)]
+    end_ts = pd.Timestamp(end) if end is not None else None
+    if end_ts is not None:
+        scored = scored[scored['day'] <= end_ts.normalize()]
+    if scored.empty:
+        return empty
+    nearest = scored.groupby('day')['expiry_date'].transform('min')
+    scored = scored[scored['expiry_date'] == nearest]
+    scored = scored[scored['ts'] == scored.groupby('day')['ts'].transform('min')]
+    atm = (scored['strike'] - scored['underlying_price']).abs().groupby(scored['day']).idxmin()
+    opening = scored.loc[atm.to_numpy()].set_index('day')
+
+    s0 = opening['underlying_price'].to_numpy()
+    predicted = (opening['call_ltp'].fillna(0) + opening['put_ltp'].fillna(0)).to_numpy() / s0 * 100
+    actual = np.abs(settle.reindex(opening['expiry_date']).to_numpy() - s0) / s0 * 100
+    valid = predicted > 0
+    if not valid.any():
+        return empty
+    predicted, actual, days = predicted[valid], actual[valid], opening.index[valid]
+    day_accuracy = np.clip(100 - np.abs(predicted - actual) / predicted * 100, 0, 100)
+    hits = int((actual <= predicted).sum())
+    return {
+        'accuracy': round(hits / len(predicted) * 100, 2),
+        'total_tests': int(len(predicted)),
+        'successful_predictions': hits,
+        'average_error': round(float(np.abs(predicted - actual).mean()), 4),
+        'results_by_day': [
+            {'date': d.strftime('%Y-%m-%d'), 'expiry': e.strftime('%Y-%m-%d'), 'predicted_move': round(float(p), 4),
+             'actual_move': round(float(a), 4), 'accuracy': round(float(acc), 2)}
+            for d, e, p, a, acc in zip(days, opening['expiry_date'][valid], predicted, actual, day_accuracy)
+        ],
+    }
+
+
+ChainFetcher = Callable[[str, str], Dict[str, Any]]
+
+
+class ChainRecorder:
+    """Appends a snapshot of every target chain per record_once() call."""
+
+    def __init__(self, store: OptionChainStore, fetch: ChainFetcher, targets: Iterable[Tuple[str, str]],
+                 workers: int = 4):
+        self.store = store
+        self.fetch = fetch
+        self.targets = [(str(u), str(e)) for u, e in targets]
+        self.workers = max(1, int(workers))
+        self.last_run: Optional[str] = None
+        self.last_errors: Dict[str, str] = {}
+        self.snapshots = 0
+
+    def _record(self, target: Tuple[str, str], ts: pd.Timestamp) -> int:
+        underlying, expiry = target
+        chain = self.fetch(underlying, expiry) or {}
+        if not chain.get('ok', True) or not chain.get('raw'):
+            raise ValueError(chain.get('error') or 'empty chain')
+        return self.store.append(underlying, expiry, chain['raw'], ts=ts,
+                                 underlying_price=chain.get('underlying_price'))
+
+    def record_once(self) -> Dict[str, int]:
+        """Fetch every target concurrently and append them under one shared timestamp."""
+        ts = pd.Timestamp(datetime.now())
+        written: Dict[str, int] = {}
+        errors: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(self.targets)))) as pool:
+            futures = {f"{u}|{e}": pool.submit(self._record, (u, e), ts) for u, e in self.targets}
+            for key, future in futures.items():
+                try:
+                    written[key] = future.result()
+                except Exception as e:
+                    errors[key] = str(e)
+        self.snapshots += sum(1 for n in written.values() if n)
+        self.last_errors = errors
+        self.last_run = ts.isoformat()
+        return written
+
+
+_instance: Optional[OptionChainStore] = None
+_instance_lock = threading.Lock()
+
+
+_user_instance: Optional[OptionChainStore] = None
+
+
+def get_option_chain_store() -> OptionChainStore:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = OptionChainStore()
+    return _instance
+
+
+def get_user_chain_store() -> OptionChainStore:
+    global _user_instance
+    if _user_instance is None:
+        with _instance_lock:
+            if _user_instance is None:
+                _user_instance = OptionChainStore(
+                    os.getenv("OPTION_CHAIN_USER_STORE_DIR") or os.path.join("data", "option_chains_user"))
+    return _user_instance
@@ -0,0 +1,218 @@
+"""
+Shared, atomic usage counters for plan quotas.
+
+Counters are sliding windows made of fixed-size buckets: an hourly quota sums the last 60 one-minute
+buckets, a daily cap the last 24 one-hour buckets. `consume()` checks every window of a request and,
+only if all of them have room, adds the cost to each - in a single write transaction, so concurrent
+requests from different gunicorn workers can never both squeeze under the same limit.
+
+Backends:
+    SQLiteCounterStore  one WAL-mode SQLite file shared by every worker on the host (default)
+    MemoryCounterStore  per-process; for tests or when the data directory is not writable
+
+Each bucket row carries an expiry (end of the bucket + window length); expired rows are purged
+opportunistically, so old hour/day keys do not accumulate.
+
+Usage:
+    from utils.quota_store import Window, get_counter_store
+    store = get_counter_store()
+    d = store.consume([Window("h:inv1", 3600, 60, 120), Window("d:inv1", 86400, 3600, 300)])
+    d.allowed, d.usage["h:inv1"], d.denied
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+HOUR = 3600
+DAY = 86400
+
+
+class Window(NamedTuple):
+    key: str
+    seconds: int  # window length
+    bucket: int  # bucket size in seconds
+    limit: Optional[int] = None  # None = count only, never deny
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    usage: Dict[str, int]  # per key: usage after this request (or current usage when denied)
+    denied: Optional[Window] = None
+
+
+def _first_bucket(w: Window, now: float) -> int:
+    return int(now // w.bucket) - (w.seconds // w.bucket) + 1
+
+
+class CounterStore:
+    purge_interval = 60.0
+
+    def consume(self, windows: Iterable[Window], cost: int = 1, now: Optional[float] = None) -> Decision:
+        raise NotImplementedError
+
+    def usage(self, windows: Iterable[Window], now: Optional[float] = None) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def purge(self, now: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+
+class MemoryCounterStore(CounterStore):
+    def __init__(self):
+        self._buckets: Dict[str, Dict[int, list]] = defaultdict(dict)  # key -> bucket -> [count, expires]
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def _used(self, w: Window, now: float) -> int:
+        lo = _first_bucket(w, now)
+        return sum(c for b, (c, _) in self._buckets.get(w.key, {}).items() if b >= lo)
+
+    def consume(self, windows, cost=1, now=None):
+        now = time.time() if now is None else now
+        windows = list(windows)
+        with self._lock:
+            self._maybe_purge(now)
+            used = {w.key: self._used(w, now) for w in windows}
+            for w in windows:
+                if w.limit is not None and used[w.key] + cost > w.limit:
+                    return Decision(False, used, w)
+            for w in windows:
+                b = int(now // w.bucket)
+                slot = self._buckets[w.key].setdefault(b, [0, (b + 1) * w.bucket + w.seconds])
+                slot[0] += cost
+                used[w.key] += cost
+            return Decision(True, used)
+
+    def usage(self, windows, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return {w.key: self._used(w, now) for w in windows}
+
+    def _maybe_purge(self, now: float) -> None:
+        if now - self._last_purge >= self.purge_interval:
+            self._purge_locked(now)
+
+    def _purge_locked(self, now: float) -> int:
+        self._last_purge = now
+        removed = 0
+        for key in list(self._buckets):
+            buckets = self._buckets[key]
+            for b in [b for b, (_, exp) in buckets.items() if exp < now]:
+                del buckets[b]
+                removed += 1
+            if not buckets:
+                del self._buckets[key]
+        return removed
+
+    def purge(self, now=None):
+        with self._lock:
+            return self._purge_locked(time.time() if now is None else now)
+
+
+class SQLiteCounterStore(CounterStore):
+    def __init__(self, path: Optional[str] = None, timeout: float = 5.0):
+        self.path = path or os.getenv("QUOTA_DB_PATH", os.path.join("data", "quota_counters.db"))
+        self.timeout = timeout
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._local = threading.local()
+        self._purge_lock = threading.Lock()
+        self._last_purge = 0.0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS quota_counter ("
+            " key TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL, expires_at INTEGER NOT NULL,"
+            " PRIMARY KEY (key, bucket)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_quota_counter_expires ON quota_counter (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _used(conn: sqlite3.Connection, w: Window, now: float) -> int:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM quota_counter WHERE key = ? AND bucket >= ?",
+            (w.key, _first_bucket(w, now)),
+        ).fetchone()
+        return int(row[0])
+
+    def consume(self, windows, cost=1, now=None):
+        now = time.time() if now is None else now
+        windows = list(windows)
+        self._maybe_purge(now)
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front: check and increment are one atomic step across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            used = {w.key: self._used(conn, w, now) for w in windows}
+            for w in windows:
+                if w.limit is not None and used[w.key] + cost > w.limit:
+                    conn.execute("ROLLBACK")
+                    return Decision(False, used, w)
+            for w in windows:
+                b = int(now // w.bucket)
+                conn.execute(
+                    "INSERT INTO quota_counter (key, bucket, count, expires_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (key, bucket) DO UPDATE SET count = count + excluded.count",
+                    (w.key, b, cost, (b + 1) * w.bucket + w.seconds),
+                )
+                used[w.key] += cost
+            conn.execute("COMMIT")
+            return Decision(True, used)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def usage(self, windows, now=None):
+        now = time.time() if now is None else now
+        conn = self._conn()
+        return {w.key: self._used(conn, w, now) for w in windows}
+
+    def _maybe_purge(self, now: float) -> None:
+        if now - self._last_purge < self.purge_interval or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_purge = now
+            self.purge(now)
+        except sqlite3.Error:
+            pass
+        finally:
+            self._purge_lock.release()
+
+    def purge(self, now=None):
+        now = time.time() if now is None else now
+        return self._conn().execute("DELETE FROM quota_counter WHERE expires_at < ?", (int(now),)).rowcount
+
+
+_instance: Optional[CounterStore] = None
+_instance_lock = threading.Lock()
+
+
+def get_counter_store() -> CounterStore:
+    """QUOTA_BACKEND=sqlite (default, shared across workers) or memory."""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                if os.getenv("QUOTA_BACKEND", "sqlite").lower() == "memory":
+                    _instance = MemoryCounterStore()
+                else:
+                    try:
+                        _instance = SQLiteCounterStore()
+                    except Exception as e:
+                        print(f"Warning: SQLite quota store unavailable, using per-process counters: {e}")
+                        _instance = MemoryCounterStore()
+    return _instance
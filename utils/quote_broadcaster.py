@@ -0,0 +1,159 @@
+"""
+Per-client pub/sub fan-out for the SSE quote stream.
+
+The quote loop publishes one batch of updates per tick; every connected client owns a Subscription
+with its own bounded buffer and symbol filter, so each update reaches every interested client and
+the producer never blocks on a slow one.
+
+Slow consumers get latest-value-wins delivery: pending snapshot/delta updates are coalesced per
+symbol (later fields overwrite earlier ones) so a client that falls behind receives one merged
+update per symbol instead of a backlog. Alerts are not coalesced but live in a bounded ring.
+
+Usage:
+    from utils.quote_broadcaster import get_quote_broadcaster
+    hub = get_quote_broadcaster()
+    sub = hub.subscribe({"TCS.NS", "INFY.NS"})        # None = all symbols
+    hub.publish([{"t": "delta", "sym": "TCS.NS", "f": {"price": 1.0}}])
+    items = sub.get(timeout=15)                        # [] on timeout -> send keepalive
+    hub.unsubscribe(sub)
+"""
+from __future__ import annotations
+import itertools
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set
+
+
+def _item_symbol(item: dict) -> Optional[str]:
+    if item.get("t") == "alert":
+        return (item.get("data") or {}).get("symbol")
+    return item.get("sym")
+
+
+class Subscription:
+    """One client's bounded, coalescing buffer."""
+
+    def __init__(self, sid: int, symbols: Optional[Iterable[str]] = None, max_symbols: int = 500, max_alerts: int = 100):
+        self.id = sid
+        self.symbols: Optional[Set[str]] = set(symbols) if symbols else None
+        self.max_symbols = max_symbols
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()  # sym -> coalesced update
+        self._alerts: deque = deque(maxlen=max_alerts)
+        self._cond = threading.Condition()
+        self.closed = False
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def wants(self, sym: Optional[str]) -> bool:
+        return self.symbols is None or (sym is not None and sym in self.symbols)
+
+    def set_symbols(self, symbols: Optional[Iterable[str]]) -> None:
+        with self._cond:
+            self.symbols = set(symbols) if symbols else None
+
+    def offer(self, items: List[dict]) -> None:
+        with self._cond:
+            for item in items:
+                if item.get("t") == "alert":
+                    if len(self._alerts) == self._alerts.maxlen:
+                        self.dropped += 1
+                    self._alerts.append(item)
+                    continue
+                sym = item.get("sym")
+                prev = self._pending.get(sym)
+                if prev is not None:
+                    # Latest value wins; a pending snapshot stays a snapshot with newer fields applied
+                    merged = dict(prev.get("f") or {})
+                    merged.update(item.get("f") or {})
+                    self._pending[sym] = {"t": "snapshot" if prev.get("t") == "snapshot" else item.get("t"), "sym": sym, "f": merged}
+                    self.coalesced += 1
+                    continue
+                if len(self._pending) >= self.max_symbols:
+                    self._pending.popitem(last=False)
+                    self.dropped += 1
+                self._pending[sym] = item
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> List[dict]:
+        """Drain everything pending, waiting up to `timeout` seconds for the first item."""
+        with self._cond:
+            if not self._pending and not self._alerts and not self.closed:
+                self._cond.wait(timeout)
+            out = list(self._pending.values()) + list(self._alerts)
+            self._pending.clear()
+            self._alerts.clear()
+            self.delivered += len(out)
+            return out
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class QuoteBroadcaster:
+    """Fan each published batch out to every subscription whose filter matches."""
+
+    def __init__(self, max_symbols: int = 500):
+        self.max_symbols = max_symbols
+        self._subs: Dict[int, Subscription] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None) -> Subscription:
+        sub = Subscription(next(self._ids), symbols, max_symbols=self.max_symbols)
+        with self._lock:
+            self._subs[sub.id] = sub
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.close()
+        with self._lock:
+            self._subs.pop(sub.id, None)
+
+    def publish(self, items: List[dict]) -> None:
+        if not items:
+            return
+        with self._lock:
+            subs = list(self._subs.values())
+            self.published += len(items)
+        for sub in subs:
+            mine = [it for it in items if sub.wants(_item_symbol(it))]
+            if mine:
+                sub.offer(mine)
+
+    def symbols(self) -> Set[str]:
+        """Union of all explicit subscription filters (what the quote loop must keep fetching)."""
+        with self._lock:
+            subs = list(self._subs.values())
+        out: Set[str] = set()
+        for s in subs:
+            if s.symbols:
+                out |= s.symbols
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._subs.values())
+        return {
+            "subscribers": len(subs),
+            "published": self.published,
+            "delivered": sum(s.delivered for s in subs),
+            "coalesced": sum(s.coalesced for s in subs),
+            "dropped": sum(s.dropped for s in subs),
+        }
+
+
+_instance: Optional[QuoteBroadcaster] = None
+_instance_lock = threading.Lock()
+
+
+def get_quote_broadcaster() -> QuoteBroadcaster:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = QuoteBroadcaster()
+    return _instance
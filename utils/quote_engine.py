@@ -0,0 +1,279 @@
+"""
+Batched multi-symbol quote engine for the SSE quote loop.
+
+One tick:
+    1. fetch 1-minute intraday bars for every subscribed symbol with a single batched
+       yf.download per chunk (QUOTE_BATCH_SIZE symbols), falling back to a bounded thread pool of
+       per-symbol Ticker.history calls for anything the batch did not return;
+    2. reduce the bars to snapshots for the whole batch at once (open/high/low/last/volume/change)
+       using column-wise pandas/numpy reductions over a time x symbol panel;
+    3. diff the new snapshot table against the previous one to produce snapshot/delta updates.
+
+Snapshots of symbols that have not been quoted for QUOTE_SNAPSHOT_TTL seconds (default 900) are
+dropped, so the previous-snapshot table only holds symbols that are still being ticked.
+
+Per-tick latency (fetch, compute, total) is kept in a bounded ring and summarised by metrics().
+
+Usage:
+    from utils.quote_engine import get_quote_engine
+    engine = get_quote_engine()
+    updates = engine.tick(["TCS.NS", "INFY.NS"])   # [{'t': 'snapshot'|'delta', 'sym': ..., 'f': {...}}]
+    engine.metrics()
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import yfinance as yf  # type: ignore
+    YF_AVAILABLE = True
+except Exception:
+    YF_AVAILABLE = False
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+SNAPSHOT_COLUMNS = ("price", "open", "high", "low", "volume", "change", "change_pct")
+
+# fetch_batch(symbols) -> {field: DataFrame(index=time, columns=symbols)}
+BatchFetcher = Callable[[List[str]], Dict[str, pd.DataFrame]]
+
+
+def _panels_from_download(raw: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """Normalise yf.download output (flat or MultiIndex, either level order) to field panels."""
+    if raw is None or raw.empty:
+        return {}
+    panels: Dict[str, pd.DataFrame] = {}
+    if isinstance(raw.columns, pd.MultiIndex):
+        lvl0 = set(raw.columns.get_level_values(0))
+        field_level = 0 if lvl0 & set(FIELDS) else 1
+        for f in FIELDS:
+            try:
+                panels[f] = raw.xs(f, level=field_level, axis=1)
+            except KeyError:
+                continue
+    elif len(symbols) == 1:
+        for f in FIELDS:
+            if f in raw.columns:
+                panels[f] = raw[[f]].set_axis([symbols[0]], axis=1)
+    return panels
+
+
+def _yfinance_batch(symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    if not YF_AVAILABLE or not symbols:
+        return {}
+    raw = yf.download(symbols, period="1d", interval="1m", group_by="column", threads=True, progress=False)
+    return _panels_from_download(raw, symbols)
+
+
+def _yfinance_single(symbol: str) -> Dict[str, pd.DataFrame]:
+    if not YF_AVAILABLE:
+        return {}
+    hist = yf.Ticker(symbol).history(period="1d", interval="1m")
+    return _panels_from_download(hist, [symbol])
+
+
+def compute_snapshots(panels: Dict[str, pd.DataFrame], ts_ms: Optional[int] = None) -> pd.DataFrame:
+    """Reduce time x symbol panels to one snapshot row per symbol (vectorised across symbols)."""
+    if not panels or "Close" not in panels:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    close = panels["Close"]
+    open_ = panels.get("Open", close)
+    valid = close.notna()
+    has_bars = valid.any(axis=0)
+    close = close.loc[:, has_bars]
+    if close.empty:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    cols = close.columns
+    # First/last valid value per column without a Python loop over symbols
+    c = close.to_numpy(dtype=float)
+    o = open_.reindex(columns=cols).to_numpy(dtype=float)
+    n = c.shape[0]
+    mask = ~np.isnan(c)
+    first_idx = mask.argmax(axis=0)
+    last_idx = n - 1 - mask[::-1].argmax(axis=0)
+    ar = np.arange(c.shape[1])
+    price = c[last_idx, ar]
+    open_px = o[first_idx, ar]
+    open_px = np.where(np.isnan(open_px), c[first_idx, ar], open_px)
+    high = panels.get("High", close).reindex(columns=cols).max(axis=0).to_numpy(dtype=float)
+    low = panels.get("Low", close).reindex(columns=cols).min(axis=0).to_numpy(dtype=float)
+    vol_panel = panels.get("Volume")
+    # min_count=1: a symbol with no volume prints stays NaN (unknown) instead of reading as 0
+    volume = (vol_panel.reindex(columns=cols).sum(axis=0, min_count=1).to_numpy(dtype=float) if vol_panel is not None
+              else np.full(len(cols), np.nan))
+    change = price - open_px
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = np.where(open_px != 0, change / open_px * 100.0, 0.0)
+    snap = pd.DataFrame(
+        {"price": price, "open": open_px, "high": high, "low": low, "volume": volume, "change": change, "change_pct": change_pct},
+        index=pd.Index(cols, name="symbol"),
+    )
+    snap["ts"] = int(ts_ms if ts_ms is not None else time.time() * 1000)
+    return snap
+
+
+def _wire(field: str, value) -> Any:
+    """JSON value for one snapshot field: volume/ts as int (volume None when unknown), prices as float."""
+    if field == "volume":
+        return None if pd.isna(value) else int(value)
+    return int(value) if field == "ts" else float(value)
+
+
+def compute_updates(prev: Optional[pd.DataFrame], snap: pd.DataFrame) -> List[dict]:
+    """Snapshot rows for new symbols, changed-field deltas for known ones (ts alone is not a change)."""
+    updates: List[dict] = []
+    if snap.empty:
+        return updates
+    known = snap.index.intersection(prev.index) if prev is not None and not prev.empty else pd.Index([])
+    fresh = snap.index.difference(known)
+    for sym, row in snap.loc[fresh].iterrows():
+        f = {k: _wire(k, v) for k, v in row.items()}
+        f["symbol"] = sym
+        updates.append({"t": "snapshot", "sym": sym, "f": f})
+    if len(known):
+        cur = snap.loc[known, list(SNAPSHOT_COLUMNS)]
+        old = prev.loc[known, list(SNAPSHOT_COLUMNS)]
+        changed = (cur.ne(old) & ~(cur.isna() & old.isna())).to_numpy()
+        rows = np.flatnonzero(changed.any(axis=1))
+        values = cur.to_numpy()
+        ts = snap.loc[known, "ts"].to_numpy()
+        for r in rows:
+            f = {SNAPSHOT_COLUMNS[c]: _wire(SNAPSHOT_COLUMNS[c], values[r, c]) for c in np.flatnonzero(changed[r])}
+            f["ts"] = int(ts[r])
+            updates.append({"t": "delta", "sym": known[r], "f": f})
+    return updates
+
+
+class BatchQuoteEngine:
+    """Fetch, snapshot and diff quotes for a whole watchlist per tick."""
+
+    def __init__(
+        self,
+        fetch_batch: Optional[BatchFetcher] = None,
+        fetch_single: Optional[Callable[[str], Dict[str, pd.DataFrame]]] = None,
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        history: int = 500,
+        snapshot_ttl: Optional[float] = None,
+    ):
+        self.fetch_batch = fetch_batch or _yfinance_batch
+        self.fetch_single = fetch_single or _yfinance_single
+        self.batch_size = batch_size or int(os.getenv("QUOTE_BATCH_SIZE", "200"))
+        self.max_workers = max_workers or int(os.getenv("QUOTE_FETCH_WORKERS", "8"))
+        self.snapshot_ttl = snapshot_ttl if snapshot_ttl is not None else float(os.getenv("QUOTE_SNAPSHOT_TTL", "900"))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="quote-fetch")
+        self._lock = threading.Lock()
+        self._last: Optional[pd.DataFrame] = None
+        self._ticks: deque = deque(maxlen=history)
+        self.errors = 0
+
+    def _fetch(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        chunks = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        parts: List[Dict[str, pd.DataFrame]] = []
+        for result in self._pool.map(self._safe_batch, chunks):
+            parts.append(result)
+        got = set()
+        for p in parts:
+            if "Close" in p:
+                got.update(p["Close"].columns[p["Close"].notna().any(axis=0)])
+        missing = [s for s in symbols if s not in got]
+        if missing:
+            parts.extend(self._pool.map(self._safe_single, missing))
+        panels: Dict[str, pd.DataFrame] = {}
+        for f in FIELDS:
+            frames = [p[f] for p in parts if f in p and not p[f].empty]
+            if frames:
+                merged = pd.concat(frames, axis=1)
+                panels[f] = merged.loc[:, ~merged.columns.duplicated()]
+        return panels
+
+    def _safe_batch(self, chunk: List[str]) -> Dict[str, pd.DataFrame]:
+        try:
+            return self.fetch_batch(chunk)
+        except Exception:
+            self._count_error()
+            return {}
+
+    def _safe_single(self, symbol: str) -> Dict[str, pd.DataFrame]:
+        try:
+            return self.fetch_single(symbol)
+        except Exception:
+            self._count_error()
+            return {}
+
+    def _count_error(self) -> None:
+        # Called from the fetch pool threads
+        with self._lock:
+            self.errors += 1
+
+    def tick(self, symbols: Iterable[str]) -> List[dict]:
+        syms = sorted({s for s in symbols if s})
+        t0 = time.perf_counter()
+        panels = self._fetch(syms) if syms else {}
+        t1 = time.perf_counter()
+        snap = compute_snapshots(panels)
+        with self._lock:
+            updates = compute_updates(self._last, snap)
+            if not snap.empty:
+                self._last = snap if self._last is None else pd.concat([self._last.drop(snap.index, errors="ignore"), snap])
+            if self._last is not None:
+                self._last = self._last[self._last["ts"] >= (time.time() - self.snapshot_ttl) * 1000]
+        t2 = time.perf_counter()
+        self._ticks.append({
+            "ts": time.time(),
+            "symbols": len(syms),
+            "quoted": int(len(snap)),
+            "updates": len(updates),
+            "fetch_ms": (t1 - t0) * 1000.0,
+            "compute_ms": (t2 - t1) * 1000.0,
+            "total_ms": (t2 - t0) * 1000.0,
+        })
+        return updates
+
+    def snapshot(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            if self._last is None or symbol not in self._last.index:
+                return None
+            row = self._last.loc[symbol]
+        out = {k: _wire(k, row[k]) for k in row.index}
+        out["symbol"] = symbol
+        return out
+
+    def metrics(self) -> dict:
+        ticks = list(self._ticks)
+        with self._lock:
+            errors = self.errors
+            tracked = 0 if self._last is None else len(self._last)
+        out = {"ticks": len(ticks), "errors": errors, "snapshots": tracked, "batch_size": self.batch_size,
+               "max_workers": self.max_workers}
+        if not ticks:
+            return out
+        for name in ("fetch_ms", "compute_ms", "total_ms"):
+            arr = np.array([t[name] for t in ticks], dtype=float)
+            out[name] = {
+                "last": round(float(arr[-1]), 2),
+                "p50": round(float(np.percentile(arr, 50)), 2),
+                "p95": round(float(np.percentile(arr, 95)), 2),
+                "max": round(float(arr.max()), 2),
+            }
+        out["last_tick"] = {k: ticks[-1][k] for k in ("ts", "symbols", "quoted", "updates")}
+        return out
+
+
+_instance: Optional[BatchQuoteEngine] = None
+_instance_lock = threading.Lock()
+
+
+def get_quote_engine() -> BatchQuoteEngine:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = BatchQuoteEngine()
+    return _instance
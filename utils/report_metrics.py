@@ -0,0 +1,131 @@
+"""
+Typed report scores and the additive counters behind the analyst / platform metrics rollups.
+
+A report's analysis JSON is parsed once, when the report is written: `extract_scores` pulls the
+numbers dashboards need into flat typed values (report_score row), and `rollup_delta` turns an
+(old, new) pair of those rows into increments for the per-analyst and platform rollup rows.
+Every rollup field is a plain sum or count, so an insert, re-analysis or delete is one UPDATE of
+two rows and averages are derived at read time (sum / count).
+
+Usage:
+    scores = extract_scores(report.analysis_result)          # {'quality': 0.82, 'factual_accuracy': ...}
+    delta = rollup_delta(old_scores, new_scores)             # {'report_count': 0, 'quality_sum': 0.07, ...}
+    averages(rollup_row)                                     # {'quality': 0.79, 'factual_accuracy': ...}
+    add_to_rollups(rollups, score_row)                       # backfill: accumulate rows in memory
+"""
+from __future__ import annotations
+import json
+import math
+from typing import Any, Dict, Mapping, Optional
+
+PLATFORM_KEY = '__platform__'  # rollup row aggregating every analyst
+METRICS = ('factual_accuracy', 'predictive_power', 'bias_score', 'originality', 'risk_disclosure', 'transparency')
+SCORE_FIELDS = ('quality',) + METRICS + ('sebi_compliance', 'alert_count', 'ai_probability', 'plagiarism_score')
+
+# Rollup counters: (column, score field, kind). 'sum' adds the value when present, 'n' counts presence.
+# Counts ('n', report_count) are integers, sums floats.
+ROLLUP_COUNTERS = (
+    [('quality_sum', 'quality', 'sum'), ('scored_count', 'quality', 'n')]
+    + [(f'{m}_sum', m, 'sum') for m in METRICS]
+    + [(f'{m}_n', m, 'n') for m in METRICS]
+    + [('sebi_sum', 'sebi_compliance', 'sum'), ('sebi_n', 'sebi_compliance', 'n'),
+       ('alert_sum', 'alert_count', 'sum'),
+       ('ai_probability_sum', 'ai_probability', 'sum'), ('plagiarism_sum', 'plagiarism_score', 'sum')]
+)
+ROLLUP_COLUMNS = ('report_count',) + tuple(c for c, _, _ in ROLLUP_COUNTERS)
+
+
+def _num(value: Any) -> Optional[float]:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+def extract_scores(analysis: Any) -> Dict[str, Optional[float]]:
+    """Typed score values from an analysis_result (JSON string or dict); missing values are None.
+
+    quality is None unless composite_quality_score is truthy, matching how dashboards always
+    counted "scored" reports."""
+    if isinstance(analysis, (str, bytes)):
+        try:
+            analysis = json.loads(analysis)
+        except ValueError:
+            analysis = None
+    if not isinstance(analysis, Mapping):
+        analysis = {}
+    scores = analysis.get('scores') if isinstance(analysis.get('scores'), Mapping) else {}
+    out: Dict[str, Optional[float]] = {'quality': _num(analysis.get('composite_quality_score')) or None}
+    for m in METRICS:
+        out[m] = _num(scores.get(m))
+    sebi = analysis.get('sebi_compliance_detailed')
+    out['sebi_compliance'] = _num(sebi.get('overall_compliance_score')) if isinstance(sebi, Mapping) else None
+    alerts = analysis.get('flagged_alerts')
+    if isinstance(alerts, Mapping):
+        total = _num(alerts.get('total_alerts'))
+        if total is None and isinstance(alerts.get('alerts'), list):
+            total = float(len(alerts['alerts']))
+        out['alert_count'] = total
+    else:
+        out['alert_count'] = None
+    return out
+
+
+def _contribution(scores: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    out: Dict[str, float] = {'report_count': 0 if scores is None else 1}
+    for column, field, kind in ROLLUP_COUNTERS:
+        v = None if scores is None else scores.get(field)
+        if kind == 'sum':
+            out[column] = 0.0 if v is None else float(v)
+        else:
+            out[column] = 0 if v is None else 1
+    return out
+
+
+def rollup_delta(old: Optional[Mapping[str, Any]], new: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    """Counter increments that turn a rollup containing `old` into one containing `new` (None = absent)."""
+    a, b = _contribution(old), _contribution(new)
+    return {c: b[c] - a[c] for c in ROLLUP_COLUMNS}
+
+
+def add_to_rollups(rollups: Dict[str, Dict[str, Any]], row: Mapping[str, Any]) -> None:
+    """Add one report_score row to in-memory rollup rows (its analyst's and the platform row)."""
+    c = _contribution(row)
+    quality = row.get('quality')
+    for key in (row.get('analyst') or '', PLATFORM_KEY):
+        acc = rollups.get(key)
+        if acc is None:
+            acc = rollups[key] = dict({col: 0 for col in ROLLUP_COLUMNS}, analyst=key, best_report_id=None, best_quality=None)
+        for col in ROLLUP_COLUMNS:
+            acc[col] += c[col]
+        if quality is not None and (acc['best_quality'] is None or quality > acc['best_quality']):
+            acc['best_report_id'], acc['best_quality'] = row.get('report_id'), quality
+
+
+def averages(row: Any) -> Dict[str, float]:
+    """Per-field means of a rollup row (mapping or object with rollup columns); 0 when nothing counted."""
+    get = row.get if isinstance(row, Mapping) else (lambda k, d=None: getattr(row, k, d))
+
+    def mean(total, n):
+        total, n = get(total) or 0.0, get(n) or 0
+        return total / n if n else 0.0
+
+    out = {'quality': mean('quality_sum', 'scored_count'), 'sebi_compliance': mean('sebi_sum', 'sebi_n'),
+           'ai_probability': mean('ai_probability_sum', 'report_count'),
+           'plagiarism_score': mean('plagiarism_sum', 'report_count')}
+    for m in METRICS:
+        out[m] = mean(f'{m}_sum', f'{m}_n')
+    return out
+
+
+def quality_trend(recent, oldest, threshold: float = 0.05) -> str:
+    """'Improving' / 'Declining' / 'Stable' comparing the newest scores with the oldest ones."""
+    if len(recent) < 3:
+        return 'Insufficient Data'
+    r, o = sum(recent) / len(recent), sum(oldest) / len(oldest)
+    if r > o + threshold:
+        return 'Improving'
+    if r < o - threshold:
+        return 'Declining'
+    return 'Stable'
@@ -0,0 +1,288 @@
+"""
+Pool of pre-started sandbox interpreters for published model runs.
+
+Each worker is an isolated `python -I utils/sandbox_worker.py` process that has already imported
+the heavy libraries models use (SANDBOX_PRELOAD, default numpy/pandas/sklearn/yfinance). A run
+sends one JSON request over stdin, the worker loads `artifact_path` plus its `extensions_<id>.py`
+override, calls the function and answers on its protocol pipe. Runs therefore skip interpreter
+start-up and library imports, which happened while the worker sat idle.
+
+Isolation and limits:
+    - single use: published models are untrusted, so a worker serves exactly one run and is then
+      killed; module globals, monkey-patches, files left open or stderr never carry over to the
+      next model or user;
+    - per-run timeout and cancellation: the worker is killed when either fires;
+    - memory: RLIMIT_AS of SANDBOX_MEMORY_MB per worker, applied after preloading.
+
+Up to `size` interpreters are kept (idle or busy); every finished worker is replaced in the
+background so the next run finds a warm one.
+
+Usage:
+    from utils.sandbox_pool import get_sandbox_pool
+    out = get_sandbox_pool().run({"artifact": path, "ext_path": ext, "function": "predict",
+                                  "args": [], "kwargs": {}, "inputs": {}, "cwd": dirpath},
+                                 timeout=60, should_cancel=None)
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+import numpy as np
+
+try:
+    from utils.job_queue import JobCancelled
+except ImportError:
+    from job_queue import JobCancelled
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+DEFAULT_PRELOAD = "numpy,pandas,sklearn,yfinance"
+
+
+class SandboxError(RuntimeError):
+    """The sandbox process died or answered with something other than a result."""
+
+
+class SandboxWorker:
+    def __init__(self, python: str, preload: str, memory_mb: int, startup_timeout: float):
+        env = dict(os.environ)
+        env.update({"SANDBOX_PRELOAD": preload, "SANDBOX_MEMORY_MB": str(memory_mb),
+                    "OPENBLAS_NUM_THREADS": env.get("OPENBLAS_NUM_THREADS", "1"),
+                    "OMP_NUM_THREADS": env.get("OMP_NUM_THREADS", "1")})
+        self.proc = subprocess.Popen(
+            [python, "-I", WORKER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, bufsize=1, env=env,
+        )
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stderr: deque = deque(maxlen=50)
+        threading.Thread(target=self._pump, args=(self.proc.stdout, self._lines), daemon=True).start()
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+        hello = self._read(startup_timeout, None)
+        if not hello.get("ready"):
+            self.kill()
+            raise SandboxError("sandbox worker failed to start")
+        self.startup_ms = hello.get("startup_ms")
+        self.preloaded = hello.get("preloaded") or []
+
+    @staticmethod
+    def _pump(stream, out: "queue.Queue"):
+        for line in stream:
+            out.put(line)
+        out.put(None)
+
+    def _drain_stderr(self):
+        for line in self.proc.stderr:
+            self._stderr.append(line.rstrip("\n"))
+
+    def _read(self, timeout: float, should_cancel: Optional[Callable[[], bool]], poll: float = 0.25) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, min(poll, deadline - time.monotonic())))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    self.kill()
+                    raise subprocess.TimeoutExpired("sandbox", timeout)
+                if should_cancel is not None and should_cancel():
+                    self.kill()
+                    raise JobCancelled()
+                continue
+            if line is None:
+                self.kill()
+                raise SandboxError(f"sandbox worker exited (rc={self.proc.returncode})")
+            try:
+                return json.loads(line)
+            except ValueError:
+                self.kill()
+                raise SandboxError("malformed sandbox output")
+
+    def run(self, request: dict, timeout: float, should_cancel=None) -> dict:
+        self._stderr.clear()  # the tail reported with a failure belongs to this request only
+        try:
+            self.proc.stdin.write(json.dumps(request) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.kill()
+            raise SandboxError(f"sandbox worker unavailable: {e}")
+        return self._read(timeout, should_cancel)
+
+    def stderr_tail(self, n: int = 20, wait: float = 0.0) -> str:
+        """Last n stderr lines; `wait` lets the drain thread catch up after the process was killed."""
+        if wait > 0:
+            self._stderr_thread.join(wait)
+        return "\n".join(list(self._stderr)[-n:])
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        try:
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class SandboxPool:
+    def __init__(self, size: Optional[int] = None, memory_mb: Optional[int] = None,
+                 preload: Optional[str] = None, python: Optional[str] = None, startup_timeout: float = 120.0,
+                 history: int = 500):
+        self.size = size if size is not None else int(os.getenv("SANDBOX_POOL_SIZE", "2"))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv("SANDBOX_MEMORY_MB", "2048"))
+        self.preload = preload if preload is not None else os.getenv("SANDBOX_PRELOAD", DEFAULT_PRELOAD)
+        self.python = python or sys.executable
+        self.startup_timeout = startup_timeout
+        self._idle: List[SandboxWorker] = []
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._spawning = 0
+        self._busy = 0
+        self._runs: deque = deque(maxlen=history)
+        self.counters = {"spawned": 0, "warm_runs": 0, "cold_runs": 0, "recycled": 0,
+                         "timeouts": 0, "cancelled": 0, "crashes": 0, "spawn_errors": 0}
+
+    # ----- worker lifecycle -----
+    def _spawn(self) -> SandboxWorker:
+        try:
+            w = SandboxWorker(self.python, self.preload, self.memory_mb, self.startup_timeout)
+        except Exception:
+            with self._lock:
+                self.counters["spawn_errors"] += 1
+            raise
+        with self._lock:
+            self.counters["spawned"] += 1
+        return w
+
+    def _refill(self):
+        try:
+            w = self._spawn()
+        except Exception:
+            w = None
+        with self._cond:
+            self._spawning -= 1
+            if w is not None and len(self._idle) < self.size:
+                self._idle.append(w)
+                w = None
+            self._cond.notify()
+        if w is not None:
+            w.kill()
+
+    def _start_refills_locked(self) -> int:
+        missing = max(0, self.size - len(self._idle) - self._spawning)
+        self._spawning += missing
+        return missing
+
+    def warm(self) -> "SandboxPool":
+        """Top the pool up to `size` interpreters in the background."""
+        with self._lock:
+            missing = self._start_refills_locked()
+        for _ in range(missing):
+            threading.Thread(target=self._refill, daemon=True).start()
+        return self
+
+    def _acquire(self):
+        """Take an idle worker, waiting for an in-flight warm-up rather than cold-starting another.
+        Returns (worker, warm) where warm means it was already idle when asked for."""
+        w, waited = None, False
+        deadline = time.monotonic() + self.startup_timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    cand = self._idle.pop()
+                    if cand.alive:
+                        w = cand
+                        break
+                    self.counters["crashes"] += 1
+                if w is not None or self._spawning == 0 or time.monotonic() >= deadline:
+                    break
+                waited = True
+                self._cond.wait(max(0.0, deadline - time.monotonic()))
+            self._busy += 1
+        if w is not None:
+            return w, not waited
+        try:
+            return self._spawn(), False
+        except Exception:
+            with self._lock:
+                self._busy -= 1
+            raise
+
+    def _release(self, w: SandboxWorker):
+        with self._cond:
+            self._busy -= 1
+            self.counters["recycled"] += 1
+        w.kill()
+
+    # ----- public API -----
+    def run(self, request: dict, timeout: float, should_cancel: Optional[Callable[[], bool]] = None) -> dict:
+        """Execute one request; raises subprocess.TimeoutExpired, JobCancelled or SandboxError."""
+        t0 = time.perf_counter()
+        w, warm = self._acquire()
+        self.warm()  # start this worker's replacement while it runs
+        try:
+            out = w.run(request, timeout, should_cancel)
+            if not out.get("ok"):
+                w.kill()  # closes the pipe so the tail below holds everything this run wrote
+                tail = w.stderr_tail(wait=1.0)
+                if tail:
+                    out.setdefault("stderr", tail[-800:])
+            return out
+        except subprocess.TimeoutExpired:
+            with self._lock:
+                self.counters["timeouts"] += 1
+            raise
+        except JobCancelled:
+            with self._lock:
+                self.counters["cancelled"] += 1
+            raise
+        except SandboxError:
+            with self._lock:
+                self.counters["crashes"] += 1
+            raise
+        finally:
+            self._release(w)
+            with self._lock:
+                self.counters["warm_runs" if warm else "cold_runs"] += 1
+            self._runs.append({"ms": (time.perf_counter() - t0) * 1000.0, "warm": warm})
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for w in idle:
+            w.kill()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {"size": self.size, "idle": len(self._idle), "busy": self._busy, "spawning": self._spawning,
+                   "memory_mb": self.memory_mb, **self.counters}
+        runs = list(self._runs)
+        for label, sel in (("warm_ms", True), ("cold_ms", False)):
+            arr = np.array([r["ms"] for r in runs if r["warm"] is sel], dtype=float)
+            if arr.size:
+                out[label] = {"p50": round(float(np.percentile(arr, 50)), 2),
+                              "p95": round(float(np.percentile(arr, 95)), 2),
+                              "max": round(float(arr.max()), 2)}
+        return out
+
+
+_instance: Optional[SandboxPool] = None
+_instance_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = SandboxPool().warm()
+    return _instance
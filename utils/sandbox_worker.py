@@ -0,0 +1,104 @@
+"""
+Long-lived sandbox process for published model runs (driven by utils.sandbox_pool).
+
+Started as `python -I sandbox_worker.py`; stdlib only at import time. It preloads the heavy
+libraries listed in SANDBOX_PRELOAD, applies the address-space limit, then serves one JSON request
+per stdin line and answers on a private copy of the original stdout. File descriptor 1 is pointed
+at stderr so prints from model code (or C extensions) cannot corrupt the protocol.
+
+Request:  {"artifact", "ext_path", "function", "args", "kwargs", "inputs", "cwd"}
+Response: {"ok": true, "result": repr(result)[:5000]} | {"ok": false, "error", "trace"}
+"""
+import builtins
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import traceback
+
+
+def _preload():
+    loaded = []
+    for name in filter(None, (os.environ.get("SANDBOX_PRELOAD") or "").split(",")):
+        try:
+            importlib.import_module(name.strip())
+            loaded.append(name.strip())
+        except Exception:
+            pass
+    return loaded
+
+
+def _limit_memory():
+    mb = int(os.environ.get("SANDBOX_MEMORY_MB") or 0)
+    if mb <= 0:
+        return
+    try:
+        import resource
+        limit = mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except Exception:
+        pass
+
+
+def _run(req):
+    artifact = req["artifact"]
+    ext_path = req.get("ext_path")
+    if req.get("cwd"):
+        os.chdir(req["cwd"])
+    # Like `python model.py`: helpers shipped next to the artifact (history_source.py) are importable
+    sys.path.insert(0, os.path.dirname(os.path.abspath(artifact)))
+    spec = importlib.util.spec_from_file_location("artifact_mod", artifact)
+    mod = importlib.util.module_from_spec(spec)
+    original_input = builtins.input
+    try:
+        spec.loader.exec_module(mod)  # type: ignore
+        # Load extension overrides if present
+        if ext_path and os.path.exists(ext_path):
+            try:
+                with open(ext_path, "r", encoding="utf-8") as _f:
+                    code = _f.read()
+                exec(compile(code, ext_path, "exec"), mod.__dict__)
+            except Exception as _e:
+                print("EXTENSION_LOAD_ERROR", _e, file=sys.stderr)
+        # input() shim using the provided prompt->value mapping to avoid blocking
+        inputs_map = req.get("inputs") or {}
+        builtins.input = lambda prompt="": str(inputs_map.get(prompt, ""))
+        fn = getattr(mod, req["function"], None)
+        if not callable(fn):
+            raise AttributeError("callable missing")
+        result = fn(*(req.get("args") or []), **(req.get("kwargs") or {}))
+        return {"ok": True, "result": repr(result)[:5000]}
+    except BaseException as e:  # SystemExit from model code must not kill the protocol loop
+        return {"ok": False, "error": str(e) or type(e).__name__, "trace": traceback.format_exc()[-4000:]}
+    finally:
+        builtins.input = original_input
+        sys.stdout.flush()
+
+
+def main():
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    t0 = time.perf_counter()
+    loaded = _preload()
+    _limit_memory()
+    proto.write(json.dumps({"ready": True, "pid": os.getpid(), "preloaded": loaded,
+                            "startup_ms": round((time.perf_counter() - t0) * 1000.0, 1)}) + "\n")
+    proto.flush()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            req = json.loads(line)
+        except Exception:
+            out = {"ok": False, "error": "malformed request"}
+        else:
+            out = _run(req)
+        proto.write(json.dumps(out) + "\n")
+        proto.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Stable, incrementally maintained TF-IDF vocabulary for plagiarism embeddings.
+
+Term indices are append-only, so a term keeps its column for the lifetime of the vocabulary and
+every embedding lives in the same vector space. Document frequencies are updated per report as it
+arrives; the IDF table used for weighting is frozen per *version* and only re-cut when the corpus
+has drifted (document count grown by `drift`, or that many new terms), so embeddings produced under
+one version are directly comparable. Terms added after the cut are weighted as the rarest term
+of that version until the next cut.
+
+The app keeps the counts in the database (one row per term) and only loads frozen snapshots built
+with `TfidfVocabulary.frozen()`; those embed with the terms known at the cut.
+
+Embeddings are compact sparse float32 blobs tagged with the version:
+    b"TFv2" | uint32 version | uint32 nnz | int32[nnz] indices | float32[nnz] values (L2-normalised)
+
+Usage:
+    vocab = TfidfVocabulary()
+    vocab.add_document(text)            # True when a new IDF version was cut
+    snapshot = TfidfVocabulary.frozen([(term_id, term, df), ...], n_docs, version)
+    blob = vocab.embed(text)
+    TfidfVocabulary.cosine(blob, other_blob)
+    TfidfVocabulary.blob_version(blob)  # None for legacy dense embeddings
+"""
+from __future__ import annotations
+import json
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+except Exception:
+    ENGLISH_STOP_WORDS = frozenset()
+
+MAGIC = b"TFv2"
+_HEADER = struct.Struct("<4sII")
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")  # same token pattern as TfidfVectorizer
+MAX_TERM_LENGTH = 64  # longer tokens are noise (hashes, URLs) and would not fit the term column
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower())
+            if t not in ENGLISH_STOP_WORDS and len(t) <= MAX_TERM_LENGTH]
+
+
+def document_terms(text: str) -> List[str]:
+    """Distinct terms of one document, sorted (the unit a document frequency counts)."""
+    return sorted(set(tokenize(text)))
+
+
+class TfidfVocabulary:
+    def __init__(self, max_terms: int = 50000, drift: float = 0.25, min_docs_per_version: int = 10):
+        self.max_terms = max_terms
+        self.drift = drift
+        self.min_docs_per_version = min_docs_per_version
+        self.terms: Dict[str, int] = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        self.version = 0
+        self.idf = np.zeros(0, dtype=np.float32)  # frozen for `version`
+        self.n_docs_at_version = 0
+        self.n_terms_at_version = 0
+
+    # ----- learning -----
+    def add_document(self, text: str, allow_cut: bool = True) -> bool:
+        """Count one document's terms; returns True if this cut a new IDF version."""
+        uniq = document_terms(text)
+        if not uniq:
+            return False
+        new = [t for t in uniq if t not in self.terms]
+        room = max(0, self.max_terms - len(self.terms))
+        for t in new[:room]:
+            self.terms[t] = len(self.terms)
+        if len(self.terms) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(len(self.terms) - len(self.df), dtype=np.int64)])
+        idx = [self.terms[t] for t in uniq if t in self.terms]
+        self.df[idx] += 1
+        self.n_docs += 1
+        if allow_cut and self.needs_new_version():
+            self.cut_version()
+            return True
+        return False
+
+    def needs_new_version(self) -> bool:
+        return self.drifted(self.n_docs, len(self.terms))
+
+    def drifted(self, n_docs: int, n_terms: int) -> bool:
+        """True if a corpus of n_docs documents / n_terms terms has moved far enough from this version."""
+        if self.version == 0:
+            return n_docs > 0
+        grown = n_docs - self.n_docs_at_version
+        if grown < self.min_docs_per_version:
+            return False
+        new_terms = n_terms - self.n_terms_at_version
+        return (grown >= self.drift * max(1, self.n_docs_at_version)
+                or new_terms >= self.drift * max(1, self.n_terms_at_version))
+
+    def cut_version(self) -> None:
+        n = self.n_docs
+        self.idf = (np.log((1.0 + n) / (1.0 + self.df)) + 1.0).astype(np.float32)  # smooth_idf, as sklearn
+        self.n_docs_at_version = n
+        self.n_terms_at_version = len(self.terms)
+        self.version += 1
+
+    @classmethod
+    def frozen(cls, rows: Iterable[Tuple[int, str, int]], n_docs: int, version: int, **kwargs) -> "TfidfVocabulary":
+        """Snapshot of `version` cut from persisted (term index, term, df) rows."""
+        v = cls(**kwargs)
+        rows = list(rows)
+        v.terms = {term: int(i) for i, term, _ in rows}
+        v.df = np.zeros(max(v.terms.values(), default=-1) + 1, dtype=np.int64)
+        for i, _, df in rows:
+            v.df[int(i)] = int(df or 0)
+        v.n_docs = int(n_docs)
+        v.cut_version()
+        v.version = int(version)
+        return v
+
+    # ----- embedding -----
+    def _weights(self, idx: np.ndarray) -> np.ndarray:
+        rare = np.float32(np.log(1.0 + self.n_docs_at_version) + 1.0)
+        out = np.full(len(idx), rare, dtype=np.float32)
+        known = idx < len(self.idf)
+        out[known] = self.idf[idx[known]]
+        return out
+
+    def embed(self, text: str) -> bytes:
+        counts = Counter(t for t in tokenize(text) if t in self.terms)
+        if not counts:
+            return _HEADER.pack(MAGIC, self.version, 0)
+        idx = np.fromiter((self.terms[t] for t in counts), dtype=np.int32, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        vals = tf * self._weights(idx)
+        order = np.argsort(idx)
+        idx, vals = idx[order], vals[order]
+        norm = float(np.linalg.norm(vals))
+        if norm > 0:
+            vals = vals / norm
+        return _HEADER.pack(MAGIC, self.version, len(idx)) + idx.tobytes() + vals.astype(np.float32).tobytes()
+
+    # ----- blob helpers -----
+    @staticmethod
+    def decode(blob: Optional[bytes]) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+        if not blob or len(blob) < _HEADER.size or bytes(blob[:4]) != MAGIC:
+            return None
+        _, version, nnz = _HEADER.unpack_from(blob)
+        off = _HEADER.size
+        idx = np.frombuffer(blob, dtype=np.int32, count=nnz, offset=off)
+        vals = np.frombuffer(blob, dtype=np.float32, count=nnz, offset=off + 4 * nnz)
+        return version, idx, vals
+
+    @staticmethod
+    def blob_version(blob: Optional[bytes]) -> Optional[int]:
+        if not blob or len(blob) < _HEADER.size or bytes(blob[:4]) != MAGIC:
+            return None
+        return _HEADER.unpack_from(blob)[1]
+
+    @classmethod
+    def cosine(cls, blob1: bytes, blob2: bytes) -> float:
+        a, b = cls.decode(blob1), cls.decode(blob2)
+        if a is None or b is None:
+            return 0.0
+        _, i1, v1 = a
+        _, i2, v2 = b
+        _, p1, p2 = np.intersect1d(i1, i2, assume_unique=True, return_indices=True)
+        if not len(p1):
+            return 0.0
+        return float(np.clip(np.dot(v1[p1], v2[p2]), 0.0, 1.0))
+
+    # ----- persistence -----
+    def to_payload(self) -> bytes:
+        terms = [None] * len(self.df)  # indices may be sparse (database ids)
+        for t, i in self.terms.items():
+            terms[i] = t
+        data = {
+            "terms": terms,
+            "df": self.df.tolist(),
+            "n_docs": self.n_docs,
+            "version": self.version,
+            "idf": self.idf.tolist(),
+            "n_docs_at_version": self.n_docs_at_version,
+            "n_terms_at_version": self.n_terms_at_version,
+            "max_terms": self.max_terms,
+        }
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_payload(cls, payload: bytes, **kwargs) -> "TfidfVocabulary":
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        v = cls(max_terms=data.get("max_terms", 50000), **kwargs)
+        v.terms = {t: i for i, t in enumerate(data["terms"]) if t is not None}
+        v.df = np.asarray(data["df"], dtype=np.int64)
+        v.n_docs = int(data["n_docs"])
+        v.version = int(data["version"])
+        v.idf = np.asarray(data["idf"], dtype=np.float32)
+        v.n_docs_at_version = int(data["n_docs_at_version"])
+        v.n_terms_at_version = int(data.get("n_terms_at_version", len(v.idf)))
+        return v
@@ -1,48 +1,29 @@
-import time
-import threading
 import yfinance as yf
-from typing import Any, Dict, Tuple, Optional, List
+from typing import List
 
-# Simple in-process TTL cache for yfinance calls to cut API usage 5–20x.
-# Not persistent across restarts; thread-safe enough for simple Flask app.
+try:
+    from utils.ohlcv_cache import get_ohlcv_cache
+    from utils.history_store import get_history
+except ImportError:  # imported as a sibling module
+    from ohlcv_cache import get_ohlcv_cache  # type: ignore
+    from history_store import get_history  # type: ignore
 
-_lock = threading.Lock()
-_store: Dict[str, Tuple[float, Any]] = {}
-
-def _get(key: str) -> Optional[Any]:
-    now = time.time()
-    with _lock:
-        item = _store.get(key)
-        if not item:
-            return None
-        exp, val = item
-        if now > exp:
-            _store.pop(key, None)
-            return None
-        return val
-
-def _set(key: str, val: Any, ttl: int):
-    with _lock:
-        _store[key] = (time.time() + max(1, int(ttl)), val)
+# yfinance helpers backed by the shared tiered OHLCV cache (memory LRU -> disk -> provider).
+# The disk tier is shared by every worker on the host, so repeated 2y pulls hit the network once.
 
 # High-level helpers
 
 def ticker_history(symbol: str, period: str = '6mo', ttl: int = 900):
-    key = f"hist::{symbol}::{period}"
-    cached = _get(key)
-    if cached is not None:
-        return cached
-    data = yf.Ticker(symbol).history(period=period)
-    _set(key, data, ttl)
-    return data
+    # Served from the incremental history store: after the first pull only new bars are fetched,
+    # at most once per `ttl` seconds.
+    return get_history(symbol, period=period, refresh=ttl)
 
 def download(symbols: List[str] | str, start=None, end=None, ttl: int = 900):
     # Normalize symbols list for key stability
     syms = symbols if isinstance(symbols, list) else [symbols]
-    key = f"dl::{','.join(sorted(syms))}::{start}::{end}"
-    cached = _get(key)
-    if cached is not None:
-        return cached
-    data = yf.download(symbols, start=start, end=end)
-    _set(key, data, ttl)
-    return data
+    return get_ohlcv_cache().get_or_fetch(
+        ','.join(sorted(syms)), '1d', f"s={start}_e={end}",
+        lambda: yf.download(symbols, start=start, end=end),
+        ttl=ttl,
+        source='yfinance_dl',
+    )
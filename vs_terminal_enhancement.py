@@ -25,6 +25,12 @@ from scipy.stats import norm
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from utils.history_store import get_history as stored_history
+    HISTORY_STORE_AVAILABLE = True
+except ImportError:
+    HISTORY_STORE_AVAILABLE = False
+
 class VSTerminalEnhancer:
     """Enhanced data fetching and processing for VS Terminal tabs"""
     
@@ -470,8 +476,10 @@ class VSTerminalEnhancer:
         
         for symbol in symbols:
             try:
-                ticker = yf.Ticker(f"{symbol}.NS")
-                data = ticker.history(period=period)
+                if HISTORY_STORE_AVAILABLE:
+                    data = stored_history(f"{symbol}.NS", period=period)
+                else:
+                    data = yf.Ticker(f"{symbol}.NS").history(period=period)
                 historical_data[symbol] = data
             except Exception as e:
                 self.logger.warning(f"Error fetching historical data for {symbol}: {e}")